@@ -0,0 +1,310 @@
+"""
+HTTP API server for the generators
+
+Serves blog outlines, social media calendars and writing prompts as JSON to
+other services, without Streamlit. Built on the standard library HTTP server
+and loads the generators on first use, so it starts instantly.
+
+Endpoints (<type> is blog, social or writing):
+    GET  /health                    Liveness check
+    GET  /generators                Generator names and their input schemas
+    GET  /metrics                   Usage counters shared by every process on the host
+    POST /generate/<type>           Generate and return the result
+    POST /generate/<type>/stream    Server-sent events: "chunk" events, then "result" (or "error")
+    POST /jobs/<type>               Queue a generation; returns 202 with the job id
+    GET  /jobs/<id>                 Job status, and the result once it is done
+
+Request bodies are JSON objects with the generator's parameters, e.g.
+{"topic": "Rust ownership", "audience": "beginners"}. At most
+API_MAX_CONCURRENT generations run at once; sync and streaming requests
+beyond that get 429, as do job submissions once API_MAX_QUEUED_JOBS wait.
+With JOB_QUEUE_ENABLED, jobs go to the durable job queue and are run by
+worker processes (worker.py) instead of this server.
+
+Usage:
+    python api_server.py [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from config import settings
+from utils.job_manager import JobManager, JobQueueFull
+from utils.logger import setup_logger
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Set up logger
+logger = setup_logger(__name__)
+
+MAX_BODY_BYTES = 1_000_000
+
+# Seconds a client should wait before retrying a 429
+RETRY_AFTER_SECONDS = 5
+
+
+class RequestError(Exception):
+    """A request the server rejects with a given HTTP status"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def prepare_request(kind: str, body: dict) -> dict:
+    """
+    Validate a request body and turn it into generator arguments
+
+    Raises:
+        RequestError: 404 for an unknown generator, 422 for invalid inputs
+    """
+    from generators.registry import GENERATORS, build_params
+
+    if kind not in GENERATORS:
+        raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown generator '{kind}'")
+    try:
+        params = build_params(kind, body)
+    except ValueError as e:
+        raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+    # Always set, so every request gets its own client instead of sharing the default one
+    params.setdefault("temperature", settings.TEMPERATURE)
+    return params
+
+
+def result_json(result) -> dict:
+    """JSON body of a generator result"""
+    from generators.registry import dump_result
+
+    return dump_result(result)
+
+
+class GeneratorServer(ThreadingHTTPServer):
+    """HTTP server holding the concurrency limit and the job table"""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], max_concurrent: Optional[int] = None,
+                 max_queued_jobs: Optional[int] = None, job_ttl: Optional[float] = None):
+        """
+        Args:
+            address: (host, port) to listen on (port 0 picks a free one)
+            max_concurrent: Generations at once (defaults to API_MAX_CONCURRENT)
+            max_queued_jobs: Jobs allowed to wait for a slot (defaults to API_MAX_QUEUED_JOBS)
+            job_ttl: Seconds finished jobs stay available (defaults to API_JOB_TTL_SECONDS)
+        """
+        super().__init__(address, ApiHandler)
+        self.max_concurrent = max(1, max_concurrent or settings.API_MAX_CONCURRENT)
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.jobs = JobManager(
+            max_workers=self.max_concurrent,
+            max_queued=max_queued_jobs if max_queued_jobs is not None else settings.API_MAX_QUEUED_JOBS,
+            ttl=job_ttl if job_ttl is not None else settings.API_JOB_TTL_SECONDS,
+            name="api-job",
+        )
+        # Jobs run by separate worker processes, when the durable queue is enabled
+        self.queue = None
+        if settings.JOB_QUEUE_ENABLED:
+            from utils.job_queue import get_job_queue
+            self.queue = get_job_queue()
+
+    def server_close(self):
+        super().server_close()
+        self.jobs.shutdown()
+
+    def run_generation(self, kind: str, params: dict, wait: bool = False):
+        """
+        Run a generator within the concurrency limit
+
+        Args:
+            wait: Wait for a free slot instead of failing (used by jobs)
+
+        Raises:
+            RequestError: 429 if no slot is free, 422 if the generator rejects
+                the inputs, 502 if generation fails
+        """
+        from generators.registry import run_generator
+
+        if not self.slots.acquire(blocking=wait):
+            raise RequestError(HTTPStatus.TOO_MANY_REQUESTS, "All generation slots are busy, retry shortly")
+        try:
+            return run_generator(kind, params, owner="api")
+        except ValueError as e:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+        except Exception as e:
+            raise RequestError(HTTPStatus.BAD_GATEWAY, str(e))
+        finally:
+            self.slots.release()
+
+    def submit_job(self, kind: str, params: dict):
+        """
+        Queue a generation
+
+        Returns:
+            The queued Job
+
+        Raises:
+            RequestError: 429 if too many jobs are waiting
+        """
+        try:
+            if self.queue is not None:
+                return self.queue.enqueue(kind, params, max_queued=self.jobs.max_queued)
+            return self.jobs.submit(lambda on_chunk: result_json(self.run_generation(kind, params, wait=True)), kind)
+        except JobQueueFull as e:
+            raise RequestError(HTTPStatus.TOO_MANY_REQUESTS, str(e))
+
+    def job_view(self, job_id: str) -> dict:
+        """
+        Public view of a job
+
+        Raises:
+            RequestError: 404 if the job is unknown or has expired
+        """
+        job = self.jobs.get(job_id) or (self.queue.get(job_id) if self.queue is not None else None)
+        if job is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown or expired job '{job_id}'")
+        return job.to_dict()
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Routes API requests"""
+
+    server: GeneratorServer
+    server_version = "ContentGeneratorAPI/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def send_json(self, status: HTTPStatus, body: dict, headers: Optional[dict] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, error: RequestError):
+        headers = {"Retry-After": str(RETRY_AFTER_SECONDS)} if error.status == HTTPStatus.TOO_MANY_REQUESTS else None
+        self.send_json(error.status, {"error": str(error)}, headers)
+
+    def read_body(self) -> dict:
+        """
+        Parsed JSON object of the request body
+
+        Raises:
+            RequestError: 413 if it is too large, 400 if it is not a JSON object
+        """
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+        return body
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        try:
+            if parts == ["health"]:
+                self.send_json(HTTPStatus.OK, {"status": "ok"})
+            elif parts == ["metrics"]:
+                from utils.shared_store import get_shared_store
+                self.send_json(HTTPStatus.OK, get_shared_store().counters())
+            elif parts == ["generators"]:
+                from generators.registry import GENERATORS
+                self.send_json(HTTPStatus.OK, {kind: generator["input_model"].model_json_schema()
+                                               for kind, generator in GENERATORS.items()})
+            elif len(parts) == 2 and parts[0] == "jobs":
+                self.send_json(HTTPStatus.OK, self.server.job_view(parts[1]))
+            else:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"No route for GET {self.path}")
+        except RequestError as e:
+            self.send_error_json(e)
+
+    def do_POST(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        try:
+            if len(parts) == 2 and parts[0] == "generate":
+                params = prepare_request(parts[1], self.read_body())
+                self.send_json(HTTPStatus.OK, result_json(self.server.run_generation(parts[1], params)))
+            elif len(parts) == 3 and parts[0] == "generate" and parts[2] == "stream":
+                self.stream_generation(parts[1], prepare_request(parts[1], self.read_body()))
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = self.server.submit_job(parts[1], prepare_request(parts[1], self.read_body()))
+                self.send_json(HTTPStatus.ACCEPTED, {"job_id": job.id, "status": job.status,
+                                                     "status_url": f"/jobs/{job.id}"})
+            else:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"No route for POST {self.path}")
+        except RequestError as e:
+            self.send_error_json(e)
+
+    def stream_generation(self, kind: str, params: dict):
+        """Generate on a worker thread and relay its chunks as server-sent events"""
+        events = queue.Queue()
+        params["stream_callback"] = lambda chunk: events.put(("chunk", {"text": chunk}))
+
+        def produce():
+            try:
+                events.put(("result", result_json(self.server.run_generation(kind, params))))
+            except RequestError as e:
+                events.put(("error", {"error": str(e), "status": int(e.status)}))
+
+        # Fail fast with a plain 429 instead of an event stream when no slot is free
+        if not self.server.slots.acquire(blocking=False):
+            raise RequestError(HTTPStatus.TOO_MANY_REQUESTS, "All generation slots are busy, retry shortly")
+        self.server.slots.release()
+        threading.Thread(target=produce, name="api-stream", daemon=True).start()
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        while True:
+            event, data = events.get()
+            try:
+                self.wfile.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client went away; the generation finishes in the background
+                logger.info(f"Stream client disconnected during {kind} generation")
+                return
+            if event != "chunk":
+                return
+
+
+def create_server(host: Optional[str] = None, port: Optional[int] = None, **kwargs) -> GeneratorServer:
+    """Create the API server (defaults to API_HOST and API_PORT)"""
+    return GeneratorServer((host or settings.API_HOST, settings.API_PORT if port is None else port), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the content generators over HTTP")
+    parser.add_argument("--host", default=None, help="Bind address (defaults to API_HOST)")
+    parser.add_argument("--port", type=int, default=None, help="Port (defaults to API_PORT)")
+    args = parser.parse_args()
+
+    # Pick up .env and profile changes (models, endpoints, generation parameters) without a restart
+    settings.watch()
+    server = create_server(args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"🚀 API server listening on http://{host}:{port} ({server.max_concurrent} generation(s) at once)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ Shutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
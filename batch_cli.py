@@ -0,0 +1,346 @@
+"""
+Headless batch generation from CSV or JSONL
+
+Reads one request per row and runs them against the configured backend with
+bounded concurrency. Each row names its generator in a "type" column (or
+--type sets it for the whole file); the other columns are the generator's
+parameters, e.g. topic,audience,length for blog outlines. An optional "id"
+column is copied to the output.
+
+Results are appended to a JSONL file as they complete, each with a hash of
+its inputs. The output file doubles as the checkpoint: running the same
+command again skips every row whose inputs hash is already in it, so an
+interrupted run resumes where it stopped. Failed rows are not recorded and
+are retried on the next run.
+
+With --queue the rows are sent to the durable job queue instead and run by
+worker processes (worker.py), possibly on other hosts; this command waits for
+them and records the results as usual. Rows are queued under their inputs
+hash, so running it again after an interruption picks up the same jobs.
+
+Usage:
+    python batch_cli.py topics.csv --type blog --output outlines.jsonl [--markdown-dir outlines/]
+    python batch_cli.py requests.jsonl --output results.jsonl --workers 2 --model llama3.2
+    python batch_cli.py topics.csv --type blog --output outlines.jsonl --queue
+
+Requires a running Ollama (or LM Studio) server.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+from config import settings
+from generators.registry import GENERATORS, build_params, params_hash, run_generator
+from utils.logger import setup_logger
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Set up logger
+logger = setup_logger(__name__)
+
+# Columns that describe a row rather than generator parameters
+ROW_COLUMNS = ("type", "id")
+
+
+def read_rows(path: str) -> list[dict]:
+    """
+    Read requests from a CSV (header row) or JSONL (one object per line) file
+
+    Raises:
+        ValueError: If a JSONL line is not a JSON object
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if Path(path).suffix.lower() == ".csv":
+            return [dict(row) for row in csv.DictReader(f)]
+        rows = []
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError(f"{path}:{number}: expected a JSON object")
+            rows.append(row)
+        return rows
+
+
+def prepare_jobs(rows: list[dict], default_type: Optional[str] = None,
+                 defaults: Optional[dict] = None) -> tuple[list[dict], list[str]]:
+    """
+    Validate rows and turn them into jobs
+
+    Args:
+        rows: Rows from read_rows
+        default_type: Generator for rows without a "type" column
+        defaults: Parameters applied where a row leaves them empty (model, temperature...)
+
+    Returns:
+        Tuple of (jobs with row, id, type, params and hash; error messages of invalid rows)
+    """
+    jobs, errors = [], []
+    for number, row in enumerate(rows, 1):
+        kind = str(row.get("type") or default_type or "").strip().lower()
+        inputs = {name: value for name, value in row.items() if name not in ROW_COLUMNS}
+        for name, value in (defaults or {}).items():
+            if inputs.get(name) in (None, ""):
+                inputs[name] = value
+        try:
+            params = build_params(kind, inputs)
+        except ValueError as e:
+            errors.append(f"row {number}: {str(e)}")
+            continue
+        jobs.append({
+            "row": number,
+            "id": row.get("id") or str(number),
+            "type": kind,
+            "params": params,
+            "hash": params_hash(kind, params),
+        })
+    return jobs, errors
+
+
+def load_completed(output: str) -> set[str]:
+    """Input hashes already recorded in an output file (empty if it does not exist yet)"""
+    completed = set()
+    if not os.path.exists(output):
+        return completed
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                completed.add(json.loads(line)["input_hash"])
+            except (ValueError, KeyError, TypeError):
+                # A line cut off by an interrupted run; that row is simply redone
+                continue
+    return completed
+
+
+def _ends_mid_line(path: str) -> bool:
+    """True if a file is non-empty and does not end with a newline"""
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def _markdown_name(job: dict) -> str:
+    """File name of a job's Markdown output"""
+    title = job["params"][GENERATORS[job["type"]]["required"]]
+    words = "".join(char if char.isalnum() else " " for char in title.lower()).split()
+    return f"{job['row']:04d}_{job['type']}_{'_'.join(words)[:60] or 'result'}.md"
+
+
+def _pending_jobs(jobs: list[dict], output: str, markdown_dir: Optional[str]) -> tuple[list[dict], int]:
+    """Jobs not yet in the output (first of any repeats) and the number skipped; creates the output directories"""
+    completed = load_completed(output)
+    pending, skipped = [], 0
+    for job in jobs:
+        if job["hash"] in completed:
+            skipped += 1
+            continue
+        completed.add(job["hash"])
+        pending.append(job)
+    if pending:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        if markdown_dir:
+            Path(markdown_dir).mkdir(parents=True, exist_ok=True)
+    return pending, skipped
+
+
+def _write_result(out, job: dict, result: dict, markdown: str, markdown_dir: Optional[str]) -> None:
+    """Append a job's record (and write its Markdown file) as soon as it completes"""
+    record = {
+        "id": job["id"],
+        "row": job["row"],
+        "type": job["type"],
+        "input_hash": job["hash"],
+        "params": job["params"],
+        "completed_at": datetime.now().isoformat(timespec="seconds"),
+        "result": result,
+    }
+    if markdown_dir:
+        path = Path(markdown_dir) / _markdown_name(job)
+        path.write_text(markdown, encoding="utf-8")
+        record["markdown_file"] = str(path)
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    # Flushed per row so an interrupted run keeps everything finished so far
+    out.flush()
+
+
+def run_batch(
+    jobs: list[dict],
+    output: str,
+    markdown_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    on_done: Optional[Callable[[dict, Optional[str]], None]] = None
+) -> dict:
+    """
+    Run jobs concurrently, appending each result to the output as it completes
+
+    Jobs whose hash is already in the output (or that repeat an earlier job)
+    are skipped.
+
+    Args:
+        jobs: Jobs from prepare_jobs
+        output: JSONL file results are appended to (also the checkpoint)
+        markdown_dir: Optional directory for one Markdown file per result
+        workers: Requests at once (defaults to LLM_MAX_PARALLEL)
+        on_done: Optional callback (job, error message or None) on the calling thread
+
+    Returns:
+        Summary with completed, skipped and failed counts
+    """
+    pending, skipped = _pending_jobs(jobs, output, markdown_dir)
+    summary = {"completed": 0, "skipped": skipped, "failed": 0}
+    if not pending:
+        return summary
+    workers = max(1, min(workers or settings.LLM_MAX_PARALLEL, len(pending)))
+    logger.info(f"Running {len(pending)} job(s), {workers} at a time ({skipped} already done)")
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        with open(output, "a", encoding="utf-8") as out:
+            # Start on a fresh line if an interrupted run left a partial one
+            if _ends_mid_line(output):
+                out.write("\n")
+            futures = {pool.submit(run_generator, job["type"], job["params"], "batch"): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    logger.warning(f"Row {job['row']} ({job['id']}) failed: {str(e)}")
+                    if on_done:
+                        on_done(job, str(e))
+                    continue
+                _write_result(out, job, result.model_dump(mode="json"), result.to_markdown(), markdown_dir)
+                summary["completed"] += 1
+                if on_done:
+                    on_done(job, None)
+    finally:
+        # Ctrl+C: drop queued rows, let running ones finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+    return summary
+
+
+def run_queued(
+    jobs: list[dict],
+    output: str,
+    markdown_dir: Optional[str] = None,
+    queue=None,
+    poll: float = 1.0,
+    on_done: Optional[Callable[[dict, Optional[str]], None]] = None
+) -> dict:
+    """
+    Send jobs to the durable job queue and record their results as workers finish them
+
+    Same skipping, output and summary as run_batch; the generations run in
+    worker processes (worker.py) instead of this one.
+
+    Args:
+        queue: JobQueue to use (defaults to the one at JOB_QUEUE_PATH)
+        poll: Seconds between checks of the queued jobs
+    """
+    from utils.job_queue import get_job_queue
+
+    queue = queue or get_job_queue()
+    pending, skipped = _pending_jobs(jobs, output, markdown_dir)
+    summary = {"completed": 0, "skipped": skipped, "failed": 0}
+    if not pending:
+        return summary
+    # Keyed by the inputs hash: a rerun attaches to the jobs an interrupted run queued
+    waiting = {queue.enqueue(job["type"], job["params"], owner="batch", label=f"row {job['row']} ({job['id']})",
+                             key=job["hash"]).id: job for job in pending}
+    logger.info(f"Queued {len(waiting)} job(s) ({skipped} already done)")
+
+    with open(output, "a", encoding="utf-8") as out:
+        if _ends_mid_line(output):
+            out.write("\n")
+        while waiting:
+            for job_id, job in list(waiting.items()):
+                queued = queue.get(job_id)
+                if queued is not None and queued.active:
+                    continue
+                del waiting[job_id]
+                if queued is None or queued.status == "failed":
+                    error = queued.error if queued is not None else "job expired before its result was read"
+                    summary["failed"] += 1
+                    logger.warning(f"Row {job['row']} ({job['id']}) failed: {error}")
+                    if on_done:
+                        on_done(job, error)
+                    continue
+                _write_result(out, job, queued.result["result"], queued.result["markdown"], markdown_dir)
+                summary["completed"] += 1
+                if on_done:
+                    on_done(job, None)
+            if waiting:
+                time.sleep(poll)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate blog outlines, social calendars or writing prompts in bulk")
+    parser.add_argument("input", help="CSV or JSONL file with one request per row")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to (also the checkpoint)")
+    parser.add_argument("--type", choices=list(GENERATORS), help="Generator for rows without a 'type' column")
+    parser.add_argument("--markdown-dir", default=None, help="Also write one Markdown file per result here")
+    parser.add_argument("--workers", type=int, default=None, help="Requests at once (defaults to LLM_MAX_PARALLEL)")
+    parser.add_argument("--model", default=None, help="Model for rows without a model_override column")
+    parser.add_argument("--provider", choices=["ollama", "lm_studio"], default=None,
+                        help="Provider for rows without a provider_override column")
+    parser.add_argument("--temperature", type=float, default=None, help="Temperature (defaults to TEMPERATURE)")
+    parser.add_argument("--max-tokens", type=int, default=None, help="Max tokens (defaults to MAX_TOKENS)")
+    parser.add_argument("--queue", action="store_true",
+                        help="Run the rows on worker processes through the durable job queue (see worker.py)")
+    args = parser.parse_args()
+
+    try:
+        jobs, errors = prepare_jobs(read_rows(args.input), args.type, {
+            "model_override": args.model,
+            "provider_override": args.provider,
+            # Always set, so every row gets its own client instead of sharing the default one
+            "temperature": args.temperature if args.temperature is not None else settings.TEMPERATURE,
+            "max_tokens": args.max_tokens,
+        })
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read {args.input}: {str(e)}")
+        sys.exit(1)
+    for error in errors:
+        print(f"⚠️ Skipping {error}")
+    if not jobs:
+        print("❌ No valid rows to run")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    done = 0
+
+    def progress(job: dict, error: Optional[str]):
+        nonlocal done
+        done += 1
+        status = f"failed: {error}" if error else "done"
+        print(f"[{done}] row {job['row']} ({job['id']}) {status}", flush=True)
+
+    try:
+        if args.queue:
+            summary = run_queued(jobs, args.output, args.markdown_dir, on_done=progress)
+        else:
+            summary = run_batch(jobs, args.output, args.markdown_dir, args.workers, on_done=progress)
+    except KeyboardInterrupt:
+        print("\n⏹️ Interrupted; run the same command again to resume")
+        sys.exit(130)
+    print(f"✅ {summary['completed']} completed, {summary['skipped']} skipped (already done), "
+          f"{summary['failed']} failed in {time.perf_counter() - started:.1f}s")
+    if summary["failed"] or errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
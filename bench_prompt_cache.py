@@ -0,0 +1,133 @@
+"""
+Benchmark: prompt-eval time with the old and the new prompt layout
+
+Sends a series of requests that differ only in their variable fields and
+compares the prompt evaluation reported by the backend for:
+  - variable-first: request details before the instructions (template v1 layout)
+  - static-first:   instructions before the request details (template v2 layout)
+
+With static-first prompts the backend reuses the cached prefix, so only the
+short request tail should be evaluated after the first request.
+
+Usage:
+    python bench_prompt_cache.py [--runs 5] [--template blog_outline]
+
+Requires a running Ollama (or LM Studio) server; Ollama reports the most
+detailed numbers (prompt_eval_count / prompt_eval_duration).
+"""
+import argparse
+import sys
+import time
+from utils.llm_interface import LocalLLM
+from utils.prompt_templates import (
+    get_template,
+    get_blog_outline_fields,
+    get_social_media_fields,
+    get_writing_prompt_fields,
+)
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+TOPICS = [
+    "Getting Started with Python Programming",
+    "Deploying Microservices on AWS EKS",
+    "State Management in React: Redux vs Context API",
+    "Complete Guide to CI/CD with GitHub Actions",
+    "Fine-tuning Large Language Models for Production",
+    "Implementing OAuth 2.0 in Modern Web Applications",
+    "Building a RESTful API with FastAPI and PostgreSQL",
+    "Observability with OpenTelemetry",
+]
+
+THEMES = [
+    "AI and Machine Learning",
+    "Remote Work and Productivity Hacks",
+    "UI/UX Design Best Practices",
+    "Digital Marketing Tips for Small Businesses",
+]
+
+GENRES = ["sci-fi", "mystery", "fantasy", "horror", "thriller", "adventure"]
+
+
+def request_fields(template_name: str, index: int) -> list:
+    """Build request fields that vary between runs"""
+    if template_name == "blog_outline":
+        return get_blog_outline_fields(TOPICS[index % len(TOPICS)], "intermediate", "medium", "how-to")
+    if template_name == "social_media":
+        return get_social_media_fields(THEMES[index % len(THEMES)], "3x week", "LinkedIn", "month", "professional")
+    return get_writing_prompt_fields(GENRES[index % len(GENRES)], "plot", "moderate")
+
+
+def run_layout(llm: LocalLLM, template_name: str, layout: str, runs: int) -> list[dict]:
+    """Send `runs` requests using the given layout and collect backend stats"""
+    template = get_template(template_name)
+    samples = []
+    for i in range(runs):
+        fields = request_fields(template_name, i)
+        request = template.render_request(fields)
+        if layout == "variable-first":
+            prompt = f"{request}\n\n{template.instructions}"
+        else:
+            prompt = f"{template.instructions}\n\n{request}"
+
+        start = time.perf_counter()
+        llm.generate(prompt=prompt, system_prompt=template.system_prompt)
+        wall = time.perf_counter() - start
+
+        stats = dict(llm.last_stats)
+        stats["wall_seconds"] = wall
+        samples.append(stats)
+    return samples
+
+
+def summarize(samples: list[dict]) -> dict:
+    """Average the samples, skipping the first (cold) request"""
+    warm = samples[1:] or samples
+
+    def mean(key):
+        values = [s[key] for s in warm if s.get(key) is not None]
+        return sum(values) / len(values) if values else None
+
+    eval_ns = mean("prompt_eval_duration")
+    return {
+        "prompt_tokens_evaluated": mean("prompt_eval_count"),
+        "prompt_eval_ms": eval_ns / 1e6 if eval_ns is not None else None,
+        "wall_seconds": mean("wall_seconds"),
+    }
+
+
+def format_value(value, fmt: str) -> str:
+    return "n/a" if value is None else format(value, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt-eval time for both prompt layouts")
+    parser.add_argument("--runs", type=int, default=5, help="Requests per layout (first one is treated as warm-up)")
+    parser.add_argument("--template", default="blog_outline",
+                        choices=["blog_outline", "social_media", "writing_prompt"])
+    args = parser.parse_args()
+
+    # Only the prompt evaluation matters here, so decode a single token
+    llm = LocalLLM(temperature=0.0, max_tokens=1)
+    success, message = llm.test_connection()
+    print(message)
+    if not success:
+        sys.exit(1)
+
+    print(f"\nTemplate: {args.template} ({get_template(args.template).fingerprint})  runs: {args.runs}")
+    print(f"{'layout':<16}{'prompt tokens':>16}{'prompt eval ms':>18}{'wall s':>10}")
+    for layout in ("variable-first", "static-first"):
+        result = summarize(run_layout(llm, args.template, layout, args.runs))
+        print(
+            f"{layout:<16}"
+            f"{format_value(result['prompt_tokens_evaluated'], '.0f'):>16}"
+            f"{format_value(result['prompt_eval_ms'], '.1f'):>18}"
+            f"{format_value(result['wall_seconds'], '.2f'):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
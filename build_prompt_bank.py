@@ -0,0 +1,57 @@
+"""
+Build or top up the offline writing prompt bank
+
+Generates creative writing prompts for every (genre, prompt type, complexity)
+combination and stores the unique ones in PROMPT_BANK_PATH. The app then
+serves prompts without constraints from the bank instantly, without using the
+LLM backend. Running the script again only fills the remaining shortfall.
+
+Usage:
+    python build_prompt_bank.py [--per-combination 50] [--genre sci-fi] [--temperature 0.9]
+
+Requires a running Ollama (or LM Studio) server.
+"""
+import argparse
+import sys
+from generators.writing_generator import build_prompt_bank, GENRES, PROMPT_TYPES, COMPLEXITY_LEVELS
+from utils.llm_interface import LocalLLM
+from utils.prompt_bank import PromptBank
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate creative writing prompts into the prompt bank")
+    parser.add_argument("--per-combination", type=int, default=50, help="Unique prompts to keep per combination")
+    parser.add_argument("--genre", action="append", choices=GENRES, help="Only these genres (repeatable)")
+    parser.add_argument("--prompt-type", action="append", choices=PROMPT_TYPES, help="Only these prompt types (repeatable)")
+    parser.add_argument("--complexity", action="append", choices=COMPLEXITY_LEVELS, help="Only these levels (repeatable)")
+    parser.add_argument("--temperature", type=float, default=0.9, help="Higher values give a more varied bank")
+    parser.add_argument("--model", default=None, help="Model to generate with (defaults to the configured one)")
+    parser.add_argument("--path", default=None, help="Bank file (defaults to PROMPT_BANK_PATH)")
+    args = parser.parse_args()
+
+    success, message = LocalLLM(model_override=args.model).test_connection()
+    print(message)
+    if not success:
+        sys.exit(1)
+
+    combinations = [(genre, prompt_type, complexity)
+                    for genre in args.genre or GENRES
+                    for prompt_type in args.prompt_type or PROMPT_TYPES
+                    for complexity in args.complexity or COMPLEXITY_LEVELS]
+    bank = PromptBank(args.path)
+    print(f"Filling {bank.path}: {len(combinations)} combinations x {args.per_combination} prompts")
+
+    def progress(key: str, stored: int, target: int):
+        print(f"\r{key:<45}{stored:>5}/{target}", end="", flush=True)
+
+    added = build_prompt_bank(bank, args.per_combination, combinations, on_progress=progress,
+                              model_override=args.model, temperature=args.temperature)
+    print(f"\nAdded {sum(added.values())} prompt(s); the bank now holds {sum(bank.counts().values())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,281 @@
 """
 Configuration settings loaded from environment variables
+
+Values come from, in increasing priority: the defaults below, the .env file,
+the process environment, and the active profile (SETTINGS_PROFILE) from the
+profiles file (config/profiles.json by default), e.g. "fast" with a small
+model and tight MAX_TOKENS.
+
+Settings are read as module attributes (settings.MAX_TOKENS) at the time
+they are used, so reload() can swap them in a running process. watch()
+polls .env and the profiles file for changes and reloads on its own; code
+holding derived state (such as the default LLM client) registers with
+on_reload(). The API server's address and concurrency limit are only read
+at startup.
 """
+import json
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from typing import Callable, Optional
+from dotenv import dotenv_values, find_dotenv
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Environment of the process before any .env values, which never override it
+_PROCESS_ENV = dict(os.environ)
+
+ENV_FILE = _PROCESS_ENV.get("SETTINGS_ENV_FILE") or find_dotenv() or os.path.join(PROJECT_DIR, ".env")
+
+_lock = threading.Lock()
+_listeners: list[Callable[[], None]] = []
+_file_stamps: tuple = ()
+_watcher: Optional[threading.Thread] = None
+
+
+def _project_path(path: str) -> str:
+    """Absolute path of a file setting (relative paths are relative to the project, not the working directory)"""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_DIR, path)
+
+
+def _build(getenv: Callable[[str, str], str]) -> dict:
+    """Typed settings from raw string values"""
+    # LLM Provider Configuration
+    LLM_PROVIDER = getenv("LLM_PROVIDER", "ollama")  # "ollama" or "lm_studio"
+
+    # Ollama Settings
+    OLLAMA_BASE_URL = getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    OLLAMA_MODEL = getenv("OLLAMA_MODEL", "llama3.2")
+
+    # LM Studio Settings
+    LM_STUDIO_BASE_URL = getenv("LM_STUDIO_BASE_URL", "http://localhost:1234/v1")
+    LM_STUDIO_MODEL = getenv("LM_STUDIO_MODEL", "local-model")
+
+    # Generation Parameters
+    MAX_TOKENS = int(getenv("MAX_TOKENS", "2000"))
+    TEMPERATURE = float(getenv("TEMPERATURE", "0.7"))
+
+    # Context window of the loaded model (tokens). Refinement sessions summarize
+    # older turns before the conversation grows past this.
+    CONTEXT_WINDOW = int(getenv("CONTEXT_WINDOW", "8192"))
+
+    # Number of requests sent to the backend at once (match OLLAMA_NUM_PARALLEL or
+    # LM Studio's parallel slots). Long calendars are generated in chunks this wide.
+    LLM_MAX_PARALLEL = int(getenv("LLM_MAX_PARALLEL", "2"))
+
+    # Default IANA time zone for social media posting schedules
+    TIMEZONE = getenv("TIMEZONE", "UTC")
+
+    # Background prefetching of writing prompts: results kept ready, seconds without
+    # use before the buffer is dropped, and background requests allowed at once
+    # (background requests only start while no foreground request is running)
+    PREFETCH_BUFFER_SIZE = int(getenv("PREFETCH_BUFFER_SIZE", "2"))
+    PREFETCH_IDLE_SECONDS = float(getenv("PREFETCH_IDLE_SECONDS", "300"))
+    PREFETCH_MAX_PARALLEL = int(getenv("PREFETCH_MAX_PARALLEL", "1"))
+
+    # SQLite file with pre-generated writing prompts (see build_prompt_bank.py)
+    PROMPT_BANK_PATH = _project_path(getenv("PROMPT_BANK_PATH", "data/prompt_bank.sqlite3"))
+
+    # HTTP API server (api_server.py): bind address, generation requests served at
+    # once (sync, streaming and jobs together) and how long finished jobs are kept
+    API_HOST = getenv("API_HOST", "127.0.0.1")
+    API_PORT = int(getenv("API_PORT", "8000"))
+    API_MAX_CONCURRENT = int(getenv("API_MAX_CONCURRENT", str(LLM_MAX_PARALLEL)))
+    API_MAX_QUEUED_JOBS = int(getenv("API_MAX_QUEUED_JOBS", "100"))
+    API_JOB_TTL_SECONDS = float(getenv("API_JOB_TTL_SECONDS", "3600"))
+
+    # Background generation jobs of the Streamlit app: jobs running at once,
+    # jobs allowed to wait, and how long finished jobs stay available
+    JOB_MAX_WORKERS = int(getenv("JOB_MAX_WORKERS", str(LLM_MAX_PARALLEL)))
+    JOB_MAX_QUEUED = int(getenv("JOB_MAX_QUEUED", "20"))
+    JOB_RESULT_TTL_SECONDS = float(getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+
+    # Durable job queue served by separate worker processes (see worker.py). When
+    # enabled, the app and the API server queue jobs in this SQLite file instead of
+    # running them in-process. Workers renew a lease on each job they run; a job
+    # whose lease lapses (crashed worker) is retried, up to JOB_MAX_ATTEMPTS runs.
+    # Turn off WAL when workers on several hosts share the file over a network
+    # filesystem (WAL needs every process on one host).
+    JOB_QUEUE_ENABLED = getenv("JOB_QUEUE_ENABLED", "false").strip().lower() in ("true", "yes", "1")
+    JOB_QUEUE_PATH = _project_path(getenv("JOB_QUEUE_PATH", "data/job_queue.sqlite3"))
+    JOB_QUEUE_WAL = getenv("JOB_QUEUE_WAL", "true").strip().lower() in ("true", "yes", "1")
+    JOB_LEASE_SECONDS = float(getenv("JOB_LEASE_SECONDS", "60"))
+    JOB_MAX_ATTEMPTS = int(getenv("JOB_MAX_ATTEMPTS", "3"))
+    WORKER_CONCURRENCY = int(getenv("WORKER_CONCURRENCY", "1"))
+
+    # Storage shared by every app replica, API server and worker on this host
+    # (SQLite in WAL mode): provider health checks and model lists are reused
+    # until their TTL runs out, and metrics counters add up across processes.
+    # RESPONSE_CACHE_TTL_SECONDS > 0 also answers repeated identical requests
+    # (same model, prompt, parameters and seed) from the cache for that long.
+    SHARED_STORE_PATH = _project_path(getenv("SHARED_STORE_PATH", "data/shared_store.sqlite3"))
+    HEALTH_CHECK_TTL_SECONDS = float(getenv("HEALTH_CHECK_TTL_SECONDS", "15"))
+    MODEL_LIST_TTL_SECONDS = float(getenv("MODEL_LIST_TTL_SECONDS", "60"))
+    RESPONSE_CACHE_TTL_SECONDS = float(getenv("RESPONSE_CACHE_TTL_SECONDS", "0"))
+
+    # History of generated blog outlines, calendars and writing prompts (SQLite
+    # with full-text search), browsed on the app's History page
+    HISTORY_ENABLED = getenv("HISTORY_ENABLED", "true").strip().lower() in ("true", "yes", "1")
+    HISTORY_STORE_PATH = _project_path(getenv("HISTORY_STORE_PATH", "data/history.sqlite3"))
+
+    # Results and drafts of each browser session are kept on disk (one folder
+    # per app process under SESSION_SPILL_DIR); session state only holds small
+    # handles, and loaded values share an LRU cache of SESSION_MEMORY_BUDGET_MB.
+    SESSION_SPILL_DIR = _project_path(getenv("SESSION_SPILL_DIR", "data/sessions"))
+    SESSION_MEMORY_BUDGET_MB = float(getenv("SESSION_MEMORY_BUDGET_MB", "64"))
+    SESSION_IDLE_HOURS = float(getenv("SESSION_IDLE_HOURS", "24"))
+
+    # Downloads (HTML, Markdown, iCalendar, CSV, series bundles) are rendered
+    # when requested and kept for repeated downloads, up to this much memory
+    EXPORT_CACHE_MB = float(getenv("EXPORT_CACHE_MB", "32"))
+
+    # Named profile to apply from the profiles file, and seconds between checks
+    # of .env and the profiles file for changes (see watch())
+    SETTINGS_PROFILE = getenv("SETTINGS_PROFILE", "")
+    SETTINGS_PROFILES_FILE = getenv("SETTINGS_PROFILES_FILE", "config/profiles.json")
+    SETTINGS_RELOAD_INTERVAL = float(getenv("SETTINGS_RELOAD_INTERVAL", "2"))
+
+    # Validate configuration
+    if LLM_PROVIDER not in ["ollama", "lm_studio"]:
+        raise ValueError(f"Invalid LLM_PROVIDER: {LLM_PROVIDER}. Must be 'ollama' or 'lm_studio'")
+
+    return {name: value for name, value in locals().items() if name.isupper()}
+
+
+def _raw_values() -> dict[str, str]:
+    """Raw values from .env, the process environment and the active profile"""
+    values = {}
+    if os.path.exists(ENV_FILE):
+        values.update({name: value for name, value in dotenv_values(ENV_FILE).items() if value is not None})
+    values.update(_PROCESS_ENV)
+    profile = values.get("SETTINGS_PROFILE", "").strip()
+    if profile:
+        available = load_profiles(values.get("SETTINGS_PROFILES_FILE") or None)
+        if profile not in available:
+            raise ValueError(f"Unknown SETTINGS_PROFILE '{profile}'. Available: {', '.join(available) or 'none'}")
+        values.update({name: str(value) for name, value in available[profile].items()})
+    return values
+
+
+def _profiles_file(path: Optional[str] = None) -> str:
+    """Absolute path of a profiles file (relative paths are relative to the project)"""
+    return _project_path(path or "config/profiles.json")
+
+
+def load_profiles(path: Optional[str] = None) -> dict[str, dict]:
+    """
+    Named profiles from a JSON file of {"profile": {"SETTING": value}}
+
+    Args:
+        path: Profiles file (defaults to config/profiles.json)
+
+    Returns:
+        Profile name to setting overrides (empty if the file does not exist)
+
+    Raises:
+        ValueError: If the file is malformed or a profile sets an unknown setting
+    """
+    path = _profiles_file(path)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        profiles = json.load(f)
+    if not isinstance(profiles, dict) or not all(isinstance(values, dict) for values in profiles.values()):
+        raise ValueError(f"{path} must map profile names to objects of settings")
+    known = set(_build(lambda name, default: default))
+    for name, values in profiles.items():
+        unknown = sorted(set(values) - known)
+        if unknown:
+            raise ValueError(f"Profile '{name}' sets unknown setting(s): {', '.join(unknown)}")
+    return profiles
+
+
+def _stamps() -> tuple:
+    """Modification times of the files settings are read from"""
+    paths = [ENV_FILE, _profiles_file(globals().get("SETTINGS_PROFILES_FILE"))]
+    return tuple((path, os.path.getmtime(path) if os.path.exists(path) else None) for path in paths)
+
+
+def reload() -> None:
+    """
+    Re-read all settings and notify on_reload() listeners
+
+    The new values are built and validated first, so a broken .env or
+    profile leaves the current settings in place.
+
+    Raises:
+        ValueError: If the new configuration is invalid
+    """
+    global _file_stamps
+    with _lock:
+        # Stamped before reading, so a change made while reading triggers another reload
+        stamps = _stamps()
+        try:
+            raw = _raw_values()
+            values = _build(lambda name, default: raw.get(name, default))
+        except Exception:
+            # Not retried until the files change again
+            _file_stamps = stamps
+            raise
+        globals().update(values)
+        # Restamp if the reload pointed SETTINGS_PROFILES_FILE at another file
+        current = _stamps()
+        _file_stamps = stamps if [path for path, _ in stamps] == [path for path, _ in current] else current
+    logger.info(f"Settings reloaded (profile: {values['SETTINGS_PROFILE'] or 'none'})")
+    for listener in list(_listeners):
+        listener()
+
+
+def reload_if_changed() -> bool:
+    """
+    Reload if .env or the profiles file changed since the last load
+
+    Returns:
+        True if settings were reloaded
+    """
+    if _stamps() == _file_stamps:
+        return False
+    reload()
+    return True
+
+
+def on_reload(callback: Callable[[], None]) -> None:
+    """Call `callback` after every reload (e.g. to rebuild clients from the new settings)"""
+    _listeners.append(callback)
+
+
+def watch(interval: Optional[float] = None) -> None:
+    """
+    Start a background thread that reloads settings when their files change
 
-# Load environment variables from .env file
-load_dotenv()
+    Safe to call repeatedly; only one watcher runs per process.
 
-# LLM Provider Configuration
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama")  # "ollama" or "lm_studio"
+    Args:
+        interval: Seconds between checks (defaults to SETTINGS_RELOAD_INTERVAL)
+    """
+    global _watcher
+    with _lock:
+        if _watcher is not None and _watcher.is_alive():
+            return
 
-# Ollama Settings
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
+        def run():
+            while True:
+                time.sleep(interval or SETTINGS_RELOAD_INTERVAL)
+                try:
+                    reload_if_changed()
+                except Exception as e:
+                    # Keep the current settings until the files are fixed
+                    logger.error(f"Settings not reloaded: {str(e)}")
 
-# LM Studio Settings
-LM_STUDIO_BASE_URL = os.getenv("LM_STUDIO_BASE_URL", "http://localhost:1234/v1")
-LM_STUDIO_MODEL = os.getenv("LM_STUDIO_MODEL", "local-model")
+        _watcher = threading.Thread(target=run, name="settings-watch", daemon=True)
+        _watcher.start()
 
-# Generation Parameters
-MAX_TOKENS = int(os.getenv("MAX_TOKENS", "2000"))
-TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
 
-# Validate configuration
-if LLM_PROVIDER not in ["ollama", "lm_studio"]:
-    raise ValueError(f"Invalid LLM_PROVIDER: {LLM_PROVIDER}. Must be 'ollama' or 'lm_studio'")
+_file_stamps = _stamps()
+_initial = _raw_values()
+globals().update(_build(lambda name, default: _initial.get(name, default)))
+del _initial
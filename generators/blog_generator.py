@@ -1,10 +1,15 @@
 """
 Blog Post Outline Generator
 """
-from typing import Optional
-from pydantic import BaseModel, Field
+import time
+from typing import Callable, Optional
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError
 from utils.llm_interface import llm, LocalLLM
-from utils.prompt_templates import get_blog_outline_prompt
+from utils.prompt_templates import get_blog_outline_prompt, get_headline_prompt, BLOG_OUTLINE_TEMPLATE, HEADLINES_TEMPLATE
+from utils.output_parsers import extract_json, parse_blog_outline, list_items, SectionCompletionDetector, BLOG_SECTIONS
+from utils.headline_scorer import rank_headlines, HeadlineScore
+from utils.variants import generate_variants, BLOG_ANGLES
+from utils.repair import find_section_gaps, repair_sections
 from utils.logger import setup_logger
 
 # Set up logger
@@ -30,11 +35,45 @@ class BlogInput(BaseModel):
         }
 
 
+class OutlineSection(BaseModel):
+    """One main section of a structured blog outline"""
+    title: str = Field(..., description="Section header")
+    key_points: list[str] = Field(default_factory=list, description="Points to cover in the section")
+
+
+class BlogStructure(BaseModel):
+    """Typed blog outline produced in structured output mode"""
+    headlines: list[str] = Field(default_factory=list, description="Headline options, each under 70 characters")
+    sections: list[OutlineSection] = Field(default_factory=list, description="Introduction, main sections and conclusion")
+    key_points: list[str] = Field(default_factory=list, description="Facts, examples, pain points and takeaways")
+    subtopics: list[str] = Field(default_factory=list, description="Related topics and supporting concepts")
+    
+    def to_markdown(self) -> str:
+        """Render in the same numbered layout the free-form prompt asks for"""
+        md = "## 1. HEADLINES\n\n"
+        md += "".join(f"- {headline}\n" for headline in self.headlines)
+        md += "\n## 2. STRUCTURED OUTLINE\n\n"
+        for section in self.sections:
+            md += f"### {section.title}\n"
+            md += "".join(f"- {point}\n" for point in section.key_points)
+            md += "\n"
+        md += "## 3. KEY POINTS\n\n"
+        md += "".join(f"- {point}\n" for point in self.key_points)
+        md += "\n## 4. SUBTOPICS\n\n"
+        md += "".join(f"- {subtopic}\n" for subtopic in self.subtopics)
+        return md
+
+
 class BlogOutline(BaseModel):
     """Generated blog post outline"""
     topic: str
     outline: str
     metadata: dict
+    structured: Optional[BlogStructure] = None
+    # Lower-ranked variants when several were requested (see utils.variants)
+    alternatives: list["BlogOutline"] = Field(default_factory=list)
+    # Prompt and backend state needed to continue the conversation (see utils.refinement)
+    _session_seed: Optional[dict] = PrivateAttr(default=None)
     
     def to_markdown(self) -> str:
         """Convert to formatted markdown"""
@@ -52,7 +91,13 @@ def generate_blog_outline(
     model_override: Optional[str] = None,
     provider_override: Optional[str] = None,
     temperature: Optional[float] = None,
-    max_tokens: Optional[int] = None
+    max_tokens: Optional[int] = None,
+    structured: bool = False,
+    stream_callback: Optional[Callable[[str], None]] = None,
+    early_stop: bool = True,
+    variants: int = 1,
+    angle: Optional[str] = None,
+    seed: Optional[int] = None
 ) -> BlogOutline:
     """
     Generate a blog post outline using the local LLM
@@ -67,6 +112,14 @@ def generate_blog_outline(
         provider_override: Optional provider to use ('ollama' or 'lm_studio')
         temperature: Optional temperature setting (0.0-2.0)
         max_tokens: Optional max tokens for response
+        structured: Request JSON output and fill BlogOutline.structured
+        stream_callback: Optional callback receiving text chunks as they are generated
+            (not used when several variants are requested)
+        early_stop: Stream and close the connection once all required sections are complete
+        variants: Number of distinct outlines to generate concurrently; the best
+            is returned with the others, ranked, in `alternatives`
+        angle: Optional angle for the outline (set per variant)
+        seed: Optional sampling seed
     
     Returns:
         BlogOutline object with generated content
@@ -100,20 +153,32 @@ def generate_blog_outline(
         logger.error(f"Invalid content type: {content_type}")
         raise ValueError(f"Content type must be one of: {', '.join(valid_types)}")
     
+    if variants > 1:
+        ranked, summary = generate_variants(
+            lambda option: generate_blog_outline(
+                topic, audience, length, content_type, custom_context, model_override, provider_override,
+                option["temperature"], max_tokens, structured, None, early_stop,
+                angle=option["angle"], seed=option["seed"]),
+            text_of=lambda outline: outline.outline,
+            count=variants,
+            temperature=temperature,
+            angles=BLOG_ANGLES,
+            gaps=find_blog_outline_gaps,
+        )
+        ranked[0].metadata.update(summary)
+        return ranked[0].model_copy(update={"alternatives": ranked[1:]})
+    
     # Generate the prompt
-    prompt = get_blog_outline_prompt(topic, audience, length, content_type, custom_context)
+    json_schema = BlogStructure.model_json_schema() if structured else None
+    prompt = get_blog_outline_prompt(topic, audience, length, content_type, custom_context, json_schema, angle)
     logger.debug("Prompt generated successfully")
     
-    # System prompt for consistent output
-    system_prompt = """You are an expert technical content strategist and SEO specialist.
-You create detailed, actionable technical blog post outlines that are easy to follow and implement.
-Your outlines are well-structured, comprehensive, and tailored to the target audience.
-When provided with custom context or documentation, you incorporate that information accurately.
-Always format your output clearly with proper headers, bullet points, and sections."""
+    # System prompt for consistent output (part of the cached static prefix)
+    system_prompt = BLOG_OUTLINE_TEMPLATE.system_prompt
     
     try:
         # Use overrides if provided, otherwise use default
-        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None else llm
+        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None or seed is not None else llm.current()
         
         # Override provider if specified
         if provider_override:
@@ -128,29 +193,64 @@ Always format your output clearly with proper headers, bullet points, and sectio
                 if not model_override:
                     llm_instance.model = settings.LM_STUDIO_MODEL
         
-        # Update temperature and max_tokens if provided
+        # Update temperature, max_tokens and seed if provided
         if temperature is not None:
             llm_instance.temperature = temperature
         if max_tokens is not None:
             llm_instance.max_tokens = max_tokens
+        if seed is not None:
+            llm_instance.seed = seed
         
         # Generate the outline
         logger.info("Sending request to LLM...")
-        response = llm_instance.generate(prompt=prompt, system_prompt=system_prompt)
+        detector = None
+        if early_stop and not structured:
+            detector = SectionCompletionDetector(BLOG_SECTIONS)
+        if stream_callback is not None or detector is not None:
+            response = llm_instance.stream_text(prompt=prompt, system_prompt=system_prompt, json_schema=json_schema,
+                                                on_chunk=stream_callback, stop=BLOG_OUTLINE_TEMPLATE.stop,
+                                                completion_detector=detector)
+        else:
+            response = llm_instance.generate(prompt=prompt, system_prompt=system_prompt,
+                                             json_schema=json_schema, stop=BLOG_OUTLINE_TEMPLATE.stop)
         logger.info("Successfully received response from LLM")
         
+        structure = None
+        outline_text = response
+        structured_source = None
+        if structured:
+            structure, structured_source = parse_blog_structure(response)
+            if structured_source == "json":
+                outline_text = structure.to_markdown()
+        
         # Create the outline object
         outline = BlogOutline(
             topic=topic,
-            outline=response,
+            outline=outline_text,
+            structured=structure,
             metadata={
                 "audience": audience,
                 "length": length,
                 "content_type": content_type,
                 "model": llm_instance.model,
-                "provider": llm_instance.provider
+                "provider": llm_instance.provider,
+                **BLOG_OUTLINE_TEMPLATE.metadata(),
+                **llm_instance.generation_metadata()
             }
         )
+        if structured:
+            outline.metadata["structured_output"] = structured_source
+        
+        outline._session_seed = {
+            "llm": llm_instance.clone(),
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            # None after an early stop: the final chunk carrying it never arrived
+            "context": llm_instance.last_context,
+            "response": response,
+            # Knowledge base for the full draft (see generators.draft_generator)
+            "custom_context": custom_context,
+        }
         
         logger.info(f"Blog outline created successfully for '{topic}'")
         return outline
@@ -160,6 +260,199 @@ Always format your output clearly with proper headers, bullet points, and sectio
         raise Exception(f"Failed to generate blog outline: {str(e)}")
 
 
+def parse_blog_structure(response: str) -> tuple[BlogStructure, str]:
+    """
+    Build a BlogStructure from a structured-mode response
+    
+    Models that ignore the JSON schema are handled by the markdown fallback parser.
+    
+    Args:
+        response: Raw LLM response
+    
+    Returns:
+        Tuple of (structure, source) where source is "json" or "fallback_parser"
+    """
+    data = extract_json(response)
+    if data is not None:
+        try:
+            return BlogStructure.model_validate(data), "json"
+        except ValidationError as e:
+            logger.warning(f"Structured response did not match the schema, using fallback parser: {e.error_count()} error(s)")
+    else:
+        logger.warning("Response was not JSON, using fallback parser")
+    return BlogStructure.model_validate(parse_blog_outline(response)), "fallback_parser"
+
+
+def find_blog_outline_gaps(outline: BlogOutline) -> list[str]:
+    """
+    Find sections of a generated outline that are missing, empty or were cut off
+    
+    Args:
+        outline: Generated blog outline
+    
+    Returns:
+        Section names that need repairing (empty if the outline is complete)
+    """
+    truncated = outline.metadata.get("stop_reason") == "length"
+    return find_section_gaps(outline.outline, BLOG_SECTIONS, truncated=truncated)
+
+
+def repair_blog_outline(outline: BlogOutline, llm_instance: Optional[LocalLLM] = None) -> BlogOutline:
+    """
+    Regenerate only the missing or truncated sections of an outline
+    
+    Args:
+        outline: Generated blog outline
+        llm_instance: Client to use if the outline carries no session seed
+    
+    Returns:
+        A new BlogOutline with the repaired sections merged in (the same
+        outline if nothing needed repairing)
+    
+    Raises:
+        Exception: If the repair request fails
+    """
+    gaps = find_blog_outline_gaps(outline)
+    if not gaps:
+        return outline
+    
+    logger.info(f"Repairing blog outline sections: {', '.join(gaps)}")
+    seed = outline._session_seed or {}
+    max_tokens = (seed.get("llm") or llm_instance or llm.current()).max_tokens
+    try:
+        text = repair_sections(seed, outline.outline, BLOG_SECTIONS, gaps, max_tokens,
+                               stop=BLOG_OUTLINE_TEMPLATE.stop, llm_instance=llm_instance)
+    except Exception as e:
+        logger.error(f"Failed to repair blog outline: {str(e)}")
+        raise Exception(f"Failed to repair blog outline: {str(e)}")
+    
+    metadata = {**outline.metadata, "repaired_sections": outline.metadata.get("repaired_sections", []) + gaps}
+    metadata.pop("stop_reason", None)
+    structured = None
+    if outline.structured is not None:
+        structured = BlogStructure.model_validate(parse_blog_outline(text))
+    return outline.model_copy(update={"outline": text, "metadata": metadata, "structured": structured})
+
+
+# Output budget per headline candidate (about 15 words plus numbering)
+TOKENS_PER_HEADLINE = 30
+
+
+class HeadlineSet(BaseModel):
+    """Headline candidates from the fast path, ranked by the local scorer"""
+    topic: str
+    candidates: list[str]
+    ranked: list[HeadlineScore]
+    metadata: dict
+    
+    def rerank(self, top_n: int = 10, weights: Optional[dict[str, float]] = None) -> "HeadlineSet":
+        """Rank the same candidates again (no LLM call)"""
+        ranked = rank_headlines(self.candidates, self.topic, top_n=top_n, weights=weights)
+        return self.model_copy(update={"ranked": ranked})
+    
+    def to_markdown(self) -> str:
+        """Convert to formatted markdown"""
+        md = f"# Headlines: {self.topic}\n\n"
+        md += "".join(f"{index}. {item.headline}\n" for index, item in enumerate(self.ranked, 1))
+        return md
+
+
+def generate_headlines(
+    topic: str,
+    audience: str = "intermediate",
+    content_type: str = "how-to",
+    custom_context: Optional[str] = None,
+    candidates: int = 40,
+    top_n: int = 10,
+    model_override: Optional[str] = None,
+    provider_override: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None
+) -> HeadlineSet:
+    """
+    Generate headline candidates in one request and rank them locally
+    
+    Much faster than a full outline, so users can iterate on headlines alone.
+    
+    Args:
+        topic: The main topic or keyword focus
+        audience: Target audience (beginners, intermediate, experts)
+        content_type: Type of content (tutorial, listicle, how-to, opinion)
+        custom_context: Optional custom information/documentation to reference
+        candidates: Number of candidates to ask the model for
+        top_n: Number of ranked headlines to keep
+        model_override: Optional specific model to use (overrides default)
+        provider_override: Optional provider to use ('ollama' or 'lm_studio')
+        temperature: Optional temperature setting (0.0-2.0)
+        max_tokens: Optional max tokens for response
+    
+    Returns:
+        HeadlineSet with all candidates and the top_n ranked headlines
+    
+    Raises:
+        ValueError: If no headlines could be parsed from the response
+        Exception: If generation fails
+    """
+    logger.info(f"Generating {candidates} headline candidates for topic: '{topic}'")
+    prompt = get_headline_prompt(topic, audience, content_type, candidates, custom_context)
+    
+    try:
+        # Use overrides if provided, otherwise use default
+        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None else llm.current()
+        
+        # Override provider if specified
+        if provider_override:
+            from config import settings
+            llm_instance.provider = provider_override
+            if provider_override == "ollama":
+                llm_instance.base_url = settings.OLLAMA_BASE_URL
+                if not model_override:
+                    llm_instance.model = settings.OLLAMA_MODEL
+            elif provider_override == "lm_studio":
+                llm_instance.base_url = settings.LM_STUDIO_BASE_URL
+                if not model_override:
+                    llm_instance.model = settings.LM_STUDIO_MODEL
+        
+        # Update temperature and max_tokens if provided
+        if temperature is not None:
+            llm_instance.temperature = temperature
+        if max_tokens is not None:
+            llm_instance.max_tokens = max_tokens
+        
+        # Headlines are short, so cap the budget well below a full outline's
+        client = llm_instance.clone()
+        client.max_tokens = min(llm_instance.max_tokens, candidates * TOKENS_PER_HEADLINE)
+        response = client.generate(prompt=prompt, system_prompt=HEADLINES_TEMPLATE.system_prompt,
+                                   stop=HEADLINES_TEMPLATE.stop)
+    except Exception as e:
+        logger.error(f"Failed to generate headlines: {str(e)}")
+        raise Exception(f"Failed to generate headlines: {str(e)}")
+    
+    found = list_items(response.splitlines())
+    if not found:
+        logger.error("No headlines found in the response")
+        raise ValueError("The model did not return any headlines. Try again or rephrase the topic.")
+    
+    started = time.perf_counter()
+    ranked = rank_headlines(found, topic, top_n=top_n)
+    logger.info(f"Ranked {len(found)} headline candidates")
+    return HeadlineSet(
+        topic=topic,
+        candidates=found,
+        ranked=ranked,
+        metadata={
+            "audience": audience,
+            "content_type": content_type,
+            "candidates": len(found),
+            "rank_ms": round((time.perf_counter() - started) * 1000, 2),
+            "model": client.model,
+            "provider": client.provider,
+            **HEADLINES_TEMPLATE.metadata(),
+            **client.generation_metadata()
+        }
+    )
+
+
 def validate_blog_input(data: dict) -> BlogInput:
     """
     Validate blog input data using Pydantic
@@ -0,0 +1,245 @@
+"""
+Full Blog Draft Generator
+
+Writes a complete post from an outline in map-reduce fashion: every main
+section is expanded concurrently (map), then one short request writes the
+introduction, the transitions between sections and the conclusion (reduce).
+Wall-clock time is about that of the longest section plus the reduce pass.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+from pydantic import BaseModel, Field
+from generators.blog_generator import BlogOutline, BlogStructure
+from utils.llm_interface import llm, LocalLLM
+from utils.prompt_templates import (
+    get_blog_section_prompt,
+    get_blog_draft_reduce_prompt,
+    BLOG_SECTION_TEMPLATE,
+    BLOG_DRAFT_REDUCE_TEMPLATE,
+)
+from utils.output_parsers import parse_blog_outline, split_sections, list_items, clean_line
+from utils.similarity import split_into_chunks, top_chunks
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+# Total words of the finished post per outline length
+DRAFT_WORDS = {
+    "short": 1000,
+    "medium": 1750,
+    "long": 3000,
+}
+
+# Share of the post taken by the introduction and conclusion
+FRAME_SHARE = 0.2
+
+# Rough tokens per word of English prose, used to size each section's budget
+TOKENS_PER_WORD = 1.5
+
+REDUCE_SECTIONS = ["INTRODUCTION", "TRANSITIONS", "CONCLUSION"]
+
+FRAME_TITLES = ("introduction", "intro", "conclusion", "summary", "wrap-up", "wrapping up", "final thoughts")
+
+
+class DraftSection(BaseModel):
+    """One expanded section of a blog draft"""
+    title: str
+    content: str
+    seconds: float = Field(default=0.0, description="Generation time of this section")
+
+
+class BlogDraft(BaseModel):
+    """Generated full blog post draft"""
+    topic: str
+    title: str
+    introduction: str
+    sections: list[DraftSection]
+    transitions: list[str] = Field(default_factory=list)
+    conclusion: str
+    metadata: dict
+
+    @property
+    def draft(self) -> str:
+        """The assembled post body"""
+        md = f"{self.introduction.strip()}\n\n"
+        for index, section in enumerate(self.sections):
+            md += f"## {section.title}\n\n"
+            # transitions[i] leads from section i into section i + 1
+            if index and index - 1 < len(self.transitions):
+                md += f"{self.transitions[index - 1].strip()}\n\n"
+            md += f"{section.content.strip()}\n\n"
+        md += f"## Conclusion\n\n{self.conclusion.strip()}\n"
+        return md
+
+    def to_markdown(self) -> str:
+        """Convert to formatted markdown"""
+        return f"# {self.title}\n\n{self.draft}"
+
+
+def main_sections(structure: BlogStructure) -> list:
+    """Outline sections except the introduction and conclusion, which the reduce pass writes"""
+    return [section for section in structure.sections
+            if not section.title.lower().strip(" :").startswith(FRAME_TITLES)]
+
+
+def section_summary(section: DraftSection, lines: int = 2) -> str:
+    """Title plus the opening and closing sentences of a drafted section"""
+    paragraphs = [p.strip() for p in section.content.split("\n\n") if p.strip()]
+    if not paragraphs:
+        return f"{section.title}: (empty)"
+    opening = " ".join(paragraphs[0].split(". ")[:lines])
+    closing = " ".join(paragraphs[-1].split(". ")[-lines:])
+    return f"{section.title}\nStarts: {opening}\nEnds: {closing}"
+
+
+def generate_blog_draft(
+    outline: BlogOutline,
+    custom_context: Optional[str] = None,
+    model_override: Optional[str] = None,
+    provider_override: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    on_section: Optional[Callable[[dict], None]] = None
+) -> BlogDraft:
+    """
+    Write a full blog post from a generated outline
+
+    Args:
+        outline: Outline from generate_blog_outline
+        custom_context: Optional knowledge base; each section gets only the
+            chunks relevant to it (defaults to the context the outline was made with)
+        model_override: Optional specific model to use (overrides default)
+        provider_override: Optional provider to use ('ollama' or 'lm_studio')
+        temperature: Optional temperature setting (0.0-2.0)
+        max_tokens: Optional max tokens per request
+        on_section: Optional callback receiving {"type": "section", "index",
+            "title", "content"} as each section completes (called on this thread)
+
+    Returns:
+        BlogDraft with the expanded sections and the connecting text
+
+    Raises:
+        ValueError: If the outline has no main sections
+        Exception: If generation fails
+    """
+    logger.info(f"Generating blog draft for topic: '{outline.topic}'")
+    structure = outline.structured or BlogStructure.model_validate(parse_blog_outline(outline.outline))
+    sections = main_sections(structure)
+    if not sections:
+        logger.error("Outline has no main sections to expand")
+        raise ValueError("The outline has no main sections to expand. Regenerate or repair the outline first.")
+
+    if custom_context is None:
+        custom_context = (outline._session_seed or {}).get("custom_context")
+    chunks = split_into_chunks(custom_context) if custom_context else []
+
+    audience = outline.metadata.get("audience", "intermediate")
+    content_type = outline.metadata.get("content_type", "how-to")
+    total_words = DRAFT_WORDS.get(outline.metadata.get("length", "medium"), DRAFT_WORDS["medium"])
+    section_words = int(total_words * (1 - FRAME_SHARE) / len(sections))
+
+    try:
+        # Use overrides if provided, otherwise use default
+        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None else llm.current()
+
+        # Override provider if specified
+        if provider_override:
+            from config import settings
+            llm_instance.provider = provider_override
+            if provider_override == "ollama":
+                llm_instance.base_url = settings.OLLAMA_BASE_URL
+                if not model_override:
+                    llm_instance.model = settings.OLLAMA_MODEL
+            elif provider_override == "lm_studio":
+                llm_instance.base_url = settings.LM_STUDIO_BASE_URL
+                if not model_override:
+                    llm_instance.model = settings.LM_STUDIO_MODEL
+
+        # Update temperature and max_tokens if provided
+        if temperature is not None:
+            llm_instance.temperature = temperature
+        if max_tokens is not None:
+            llm_instance.max_tokens = max_tokens
+
+        from config import settings
+        started = time.perf_counter()
+        workers = max(1, min(settings.LLM_MAX_PARALLEL, len(sections)))
+        logger.info(f"Expanding {len(sections)} sections, {workers} at a time")
+
+        def expand(section) -> DraftSection:
+            client = llm_instance.clone()
+            client.max_tokens = min(llm_instance.max_tokens, int(section_words * TOKENS_PER_WORD * 1.5))
+            query = " ".join([section.title] + section.key_points)
+            reference = "\n\n---\n\n".join(top_chunks(query, chunks)) if chunks else None
+            prompt = get_blog_section_prompt(outline.outline, audience, content_type, section.title,
+                                             section.key_points, section_words, reference)
+            section_started = time.perf_counter()
+            content = client.generate(prompt=prompt, system_prompt=BLOG_SECTION_TEMPLATE.system_prompt,
+                                      stop=BLOG_SECTION_TEMPLATE.stop)
+            return DraftSection(title=section.title, content=strip_section_header(content, section.title),
+                                seconds=round(time.perf_counter() - section_started, 2))
+
+        # Map: expand the sections concurrently, reporting each as it completes
+        drafted: list[Optional[DraftSection]] = [None] * len(sections)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(expand, section): index for index, section in enumerate(sections)}
+            for future in as_completed(futures):
+                index = futures[future]
+                drafted[index] = future.result()
+                if on_section is not None:
+                    on_section({"type": "section", "index": index, "title": drafted[index].title,
+                                "content": drafted[index].content})
+        map_seconds = time.perf_counter() - started
+
+        # Reduce: introduction, transitions and conclusion from the section summaries
+        logger.info("Writing introduction, transitions and conclusion")
+        reducer = llm_instance.clone()
+        frame_tokens = int(total_words * FRAME_SHARE * TOKENS_PER_WORD * 1.5) + 50 * len(sections)
+        reducer.max_tokens = min(llm_instance.max_tokens, frame_tokens)
+        summaries = "\n\n".join(section_summary(section) for section in drafted)
+        reduce_text = reducer.generate(prompt=get_blog_draft_reduce_prompt(outline.outline, audience, summaries),
+                                       system_prompt=BLOG_DRAFT_REDUCE_TEMPLATE.system_prompt,
+                                       stop=BLOG_DRAFT_REDUCE_TEMPLATE.stop)
+        parts = split_sections(reduce_text, REDUCE_SECTIONS)
+
+        draft = BlogDraft(
+            topic=outline.topic,
+            title=structure.headlines[0] if structure.headlines else outline.topic,
+            introduction="\n".join(parts.get("INTRODUCTION", [])).strip(),
+            sections=drafted,
+            transitions=list_items(parts.get("TRANSITIONS", []))[:len(drafted) - 1],
+            conclusion="\n".join(parts.get("CONCLUSION", [])).strip(),
+            metadata={
+                "audience": audience,
+                "content_type": content_type,
+                "target_words": total_words,
+                "model": llm_instance.model,
+                "provider": llm_instance.provider,
+                "sections": len(drafted),
+                "parallel_requests": workers,
+                "map_seconds": round(map_seconds, 2),
+                "longest_section_seconds": max(section.seconds for section in drafted),
+                "total_seconds": round(time.perf_counter() - started, 2),
+                "reference_chunks": len(chunks),
+                **BLOG_SECTION_TEMPLATE.metadata(),
+                "reduce_prompt_version": BLOG_DRAFT_REDUCE_TEMPLATE.metadata()["prompt_version"],
+            }
+        )
+        draft.metadata["words"] = len(draft.draft.split())
+
+        logger.info(f"Blog draft created successfully for '{outline.topic}' ({draft.metadata['words']} words)")
+        return draft
+
+    except Exception as e:
+        logger.error(f"Failed to generate blog draft: {str(e)}")
+        raise Exception(f"Failed to generate blog draft: {str(e)}")
+
+
+def strip_section_header(content: str, title: str) -> str:
+    """Remove a repeated section header from the start of a drafted section"""
+    lines = content.strip().splitlines()
+    if lines and clean_line(lines[0]).lower().strip(" :") == title.lower().strip(" :"):
+        lines = lines[1:]
+    return "\n".join(lines).strip()
@@ -0,0 +1,147 @@
+"""
+Generator registry
+
+Maps the generator names used outside the Streamlit app (batch runs, the HTTP
+API) to their generate functions, and turns loosely typed inputs (CSV cells,
+JSON values) into keyword arguments those functions accept.
+"""
+import hashlib
+import inspect
+import json
+import time
+import typing
+from typing import Any, Optional
+from pydantic import ValidationError
+from generators.blog_generator import generate_blog_outline, BlogInput, BlogOutline
+from generators.social_generator import generate_social_calendar, SocialMediaInput, SocialMediaCalendar
+from generators.writing_generator import generate_writing_prompt, WritingPromptInput, WritingPrompt
+from utils.history_store import record_result
+
+GENERATORS = {
+    "blog": {"function": generate_blog_outline, "input_model": BlogInput, "output_model": BlogOutline,
+             "required": "topic", "text_field": "outline"},
+    "social": {"function": generate_social_calendar, "input_model": SocialMediaInput,
+               "output_model": SocialMediaCalendar, "required": "theme", "text_field": "calendar"},
+    "writing": {"function": generate_writing_prompt, "input_model": WritingPromptInput,
+                "output_model": WritingPrompt, "required": "genre", "text_field": "prompt"},
+}
+
+# Parameters that only make sense inside the app
+_EXCLUDED_PARAMS = {"stream_callback"}
+
+
+def generator_params(kind: str) -> dict[str, type]:
+    """
+    Accepted parameters of a generator and their types (Optional unwrapped)
+
+    Raises:
+        ValueError: If the generator is unknown
+    """
+    if kind not in GENERATORS:
+        raise ValueError(f"Generator must be one of: {', '.join(GENERATORS)}")
+    function = GENERATORS[kind]["function"]
+    hints = typing.get_type_hints(function)
+    params = {}
+    for name in inspect.signature(function).parameters:
+        if name in _EXCLUDED_PARAMS:
+            continue
+        hint = hints.get(name, str)
+        arguments = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        if typing.get_origin(hint) is typing.Union and len(arguments) == 1:
+            hint = arguments[0]
+        params[name] = hint
+    return params
+
+
+def _coerce(name: str, value: Any, hint: type) -> Any:
+    """Convert a CSV cell or JSON value to the parameter's type"""
+    if hint is bool:
+        if isinstance(value, str):
+            if value.strip().lower() not in ("true", "false", "yes", "no", "1", "0"):
+                raise ValueError(f"{name} must be true or false, got '{value}'")
+            return value.strip().lower() in ("true", "yes", "1")
+        return bool(value)
+    if hint is int:
+        return int(value)
+    if hint is float:
+        return float(value)
+    if typing.get_origin(hint) is list:
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return [str(item) for item in value]
+    return str(value).strip()
+
+
+def build_params(kind: str, inputs: dict) -> dict:
+    """
+    Keyword arguments for a generator from loosely typed inputs
+
+    Empty values are dropped so the generator's defaults apply. The core
+    inputs are checked against the generator's input model (e.g. BlogInput).
+
+    Args:
+        kind: Generator name (see GENERATORS)
+        inputs: Parameter names to values (strings from CSV or JSON values)
+
+    Returns:
+        Arguments ready to pass to the generate function
+
+    Raises:
+        ValueError: If the generator is unknown, a parameter is unknown or has
+            a bad value, or the required input is missing
+    """
+    accepted = generator_params(kind)
+    unknown = sorted(set(inputs) - set(accepted))
+    if unknown:
+        raise ValueError(f"Unknown {kind} parameter(s): {', '.join(unknown)}")
+    params = {}
+    for name, value in inputs.items():
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        try:
+            params[name] = _coerce(name, value, accepted[name])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid value for {name}: {str(e)}")
+    required = GENERATORS[kind]["required"]
+    if required not in params:
+        raise ValueError(f"Missing required {kind} parameter: {required}")
+    input_model = GENERATORS[kind]["input_model"]
+    try:
+        input_model.model_validate({name: value for name, value in params.items()
+                                    if name in input_model.model_fields})
+    except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+        raise ValueError(f"Invalid {kind} input: {problems}")
+    return params
+
+
+def params_hash(kind: str, params: dict) -> str:
+    """Stable hash of a generator request (same inputs, same hash)"""
+    canonical = json.dumps({"type": kind, **params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def run_generator(kind: str, params: dict, owner: Optional[str] = None):
+    """
+    Run a generator with arguments from build_params and record the result in the history
+
+    Args:
+        owner: Who the result is recorded for (a user id, "api", "batch"...)
+
+    Returns:
+        The generator's result model
+    """
+    started = time.perf_counter()
+    result = GENERATORS[kind]["function"](**params)
+    record_result(kind, result, params, owner, time.perf_counter() - started)
+    return result
+
+
+def dump_result(result) -> dict:
+    """JSON-ready form of a generator result: the result model and its Markdown"""
+    return {"result": result.model_dump(mode="json"), "markdown": result.to_markdown()}
+
+
+def load_result(kind: str, data: dict):
+    """Result model back from the "result" part of dump_result"""
+    return GENERATORS[kind]["output_model"].model_validate(data)
@@ -0,0 +1,385 @@
+"""
+Blog Series Planner
+
+Plans a series of blog posts, then outlines every post concurrently with the
+series plan as shared context. Headlines and sections that repeat across
+posts are found with a near-duplicate index, and only the colliding posts are
+outlined again.
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+from pydantic import BaseModel
+from generators.blog_generator import BlogOutline, BlogStructure
+from generators.draft_generator import main_sections
+from utils.llm_interface import llm, LocalLLM
+from utils.prompt_templates import (
+    get_series_plan_prompt,
+    get_series_post_outline_prompt,
+    BLOG_OUTLINE_TEMPLATE,
+    SERIES_PLAN_TEMPLATE,
+)
+from utils.output_parsers import (
+    parse_blog_outline,
+    split_sections,
+    list_items,
+    SectionCompletionDetector,
+    BLOG_SECTIONS,
+)
+from utils.similarity import NearDuplicateIndex
+from utils.export_utils import create_zip_bundle, read_zip_bundle
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+SERIES_PLAN_SECTIONS = ["SERIES OVERVIEW", "POSTS"]
+
+MAX_SERIES_POSTS = 24
+
+# Jaccard similarity at which a headline or section of one post repeats another post
+OVERLAP_THRESHOLD = 0.6
+
+
+class SeriesPost(BaseModel):
+    """One entry of a series plan"""
+    title: str
+    scope: str = ""
+
+
+class BlogSeries(BaseModel):
+    """Generated blog series: the plan plus one outline per post"""
+    theme: str
+    overview: str
+    plan: list[SeriesPost]
+    outlines: list[BlogOutline]
+    metadata: dict
+
+    @property
+    def plan_text(self) -> str:
+        """The plan in the form given to every post's outline prompt"""
+        lines = [f"{index}. {post.title} - {post.scope}".rstrip(" -") for index, post in enumerate(self.plan, 1)]
+        return f"{self.overview}\n\n" + "\n".join(lines)
+
+    def to_markdown(self) -> str:
+        """Convert to formatted markdown (the plan followed by every outline)"""
+        md = f"# Blog Series: {self.theme}\n\n{self.plan_text}\n"
+        for index, outline in enumerate(self.outlines, 1):
+            md += f"\n---\n\n# Part {index}: {outline.topic}\n\n{outline.outline.strip()}\n"
+        return md
+
+
+def parse_series_plan(text: str) -> tuple[str, list[SeriesPost]]:
+    """
+    Parse a series plan response
+
+    Returns:
+        Tuple of (overview, planned posts in reading order)
+    """
+    sections = split_sections(text, SERIES_PLAN_SECTIONS)
+    overview = " ".join(line.strip() for line in sections.get("SERIES OVERVIEW", []) if line.strip())
+    posts = []
+    for item in list_items(sections.get("POSTS", [])):
+        title, _, scope = item.strip('"').partition(" - ")
+        if title.strip():
+            posts.append(SeriesPost(title=title.strip(' "*'), scope=scope.strip()))
+    return overview, posts
+
+
+def outline_items(outline: BlogOutline) -> list[str]:
+    """Headlines and main section titles of an outline (what readers see of a post)"""
+    structure = outline.structured or BlogStructure.model_validate(parse_blog_outline(outline.outline))
+    return structure.headlines + [section.title for section in main_sections(structure)]
+
+
+def find_series_overlaps(outlines: list[BlogOutline], threshold: float = OVERLAP_THRESHOLD) -> dict[int, list[str]]:
+    """
+    Find posts whose headlines or sections repeat an earlier post of the series
+
+    Args:
+        outlines: Outlines in reading order (earlier posts are kept)
+        threshold: Jaccard similarity of content words at which two items overlap
+
+    Returns:
+        Post index -> the earlier posts' items it repeats
+    """
+    index = NearDuplicateIndex(threshold=threshold)
+    overlaps: dict[int, list[str]] = {}
+    for post, outline in enumerate(outlines):
+        items = outline_items(outline)
+        for item in items:
+            for (other, other_item), _ in index.query(item):
+                if other != post and other_item not in overlaps.get(post, []):
+                    overlaps.setdefault(post, []).append(other_item)
+        for item in items:
+            index.add((post, item), item)
+    return overlaps
+
+
+def generate_series_post_outline(
+    llm_instance: LocalLLM,
+    plan_text: str,
+    post: SeriesPost,
+    position: str,
+    audience: str,
+    length: str,
+    content_type: str,
+    custom_context: Optional[str] = None,
+    avoid: Optional[list[str]] = None,
+    early_stop: bool = True
+) -> BlogOutline:
+    """
+    Outline one post of a series
+
+    Args:
+        llm_instance: Client used only by this post (see LocalLLM.clone)
+        plan_text: The series plan shared by every post
+        post: The post to outline
+        position: Where the post sits in the series (e.g. "3 of 12")
+        audience, length, content_type, custom_context: Series settings
+        avoid: Headlines and sections of other posts to stay away from
+        early_stop: Close the stream once all outline sections are complete
+
+    Returns:
+        BlogOutline for the post
+    """
+    topic = f"{post.title} - {post.scope}" if post.scope else post.title
+    prompt = get_series_post_outline_prompt(plan_text, topic, position, audience, length, content_type,
+                                            custom_context, avoid)
+    system_prompt = BLOG_OUTLINE_TEMPLATE.system_prompt
+    if early_stop:
+        response = llm_instance.stream_text(prompt=prompt, system_prompt=system_prompt,
+                                            stop=BLOG_OUTLINE_TEMPLATE.stop,
+                                            completion_detector=SectionCompletionDetector(BLOG_SECTIONS))
+    else:
+        response = llm_instance.generate(prompt=prompt, system_prompt=system_prompt, stop=BLOG_OUTLINE_TEMPLATE.stop)
+
+    outline = BlogOutline(
+        topic=post.title,
+        outline=response,
+        metadata={
+            "audience": audience,
+            "length": length,
+            "content_type": content_type,
+            "series_position": position,
+            "model": llm_instance.model,
+            "provider": llm_instance.provider,
+            **BLOG_OUTLINE_TEMPLATE.metadata(),
+            **llm_instance.generation_metadata()
+        }
+    )
+    outline._session_seed = {
+        "llm": llm_instance.clone(),
+        "prompt": prompt,
+        "system_prompt": system_prompt,
+        # None if the outline's stream was stopped early
+        "context": llm_instance.last_context,
+        "response": response,
+        "custom_context": custom_context,
+    }
+    return outline
+
+
+def generate_blog_series(
+    theme: str,
+    post_count: int = 6,
+    audience: str = "intermediate",
+    length: str = "medium",
+    content_type: str = "how-to",
+    custom_context: Optional[str] = None,
+    model_override: Optional[str] = None,
+    provider_override: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    early_stop: bool = True,
+    on_post: Optional[Callable[[dict], None]] = None
+) -> BlogSeries:
+    """
+    Plan a blog series and outline every post
+
+    Args:
+        theme: What the series is about
+        post_count: Number of posts (2 to MAX_SERIES_POSTS)
+        audience: Target audience (beginners, intermediate, experts)
+        length: Length of each post (short, medium, long)
+        content_type: Type of content (tutorial, listicle, how-to, opinion)
+        custom_context: Optional custom information/documentation to reference
+        model_override: Optional specific model to use (overrides default)
+        provider_override: Optional provider to use ('ollama' or 'lm_studio')
+        temperature: Optional temperature setting (0.0-2.0)
+        max_tokens: Optional max tokens per request
+        early_stop: Close each outline's stream once all of its sections are complete
+        on_post: Optional callback receiving {"type": "plan", "posts"} once the
+            plan is ready and {"type": "post", "index", "title", "outline"} as
+            each outline completes (called on this thread)
+
+    Returns:
+        BlogSeries with the plan and one outline per post
+
+    Raises:
+        ValueError: If parameters are invalid or the plan lists no posts
+        Exception: If generation fails
+    """
+    logger.info(f"Generating blog series for theme: '{theme}' ({post_count} posts)")
+
+    # Validate inputs
+    valid_audiences = ["beginners", "intermediate", "experts"]
+    valid_lengths = ["short", "medium", "long"]
+    valid_types = ["tutorial", "listicle", "how-to", "opinion"]
+
+    if not 2 <= post_count <= MAX_SERIES_POSTS:
+        logger.error(f"Invalid post count: {post_count}")
+        raise ValueError(f"A series must have between 2 and {MAX_SERIES_POSTS} posts")
+
+    if audience.lower() not in valid_audiences:
+        logger.error(f"Invalid audience: {audience}")
+        raise ValueError(f"Audience must be one of: {', '.join(valid_audiences)}")
+
+    if length.lower() not in valid_lengths:
+        logger.error(f"Invalid length: {length}")
+        raise ValueError(f"Length must be one of: {', '.join(valid_lengths)}")
+
+    if content_type.lower() not in valid_types:
+        logger.error(f"Invalid content type: {content_type}")
+        raise ValueError(f"Content type must be one of: {', '.join(valid_types)}")
+
+    try:
+        # Use overrides if provided, otherwise use default
+        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None else llm.current()
+
+        # Override provider if specified
+        if provider_override:
+            from config import settings
+            llm_instance.provider = provider_override
+            if provider_override == "ollama":
+                llm_instance.base_url = settings.OLLAMA_BASE_URL
+                if not model_override:
+                    llm_instance.model = settings.OLLAMA_MODEL
+            elif provider_override == "lm_studio":
+                llm_instance.base_url = settings.LM_STUDIO_BASE_URL
+                if not model_override:
+                    llm_instance.model = settings.LM_STUDIO_MODEL
+
+        # Update temperature and max_tokens if provided
+        if temperature is not None:
+            llm_instance.temperature = temperature
+        if max_tokens is not None:
+            llm_instance.max_tokens = max_tokens
+
+        from config import settings
+        started = time.perf_counter()
+
+        # Plan the series in one request
+        logger.info("Planning the series...")
+        planner = llm_instance.clone()
+        plan_response = planner.generate(prompt=get_series_plan_prompt(theme, post_count, audience, content_type,
+                                                                       custom_context),
+                                         system_prompt=SERIES_PLAN_TEMPLATE.system_prompt,
+                                         stop=SERIES_PLAN_TEMPLATE.stop)
+        overview, plan = parse_series_plan(plan_response)
+        if not plan:
+            logger.error("Series plan lists no posts")
+            raise ValueError("The series plan did not list any posts. Try again or rephrase the theme.")
+        if len(plan) != post_count:
+            logger.warning(f"Series plan lists {len(plan)} posts instead of {post_count}")
+        plan = plan[:post_count]
+        series = BlogSeries(theme=theme, overview=overview, plan=plan, outlines=[], metadata={})
+        plan_text = series.plan_text
+        if on_post is not None:
+            on_post({"type": "plan", "posts": [post.title for post in plan]})
+
+        workers = max(1, min(settings.LLM_MAX_PARALLEL, len(plan)))
+        clients = [planner]
+
+        def outline_posts(indices: list[int], avoid: dict[int, list[str]]) -> dict[int, BlogOutline]:
+            """Outline the given posts concurrently, reporting each as it completes"""
+            results = {}
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {}
+                for index in indices:
+                    client = llm_instance.clone()
+                    clients.append(client)
+                    futures[pool.submit(generate_series_post_outline, client, plan_text, plan[index],
+                                        f"{index + 1} of {len(plan)}", audience, length, content_type,
+                                        custom_context, avoid.get(index), early_stop)] = index
+                for future in as_completed(futures):
+                    index = futures[future]
+                    results[index] = future.result()
+                    if on_post is not None:
+                        on_post({"type": "post", "index": index, "title": plan[index].title,
+                                 "outline": results[index].outline})
+            return results
+
+        # Outline every post with the plan as shared context
+        logger.info(f"Outlining {len(plan)} posts, {workers} at a time")
+        outlines = outline_posts(list(range(len(plan))), {})
+        series.outlines = [outlines[index] for index in range(len(plan))]
+
+        # Outline the posts that repeat earlier posts once more, steering away from the repeats
+        overlaps = find_series_overlaps(series.outlines)
+        if overlaps:
+            logger.info(f"Regenerating {len(overlaps)} post(s) that overlap earlier posts")
+            for index, outline in outline_posts(sorted(overlaps), overlaps).items():
+                series.outlines[index] = outline
+        remaining = find_series_overlaps(series.outlines)
+
+        generations = [client.generation_metadata() for client in clients]
+        series.metadata = {
+            "audience": audience,
+            "length": length,
+            "content_type": content_type,
+            "posts": len(plan),
+            "model": llm_instance.model,
+            "provider": llm_instance.provider,
+            "parallel_requests": workers,
+            "regenerated_posts": [index + 1 for index in sorted(overlaps)],
+            "remaining_overlaps": {index + 1: items for index, items in remaining.items()},
+            "tokens_generated": sum(generation["tokens_generated"] or 0 for generation in generations),
+            "total_seconds": round(time.perf_counter() - started, 2),
+            "plan_prompt_version": SERIES_PLAN_TEMPLATE.metadata()["prompt_version"],
+            **BLOG_OUTLINE_TEMPLATE.metadata(),
+        }
+
+        logger.info(f"Blog series created successfully for '{theme}'")
+        return series
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to generate blog series: {str(e)}")
+        raise Exception(f"Failed to generate blog series: {str(e)}")
+
+
+def series_bundle(series: BlogSeries) -> bytes:
+    """
+    Export a series as one zip archive
+
+    The archive holds the plan (README.md), one markdown file per post and
+    series.json, from which load_series_bundle restores the series.
+    """
+    files = {"README.md": f"# Blog Series: {series.theme}\n\n{series.plan_text}\n"}
+    for index, outline in enumerate(series.outlines, 1):
+        files[f"posts/{index:02d}_{_slug(outline.topic)}.md"] = (
+            f"# Part {index}: {outline.topic}\n\n{outline.outline.strip()}\n")
+    files["series.json"] = series.model_dump_json(indent=2)
+    return create_zip_bundle(files)
+
+
+def load_series_bundle(data: bytes) -> BlogSeries:
+    """
+    Restore a series saved with series_bundle
+
+    Raises:
+        ValueError: If the archive has no series.json
+    """
+    files = read_zip_bundle(data)
+    if "series.json" not in files:
+        raise ValueError("Not a blog series bundle (series.json is missing)")
+    return BlogSeries.model_validate(json.loads(files["series.json"]))
+
+
+def _slug(text: str) -> str:
+    """Lowercase, filename-safe version of a title"""
+    words = "".join(char if char.isalnum() else " " for char in text.lower()).split()
+    return "_".join(words)[:60] or "post"
@@ -1,16 +1,38 @@
 """
 Social Media Calendar Generator
 """
-from typing import Optional
-from datetime import datetime, timedelta
-from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError
 from utils.llm_interface import llm, LocalLLM
-from utils.prompt_templates import get_social_media_prompt
+from utils.prompt_templates import (
+    get_social_media_prompt,
+    get_platform_adaptation_prompt,
+    SOCIAL_MEDIA_TEMPLATE,
+    PLATFORM_ADAPTATION_TEMPLATE,
+)
+from utils.output_parsers import (
+    extract_json,
+    parse_post_block,
+    parse_social_calendar,
+    post_date,
+    post_header_offsets,
+    PostCountDetector,
+)
+from utils.repair import request_repair, repair_budget, MISSING_POSTS_PROMPT
+from utils.similarity import find_near_duplicates
+from utils.platform_limits import fit_post_to_platform
+from utils.scheduler import PostingSchedule, POST_DATE_FORMAT
+from utils.variants import generate_variants, SOCIAL_ANGLES
 from utils.logger import setup_logger
 
 # Set up logger
 logger = setup_logger(__name__)
 
+# Calendars with more posts than this are generated as concurrent week-sized chunks
+CHUNK_THRESHOLD = 10
+
 
 class SocialMediaInput(BaseModel):
     """Input parameters for social media calendar generation"""
@@ -33,11 +55,48 @@ class SocialMediaInput(BaseModel):
         }
 
 
+class SocialPost(BaseModel):
+    """One scheduled post in a structured calendar"""
+    date: str = Field(..., description="Date or day of the post")
+    format: str = Field(default="", description="Post type: text post, image, video, thread, carousel, ...")
+    idea: str = Field(..., description="Content idea")
+    caption: str = Field(default="", description="Caption or hook (first line)")
+    engagement_prompt: str = Field(default="", description="Question or call-to-action")
+    hashtags: list[str] = Field(default_factory=list, description="Hashtags including the leading #")
+
+
+class CalendarStructure(BaseModel):
+    """Typed social media calendar produced in structured output mode"""
+    posts: list[SocialPost] = Field(default_factory=list, description="Posts in date order")
+
+    def to_markdown(self) -> str:
+        """Render posts in the post format the free-form prompt asks for"""
+        blocks = []
+        for post in self.posts:
+            header = f"**{post.date}**: {post.format} - {post.idea}" if post.format else f"**{post.date}**: {post.idea}"
+            lines = [header]
+            if post.caption:
+                lines.append(f"Caption/Hook: {post.caption}")
+            if post.engagement_prompt:
+                lines.append(f"Engagement Prompt: {post.engagement_prompt}")
+            if post.hashtags:
+                lines.append(f"Hashtags: {' '.join(post.hashtags)}")
+            blocks.append("  \n".join(lines))
+        return "\n\n".join(blocks) + "\n"
+
+
 class SocialMediaCalendar(BaseModel):
     """Generated social media calendar"""
     theme: str
     calendar: str
     metadata: dict
+    structured: Optional[CalendarStructure] = None
+    # Multi-platform mode: platform name -> calendar adapted for that platform
+    platform_calendars: dict[str, str] = Field(default_factory=dict)
+    # Lower-ranked variants when several were requested (see utils.variants)
+    alternatives: list["SocialMediaCalendar"] = Field(default_factory=list)
+    # Prompt and backend state needed to continue the conversation (see utils.refinement)
+    _session_seed: Optional[dict] = PrivateAttr(default=None)
 
     def to_markdown(self) -> str:
         """Convert to formatted markdown"""
@@ -47,7 +106,11 @@ class SocialMediaCalendar(BaseModel):
         md += f"**Timeframe:** {self.metadata.get('timeframe', '')}\n"
         md += f"**Tone:** {self.metadata.get('tone', '')}\n\n"
         md += "---\n\n"
-        md += self.calendar
+        if not self.platform_calendars:
+            md += self.calendar
+            return md
+        for platform, calendar in self.platform_calendars.items():
+            md += f"## {platform}\n\n{calendar.strip()}\n\n"
         return md
 
     def get_formatted_calendar(self) -> str:
@@ -68,7 +131,16 @@ def generate_social_calendar(
     model_override: Optional[str] = None,
     provider_override: Optional[str] = None,
     temperature: Optional[float] = None,
-    max_tokens: Optional[int] = None) -> SocialMediaCalendar:
+    max_tokens: Optional[int] = None,
+    structured: bool = False,
+    stream_callback: Optional[Callable[[str], None]] = None,
+    early_stop: bool = True,
+    parallel: bool = True,
+    timezone: Optional[str] = None,
+    blackout_dates: Optional[list[str]] = None,
+    variants: int = 1,
+    angle: Optional[str] = None,
+    seed: Optional[int] = None) -> SocialMediaCalendar:
     """
     Generate a social media content calendar using the local LLM
     
@@ -76,12 +148,23 @@ def generate_social_calendar(
         theme: Content theme or topic focus
         frequency: Posting frequency (daily, 3x week, weekly, 2x week)
         platform: Target platform (LinkedIn, Twitter, Instagram, Facebook, TikTok)
-        timeframe: Time period (week, month, quarter)
+        timeframe: Time period (week, month, quarter, year)
         tone: Brand voice/tone (professional, casual, friendly, educational, inspirational)
         model_override:  Optional specific model to use (overrides default)
         provider_override: Optional provider to use ('ollama' or 'lm_studio')
         temperature: Optional temperature setting (0.0-2.0)
         max_tokens: Optional max tokens for response
+        structured: Request JSON output and fill SocialMediaCalendar.structured
+        stream_callback: Optional callback receiving text chunks as they are generated
+        early_stop: Stream and close the connection once all required sections are complete
+        parallel: Generate long calendars as concurrent week-sized chunks
+            (settings.LLM_MAX_PARALLEL at a time)
+        timezone: IANA time zone of the schedule (defaults to settings.TIMEZONE)
+        blackout_dates: Dates (YYYY-MM-DD) to leave without posts
+        variants: Number of distinct calendars to generate concurrently; the best
+            is returned with the others, ranked, in `alternatives`
+        angle: Optional content focus (set per variant)
+        seed: Optional sampling seed
     
     Returns:
         SocialMediaCalendar object with generated content
@@ -101,7 +184,7 @@ def generate_social_calendar(
     # Validate inputs (case-insensitive checks)
     valid_frequencies = ["daily", "3x week", "2x week", "weekly"]
     valid_platforms = ["linkedin", "twitter", "instagram", "facebook", "tiktok"]
-    valid_timeframes = ["week", "month", "quarter"]
+    valid_timeframes = ["week", "month", "quarter", "year"]
     valid_tones = ["professional", "casual", "friendly", "educational", "inspirational", "humorous"]
 
     if frequency.lower() not in valid_frequencies:
@@ -120,20 +203,39 @@ def generate_social_calendar(
         logger.error(f"Invalid tone: {tone}")
         raise ValueError(f"Tone must be one of: {', '.join(valid_tones)}")
     
+    if variants > 1:
+        ranked, summary = generate_variants(
+            lambda option: generate_social_calendar(
+                theme, frequency, platform, timeframe, tone, model_override, provider_override,
+                option["temperature"], max_tokens, structured, None, early_stop, parallel, timezone,
+                blackout_dates, angle=option["angle"], seed=option["seed"]),
+            text_of=lambda calendar: calendar.calendar,
+            count=variants,
+            temperature=temperature,
+            angles=SOCIAL_ANGLES,
+            gaps=find_missing_post_dates,
+        )
+        ranked[0].metadata.update(summary)
+        return ranked[0].model_copy(update={"alternatives": ranked[1:]})
+    
+    # Real posting dates (weekday pattern, time zone, blackouts) go into the prompt
+    from config import settings
+    timezone = timezone or settings.TIMEZONE
+    schedule = PostingSchedule(frequency, timeframe, timezone=timezone, blackout_dates=blackout_dates)
+    post_dates = [day.strftime(POST_DATE_FORMAT) for day in schedule.dates()]
+    
     # Generate the prompt
-    prompt = get_social_media_prompt(theme, frequency, platform, timeframe, tone)
+    json_schema = CalendarStructure.model_json_schema() if structured else None
+    prompt = get_social_media_prompt(theme, frequency, platform, timeframe, tone, json_schema, post_dates=post_dates,
+                                     angle=angle)
     logger.debug("Prompt generated successfully")
     
-    # System prompt for consistent output
-    system_prompt = """You are an expert social media strategist and content creator.
-You create engaging, platform-optimized social media calendars that drive audience engagement.
-Your calendars are well-structured, actionable, and tailored to the specific platform and audience. 
-You understand platform-specific best practices, optimal posting times, and content formats.
-Always format your output clearly with dates, post ideas, engagement prompts, and hashtags."""
+    # System prompt for consistent output (part of the cached static prefix)
+    system_prompt = SOCIAL_MEDIA_TEMPLATE.system_prompt
     
     try:
         # Use overrides if provided, otherwise use default
-        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None else llm
+        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None or seed is not None else llm.current()
         
         # Override provider if specified
         if provider_override:
@@ -148,21 +250,52 @@ Always format your output clearly with dates, post ideas, engagement prompts, an
                 if not model_override:
                     llm_instance.model = settings.LM_STUDIO_MODEL
         
-        # Update temperature and max_tokens if provided
+        # Update temperature, max_tokens and seed if provided
         if temperature is not None:
             llm_instance.temperature = temperature
         if max_tokens is not None:
             llm_instance.max_tokens = max_tokens
+        if seed is not None:
+            llm_instance.seed = seed
         
         # Generate the calendar
-        logger.info("Sending request to LLM...")
-        response = llm_instance.generate(prompt=prompt, system_prompt=system_prompt)
+        chunks = chunk_post_dates(post_dates) if parallel and len(post_dates) > CHUNK_THRESHOLD else [post_dates]
+        structure = None
+        structured_source = None
+        if len(chunks) > 1:
+            response, structured_source, generation = generate_calendar_chunks(
+                llm_instance, chunks, theme, frequency, platform, timeframe, tone,
+                json_schema=json_schema, stream_callback=stream_callback, early_stop=early_stop, angle=angle
+            )
+            calendar_text = response
+            if structured:
+                structure = CalendarStructure.model_validate(parse_social_calendar(response))
+        else:
+            logger.info("Sending request to LLM...")
+            detector = None
+            if early_stop and not structured:
+                detector = PostCountDetector(len(post_dates))
+            if stream_callback is not None or detector is not None:
+                response = llm_instance.stream_text(prompt=prompt, system_prompt=system_prompt, json_schema=json_schema,
+                                                    on_chunk=stream_callback, stop=SOCIAL_MEDIA_TEMPLATE.stop,
+                                                    completion_detector=detector)
+            else:
+                response = llm_instance.generate(prompt=prompt, system_prompt=system_prompt,
+                                                 json_schema=json_schema, stop=SOCIAL_MEDIA_TEMPLATE.stop)
+            generation = llm_instance.generation_metadata()
+            
+            calendar_text = response
+            if structured:
+                structure, structured_source = parse_calendar_structure(response)
+                if structured_source == "json":
+                    calendar_text = structure.to_markdown()
         logger.info("Successfully received response from LLM")
         
         # Create the calendar object
         calendar = SocialMediaCalendar(
             theme=theme,
-            calendar=response,
+            calendar=calendar_text,
+            structured=structure,
             metadata={
                 "frequency": frequency,
                 "platform": platform,
@@ -171,8 +304,26 @@ Always format your output clearly with dates, post ideas, engagement prompts, an
                 "model": getattr(llm_instance, 'model', None),
                 "provider": getattr(llm_instance, 'provider', None),
                 "generated_date": datetime.now().isoformat(),
+                "start_date": schedule.start_date.isoformat(),
+                "timezone": timezone,
+                "blackout_dates": sorted(day.isoformat() for day in schedule.blackout_dates),
+                **SOCIAL_MEDIA_TEMPLATE.metadata(),
+                **generation,
             },
         )
+        if len(chunks) > 1:
+            calendar.metadata["chunks"] = len(chunks)
+        if structured:
+            calendar.metadata["structured_output"] = structured_source
+        
+        calendar._session_seed = {
+            "llm": llm_instance.clone(),
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            # A chunked calendar was not one conversation, so there is no context to continue
+            "context": llm_instance.last_context if len(chunks) == 1 else None,
+            "response": response,
+        }
         
         logger.info(f"Social media calendar created successfully for '{theme}'")
         return calendar
@@ -182,45 +333,525 @@ Always format your output clearly with dates, post ideas, engagement prompts, an
         raise Exception(f"Failed to generate social media calendar: {str(e)}")
 
 
-def calculate_post_dates(frequency: str, timeframe: str, start_date: Optional[datetime] = None) -> list[str]:
+def generate_multi_platform_calendar(
+    theme: str,
+    platforms: list[str],
+    frequency: str = "3x week",
+    timeframe: str = "month",
+    tone: str = "professional",
+    model_override: Optional[str] = None,
+    provider_override: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    adaptation_model: Optional[str] = None,
+    structured: bool = False,
+    stream_callback: Optional[Callable[[str], None]] = None,
+    timezone: Optional[str] = None,
+    blackout_dates: Optional[list[str]] = None) -> SocialMediaCalendar:
     """
-    Calculate specific post dates based on frequency and timeframe
+    Generate one content plan and adapt it to several platforms in parallel
+    
+    The plan is generated once, for the first platform. The other platforms
+    get a short adaptation request each that rewrites the planned posts in
+    the platform's style; all of them share the plan as their cached prompt
+    prefix. Character and hashtag limits are then enforced locally.
+    
+    Args:
+        theme: Content theme or topic focus
+        platforms: Target platforms; the first one gets the base plan
+        frequency: Posting frequency (daily, 3x week, weekly, 2x week)
+        timeframe: Time period (week, month, quarter, year)
+        tone: Brand voice/tone
+        model_override: Optional specific model to use (overrides default)
+        provider_override: Optional provider to use ('ollama' or 'lm_studio')
+        temperature: Optional temperature setting (0.0-2.0)
+        max_tokens: Optional max tokens for response
+        adaptation_model: Optional smaller, faster model for the adaptations
+        structured: Request JSON output for the base plan
+        stream_callback: Optional callback receiving the base plan as it is generated
+        timezone: IANA time zone of the schedule (defaults to settings.TIMEZONE)
+        blackout_dates: Dates (YYYY-MM-DD) to leave without posts
+    
+    Returns:
+        SocialMediaCalendar whose platform_calendars holds one view per platform
+    
+    Raises:
+        ValueError: If parameters are invalid
+        Exception: If generation fails
+    """
+    from config import settings
+    
+    platforms = list(dict.fromkeys(platforms))
+    if not platforms:
+        raise ValueError("Select at least one platform")
+    valid_platforms = ["linkedin", "twitter", "instagram", "facebook", "tiktok"]
+    for platform in platforms:
+        if platform.lower() not in valid_platforms:
+            logger.error(f"Invalid platform: {platform}")
+            raise ValueError(f"Platform must be one of: {', '.join(valid_platforms)}")
+    
+    logger.info(f"Generating multi-platform calendar for '{theme}': {', '.join(platforms)}")
+    base = generate_social_calendar(
+        theme=theme, frequency=frequency, platform=platforms[0], timeframe=timeframe, tone=tone,
+        model_override=model_override, provider_override=provider_override, temperature=temperature,
+        max_tokens=max_tokens, structured=structured, stream_callback=stream_callback,
+        timezone=timezone, blackout_dates=blackout_dates
+    )
+    
+    try:
+        client = base._session_seed["llm"]
+        expected = len(parse_social_calendar(base.calendar)["posts"])
+        others = platforms[1:]
+        clients = []
+        for _ in others:
+            adapter = client.clone()
+            if adaptation_model:
+                adapter.model = adaptation_model
+            clients.append(adapter)
+        
+        workers = max(1, min(settings.LLM_MAX_PARALLEL, len(others) or 1))
+        logger.info(f"Adapting the plan to {len(others)} platform(s), {workers} at a time")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(adapt_calendar, adapter, base.calendar, platform, tone, expected)
+                       for adapter, platform in zip(clients, others)]
+            adapted = [future.result() for future in futures]
+    except Exception as e:
+        logger.error(f"Failed to adapt calendar to platforms: {str(e)}")
+        raise Exception(f"Failed to adapt calendar to platforms: {str(e)}")
+    
+    views = {}
+    fixes = {}
+    for platform, text in zip(platforms, [base.calendar] + adapted):
+        views[platform], fixes[platform] = fit_calendar_to_platform(text, platform)
+    
+    tokens = [base.metadata.get("tokens_generated")] + [adapter.generation_metadata()["tokens_generated"]
+                                                        for adapter in clients]
+    metadata = {
+        **base.metadata,
+        "platform": ", ".join(platforms),
+        "platforms": platforms,
+        "adaptation_model": adaptation_model or base.metadata.get("model"),
+        "adaptation_prompt_version": PLATFORM_ADAPTATION_TEMPLATE.metadata()["prompt_version"],
+        "posts_fitted_to_limits": fixes,
+        "tokens_generated": sum(count or 0 for count in tokens),
+    }
+    logger.info(f"Multi-platform calendar created successfully for '{theme}'")
+    return base.model_copy(update={"calendar": views[platforms[0]], "platform_calendars": views, "metadata": metadata})
+
 
+def adapt_calendar(llm_instance: LocalLLM, content_plan: str, platform: str, tone: str, expected_posts: int) -> str:
+    """
+    Rewrite a calendar's posts for another platform
+    
     Args:
-        frequency: Posting frequency (daily, 3x week, 2x week, weekly)
-        timeframe: Time period (week, month, quarter)
-        start_date: Starting date (defaults to today)
+        llm_instance: Client used only for this platform
+        content_plan: Calendar markdown to adapt
+        platform: Target platform
+        tone: Brand voice/tone
+        expected_posts: Number of posts in the plan (ends the stream once all are adapted)
+    
+    Returns:
+        Adapted calendar markdown
+    """
+    prompt = get_platform_adaptation_prompt(content_plan, platform, tone)
+    system_prompt = PLATFORM_ADAPTATION_TEMPLATE.system_prompt
+    if expected_posts:
+        return llm_instance.stream_text(prompt=prompt, system_prompt=system_prompt,
+                                        stop=PLATFORM_ADAPTATION_TEMPLATE.stop,
+                                        completion_detector=PostCountDetector(expected_posts))
+    return llm_instance.generate(prompt=prompt, system_prompt=system_prompt, stop=PLATFORM_ADAPTATION_TEMPLATE.stop)
+
 
+def fit_calendar_to_platform(text: str, platform: str) -> tuple[str, int]:
+    """
+    Enforce a platform's character and hashtag limits on every post of a calendar
+    
+    Args:
+        text: Calendar markdown
+        platform: Target platform
+    
     Returns:
-        List of formatted date strings
+        Tuple of (calendar markdown, number of posts that had to be changed).
+        The text is returned unchanged when every post already fits.
     """
-    if start_date is None:
-        start_date = datetime.now()
+    posts = parse_social_calendar(text)["posts"]
+    fitted = []
+    changed = 0
+    for post in posts:
+        post, fixes = fit_post_to_platform(post, platform)
+        if fixes:
+            logger.debug(f"{platform} post on {post['date']}: {'; '.join(fixes)}")
+            changed += 1
+        fitted.append(post)
+    if not changed:
+        return text, 0
+    return CalendarStructure(posts=[SocialPost(**post) for post in fitted]).to_markdown(), changed
 
-    # Calculate end date based on timeframe
-    timeframe_days = {
-        "week": 7,
-        "month": 30,
-        "quarter": 90,
-    }
 
-    end_date = start_date + timedelta(days=timeframe_days.get(timeframe.lower(), 30))
+def chunk_post_dates(dates: list[str], days: int = 7, min_posts: int = 3) -> list[list[str]]:
+    """
+    Split post dates into week-sized chunks
+    
+    Args:
+        dates: Dates from calculate_post_dates, in order
+        days: Days covered by one chunk
+        min_posts: Chunks with fewer posts are merged into the next one
+    
+    Returns:
+        Lists of dates, in date order
+    """
+    if not dates:
+        return []
+    first = datetime.strptime(dates[0], POST_DATE_FORMAT)
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    current_window = 0
+    for date in dates:
+        window = (datetime.strptime(date, POST_DATE_FORMAT) - first).days // days
+        if window != current_window and len(current) >= min_posts:
+            chunks.append(current)
+            current = []
+        current_window = window
+        current.append(date)
+    if current:
+        if chunks and len(current) < min_posts:
+            chunks[-1].extend(current)
+        else:
+            chunks.append(current)
+    return chunks
+
+
+def post_blocks(text: str) -> list[str]:
+    """Split calendar markdown into one text block per post"""
+    offsets = post_header_offsets(text)
+    return [text[start:end].strip() for start, end in zip(offsets, offsets[1:] + [len(text)])]
+
+
+def generate_calendar_chunk(
+    llm_instance: LocalLLM,
+    dates: list[str],
+    theme: str,
+    frequency: str,
+    platform: str,
+    timeframe: str,
+    tone: str,
+    json_schema: Optional[dict] = None,
+    early_stop: bool = True,
+    avoid_ideas: Optional[list[str]] = None,
+    angle: Optional[str] = None
+) -> tuple[str, Optional[str]]:
+    """
+    Generate the posts for one chunk of dates
+    
+    Args:
+        llm_instance: Client used only for this chunk
+        dates: Dates to plan one post each for
+        theme, frequency, platform, timeframe, tone: Calendar parameters
+        json_schema: Optional JSON schema for structured output mode
+        early_stop: Close the stream once every date has its post
+        avoid_ideas: Ideas already used elsewhere in the calendar
+        angle: Optional content focus of the whole calendar
+    
+    Returns:
+        Tuple of (markdown posts, structured source or None)
+    """
+    prompt = get_social_media_prompt(theme, frequency, platform, timeframe, tone, json_schema,
+                                     post_dates=dates, avoid_ideas=avoid_ideas, angle=angle)
+    system_prompt = SOCIAL_MEDIA_TEMPLATE.system_prompt
+    if early_stop and json_schema is None:
+        response = llm_instance.stream_text(prompt=prompt, system_prompt=system_prompt,
+                                            stop=SOCIAL_MEDIA_TEMPLATE.stop,
+                                            completion_detector=PostCountDetector(len(dates)))
+    else:
+        response = llm_instance.generate(prompt=prompt, system_prompt=system_prompt,
+                                         json_schema=json_schema, stop=SOCIAL_MEDIA_TEMPLATE.stop)
+    if json_schema is None:
+        return response, None
+    structure, source = parse_calendar_structure(response)
+    return (structure.to_markdown() if source == "json" else response), source
+
 
-    # Calculate frequency in days
-    frequency_map = {
-        "daily": 1,
-        "3x week": 2,  # Approximately every 2 days
-        "2x week": 3,  # Approximately every 3 days
-        "weekly": 7,
+def generate_calendar_chunks(
+    llm_instance: LocalLLM,
+    chunks: list[list[str]],
+    theme: str,
+    frequency: str,
+    platform: str,
+    timeframe: str,
+    tone: str,
+    json_schema: Optional[dict] = None,
+    stream_callback: Optional[Callable[[str], None]] = None,
+    early_stop: bool = True,
+    angle: Optional[str] = None
+) -> tuple[str, Optional[str], dict]:
+    """
+    Generate a long calendar as concurrent chunks and merge them in date order
+    
+    Every chunk uses the same template and calendar parameters, so the backend
+    can serve them from one cached prompt prefix. Posts whose idea repeats an
+    earlier post in another chunk are regenerated once, with the ideas already
+    planned listed as ones to avoid.
+    
+    Args:
+        llm_instance: Configured client; each chunk gets its own clone
+        chunks: Date chunks from chunk_post_dates
+        theme, frequency, platform, timeframe, tone: Calendar parameters
+        json_schema: Optional JSON schema for structured output mode
+        stream_callback: Optional callback receiving each chunk's posts, in date order
+        early_stop: Close each chunk's stream once all of its posts are complete
+        angle: Optional content focus of the whole calendar
+    
+    Returns:
+        Tuple of (merged calendar markdown, structured source or None, generation metadata)
+    """
+    from config import settings
+    
+    workers = max(1, min(settings.LLM_MAX_PARALLEL, len(chunks)))
+    logger.info(f"Generating {len(chunks)} calendar chunks, {workers} at a time")
+    clients = [llm_instance.clone() for _ in chunks]
+    
+    results = []
+    truncated = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(generate_calendar_chunk, client, dates, theme, frequency, platform, timeframe, tone,
+                        json_schema, early_stop, angle=angle)
+            for client, dates in zip(clients, chunks)
+        ]
+        # Collect in date order; callbacks run on this thread (Streamlit cannot be updated from workers)
+        for number, (client, future) in enumerate(zip(clients, futures), start=1):
+            text, source = future.result()
+            if client.generation_metadata()["stop_reason"] == "length":
+                # Drop the post the token limit cut off here, not the last post of the merged calendar
+                truncated.append(number)
+                text = drop_cut_off_post(text)
+            results.append((text, source))
+            if stream_callback is not None:
+                stream_callback(text.strip() + "\n\n")
+    
+    blocks = [block for text, _ in results for block in post_blocks(text)]
+    posts = [parse_post_block(block.splitlines()) or {} for block in blocks]
+    ideas = [f"{post.get('idea', '')} {post.get('caption', '')}" for post in posts]
+    duplicates = find_near_duplicates(ideas)
+    if duplicates:
+        logger.info(f"Regenerating {len(duplicates)} post(s) that repeat ideas from other weeks")
+        scheduled = {datetime.strptime(date, POST_DATE_FORMAT).date(): date for dates in chunks for date in dates}
+        start = min(scheduled)
+        dup_dates = [scheduled.get(post_date(posts[i].get("date", ""), start), posts[i].get("date", ""))
+                     for i in duplicates]
+        kept_ideas = [posts[i].get("idea", "") for i in range(len(posts)) if i not in duplicates]
+        client = llm_instance.clone()
+        text, _ = generate_calendar_chunk(client, dup_dates, theme, frequency, platform, timeframe, tone,
+                                          json_schema, early_stop, avoid_ideas=kept_ideas, angle=angle)
+        clients.append(client)
+        if client.generation_metadata()["stop_reason"] == "length":
+            text = drop_cut_off_post(text)
+        replacements = post_blocks(text)
+        for position, index in enumerate(duplicates):
+            # Drop the duplicate if the model returned fewer replacements
+            blocks[index] = replacements[position] if position < len(replacements) else ""
+        blocks = [block for block in blocks if block]
+    
+    sources = {source for _, source in results}
+    structured_source = None
+    if json_schema is not None:
+        structured_source = "json" if sources == {"json"} else "fallback_parser"
+    
+    generations = [client.generation_metadata() for client in clients]
+    # Cut-off posts were dropped from their chunks, so the merged calendar itself ends complete
+    reasons = [generation["stop_reason"] for generation in generations if generation["stop_reason"] != "length"]
+    generation = {
+        "stop_reason": reasons[0] if reasons else "stop",
+        "tokens_generated": sum(generation["tokens_generated"] or 0 for generation in generations),
     }
+    if truncated:
+        generation["truncated_chunks"] = truncated
+    saved = [generation["tokens_saved"] for generation in generations if "tokens_saved" in generation]
+    if saved:
+        generation["tokens_saved"] = sum(saved)
+    if duplicates:
+        generation["deduplicated_posts"] = len(duplicates)
+    
+    return "\n\n".join(blocks) + "\n", structured_source, generation
+
+
+def parse_calendar_structure(response: str) -> tuple[CalendarStructure, str]:
+    """
+    Build a CalendarStructure from a structured-mode response
+
+    Models that ignore the JSON schema are handled by the markdown fallback parser.
+
+    Args:
+        response: Raw LLM response
+
+    Returns:
+        Tuple of (structure, source) where source is "json" or "fallback_parser"
+    """
+    data = extract_json(response)
+    if data is not None:
+        try:
+            return CalendarStructure.model_validate(data), "json"
+        except ValidationError as e:
+            logger.warning(f"Structured response did not match the schema, using fallback parser: {e.error_count()} error(s)")
+    else:
+        logger.warning("Response was not JSON, using fallback parser")
+    return CalendarStructure.model_validate(parse_social_calendar(response)), "fallback_parser"
+
+
+def find_missing_post_dates(calendar: SocialMediaCalendar) -> list[str]:
+    """
+    Find the scheduled post dates a generated calendar has no post for
+    
+    Dates come from the calendar's posting schedule (see posting_schedule).
+    If the model dated its posts differently (weekdays only, "Day 3", its own
+    schedule), the number of posts decides instead.
+    
+    Args:
+        calendar: Generated social media calendar
+    
+    Returns:
+        Formatted dates without a post, in date order
+    """
+    schedule = posting_schedule(calendar)
+    expected = list(schedule.dates())
+    posts = parse_social_calendar(complete_posts_text(calendar))["posts"]
+    
+    days = {post_date(post["date"], schedule.start_date) for post in posts} - {None}
+    if posts and len(days & set(expected)) * 2 >= len(posts):
+        missing = [day for day in expected if day not in days]
+    else:
+        missing = expected[len(posts):]
+    return [day.strftime(POST_DATE_FORMAT) for day in missing]
+
+
+def drop_cut_off_post(text: str) -> str:
+    """Posts text without its last post, which the token limit cut off"""
+    offsets = post_header_offsets(text)
+    if offsets:
+        text = text[:offsets[-1]].rstrip() + "\n"
+    return text
+
+
+def complete_posts_text(calendar: SocialMediaCalendar) -> str:
+    """Calendar text without the last post if the generation was cut off in it"""
+    if calendar.metadata.get("stop_reason") == "length":
+        return drop_cut_off_post(calendar.calendar)
+    return calendar.calendar
+
 
-    days_between = frequency_map.get(frequency.lower(), 2)
+def repair_social_calendar(calendar: SocialMediaCalendar,
+                           llm_instance: Optional[LocalLLM] = None) -> SocialMediaCalendar:
+    """
+    Generate posts only for the dates a calendar is missing and append them
+    
+    Args:
+        calendar: Generated social media calendar
+        llm_instance: Client to use if the calendar carries no session seed
+    
+    Returns:
+        A new SocialMediaCalendar with the missing posts added (the same
+        calendar if no dates were missing)
+    
+    Raises:
+        Exception: If the repair request fails
+    """
+    missing = find_missing_post_dates(calendar)
+    if not missing:
+        return calendar
+    
+    logger.info(f"Repairing social media calendar: {len(missing)} missing post date(s)")
+    seed = calendar._session_seed or {}
+    client = seed.get("llm") or llm_instance or llm.current()
+    text = complete_posts_text(calendar)
+    expected = posting_schedule(calendar).count()
+    instruction = MISSING_POSTS_PROMPT.format(dates="\n".join(f"- {date}" for date in missing))
+    try:
+        repair_text = request_repair(seed, calendar.calendar, instruction,
+                                     repair_budget(client.max_tokens, len(missing) / max(expected, 1)),
+                                     stop=SOCIAL_MEDIA_TEMPLATE.stop, llm_instance=llm_instance)
+    except Exception as e:
+        logger.error(f"Failed to repair social media calendar: {str(e)}")
+        raise Exception(f"Failed to repair social media calendar: {str(e)}")
+    
+    # Drop any preamble before the first post
+    offsets = post_header_offsets(repair_text)
+    if offsets:
+        repair_text = repair_text[offsets[0]:]
+    merged = text.rstrip() + "\n\n" + repair_text.strip() + "\n"
+    
+    metadata = {**calendar.metadata, "repaired_dates": calendar.metadata.get("repaired_dates", []) + missing}
+    metadata.pop("stop_reason", None)
+    structured = None
+    if calendar.structured is not None:
+        structured = CalendarStructure.model_validate(parse_social_calendar(merged))
+    return calendar.model_copy(update={"calendar": merged, "metadata": metadata, "structured": structured})
 
-    # Generate dates
-    dates = []
-    current_date = start_date
-    while current_date <= end_date:
-        dates.append(current_date.strftime("%B %d, %Y (%A)"))
-        current_date += timedelta(days=days_between)
 
-    return dates
\ No newline at end of file
+def posting_schedule(calendar: SocialMediaCalendar) -> PostingSchedule:
+    """
+    Rebuild the posting schedule a calendar was generated for
+    
+    Args:
+        calendar: Generated social media calendar
+    
+    Returns:
+        PostingSchedule with the calendar's frequency, timeframe, start date,
+        time zone, blackout dates and platforms
+    """
+    metadata = calendar.metadata
+    start = metadata.get("start_date") or metadata.get("generated_date")
+    platforms = metadata.get("platforms") or [metadata.get("platform", "")]
+    return PostingSchedule(
+        metadata.get("frequency", "3x week"),
+        metadata.get("timeframe", "month"),
+        start_date=datetime.fromisoformat(start) if start else None,
+        timezone=metadata.get("timezone"),
+        platforms=platforms,
+        blackout_dates=metadata.get("blackout_dates"),
+    )
+
+
+def calendar_posts_by_date(calendar: SocialMediaCalendar) -> dict:
+    """
+    Index a calendar's posts for schedule exports
+    
+    Returns:
+        Dict of date -> post, plus (platform, date) -> post for the
+        per-platform views of a multi-platform calendar
+    """
+    start = posting_schedule(calendar).start_date
+    posts = {}
+    for post in parse_social_calendar(calendar.calendar)["posts"]:
+        day = post_date(post["date"], start)
+        if day:
+            posts.setdefault(day, post)
+    for platform, text in calendar.platform_calendars.items():
+        for post in parse_social_calendar(text)["posts"]:
+            day = post_date(post["date"], start)
+            if day:
+                posts.setdefault((platform.lower(), day), post)
+    return posts
+
+
+def calculate_post_dates(frequency: str, timeframe: str, start_date: Optional[datetime] = None,
+                         timezone: Optional[str] = None, blackout_dates: Optional[list[str]] = None) -> list[str]:
+    """
+    Calculate specific post dates based on frequency and timeframe
+    
+    Uses the weekday patterns of utils.scheduler (3x week is Mon/Wed/Fri,
+    2x week Tue/Thu). For exports of long schedules iterate a PostingSchedule
+    directly instead of building the list.
+    
+    Args:
+        frequency: Posting frequency (daily, 3x week, 2x week, weekly)
+        timeframe: Time period (week, month, quarter, year)
+        start_date: Starting date (defaults to today)
+        timezone: Optional IANA time zone used to determine "today"
+        blackout_dates: Optional dates (YYYY-MM-DD) to skip
+    
+    Returns:
+        List of formatted date strings
+    """
+    schedule = PostingSchedule(frequency, timeframe, start_date=start_date, timezone=timezone,
+                               blackout_dates=blackout_dates)
+    return [day.strftime(POST_DATE_FORMAT) for day in schedule.dates()]
@@ -1,15 +1,26 @@
 """
 Creative Writing Prompt Generator
 """
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Callable, Optional
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError
 from utils.llm_interface import llm, LocalLLM
-from utils.prompt_templates import get_writing_prompt_template
+from utils.prompt_templates import get_writing_prompt_template, WRITING_PROMPT_TEMPLATE
+from utils.output_parsers import extract_json, parse_writing_prompt, SectionCompletionDetector, WRITING_SECTIONS
+from utils.repair import find_section_gaps, repair_sections
+from utils.prompt_bank import PromptBank, combination_key, get_prompt_bank
+from utils.variants import generate_variants, WRITING_ANGLES
 from utils.logger import setup_logger
 
 # Set up logger
 logger = setup_logger(__name__)
 
+# Character elements are optional ("if relevant") in the prompt
+REQUIRED_SECTIONS = [name for name in WRITING_SECTIONS if name != "CHARACTER ELEMENTS"]
+
+GENRES = ["sci-fi", "mystery", "romance", "fantasy", "horror", "thriller", "historical", "literary fiction", "adventure"]
+PROMPT_TYPES = ["character", "plot", "world-building", "dialogue", "setting"]
+COMPLEXITY_LEVELS = ["simple", "moderate", "complex"]
+
 
 class WritingPromptInput(BaseModel):
     """Input parameters for creative writing prompt generation"""
@@ -30,11 +41,38 @@ class WritingPromptInput(BaseModel):
         }
 
 
+class WritingStructure(BaseModel):
+    """Typed creative writing prompt produced in structured output mode"""
+    main_prompt: str = Field(..., description="The scenario, its conflict and the details that spark it")
+    character_elements: list[str] = Field(default_factory=list, description="Archetypes, motivations, relationships")
+    setting_details: list[str] = Field(default_factory=list, description="Time, place, atmosphere, world-building")
+    plot_directions: list[str] = Field(default_factory=list, description="Story arcs, twists, escalation ideas")
+    development_questions: list[str] = Field(default_factory=list, description="Questions and themes to explore")
+    
+    def to_markdown(self) -> str:
+        """Render in the same numbered layout the free-form prompt asks for"""
+        md = f"## 1. MAIN PROMPT\n\n{self.main_prompt}\n"
+        for number, (title, items) in enumerate([
+            ("CHARACTER ELEMENTS", self.character_elements),
+            ("SETTING DETAILS", self.setting_details),
+            ("PLOT DIRECTIONS", self.plot_directions),
+            ("DEVELOPMENT QUESTIONS", self.development_questions),
+        ], start=2):
+            md += f"\n## {number}. {title}\n\n"
+            md += "".join(f"- {item}\n" for item in items)
+        return md
+
+
 class WritingPrompt(BaseModel):
     """Generated creative writing prompt"""
     genre: str
     prompt: str
     metadata: dict
+    structured: Optional[WritingStructure] = None
+    # Lower-ranked variants when several were requested (see utils.variants)
+    alternatives: list["WritingPrompt"] = Field(default_factory=list)
+    # Prompt and backend state needed to continue the conversation (see utils.refinement)
+    _session_seed: Optional[dict] = PrivateAttr(default=None)
     
     def to_markdown(self) -> str:
         """Convert to formatted markdown"""
@@ -51,7 +89,13 @@ def generate_writing_prompt(
     model_override: Optional[str] = None,
     provider_override: Optional[str] = None,
     temperature: Optional[float] = None,
-    max_tokens: Optional[int] = None
+    max_tokens: Optional[int] = None,
+    structured: bool = False,
+    stream_callback: Optional[Callable[[str], None]] = None,
+    early_stop: bool = True,
+    variants: int = 1,
+    angle: Optional[str] = None,
+    seed: Optional[int] = None
 ) -> WritingPrompt:
     """
     Generate a creative writing prompt using the local LLM
@@ -65,6 +109,14 @@ def generate_writing_prompt(
         provider_override: Optional provider to use ('ollama' or 'lm_studio')
         temperature: Optional temperature setting (0.0-2.0)
         max_tokens: Optional max tokens for response
+        structured: Request JSON output and fill WritingPrompt.structured
+        stream_callback: Optional callback receiving text chunks as they are generated
+            (not used when several variants are requested)
+        early_stop: Stream and close the connection once all required sections are complete
+        variants: Number of distinct prompts to generate concurrently; the best
+            is returned with the others, ranked, in `alternatives`
+        angle: Optional creative angle (set per variant)
+        seed: Optional sampling seed
     
     Returns:
         WritingPrompt object with generated content
@@ -82,9 +134,9 @@ def generate_writing_prompt(
         logger.debug(f"Using provider override: {provider_override}")
     
     # Validate inputs
-    valid_genres = ["sci-fi", "mystery", "romance", "fantasy", "horror", "thriller", "historical", "literary fiction", "adventure"]
-    valid_prompt_types = ["character", "plot", "world-building", "dialogue", "setting"]
-    valid_complexity = ["simple", "moderate", "complex"]
+    valid_genres = GENRES
+    valid_prompt_types = PROMPT_TYPES
+    valid_complexity = COMPLEXITY_LEVELS
     
     if genre.lower() not in valid_genres:
         logger.error(f"Invalid genre: {genre}")
@@ -98,19 +150,32 @@ def generate_writing_prompt(
         logger.error(f"Invalid complexity: {complexity}")
         raise ValueError(f"Complexity must be one of: {', '.join(valid_complexity)}")
     
+    if variants > 1:
+        ranked, summary = generate_variants(
+            lambda option: generate_writing_prompt(
+                genre, prompt_type, complexity, constraints, model_override, provider_override,
+                option["temperature"], max_tokens, structured, None, early_stop,
+                angle=option["angle"], seed=option["seed"]),
+            text_of=lambda writing_prompt: writing_prompt.prompt,
+            count=variants,
+            temperature=temperature,
+            angles=WRITING_ANGLES,
+            gaps=find_writing_prompt_gaps,
+        )
+        ranked[0].metadata.update(summary)
+        return ranked[0].model_copy(update={"alternatives": ranked[1:]})
+    
     # Generate the prompt
-    prompt = get_writing_prompt_template(genre, prompt_type, complexity, constraints)
+    json_schema = WritingStructure.model_json_schema() if structured else None
+    prompt = get_writing_prompt_template(genre, prompt_type, complexity, constraints, json_schema, angle)
     logger.debug(f"Prompt generated successfully (length: {len(prompt)} chars)")
     
-    # System prompt for consistent output
-    system_prompt = """You are a creative writing expert and professional author.
-You create inspiring, detailed creative writing prompts that spark imagination and encourage unique storytelling.
-Your prompts are specific enough to provide direction but open enough to allow creative freedom.
-Always include rich details about characters, settings, conflicts, and potential story directions."""
+    # System prompt for consistent output (part of the cached static prefix)
+    system_prompt = WRITING_PROMPT_TEMPLATE.system_prompt
     
     try:
         # Use overrides if provided, otherwise use default
-        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None else llm
+        llm_instance = LocalLLM(model_override=model_override, temperature=temperature, max_tokens=max_tokens) if model_override or temperature is not None or max_tokens is not None or seed is not None else llm.current()
         
         # Override provider if specified
         if provider_override:
@@ -125,29 +190,62 @@ Always include rich details about characters, settings, conflicts, and potential
                 if not model_override:
                     llm_instance.model = settings.LM_STUDIO_MODEL
         
-        # Update temperature and max_tokens if provided
+        # Update temperature, max_tokens and seed if provided
         if temperature is not None:
             llm_instance.temperature = temperature
         if max_tokens is not None:
             llm_instance.max_tokens = max_tokens
+        if seed is not None:
+            llm_instance.seed = seed
         
         # Generate the writing prompt
         logger.info("Sending request to LLM...")
-        response = llm_instance.generate(prompt=prompt, system_prompt=system_prompt)
+        detector = None
+        if early_stop and not structured:
+            detector = SectionCompletionDetector(WRITING_SECTIONS, required=REQUIRED_SECTIONS)
+        if stream_callback is not None or detector is not None:
+            response = llm_instance.stream_text(prompt=prompt, system_prompt=system_prompt, json_schema=json_schema,
+                                                on_chunk=stream_callback, stop=WRITING_PROMPT_TEMPLATE.stop,
+                                                completion_detector=detector)
+        else:
+            response = llm_instance.generate(prompt=prompt, system_prompt=system_prompt,
+                                             json_schema=json_schema, stop=WRITING_PROMPT_TEMPLATE.stop)
         logger.info("Successfully received response from LLM")
         
+        structure = None
+        prompt_text = response
+        structured_source = None
+        if structured:
+            structure, structured_source = parse_writing_structure(response)
+            if structured_source == "json":
+                prompt_text = structure.to_markdown()
+        
         # Create the prompt object
         writing_prompt = WritingPrompt(
             genre=genre,
-            prompt=response,
+            prompt=prompt_text,
+            structured=structure,
             metadata={
                 "prompt_type": prompt_type,
                 "complexity": complexity,
                 "constraints": constraints if constraints else "None",
                 "model": llm_instance.model,
-                "provider": llm_instance.provider
+                "provider": llm_instance.provider,
+                **WRITING_PROMPT_TEMPLATE.metadata(),
+                **llm_instance.generation_metadata()
             }
         )
+        if structured:
+            writing_prompt.metadata["structured_output"] = structured_source
+        
+        writing_prompt._session_seed = {
+            "llm": llm_instance.clone(),
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            # None after an early stop (refinement then replays the conversation)
+            "context": llm_instance.last_context,
+            "response": response,
+        }
         
         logger.info(f"Writing prompt created successfully for '{genre}'")
         return writing_prompt
@@ -157,6 +255,193 @@ Always include rich details about characters, settings, conflicts, and potential
         raise Exception(f"Failed to generate writing prompt: {str(e)}")
 
 
+def get_writing_prompt(
+    genre: str,
+    prompt_type: str = "plot",
+    complexity: str = "moderate",
+    constraints: Optional[str] = None,
+    user_id: Optional[str] = None,
+    bank: Optional[PromptBank] = None,
+    **generate_kwargs
+) -> WritingPrompt:
+    """
+    Serve a writing prompt from the offline prompt bank, generating one live if needed
+    
+    Prompts without constraints come from the bank (a random prompt this user
+    has not seen yet). Live generation is used when constraints are given, when
+    no bank has been built, or when the user has seen every banked prompt for
+    the combination.
+    
+    Args:
+        genre, prompt_type, complexity, constraints: As in generate_writing_prompt
+        user_id: User whose seen prompts are tracked in the bank
+        bank: Prompt bank to serve from (defaults to the one at PROMPT_BANK_PATH)
+        **generate_kwargs: Further generate_writing_prompt arguments for live generation
+    
+    Returns:
+        WritingPrompt; metadata["source"] is "prompt_bank" or "live"
+    """
+    bank = bank or get_prompt_bank()
+    if not constraints and bank is not None and not generate_kwargs.get("structured"):
+        entry = bank.sample(genre, prompt_type, complexity, user_id=user_id)
+        if entry is not None:
+            logger.info(f"Serving writing prompt {entry['id']} from the prompt bank")
+            writing_prompt = WritingPrompt(
+                genre=genre,
+                prompt=entry["text"],
+                metadata={
+                    "prompt_type": prompt_type,
+                    "complexity": complexity,
+                    "constraints": "None",
+                    "model": entry["model"] or "unknown",
+                    "provider": "prompt_bank",
+                    "source": "prompt_bank",
+                    "bank_id": entry["id"],
+                    "bank_unseen": bank.count(genre, prompt_type, complexity, user_id=user_id) if user_id else None,
+                }
+            )
+            # Refinement continues from the original request (there is no backend context to reuse)
+            writing_prompt._session_seed = {
+                "prompt": get_writing_prompt_template(genre, prompt_type, complexity),
+                "system_prompt": WRITING_PROMPT_TEMPLATE.system_prompt,
+                "response": entry["text"],
+            }
+            return writing_prompt
+        logger.info("Prompt bank has no unseen prompt for this selection, generating live")
+    
+    result = generate_writing_prompt(genre, prompt_type, complexity, constraints, **generate_kwargs)
+    result.metadata["source"] = "live"
+    return result
+
+
+def build_prompt_bank(
+    bank: PromptBank,
+    per_combination: int,
+    combinations: Optional[list[tuple[str, str, str]]] = None,
+    max_attempts: Optional[int] = None,
+    on_progress: Optional[Callable[[str, int, int], None]] = None,
+    **generate_kwargs
+) -> dict[str, int]:
+    """
+    Fill the prompt bank with generated prompts
+    
+    Generation stops for a combination once it holds `per_combination` unique
+    prompts; near-duplicates of stored prompts are discarded. Running it again
+    tops up the bank.
+    
+    Args:
+        bank: Bank to fill
+        per_combination: Target number of prompts per combination
+        combinations: (genre, prompt_type, complexity) tuples (defaults to all)
+        max_attempts: Generation attempts per combination (defaults to twice the shortfall)
+        on_progress: Optional callback receiving (combination key, stored, target)
+        **generate_kwargs: Further generate_writing_prompt arguments (model, temperature, ...)
+    
+    Returns:
+        Number of prompts added per combination key
+    """
+    combinations = combinations or [(genre, prompt_type, complexity)
+                                    for genre in GENRES for prompt_type in PROMPT_TYPES
+                                    for complexity in COMPLEXITY_LEVELS]
+    added = {}
+    for genre, prompt_type, complexity in combinations:
+        key = combination_key(genre, prompt_type, complexity)
+        stored = bank.count(genre, prompt_type, complexity)
+        attempts = max_attempts if max_attempts is not None else 2 * max(per_combination - stored, 0)
+        added[key] = 0
+        while stored < per_combination and attempts > 0:
+            attempts -= 1
+            try:
+                result = generate_writing_prompt(genre, prompt_type, complexity, **generate_kwargs)
+            except Exception as e:
+                logger.warning(f"Skipping failed generation for {key}: {str(e)}")
+                continue
+            if find_writing_prompt_gaps(result):
+                continue
+            if bank.add(genre, prompt_type, complexity, result.prompt, model=result.metadata.get("model")):
+                stored += 1
+                added[key] += 1
+            if on_progress is not None:
+                on_progress(key, stored, per_combination)
+        logger.info(f"Prompt bank {key}: {stored} prompt(s), {added[key]} added")
+    return added
+
+
+def parse_writing_structure(response: str) -> tuple[WritingStructure, str]:
+    """
+    Build a WritingStructure from a structured-mode response
+    
+    Models that ignore the JSON schema are handled by the markdown fallback parser.
+    
+    Args:
+        response: Raw LLM response
+    
+    Returns:
+        Tuple of (structure, source) where source is "json" or "fallback_parser"
+    """
+    data = extract_json(response)
+    if data is not None:
+        try:
+            return WritingStructure.model_validate(data), "json"
+        except ValidationError as e:
+            logger.warning(f"Structured response did not match the schema, using fallback parser: {e.error_count()} error(s)")
+    else:
+        logger.warning("Response was not JSON, using fallback parser")
+    return WritingStructure.model_validate(parse_writing_prompt(response)), "fallback_parser"
+
+
+def find_writing_prompt_gaps(writing_prompt: WritingPrompt) -> list[str]:
+    """
+    Find sections of a generated writing prompt that are missing, empty or were cut off
+    
+    Args:
+        writing_prompt: Generated writing prompt
+    
+    Returns:
+        Section names that need repairing (empty if the prompt is complete)
+    """
+    truncated = writing_prompt.metadata.get("stop_reason") == "length"
+    return find_section_gaps(writing_prompt.prompt, WRITING_SECTIONS, required=REQUIRED_SECTIONS, truncated=truncated)
+
+
+def repair_writing_prompt(writing_prompt: WritingPrompt, llm_instance: Optional[LocalLLM] = None) -> WritingPrompt:
+    """
+    Regenerate only the missing or truncated sections of a writing prompt
+    
+    Args:
+        writing_prompt: Generated writing prompt
+        llm_instance: Client to use if the prompt carries no session seed
+    
+    Returns:
+        A new WritingPrompt with the repaired sections merged in (the same
+        prompt if nothing needed repairing)
+    
+    Raises:
+        Exception: If the repair request fails
+    """
+    gaps = find_writing_prompt_gaps(writing_prompt)
+    if not gaps:
+        return writing_prompt
+    
+    logger.info(f"Repairing writing prompt sections: {', '.join(gaps)}")
+    seed = writing_prompt._session_seed or {}
+    max_tokens = (seed.get("llm") or llm_instance or llm.current()).max_tokens
+    try:
+        text = repair_sections(seed, writing_prompt.prompt, WRITING_SECTIONS, gaps, max_tokens,
+                               stop=WRITING_PROMPT_TEMPLATE.stop, llm_instance=llm_instance)
+    except Exception as e:
+        logger.error(f"Failed to repair writing prompt: {str(e)}")
+        raise Exception(f"Failed to repair writing prompt: {str(e)}")
+    
+    metadata = {**writing_prompt.metadata,
+                "repaired_sections": writing_prompt.metadata.get("repaired_sections", []) + gaps}
+    metadata.pop("stop_reason", None)
+    structured = None
+    if writing_prompt.structured is not None:
+        structured = WritingStructure.model_validate(parse_writing_prompt(text))
+    return writing_prompt.model_copy(update={"prompt": text, "metadata": metadata, "structured": structured})
+
+
 def validate_writing_input(data: dict) -> WritingPromptInput:
     """
     Validate writing prompt input data using Pydantic
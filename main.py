@@ -3,10 +3,11 @@ Content Idea Generator App - Main Streamlit Application
 """
 import streamlit as st
 import re
-from generators.blog_generator import generate_blog_outline
-from generators.social_generator import generate_social_calendar
-from generators.writing_generator import generate_writing_prompt
-from utils.export_utils import generate_markdown, generate_html
+import time
+# Generators are imported inside the functions that use them, so a page only
+# loads the generator (and its dependencies) of the selected tab
+from utils.export_utils import generate_markdown, generate_html, iter_icalendar, iter_csv, lazy_export
+from utils.variants import MAX_VARIANTS
 
 
 def sanitize_filename(text: str) -> str:
@@ -75,6 +76,10 @@ st.markdown("""
 
 def main():
     """Main application function"""
+    from config import settings
+    
+    # Pick up .env and profile changes without restarting the app
+    settings.watch()
     
     # Header
     st.markdown('<div class="main-header">💻 Content Idea Generator</div>', unsafe_allow_html=True)
@@ -83,10 +88,14 @@ def main():
     # Sidebar - Generator Selection (for now just Blog)
     with st.sidebar:
         st.header("🎯 Content Tools")
+        # A page can switch the tool for the next run (e.g. reusing a result from the history)
+        if 'pending_tool' in st.session_state:
+            st.session_state['tool'] = st.session_state.pop('pending_tool')
         generator_type = st.radio(
             "Choose tool:",
-            ["📝 Tech Blog Outline", "📱 Social Media Calendar", "✨ Creative Writing Prompts"],
-            index=0
+            ["📝 Tech Blog Outline", "📚 Blog Series Planner", "📱 Social Media Calendar", "✨ Creative Writing Prompts",
+             "🗂️ History"],
+            key="tool"
         )
         
         st.markdown("---")
@@ -94,7 +103,9 @@ def main():
         
         # Provider selection
         from utils.llm_interface import LocalLLM
-        from config import settings
+        
+        if settings.SETTINGS_PROFILE:
+            st.caption(f"⚙️ Profile: **{settings.SETTINGS_PROFILE}**")
         
         # Initialize session state for provider if not exists
         if 'selected_provider' not in st.session_state:
@@ -130,7 +141,7 @@ def main():
         st.markdown("---")
         st.subheader("📦 Model Selection")
         
-        # Get available models for selected provider
+        # Get available models for selected provider (shared by every app process for a short while)
         try:
             available_models = LocalLLM.get_available_models(provider=selected_provider)
             
@@ -166,7 +177,7 @@ def main():
                 llm_test.model = selected_model
                 llm_test.base_url = settings.OLLAMA_BASE_URL if selected_provider == "ollama" else settings.LM_STUDIO_BASE_URL
                 
-                success, message = llm_test.test_connection()
+                success, message = llm_test.check_health()
                 if success:
                     st.success(f"✅ Connected")
                 else:
@@ -175,6 +186,10 @@ def main():
                 
                 # Refresh button
                 if st.button("🔄 Refresh Models"):
+                    # Drop the shared model lists and health checks so they are fetched again
+                    from utils.shared_store import get_shared_store
+                    get_shared_store().delete("models")
+                    get_shared_store().delete("health")
                     st.rerun()
             else:
                 st.warning(f"⚠️ Could not load models from {provider_display}")
@@ -190,9 +205,9 @@ def main():
         
         # Initialize session state for parameters if not exists
         if 'temperature' not in st.session_state:
-            st.session_state['temperature'] = 0.7
+            st.session_state['temperature'] = settings.TEMPERATURE
         if 'max_tokens' not in st.session_state:
-            st.session_state['max_tokens'] = 2000
+            st.session_state['max_tokens'] = settings.MAX_TOKENS
         
         # Temperature slider
         temperature = st.slider(
@@ -216,6 +231,27 @@ def main():
         )
         st.session_state['max_tokens'] = max_tokens
         
+        # Structured output toggle
+        structured = st.checkbox(
+            "🧩 Structured output (JSON)",
+            value=st.session_state.get('structured', False),
+            help="Ask the model for typed JSON (headlines, sections, posts) instead of free-form text"
+        )
+        st.session_state['structured'] = structured
+        
+        # Number of distinct variants per request
+        variants = st.slider(
+            "🔀 Variants",
+            min_value=1,
+            max_value=MAX_VARIANTS,
+            value=st.session_state.get('variants', 1),
+            help="Generate several distinct takes at once (different angles and seeds) and compare them side by side"
+        )
+        st.session_state['variants'] = variants
+        
+        render_usage_metrics()
+        render_session_memory()
+        
         st.markdown("---")
         st.subheader("ℹ️ About")
         st.info(
@@ -226,16 +262,21 @@ def main():
     # Main content area
     if "Tech Blog Outline" in generator_type:
         render_blog_generator()
+    elif "Blog Series Planner" in generator_type:
+        render_series_generator()
     elif "Social Media Calendar" in generator_type:
         render_social_generator()
     elif "Creative Writing Prompts" in generator_type:
         render_writing_generator()
+    elif "History" in generator_type:
+        render_history_page()
     else:
         st.info("🚧 This feature is coming soon! Stay tuned.")
 
 
 def render_blog_generator():
     """Render the blog post outline generator interface"""
+    from generators.blog_generator import generate_blog_outline, generate_headlines
     
     st.header("📝 Tech Blog Outline Generator")
     st.markdown("Generate SEO-friendly technical blog post outlines with headlines, structure, and key points.")
@@ -281,8 +322,15 @@ def render_blog_generator():
             height=100
         )
         
-        # Submit button
-        submitted = st.form_submit_button("🚀 Generate Blog Outline")
+        # Submit buttons
+        col1, col2 = st.columns(2)
+        with col1:
+            submitted = st.form_submit_button("🚀 Generate Blog Outline")
+        with col2:
+            headlines_only = st.form_submit_button(
+                "⚡ Headlines Only",
+                help="Generate 40 headline candidates in one quick request and rank them locally"
+            )
     
     # Show example
     with st.expander("💡 See Example Tech Topics"):
@@ -295,133 +343,488 @@ def render_blog_generator():
         - **Security:** "Implementing OAuth 2.0 in Modern Web Applications"
         """)
     
-    # Process form submission
-    if submitted:
+    # Headline fast path
+    if headlines_only:
         if not topic or len(topic.strip()) < 3:
             st.error("⚠️ Please enter a valid topic (at least 3 characters)")
             return
         
-        # Generate outline
-        with st.spinner("🤔 Generating your tech blog outline... This may take 10-30 seconds"):
+        with st.spinner("⚡ Generating headline candidates..."):
             try:
-                # Get selected model and provider from session state
-                selected_model = st.session_state.get('selected_model', None)
-                selected_provider = st.session_state.get('selected_provider', None)
-                temperature = st.session_state.get('temperature', 0.7)
-                max_tokens = st.session_state.get('max_tokens', 2000)
-                
-                result = generate_blog_outline(
+                result = generate_headlines(
                     topic=topic.strip(),
                     audience=audience,
-                    length=length,
                     content_type=content_type,
                     custom_context=custom_context.strip() if custom_context else None,
-                    model_override=selected_model,
-                    provider_override=selected_provider,
-                    temperature=temperature,
-                    max_tokens=max_tokens
+                    model_override=st.session_state.get('selected_model', None),
+                    provider_override=st.session_state.get('selected_provider', None),
+                    temperature=st.session_state.get('temperature', 0.7),
+                    max_tokens=st.session_state.get('max_tokens', 2000)
                 )
-                
-                # Store in session state
-                st.session_state['last_result'] = result
-                st.session_state['last_type'] = 'blog'
-                
-                # Success message
-                st.success("✅ Blog outline generated successfully!")
-                
-                # Display result
-                display_blog_result(result)
-                
             except Exception as e:
-                st.error(f"❌ Error generating outline: {str(e)}")
-                st.info("""
-                **Troubleshooting:**
-                - Ensure Ollama is running (`ollama list` to verify)
-                - Check your `.env` file configuration
-                - Verify the model is available
-                - Try a simpler topic if the generation fails
-                """)
+                st.error(f"❌ Error generating headlines: {str(e)}")
+                return
+        set_last_result(result, 'headlines')
+        display_headline_result(result)
     
-    # Display previous result if exists
-    elif 'last_result' in st.session_state and st.session_state.get('last_type') == 'blog':
+    # Process form submission
+    elif submitted:
+        if not topic or len(topic.strip()) < 3:
+            st.error("⚠️ Please enter a valid topic (at least 3 characters)")
+            return
+        
+        # Generate the outline in the background; the page stays usable meanwhile
+        params = {
+            "topic": topic.strip(),
+            "audience": audience,
+            "length": length,
+            "content_type": content_type,
+            "custom_context": custom_context.strip() if custom_context else None,
+            "model_override": st.session_state.get('selected_model', None),
+            "provider_override": st.session_state.get('selected_provider', None),
+            "temperature": st.session_state.get('temperature', 0.7),
+            "max_tokens": st.session_state.get('max_tokens', 2000),
+            "structured": st.session_state.get('structured', False),
+            "variants": st.session_state.get('variants', 1),
+        }
+        submit_generation("blog", params["topic"],
+                          lambda on_chunk: generate_blog_outline(**params, stream_callback=on_chunk), params)
+    
+    render_jobs("blog", "Try a simpler topic if the generation fails")
+    
+    # Display previous result if exists (the headline fast path has shown its own)
+    if headlines_only:
+        return
+    if last_result('blog') is not None:
         st.info("📋 Showing previous result. Generate a new one using the form above.")
-        display_blog_result(st.session_state['last_result'])
+        display_blog_result(last_result('blog'))
+    elif last_result('headlines') is not None:
+        display_headline_result(last_result('headlines'))
+
+
+def display_headline_result(result):
+    """Display ranked headline candidates, re-ranking locally when the settings change"""
+    from utils.headline_scorer import DEFAULT_WEIGHTS
+    
+    st.markdown("---")
+    st.subheader(f"⚡ Top Headlines: {result.topic}")
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        top_n = st.number_input("Show top", min_value=1, max_value=max(1, len(result.candidates)),
+                                value=min(10, max(1, len(result.candidates))), key="headline_top_n")
+    with col2:
+        with st.expander("⚖️ Scoring Weights"):
+            weights = {
+                name: st.slider(name.replace("_", " ").title(), 0.0, 1.0, value, 0.05, key=f"headline_weight_{name}")
+                for name, value in DEFAULT_WEIGHTS.items()
+            }
+    
+    # Re-ranking is local and takes milliseconds, so it follows every widget change
+    if sum(weights.values()) > 0:
+        result = result.rerank(top_n=int(top_n), weights=weights)
+    
+    for index, item in enumerate(result.ranked, 1):
+        st.markdown(f"**{index}. {item.headline}**")
+        st.caption(f"Score {item.score:.2f} · {len(item.headline)} chars · "
+                   + " · ".join(f"{name.replace('_', ' ')} {value:.2f}" for name, value in item.features.items()))
+    
+    st.caption(f"{result.metadata['candidates']} candidates from {result.metadata['model']}")
+    st.download_button(
+        label="📥 Download as Markdown",
+        data=lazy_export("headlines_markdown", result, lambda item: item.to_markdown()),
+        file_name=f"headlines_{sanitize_filename(result.topic)}.md",
+        mime="text/markdown",
+        key="download_headlines"
+    )
+
+
+class LiveStreamView:
+    """Placeholders that fill in section by section (or post by post) while a result streams"""
+    
+    def __init__(self, kind: str):
+        from utils.output_parsers import SectionStreamParser, PostStreamParser, BLOG_SECTIONS, WRITING_SECTIONS
+        
+        self.chunks = []
+        self.rows = []
+        self.placeholders = {}
+        self.last_refresh = 0.0
+        self.container = st.empty()
+        
+        with self.container.container():
+            st.caption("⏳ Streaming... each part appears here as soon as it is complete")
+            if kind == "social":
+                self.parser = PostStreamParser()
+                self.table = st.empty()
+                raw_area = st.expander("📡 Live Output")
+            else:
+                names = BLOG_SECTIONS if kind == "blog" else WRITING_SECTIONS
+                self.parser = SectionStreamParser(names)
+                tabs = st.tabs([name.title() for name in names] + ["📡 Live Output"])
+                for name, tab in zip(names, tabs):
+                    with tab:
+                        self.placeholders[name] = st.empty()
+                        self.placeholders[name].caption("Waiting for this section...")
+                raw_area = tabs[-1]
+            with raw_area:
+                self.raw = st.empty()
+    
+    def on_chunk(self, chunk: str):
+        """Feed a streamed chunk; render anything it completed"""
+        self.chunks.append(chunk)
+        self._render(self.parser.feed(chunk))
+        # Redrawing the raw text is the expensive part, so throttle it
+        now = time.monotonic()
+        if now - self.last_refresh > 0.3:
+            self.raw.text("".join(self.chunks))
+            self.last_refresh = now
+    
+    def finish(self):
+        """Flush the last section and clear the live view (the full result is shown next)"""
+        self._render(self.parser.close())
+        self.container.empty()
+    
+    def _render(self, events: list):
+        for event in events:
+            if event["type"] == "post":
+                post = event["post"]
+                self.rows.append({
+                    "Date": post["date"],
+                    "Format": post["format"],
+                    "Idea": post["idea"],
+                    "Caption/Hook": post["caption"],
+                    "Hashtags": " ".join(post["hashtags"]),
+                })
+                self.table.dataframe(self.rows, use_container_width=True)
+            elif event["name"] in self.placeholders:
+                self.placeholders[event["name"]].markdown(event["text"])
 
 
 def display_blog_result(result):
     """Display the generated blog outline"""
+    from generators.blog_generator import find_blog_outline_gaps, repair_blog_outline
     
     st.markdown("---")
     st.subheader("📄 Generated Outline")
+    render_repair_notice(result, "blog", find_blog_outline_gaps(result), repair_blog_outline, "sections")
     
-    # Tabs for different views
-    tab1, tab2, tab3 = st.tabs(["📖 Formatted View", "📝 Markdown", "ℹ️ Metadata"])
+    # Tabs for different views; only the open one is rendered (exports and all)
+    tabs = st.tabs(["📖 Formatted View", "📝 Markdown", "ℹ️ Metadata", "🔁 Refine", "✍️ Full Draft"]
+                   + (["🔀 Variants"] if result.alternatives else []),
+                   on_change="rerun", key="blog_result_tabs")
+    tab1, tab2, tab3, tab4, tab5 = tabs[:5]
     
     with tab1:
-        # Display the outline in a nice format
-        st.markdown(result.outline)
+        if tab1.open:
+            # Display the outline in a nice format
+            st.markdown(result.outline)
+            
+            # Export buttons
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.download_button(
+                    label="📥 Download as Markdown",
+                    data=lazy_export("blog_markdown", result, lambda item: item.to_markdown()),
+                    file_name=f"blog_outline_{sanitize_filename(result.topic)}.md",
+                    mime="text/markdown"
+                )
+            with col2:
+                st.download_button(
+                    label="📥 Download as HTML",
+                    data=lazy_export("blog_html", result, lambda item: generate_html(
+                        f"Blog Outline: {item.topic}", item.outline, item.metadata)),
+                    file_name=f"blog_outline_{sanitize_filename(result.topic)}.html",
+                    mime="text/html"
+                )
+            with col3:
+                st.download_button(
+                    label="📥 Download as Text",
+                    data=lazy_export("blog_markdown", result, lambda item: item.to_markdown()),
+                    file_name=f"blog_outline_{sanitize_filename(result.topic)}.txt",
+                    mime="text/plain"
+                )
+    
+    with tab2:
+        if tab2.open:
+            # Raw markdown view with copy functionality
+            st.code(result.to_markdown(), language="markdown")
+            
+            # Copy-to-clipboard button
+            col1, col2 = st.columns([3, 1])
+            with col2:
+                st.button(
+                    "📋 Copy to Clipboard",
+                    help="Select all (Ctrl+A) and copy (Ctrl+C) from the text area below",
+                    key="copy_blog"
+                )
+            
+            # Text area for easy copying
+            st.text_area(
+                "Copy the outline below:",
+                value=result.to_markdown(),
+                height=300,
+                help="Select all (Ctrl+A) and copy (Ctrl+C)"
+            )
+    
+    with tab3:
+        if tab3.open:
+            # Display metadata
+            st.json(result.metadata)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Audience", result.metadata['audience'].title())
+                st.metric("Content Type", result.metadata['content_type'].title())
+            with col2:
+                st.metric("Length", result.metadata['length'].title())
+                st.metric("Model", result.metadata['model'])
+                if result.metadata.get('tokens_saved'):
+                    st.metric("Tokens Saved", result.metadata['tokens_saved'])
+            
+            if result.structured is not None:
+                st.markdown("**🧩 Structured Output**")
+                st.json(result.structured.model_dump())
+                st.download_button(
+                    label="📥 Download as JSON",
+                    data=lazy_export("blog_json", result, lambda item: item.structured.model_dump_json(indent=2)),
+                    file_name=f"blog_outline_{sanitize_filename(result.topic)}.json",
+                    mime="application/json",
+                    key="json_blog_outline"
+                )
+    
+    with tab4:
+        if tab4.open:
+            render_refine_tab(result, "blog", "outline", "e.g., Make section 3 more advanced, or give me 5 more headlines")
+    
+    with tab5:
+        if tab5.open:
+            render_draft_tab(result)
+    
+    if result.alternatives:
+        with tabs[-1]:
+            if tabs[-1].open:
+                render_variants_tab(result, "blog", "outline")
+
+
+def render_draft_tab(result):
+    """Write a full blog post from the outline, showing sections as they complete"""
+    from generators.blog_generator import BlogStructure
+    from generators.draft_generator import generate_blog_draft, main_sections
+    from utils.output_parsers import parse_blog_outline
+    
+    st.markdown("Expand every main section of this outline in parallel, then tie them together "
+                "with an introduction, transitions and a conclusion.")
+    
+    outline, draft = unstash('last_draft', (None, None))
+    if outline != result.outline:
+        draft = None
+    
+    if st.button("✍️ Write Full Draft", key="write_full_draft"):
+        structure = result.structured or BlogStructure.model_validate(parse_blog_outline(result.outline))
+        placeholders = []
+        for section in main_sections(structure):
+            st.markdown(f"#### {section.title}")
+            placeholder = st.empty()
+            placeholder.caption("⏳ Writing...")
+            placeholders.append(placeholder)
+        
+        def show_section(event: dict):
+            if event["index"] < len(placeholders):
+                placeholders[event["index"]].markdown(event["content"])
+        
+        with st.spinner("✍️ Writing sections in parallel..."):
+            try:
+                draft = generate_blog_draft(
+                    result,
+                    model_override=st.session_state.get('selected_model', None),
+                    provider_override=st.session_state.get('selected_provider', None),
+                    temperature=st.session_state.get('temperature', 0.7),
+                    max_tokens=st.session_state.get('max_tokens', 2000),
+                    on_section=show_section
+                )
+            except Exception as e:
+                st.error(f"❌ Error writing draft: {str(e)}")
+                return
+        stash('last_draft', (result.outline, draft))
+        st.rerun()
+    
+    if draft is None:
+        return
+    
+    st.caption(
+        f"📝 {draft.metadata['words']} words · {draft.metadata['sections']} sections in "
+        f"{draft.metadata['map_seconds']}s (longest {draft.metadata['longest_section_seconds']}s) · "
+        f"{draft.metadata['total_seconds']}s total"
+    )
+    st.markdown(draft.to_markdown())
+    st.download_button(
+        label="📥 Download Draft as Markdown",
+        data=lazy_export("draft_markdown", draft, lambda item: item.to_markdown()),
+        file_name=f"blog_draft_{sanitize_filename(draft.topic)}.md",
+        mime="text/markdown",
+        key="download_blog_draft"
+    )
+
+
+def render_series_generator():
+    """Render the blog series planner interface"""
+    from generators.series_generator import generate_blog_series, load_series_bundle, MAX_SERIES_POSTS
+    
+    st.header("📚 Blog Series Planner")
+    st.markdown("Plan a series of posts and outline all of them at once, without overlapping headlines or sections.")
+    
+    # Input form
+    with st.form("series_form"):
+        col1, col2 = st.columns(2)
         
-        # Export buttons
-        col1, col2, col3 = st.columns(3)
         with col1:
-            st.download_button(
-                label="📥 Download as Markdown",
-                data=result.to_markdown(),
-                file_name=f"blog_outline_{sanitize_filename(result.topic)}.md",
-                mime="text/markdown"
+            theme = st.text_input(
+                "📌 Series Theme",
+                placeholder="e.g., Kubernetes Operations",
+                help="What the whole series is about"
             )
-        with col2:
-            html_content = generate_html(f"Blog Outline: {result.topic}", result.outline, result.metadata)
-            st.download_button(
-                label="📥 Download as HTML",
-                data=html_content,
-                file_name=f"blog_outline_{sanitize_filename(result.topic)}.html",
-                mime="text/html"
+            
+            post_count = st.number_input(
+                "🔢 Number of Posts",
+                min_value=2,
+                max_value=MAX_SERIES_POSTS,
+                value=6,
+                help="Posts are outlined in parallel (see LLM_MAX_PARALLEL)"
             )
-        with col3:
-            st.download_button(
-                label="📥 Download as Text",
-                data=result.to_markdown(),
-                file_name=f"blog_outline_{sanitize_filename(result.topic)}.txt",
-                mime="text/plain"
+            
+            audience = st.selectbox(
+                "👥 Target Audience",
+                ["beginners", "intermediate", "experts"],
+                index=1
             )
-    
-    with tab2:
-        # Raw markdown view with copy functionality
-        st.code(result.to_markdown(), language="markdown")
         
-        # Copy-to-clipboard button
-        col1, col2 = st.columns([3, 1])
         with col2:
-            st.button(
-                "📋 Copy to Clipboard",
-                help="Select all (Ctrl+A) and copy (Ctrl+C) from the text area below",
-                key="copy_blog"
+            length = st.selectbox(
+                "📏 Length of Each Post",
+                ["short", "medium", "long"],
+                index=1
+            )
+            
+            content_type = st.selectbox(
+                "📄 Content Type",
+                ["tutorial", "listicle", "how-to", "opinion"],
+                index=2
             )
         
-        # Text area for easy copying
-        st.text_area(
-            "Copy the outline below:",
-            value=result.to_markdown(),
-            height=300,
-            help="Select all (Ctrl+A) and copy (Ctrl+C)"
+        custom_context = st.text_area(
+            "📚 Custom Context (Optional)",
+            placeholder="Add any specific information, requirements, or context for the series...",
+            height=100
         )
+        
+        submitted = st.form_submit_button("🚀 Plan Blog Series")
     
-    with tab3:
-        # Display metadata
-        st.json(result.metadata)
+    with st.expander("📂 Open a Saved Series"):
+        bundle = st.file_uploader("Series bundle (.zip)", type=["zip"], key="series_bundle_upload")
+        # Load each uploaded file once, so a newer generated series is not replaced on rerun
+        if bundle is not None and st.session_state.get('loaded_series_bundle') != (bundle.name, bundle.size):
+            try:
+                set_last_result(load_series_bundle(bundle.getvalue()), 'series')
+                st.session_state['loaded_series_bundle'] = (bundle.name, bundle.size)
+            except Exception as e:
+                st.error(f"❌ Could not open bundle: {str(e)}")
+    
+    if submitted:
+        if not theme or len(theme.strip()) < 3:
+            st.error("⚠️ Please enter a valid theme (at least 3 characters)")
+            return
         
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Audience", result.metadata['audience'].title())
-            st.metric("Content Type", result.metadata['content_type'].title())
-        with col2:
-            st.metric("Length", result.metadata['length'].title())
-            st.metric("Model", result.metadata['model'])
+        status = st.empty()
+        placeholders = {}
+        
+        def show_progress(event: dict):
+            if event["type"] == "plan":
+                status.info(f"🗂️ Planned {len(event['posts'])} posts, outlining them now...")
+                for index, title in enumerate(event["posts"]):
+                    placeholders[index] = st.empty()
+                    placeholders[index].caption(f"⏳ Part {index + 1}: {title}")
+            elif event["index"] in placeholders:
+                placeholders[event["index"]].markdown(f"✅ **Part {event['index'] + 1}: {event['title']}**")
+        
+        with st.spinner("🤔 Planning your blog series..."):
+            try:
+                result = generate_blog_series(
+                    theme=theme.strip(),
+                    post_count=int(post_count),
+                    audience=audience,
+                    length=length,
+                    content_type=content_type,
+                    custom_context=custom_context.strip() if custom_context else None,
+                    model_override=st.session_state.get('selected_model', None),
+                    provider_override=st.session_state.get('selected_provider', None),
+                    temperature=st.session_state.get('temperature', 0.7),
+                    max_tokens=st.session_state.get('max_tokens', 2000),
+                    on_post=show_progress
+                )
+            except Exception as e:
+                st.error(f"❌ Error planning series: {str(e)}")
+                return
+        
+        status.empty()
+        for placeholder in placeholders.values():
+            placeholder.empty()
+        set_last_result(result, 'series')
+        st.success("✅ Blog series planned successfully!")
+        display_series_result(result)
+    
+    elif last_result('series') is not None:
+        st.info("📋 Showing previous result. Generate a new one using the form above.")
+        display_series_result(last_result('series'))
+
+
+def display_series_result(result):
+    """Display a blog series plan and its outlines"""
+    from generators.series_generator import series_bundle
+    
+    st.markdown("---")
+    st.subheader(f"📚 {result.theme}")
+    st.markdown(result.overview)
+    
+    if result.metadata.get('regenerated_posts'):
+        parts = ", ".join(str(part) for part in result.metadata['regenerated_posts'])
+        st.caption(f"🔁 Re-outlined part(s) {parts} to remove overlap with earlier posts")
+    if result.metadata.get('remaining_overlaps'):
+        st.warning("⚠️ Some posts still share headlines or sections: "
+                   + "; ".join(f"part {part}: {', '.join(items)}"
+                               for part, items in result.metadata['remaining_overlaps'].items()))
+    
+    for index, outline in enumerate(result.outlines, 1):
+        with st.expander(f"Part {index}: {outline.topic}"):
+            if result.plan[index - 1].scope:
+                st.caption(result.plan[index - 1].scope)
+            st.markdown(outline.outline)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📦 Download Series Bundle (.zip)",
+            data=lazy_export("series_bundle", result, series_bundle),
+            file_name=f"blog_series_{sanitize_filename(result.theme)}.zip",
+            mime="application/zip",
+            key="download_series_bundle"
+        )
+    with col2:
+        st.download_button(
+            label="📥 Download as Markdown",
+            data=lazy_export("series_markdown", result, lambda item: item.to_markdown()),
+            file_name=f"blog_series_{sanitize_filename(result.theme)}.md",
+            mime="text/markdown",
+            key="download_series_markdown"
+        )
+    
+    with st.expander("ℹ️ Metadata"):
+        st.json(result.metadata)
 
 
 def render_social_generator():
     """Render the social media calendar generator interface"""
+    from config import settings
+    from generators.social_generator import generate_social_calendar, generate_multi_platform_calendar
     
     st.header("📱 Social Media Calendar Generator")
     st.markdown("Generate platform-optimized social media content calendars with post ideas, engagement prompts, and hashtags.")
@@ -454,17 +857,41 @@ def render_social_generator():
         with col2:
             timeframe = st.selectbox(
                 "⏰ Timeframe",
-                ["week", "month", "quarter"],
+                ["week", "month", "quarter", "year"],
                 index=1,
                 help="What time period should the calendar cover?"
             )
             
+            timezone = st.text_input(
+                "🌍 Time Zone",
+                value=settings.TIMEZONE,
+                help="IANA time zone for posting times, e.g. Europe/Berlin or America/New_York"
+            )
+            
+            blackout_dates = st.text_input(
+                "🚫 Blackout Dates (optional)",
+                placeholder="e.g., 2025-12-24, 2025-12-25",
+                help="Comma-separated dates (YYYY-MM-DD) without posts"
+            )
+            
             tone = st.selectbox(
                 "🎭 Tone",
                 ["professional", "casual", "friendly", "educational", "inspirational", "humorous"],
                 index=0,
                 help="What tone should your content have?"
             )
+            
+            extra_platforms = st.multiselect(
+                "🔀 Also adapt for",
+                ["LinkedIn", "Twitter", "Instagram", "Facebook", "TikTok"],
+                help="The plan is generated once and rewritten for each extra platform in parallel"
+            )
+            
+            adaptation_model = st.text_input(
+                "⚡ Adaptation model (optional)",
+                placeholder="e.g., llama3.2:1b",
+                help="A smaller, faster model for the per-platform rewrites. Defaults to the selected model."
+            )
         
         # Submit button
         submitted = st.form_submit_button("🚀 Generate Social Calendar")
@@ -486,129 +913,190 @@ def render_social_generator():
             st.error("⚠️ Please enter a valid theme (at least 3 characters)")
             return
         
-        # Generate calendar
-        with st.spinner("🤔 Generating your social media calendar... This may take 10-30 seconds"):
-            try:
-                # Get selected model and provider from session state
-                selected_model = st.session_state.get('selected_model', None)
-                selected_provider = st.session_state.get('selected_provider', None)
-                temperature = st.session_state.get('temperature', 0.7)
-                max_tokens = st.session_state.get('max_tokens', 2000)
-                
-                result = generate_social_calendar(
-                    theme=theme.strip(),
-                    platform=platform,
-                    frequency=frequency,
-                    timeframe=timeframe,
-                    tone=tone,
-                    model_override=selected_model,
-                    provider_override=selected_provider,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-                
-                # Store in session state
-                st.session_state['last_result'] = result
-                st.session_state['last_type'] = 'social'
-                
-                # Success message
-                st.success("✅ Social media calendar generated successfully!")
-                
-                # Display result
-                display_social_result(result)
-                
-            except Exception as e:
-                st.error(f"❌ Error generating calendar: {str(e)}")
-                st.info("""
-                **Troubleshooting:**
-                - Ensure Ollama is running (`ollama list` to verify)
-                - Check your `.env` file configuration
-                - Verify the model is available
-                - Try a simpler theme if the generation fails
-                """)
+        # Generate the calendar in the background; the page stays usable meanwhile
+        params = {
+            "theme": theme.strip(),
+            "frequency": frequency,
+            "timeframe": timeframe,
+            "tone": tone,
+            "model_override": st.session_state.get('selected_model', None),
+            "provider_override": st.session_state.get('selected_provider', None),
+            "temperature": st.session_state.get('temperature', 0.7),
+            "max_tokens": st.session_state.get('max_tokens', 2000),
+            "structured": st.session_state.get('structured', False),
+            "timezone": timezone.strip() or None,
+            "blackout_dates": [day.strip() for day in blackout_dates.split(",") if day.strip()],
+        }
+        platforms = [platform] + [p for p in extra_platforms if p != platform]
+        if len(platforms) > 1:
+            params.update(platforms=platforms, adaptation_model=adaptation_model.strip() or None)
+            submit_generation("social", f"{params['theme']} ({', '.join(platforms)})",
+                              lambda on_chunk: generate_multi_platform_calendar(**params, stream_callback=on_chunk),
+                              params, queueable=False)
+        else:
+            params.update(platform=platform, variants=st.session_state.get('variants', 1))
+            submit_generation("social", f"{params['theme']} ({platform})",
+                              lambda on_chunk: generate_social_calendar(**params, stream_callback=on_chunk), params)
+    
+    render_jobs("social", "Try a simpler theme if the generation fails")
     
     # Display previous result if exists
-    elif 'last_result' in st.session_state and st.session_state.get('last_type') == 'social':
+    if last_result('social') is not None:
         st.info("📋 Showing previous result. Generate a new one using the form above.")
-        display_social_result(st.session_state['last_result'])
+        display_social_result(last_result('social'))
 
 
 def display_social_result(result):
     """Display the generated social media calendar"""
+    from generators.social_generator import (
+        posting_schedule,
+        calendar_posts_by_date,
+        find_missing_post_dates,
+        repair_social_calendar,
+    )
     
     st.markdown("---")
     st.subheader("📄 Generated Calendar")
+    render_repair_notice(result, "social", find_missing_post_dates(result), repair_social_calendar, "post dates")
     
-    # Tabs for different views
-    tab1, tab2, tab3 = st.tabs(["📖 Formatted View", "📝 Markdown", "ℹ️ Metadata"])
+    # Tabs for different views; only the open one is rendered (exports and all)
+    tabs = st.tabs(["📖 Formatted View", "📝 Markdown", "ℹ️ Metadata", "🔁 Refine"]
+                   + (["🔀 Variants"] if result.alternatives else []),
+                   on_change="rerun", key="social_result_tabs")
+    tab1, tab2, tab3, tab4 = tabs[:4]
     
     with tab1:
-        # Display the calendar in a nice format
-        st.markdown(result.calendar)
-        
-        # Export buttons
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.download_button(
-                label="📥 Download as Markdown",
-                data=result.to_markdown(),
-                file_name=f"social_calendar_{sanitize_filename(result.theme)}.md",
-                mime="text/markdown"
-            )
-        with col2:
-            html_content = generate_html(f"Social Media Calendar: {result.theme}", result.calendar, result.metadata)
-            st.download_button(
-                label="📥 Download as HTML",
-                data=html_content,
-                file_name=f"social_calendar_{sanitize_filename(result.theme)}.html",
-                mime="text/html"
-            )
-        with col3:
-            st.download_button(
-                label="📥 Download as Text",
-                data=result.to_markdown(),
-                file_name=f"social_calendar_{sanitize_filename(result.theme)}.txt",
-                mime="text/plain"
-            )
+        if tab1.open:
+            # Display the calendar in a nice format (one tab per platform in multi-platform mode)
+            if result.platform_calendars:
+                fitted = result.metadata.get('posts_fitted_to_limits', {})
+                platform_tabs = st.tabs(list(result.platform_calendars))
+                for platform_tab, (platform, calendar) in zip(platform_tabs, result.platform_calendars.items()):
+                    with platform_tab:
+                        if fitted.get(platform):
+                            st.caption(f"✂️ {fitted[platform]} post(s) shortened to fit {platform}'s limits")
+                        st.markdown(calendar)
+                        st.download_button(
+                            label=f"📥 Download {platform} Calendar",
+                            data=calendar,
+                            file_name=f"social_calendar_{sanitize_filename(result.theme)}_{platform.lower()}.md",
+                            mime="text/markdown",
+                            key=f"download_platform_{platform}"
+                        )
+            else:
+                st.markdown(result.calendar)
+            
+            # Posting schedule exports (real dates and times in the calendar's time zone)
+            if result.metadata.get('start_date'):
+                schedule_col1, schedule_col2 = st.columns(2)
+                with schedule_col1:
+                    st.download_button(
+                        label="📅 Download as iCalendar",
+                        data=lazy_export("social_ics", result, lambda item: "".join(iter_icalendar(
+                            posting_schedule(item), calendar_posts_by_date(item), f"Social Media Calendar: {item.theme}"))),
+                        file_name=f"social_calendar_{sanitize_filename(result.theme)}.ics",
+                        mime="text/calendar",
+                        key="ics_social_calendar"
+                    )
+                with schedule_col2:
+                    st.download_button(
+                        label="📊 Download Schedule as CSV",
+                        data=lazy_export("social_csv", result, lambda item: "".join(iter_csv(
+                            posting_schedule(item), calendar_posts_by_date(item)))),
+                        file_name=f"social_calendar_{sanitize_filename(result.theme)}.csv",
+                        mime="text/csv",
+                        key="csv_social_calendar"
+                    )
+            
+            # Export buttons
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.download_button(
+                    label="📥 Download as Markdown",
+                    data=lazy_export("social_markdown", result, lambda item: item.to_markdown()),
+                    file_name=f"social_calendar_{sanitize_filename(result.theme)}.md",
+                    mime="text/markdown"
+                )
+            with col2:
+                st.download_button(
+                    label="📥 Download as HTML",
+                    data=lazy_export("social_html", result, lambda item: generate_html(
+                        f"Social Media Calendar: {item.theme}", item.calendar, item.metadata)),
+                    file_name=f"social_calendar_{sanitize_filename(result.theme)}.html",
+                    mime="text/html"
+                )
+            with col3:
+                st.download_button(
+                    label="📥 Download as Text",
+                    data=lazy_export("social_markdown", result, lambda item: item.to_markdown()),
+                    file_name=f"social_calendar_{sanitize_filename(result.theme)}.txt",
+                    mime="text/plain"
+                )
     
     with tab2:
-        # Raw markdown view with copy functionality
-        st.code(result.to_markdown(), language="markdown")
-        
-        # Copy-to-clipboard button
-        col1, col2 = st.columns([3, 1])
-        with col2:
-            st.button(
-                "📋 Copy to Clipboard",
-                help="Select all (Ctrl+A) and copy (Ctrl+C) from the text area below",
-                key="copy_social"
+        if tab2.open:
+            # Raw markdown view with copy functionality
+            st.code(result.to_markdown(), language="markdown")
+            
+            # Copy-to-clipboard button
+            col1, col2 = st.columns([3, 1])
+            with col2:
+                st.button(
+                    "📋 Copy to Clipboard",
+                    help="Select all (Ctrl+A) and copy (Ctrl+C) from the text area below",
+                    key="copy_social"
+                )
+                    # Text area for easy copying
+            st.text_area(
+                "Copy the calendar below:",
+                value=result.to_markdown(),
+                height=300,
+                help="Select all (Ctrl+A) and copy (Ctrl+C)"
             )
-                # Text area for easy copying
-        st.text_area(
-            "Copy the calendar below:",
-            value=result.to_markdown(),
-            height=300,
-            help="Select all (Ctrl+A) and copy (Ctrl+C)"
-        )
     
     with tab3:
-        # Display metadata
-        st.json(result.metadata)
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Platform", result.metadata['platform'])
-            st.metric("Frequency", result.metadata['frequency'])
-            st.metric("Timeframe", result.metadata['timeframe'])
-        with col2:
-            st.metric("Tone", result.metadata['tone'].title())
-            st.metric("Model", result.metadata['model'])
-            if 'provider' in result.metadata:
-                st.metric("Provider", result.metadata['provider'])
+        if tab3.open:
+            # Display metadata
+            st.json(result.metadata)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Platform", result.metadata['platform'])
+                st.metric("Frequency", result.metadata['frequency'])
+                st.metric("Timeframe", result.metadata['timeframe'])
+            with col2:
+                st.metric("Tone", result.metadata['tone'].title())
+                st.metric("Model", result.metadata['model'])
+                if 'provider' in result.metadata:
+                    st.metric("Provider", result.metadata['provider'])
+                if result.metadata.get('tokens_saved'):
+                    st.metric("Tokens Saved", result.metadata['tokens_saved'])
+            
+            if result.structured is not None:
+                st.markdown("**🧩 Structured Output**")
+                st.json(result.structured.model_dump())
+                st.download_button(
+                    label="📥 Download as JSON",
+                    data=lazy_export("social_json", result, lambda item: item.structured.model_dump_json(indent=2)),
+                    file_name=f"social_calendar_{sanitize_filename(result.theme)}.json",
+                    mime="application/json",
+                    key="json_social_calendar"
+                )
+    
+    with tab4:
+        if tab4.open:
+            render_refine_tab(result, "social", "calendar", "e.g., Add two more video posts, or make the captions shorter")
+    
+    if result.alternatives:
+        with tabs[-1]:
+            if tabs[-1].open:
+                render_variants_tab(result, "social", "calendar")
 
 
 def render_writing_generator():
     """Render the creative writing prompt generator interface"""
+    from generators.writing_generator import generate_writing_prompt
+    from utils.history_store import record_result
     
     st.header("✨ Creative Writing Prompt Generator")
     st.markdown("Generate original, inspiring creative writing prompts with rich details, character ideas, and plot directions.")
@@ -648,6 +1136,13 @@ def render_writing_generator():
             height=80
         )
         
+        keep_ready = st.checkbox(
+            "⚡ Keep prompts ready",
+            value=st.session_state.get('writing_prefetch_enabled', False),
+            help="Generate the next prompts for this selection in the background while the backend is idle, "
+                 "so clicking Generate again is instant"
+        )
+        
         # Submit button
         submitted = st.form_submit_button("🚀 Generate Writing Prompt")
     
@@ -677,124 +1172,626 @@ def render_writing_generator():
     
     # Process form submission
     if submitted:
-        # Generate prompt
-        with st.spinner("🤔 Crafting your creative writing prompt... This may take 10-30 seconds"):
-            try:
-                # Get selected model and provider from session state
-                selected_model = st.session_state.get('selected_model', None)
-                selected_provider = st.session_state.get('selected_provider', None)
-                temperature = st.session_state.get('temperature', 0.7)
-                max_tokens = st.session_state.get('max_tokens', 2000)
-                
-                result = generate_writing_prompt(
-                    genre=genre,
-                    prompt_type=prompt_type,
-                    complexity=complexity,
-                    constraints=constraints.strip() if constraints else None,
-                    model_override=selected_model,
-                    provider_override=selected_provider,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-                
-                # Store in session state
-                st.session_state['last_result'] = result
-                st.session_state['last_type'] = 'writing'
-                
-                # Success message
-                st.success("✅ Writing prompt generated successfully!")
-                
-                # Display result
-                display_writing_result(result)
-                
-            except Exception as e:
-                st.error(f"❌ Error generating prompt: {str(e)}")
-                st.info("""
-                **Troubleshooting:**
-                - Ensure Ollama is running (`ollama list` to verify)
-                - Check your `.env` file configuration
-                - Verify the model is available
-                - Try without additional constraints if the generation fails
-                """)
+        st.session_state['writing_prefetch_enabled'] = keep_ready
+        params = {
+            "genre": genre,
+            "prompt_type": prompt_type,
+            "complexity": complexity,
+            "constraints": constraints.strip() if constraints else None,
+            "model_override": st.session_state.get('selected_model', None),
+            "provider_override": st.session_state.get('selected_provider', None),
+            "temperature": st.session_state.get('temperature', 0.7),
+            "max_tokens": st.session_state.get('max_tokens', 2000),
+            "structured": st.session_state.get('structured', False),
+        }
+        variants = st.session_state.get('variants', 1)
+        # Prompts without constraints come from the offline prompt bank when it has unseen ones
+        result = serve_from_prompt_bank(params) if variants == 1 else None
+        if result is not None:
+            record_result("writing", result, params, current_user_id())
+            set_last_result(result, 'writing')
+            st.success(f"📚 Served from the prompt bank ({result.metadata['bank_unseen']} more unseen)")
+            display_writing_result(result)
+            return
+        
+        queue = writing_prefetch_queue(params if keep_ready else None)
+        result = queue.take() if queue is not None and variants == 1 else None
+        if result is not None:
+            record_result("writing", result, params, current_user_id())
+            set_last_result(result, 'writing')
+            st.success(f"⚡ Served instantly from the ready queue ({queue.ready_count} more ready)")
+            display_writing_result(result)
+            return
+        
+        # Generate the prompt in the background; the page stays usable meanwhile
+        params = {**params, "variants": variants}
+        submit_generation("writing", f"{genre} {prompt_type} ({complexity})",
+                          lambda on_chunk: generate_writing_prompt(**params, stream_callback=on_chunk), params)
+    
+    render_jobs("writing", "Try without additional constraints if the generation fails")
     
     # Display previous result if exists
-    elif 'last_result' in st.session_state and st.session_state.get('last_type') == 'writing':
+    if last_result('writing') is not None:
         st.info("📋 Showing previous result. Generate a new one using the form above.")
-        display_writing_result(st.session_state['last_result'])
+        display_writing_result(last_result('writing'))
+
+
+def serve_from_prompt_bank(params: dict):
+    """
+    Take an unseen prompt for the selection from the offline prompt bank
+    
+    Returns:
+        WritingPrompt, or None if there are constraints, no bank has been built,
+        or this user has seen every banked prompt for the selection
+    """
+    from generators.writing_generator import get_writing_prompt
+    from utils.prompt_bank import get_prompt_bank
+    
+    bank = get_prompt_bank()
+    if bank is None or params["constraints"] or params["structured"]:
+        return None
+    user_id = current_user_id()
+    if not bank.count(params["genre"], params["prompt_type"], params["complexity"], user_id=user_id):
+        return None
+    return get_writing_prompt(params["genre"], params["prompt_type"], params["complexity"],
+                              user_id=user_id, bank=bank)
+
+
+def writing_prefetch_queue(params: dict = None):
+    """
+    Background queue of ready writing prompts for the current selection
+    
+    Args:
+        params: generate_writing_prompt arguments, or None to turn prefetching off
+    
+    Returns:
+        The running PrefetchQueue for these arguments, or None when prefetching is off
+    """
+    from generators.writing_generator import generate_writing_prompt
+    from utils.prefetch import PrefetchQueue
+    
+    current = st.session_state.get('writing_prefetch')
+    if current is not None and (params is None or current[0] != params):
+        # Selection changed: prompts prefetched for the old one are no longer wanted
+        current[1].stop()
+        del st.session_state['writing_prefetch']
+        current = None
+    if params is None:
+        return None
+    if current is None:
+        queue = PrefetchQueue(lambda: generate_writing_prompt(**params), name="writing-prefetch")
+        current = (dict(params), queue)
+        st.session_state['writing_prefetch'] = current
+    return current[1].start()
 
 
 def display_writing_result(result):
     """Display the generated creative writing prompt"""
+    from generators.writing_generator import find_writing_prompt_gaps, repair_writing_prompt
     
     st.markdown("---")
     st.subheader("📄 Generated Writing Prompt")
+    render_repair_notice(result, "writing", find_writing_prompt_gaps(result), repair_writing_prompt, "sections")
     
-    # Tabs for different views
-    tab1, tab2, tab3 = st.tabs(["📖 Formatted View", "📝 Markdown", "ℹ️ Metadata"])
+    # Tabs for different views; only the open one is rendered (exports and all)
+    tabs = st.tabs(["📖 Formatted View", "📝 Markdown", "ℹ️ Metadata", "🔁 Refine"]
+                   + (["🔀 Variants"] if result.alternatives else []),
+                   on_change="rerun", key="writing_result_tabs")
+    tab1, tab2, tab3, tab4 = tabs[:4]
     
     with tab1:
-        # Display the prompt in a nice format
-        st.markdown(result.prompt)
-        
-        # Export buttons
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.download_button(
-                label="📥 Download as Markdown",
-                data=result.to_markdown(),
-                file_name=f"writing_prompt_{sanitize_filename(result.genre)}.md",
-                mime="text/markdown"
-            )
-        with col2:
-            html_content = generate_html(f"Writing Prompt: {result.genre.title()}", result.prompt, result.metadata)
-            st.download_button(
-                label="📥 Download as HTML",
-                data=html_content,
-                file_name=f"writing_prompt_{sanitize_filename(result.genre)}.html",
-                mime="text/html"
-            )
-        with col3:
-            st.download_button(
-                label="📥 Download as Text",
-                data=result.to_markdown(),
-                file_name=f"writing_prompt_{sanitize_filename(result.genre)}.txt",
-                mime="text/plain"
-            )
+        if tab1.open:
+            # Display the prompt in a nice format
+            st.markdown(result.prompt)
+            
+            # Export buttons
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.download_button(
+                    label="📥 Download as Markdown",
+                    data=lazy_export("writing_markdown", result, lambda item: item.to_markdown()),
+                    file_name=f"writing_prompt_{sanitize_filename(result.genre)}.md",
+                    mime="text/markdown"
+                )
+            with col2:
+                st.download_button(
+                    label="📥 Download as HTML",
+                    data=lazy_export("writing_html", result, lambda item: generate_html(
+                        f"Writing Prompt: {item.genre.title()}", item.prompt, item.metadata)),
+                    file_name=f"writing_prompt_{sanitize_filename(result.genre)}.html",
+                    mime="text/html"
+                )
+            with col3:
+                st.download_button(
+                    label="📥 Download as Text",
+                    data=lazy_export("writing_markdown", result, lambda item: item.to_markdown()),
+                    file_name=f"writing_prompt_{sanitize_filename(result.genre)}.txt",
+                    mime="text/plain"
+                )
     
     with tab2:
-        # Raw markdown view with copy functionality
-        st.code(result.to_markdown(), language="markdown")
-        
-        # Copy-to-clipboard button
-        col1, col2 = st.columns([3, 1])
-        with col2:
-            st.button(
-                "📋 Copy to Clipboard",
-                help="Select all (Ctrl+A) and copy (Ctrl+C) from the text area below",
-                key="copy_writing"
+        if tab2.open:
+            # Raw markdown view with copy functionality
+            st.code(result.to_markdown(), language="markdown")
+            
+            # Copy-to-clipboard button
+            col1, col2 = st.columns([3, 1])
+            with col2:
+                st.button(
+                    "📋 Copy to Clipboard",
+                    help="Select all (Ctrl+A) and copy (Ctrl+C) from the text area below",
+                    key="copy_writing"
+                )
+                    # Text area for easy copying
+            st.text_area(
+                "Copy the prompt below:",
+                value=result.to_markdown(),
+                height=300,
+                help="Select all (Ctrl+A) and copy (Ctrl+C)"
             )
-                # Text area for easy copying
-        st.text_area(
-            "Copy the prompt below:",
-            value=result.to_markdown(),
-            height=300,
-            help="Select all (Ctrl+A) and copy (Ctrl+C)"
-        )
     
     with tab3:
-        # Display metadata
-        st.json(result.metadata)
-        
+        if tab3.open:
+            # Display metadata
+            st.json(result.metadata)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Genre", result.genre.title())
+                st.metric("Prompt Type", result.metadata['prompt_type'].title())
+                st.metric("Complexity", result.metadata['complexity'].title())
+            with col2:
+                st.metric("Model", result.metadata['model'])
+                st.metric("Provider", result.metadata['provider'])
+                if result.metadata.get('constraints') and result.metadata['constraints'] != "None":
+                    st.metric("Constraints", "Yes")
+                if result.metadata.get('tokens_saved'):
+                    st.metric("Tokens Saved", result.metadata['tokens_saved'])
+            
+            if result.structured is not None:
+                st.markdown("**🧩 Structured Output**")
+                st.json(result.structured.model_dump())
+                st.download_button(
+                    label="📥 Download as JSON",
+                    data=lazy_export("writing_json", result, lambda item: item.structured.model_dump_json(indent=2)),
+                    file_name=f"writing_prompt_{sanitize_filename(result.genre)}.json",
+                    mime="application/json",
+                    key="json_writing_prompt"
+                )
+    
+    with tab4:
+        if tab4.open:
+            render_refine_tab(result, "writing", "prompt", "e.g., Make the twist darker, or add a second point-of-view character")
+    
+    if result.alternatives:
+        with tabs[-1]:
+            if tabs[-1].open:
+                render_variants_tab(result, "writing", "prompt")
+
+
+def render_refine_tab(result, result_type: str, text_field: str, placeholder: str):
+    """Render follow-up refinement controls for a displayed result"""
+    from utils.refinement import RefinementSession
+    
+    st.markdown("Ask for a change to this result. The conversation is continued, so only your instruction is processed.")
+    
+    with st.form(f"refine_form_{result_type}", clear_on_submit=True):
+        instruction = st.text_input("✏️ Refinement instruction", placeholder=placeholder)
+        submitted = st.form_submit_button("🔁 Apply Refinement")
+    
+    session_key = f"refinement_{result_type}"
+    session = st.session_state.get(session_key)
+    current_text = getattr(result, text_field)
+    
+    if session is not None and session.current == current_text and session.refinements:
+        st.caption(f"🔁 {session.refinements} refinement(s) applied in this session")
+    
+    if not submitted:
+        return
+    if not instruction or not instruction.strip():
+        st.error("⚠️ Please describe the change you want")
+        return
+    
+    # Start a new session if this result was regenerated or loaded since the last refinement
+    if session is None or session.current != current_text:
+        session = RefinementSession.from_seed(result._session_seed, current_text, llm=sidebar_llm())
+    
+    with st.spinner("🔁 Applying refinement..."):
+        try:
+            updated_text = session.refine(instruction)
+        except Exception as e:
+            st.error(f"❌ Error applying refinement: {str(e)}")
+            return
+    
+    st.session_state[session_key] = session
+    metadata = {**result.metadata, "refinements": session.refinements}
+    # The structured view no longer matches the edited text
+    set_last_result(result.model_copy(update={text_field: updated_text, "metadata": metadata, "structured": None}),
+                    result_type)
+    st.rerun()
+
+
+def render_variants_tab(result, result_type: str, text_field: str):
+    """Show all generated variants side by side and let the user pick one"""
+    variants = [result] + list(result.alternatives)
+    summary = result.metadata
+    st.caption(
+        f"🔀 {len(variants)} of {summary.get('variants_requested', len(variants))} variant(s), best first"
+        + (f" · {summary['variants_discarded_as_duplicates']} near-duplicate(s) replaced"
+           if summary.get('variants_discarded_as_duplicates') else "")
+    )
+    
+    for position, (column, variant) in enumerate(zip(st.columns(len(variants)), variants)):
+        with column:
+            label = "⭐ Current" if position == 0 else f"Variant {position + 1}"
+            st.markdown(f"**{label}**")
+            if variant.metadata.get('variant_angle'):
+                st.caption(f"Angle: {variant.metadata['variant_angle']}")
+            st.caption(f"Distinctiveness: {variant.metadata.get('variant_distinctiveness', 0.0):.2f}")
+            with st.container(height=500):
+                st.markdown(getattr(variant, text_field))
+            if position and st.button("✅ Use this variant", key=f"use_variant_{result_type}_{position}"):
+                others = [other.model_copy(update={"alternatives": []})
+                          for other in variants if other is not variant]
+                chosen = variant.model_copy(update={"alternatives": others})
+                # Keep the run summary with whichever variant is shown
+                chosen.metadata = {**variant.metadata, **{key: value for key, value in summary.items()
+                                                          if key.startswith("variants_")}}
+                set_last_result(chosen, result_type)
+                st.rerun()
+
+
+def sidebar_llm():
+    """Client for the provider/model selected in the sidebar (None if nothing is selected)"""
+    from utils.llm_interface import LocalLLM
+    from config import settings
+    
+    selected_provider = st.session_state.get('selected_provider')
+    if not selected_provider:
+        return None
+    client = LocalLLM(model_override=st.session_state.get('selected_model'))
+    client.provider = selected_provider
+    client.base_url = settings.OLLAMA_BASE_URL if selected_provider == "ollama" else settings.LM_STUDIO_BASE_URL
+    if not st.session_state.get('selected_model'):
+        client.model = settings.OLLAMA_MODEL if selected_provider == "ollama" else settings.LM_STUDIO_MODEL
+    return client
+
+
+def render_history_page():
+    """Search earlier results, and open, reuse or delete them"""
+    from datetime import datetime
+    from utils.history_store import get_history_store
+    
+    kinds = {"All types": None, "📝 Blog outlines": "blog", "📱 Social calendars": "social",
+             "✨ Writing prompts": "writing"}
+    tools = {"blog": "📝 Tech Blog Outline", "social": "📱 Social Media Calendar",
+             "writing": "✨ Creative Writing Prompts"}
+    displays = {"blog": display_blog_result, "social": display_social_result, "writing": display_writing_result}
+    
+    st.header("🗂️ History")
+    st.markdown("Find a result you already generated instead of generating it again.")
+    
+    store = get_history_store()
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        query = st.text_input("🔎 Search", placeholder="e.g. rust ownership", key="history_query",
+                              help="Matches every word (or word start) in the titles and generated text")
+    with col2:
+        kind_label = st.selectbox("Type", list(kinds), key="history_kind")
+    with col3:
+        model = st.selectbox("Model", ["All models"] + store.models(), key="history_model")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        mine_only = st.checkbox("Only my results", value=True, key="history_mine",
+                                help="Uncheck to include other users, the API and batch runs")
+    with col2:
+        best_match = st.checkbox("Best match first", key="history_best_match", disabled=not query.strip())
+    with col3:
+        page_size = st.selectbox("Per page", [10, 20, 50], index=1, key="history_page_size")
+    
+    # A new search or filter starts again on the first page
+    filters = (query, kind_label, model, mine_only, best_match, page_size)
+    if st.session_state.get('history_filters') != filters:
+        st.session_state['history_filters'] = filters
+        st.session_state['history_page'] = 0
+    page = st.session_state['history_page']
+    
+    entries, total = store.search(
+        query,
+        kind=kinds[kind_label],
+        model=None if model == "All models" else model,
+        owner=current_user_id() if mine_only else None,
+        best_match=best_match and bool(query.strip()),
+        limit=page_size,
+        offset=page * page_size,
+    )
+    if not total:
+        st.info("No matching results." if query.strip() else "Nothing here yet. Generated results appear here.")
+        return
+    pages = (total + page_size - 1) // page_size
+    st.caption(f"{total} result(s) · page {page + 1} of {pages}")
+    
+    for entry in entries:
+        with st.container(border=True):
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                icon = tools[entry['kind']].split()[0]
+                st.markdown(f"{icon} **{entry['title']}**")
+                details = [datetime.fromtimestamp(entry['created_at']).strftime("%Y-%m-%d %H:%M")]
+                if entry['model']:
+                    details.append(entry['model'])
+                if entry['duration']:
+                    details.append(f"{entry['duration']:.0f}s")
+                st.caption(" · ".join(details))
+                st.markdown(entry['snippet'] or entry['preview'])
+            with col2:
+                if st.button("📂 Open", key=f"history_open_{entry['id']}"):
+                    st.session_state['history_open'] = entry['id']
+                if st.button("♻️ Reuse", key=f"history_reuse_{entry['id']}",
+                             help="Make this the current result of its generator"):
+                    set_last_result(store.load(entry['id']), entry['kind'])
+                    st.session_state['pending_tool'] = tools[entry['kind']]
+                    st.rerun()
+                # Everyone can open and reuse shared entries, but only the owner can delete one
+                if entry['owner'] == current_user_id() and st.button("🗑️ Delete", key=f"history_delete_{entry['id']}"):
+                    store.delete(entry['id'], owner=current_user_id())
+                    if st.session_state.get('history_open') == entry['id']:
+                        del st.session_state['history_open']
+                    st.rerun()
+    
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col1:
+        if st.button("⬅️ Newer", disabled=page == 0, key="history_previous"):
+            st.session_state['history_page'] = page - 1
+            st.rerun()
+    with col3:
+        if st.button("Older ➡️", disabled=page + 1 >= pages, key="history_next"):
+            st.session_state['history_page'] = page + 1
+            st.rerun()
+    
+    # The opened result, with the usual views and exports
+    opened = st.session_state.get('history_open')
+    if opened:
+        try:
+            result = store.load(opened)
+        except KeyError:
+            del st.session_state['history_open']
+            return
+        displays[store.get(opened)['kind']](result)
+
+
+def render_session_memory():
+    """Memory used by this session's stored results, and by all sessions of this app process"""
+    from utils.session_store import get_session_store
+    
+    store = get_session_store()
+    mine = store.usage(session_id())
+    total = store.usage()
+    with st.expander("💾 Session Memory"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("In memory", f"{mine['in_memory'] / 1024:.1f} KB")
+        with col2:
+            st.metric("On disk", f"{mine['on_disk'] / 1024:.1f} KB")
+        st.caption(f"All {total['sessions']} session(s): {total['in_memory'] / 1024 / 1024:.1f} of "
+                   f"{total['budget'] / 1024 / 1024:.0f} MB in memory, the rest is loaded from disk when used")
+
+
+def render_usage_metrics():
+    """Backend usage counted by every app replica, API server and worker on this host"""
+    from utils.shared_store import get_shared_store
+    
+    with st.expander("📊 Usage"):
+        try:
+            counters = get_shared_store().counters()
+        except Exception as e:
+            st.caption(f"Usage metrics unavailable: {str(e)}")
+            return
+        requests_sent = counters.get("llm_requests", 0)
+        if not requests_sent:
+            st.caption("No requests yet")
+            return
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Genre", result.genre.title())
-            st.metric("Prompt Type", result.metadata['prompt_type'].title())
-            st.metric("Complexity", result.metadata['complexity'].title())
+            st.metric("Requests", f"{requests_sent:.0f}")
+            st.metric("Tokens generated", f"{counters.get('llm_completion_tokens', 0):.0f}")
         with col2:
-            st.metric("Model", result.metadata['model'])
-            st.metric("Provider", result.metadata['provider'])
-            if result.metadata.get('constraints') and result.metadata['constraints'] != "None":
-                st.metric("Constraints", "Yes")
+            st.metric("Errors", f"{counters.get('llm_errors', 0):.0f}")
+            st.metric("Avg. seconds", f"{counters.get('llm_seconds', 0) / requests_sent:.1f}")
+        hits = counters.get("response_cache_hits", 0)
+        if hits:
+            st.caption(f"♻️ {hits:.0f} response(s) served from the shared cache")
+        st.caption("Counted across all app processes, the API server and workers on this host")
+
+
+def session_id() -> str:
+    """Id of this browser session (one per tab, unlike current_user_id)"""
+    from uuid import uuid4
+    
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid4().hex
+    return st.session_state['session_id']
+
+
+def stash(key: str, value):
+    """Keep a large session value on disk; session state only holds its handle (see utils/session_store.py)"""
+    from utils.session_store import get_session_store
+    
+    st.session_state[key] = get_session_store().put(session_id(), key, value)
+
+
+def unstash(key: str, default=None):
+    """A value kept with stash(), loaded back from disk if it is no longer in memory"""
+    from utils.session_store import get_session_store
+    
+    handle = st.session_state.get(key)
+    value = get_session_store().get(handle) if handle is not None else None
+    return default if value is None else value
+
+
+def set_last_result(result, result_type: str):
+    """Make a result the one shown by its generator's page"""
+    stash('last_result', result)
+    st.session_state['last_type'] = result_type
+
+
+def last_result(result_type: str):
+    """This session's current result if it is of this type, else None"""
+    if st.session_state.get('last_type') != result_type:
+        return None
+    return unstash('last_result')
+
+
+def current_user_id() -> str:
+    """Id of this browser's user, kept in the URL so a reloaded page finds its jobs again"""
+    from uuid import uuid4
+    
+    if 'user_id' not in st.session_state:
+        st.session_state['user_id'] = st.query_params.get("uid") or uuid4().hex
+    if st.query_params.get("uid") != st.session_state['user_id']:
+        st.query_params["uid"] = st.session_state['user_id']
+    return st.session_state['user_id']
+
+
+def submit_generation(kind: str, label: str, run, params: dict, queueable: bool = True):
+    """
+    Queue a generation as a background job for this user; its result is recorded in the history
+    
+    Args:
+        kind: Result type ("blog", "social" or "writing")
+        label: Short description shown in the job list
+        run: Does the generation; receives a stream callback and returns the result
+        params: The generator's arguments
+        queueable: `run` only calls the registry generator of `kind` with `params`,
+            so the job can go to the durable queue when it is enabled
+    """
+    from config import settings
+    from utils.history_store import record_result
+    from utils.job_manager import get_job_manager, JobQueueFull
+    
+    owner = current_user_id()
+    
+    def run_and_record(on_chunk):
+        started = time.perf_counter()
+        result = run(on_chunk)
+        record_result(kind, result, params, owner, time.perf_counter() - started)
+        return result
+    
+    try:
+        if settings.JOB_QUEUE_ENABLED and queueable:
+            # The worker records the result
+            from utils.job_queue import get_job_queue
+            job = get_job_queue().enqueue(kind, params, owner=owner, label=label,
+                                          max_queued=settings.JOB_MAX_QUEUED)
+        else:
+            job = get_job_manager().submit(run_and_record, kind, owner=owner, label=label)
+    except JobQueueFull as e:
+        st.error(f"⏳ The server is busy: {str(e)}")
+        return
+    # Opened automatically when it finishes
+    st.session_state['open_job'] = job.id
+
+
+def job_sources() -> list:
+    """Where this app's jobs live: the in-process manager, and the durable queue when enabled"""
+    from config import settings
+    from utils.job_manager import get_job_manager
+    
+    if not settings.JOB_QUEUE_ENABLED:
+        return [get_job_manager()]
+    from utils.job_queue import get_job_queue
+    return [get_job_manager(), get_job_queue()]
+
+
+def job_result(job):
+    """Result model of a finished job (jobs from the durable queue hold it as JSON)"""
+    if isinstance(job.result, dict):
+        from generators.registry import load_result
+        return load_result(job.kind, job.result["result"])
+    return job.result
+
+
+def render_jobs(kind: str, hint: str):
+    """List this user's jobs of one kind, refreshing every second while any is running"""
+    jobs = [job for source in job_sources() for job in source.jobs_for(current_user_id(), kind)]
+    if any(job.active for job in jobs):
+        # Only this part of the page reruns while polling, so the form stays usable
+        st.fragment(run_every=1.0)(_render_job_list)(kind, hint, polling=True)
+    else:
+        _render_job_list(kind, hint, polling=False)
+
+
+def _render_job_list(kind: str, hint: str, polling: bool):
+    sources = job_sources()
+    jobs = sorted((job for source in sources for job in source.jobs_for(current_user_id(), kind)),
+                  key=lambda job: job.submitted_at, reverse=True)
+    active = [job for job in jobs if job.active]
+    
+    # The job submitted last is opened as soon as it is done
+    open_job = next((job for job in jobs if job.id == st.session_state.get('open_job')), None)
+    if open_job is not None and not open_job.active:
+        del st.session_state['open_job']
+        if open_job.status == "done":
+            set_last_result(job_result(open_job), kind)
+            if polling:
+                st.rerun(scope="app")
+            st.success(f"✅ Generated in {open_job.elapsed:.0f}s: {open_job.label}")
+    if polling and not active:
+        st.rerun(scope="app")
+    
+    for position, job in enumerate(active):
+        with st.container(border=True):
+            state = "⏳ Queued" if job.status == "queued" else f"🔄 Running for {job.elapsed:.0f}s"
+            st.markdown(f"**{state}:** {job.label}")
+            # Live output of the newest job only; the others just show their state
+            if position == 0 and job.partial_text:
+                LiveStreamView(kind).on_chunk(job.partial_text)
+    
+    for job in jobs:
+        if job.status != "failed":
+            continue
+        st.error(f"❌ Generation failed ({job.label}): {job.error}")
+        st.info(f"""
+        **Troubleshooting:**
+        - Ensure Ollama is running (`ollama list` to verify)
+        - Check your `.env` file configuration
+        - Verify the model is available
+        - {hint}
+        """)
+        if st.button("Dismiss", key=f"dismiss_job_{job.id}"):
+            for source in sources:
+                source.forget(job.id)
+            st.rerun(scope="app")
+    
+    finished = [job for job in jobs if job.status == "done"]
+    if finished:
+        with st.expander(f"🧵 Recent results ({len(finished)})"):
+            for job in finished:
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.markdown(f"{job.label} · {job.elapsed:.0f}s")
+                with col2:
+                    if st.button("📂 Open", key=f"open_job_{job.id}"):
+                        set_last_result(job_result(job), kind)
+                        st.rerun(scope="app")
+
+
+def render_repair_notice(result, result_type: str, gaps: list[str], repair, what: str):
+    """Offer a targeted repair when a result is missing sections or posts"""
+    if not gaps:
+        return
+    shown = ", ".join(gaps[:5]) + (f" and {len(gaps) - 5} more" if len(gaps) > 5 else "")
+    st.warning(f"⚠️ Missing or incomplete {what}: {shown}")
+    if not st.button(f"🩹 Repair {what}", key=f"repair_{result_type}"):
+        return
+    with st.spinner(f"🩹 Generating only the missing {what}..."):
+        try:
+            repaired = repair(result, llm_instance=sidebar_llm())
+        except Exception as e:
+            st.error(f"❌ Error repairing result: {str(e)}")
+            return
+    set_last_result(repaired, result_type)
+    st.rerun()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+"""
+Scripted LLM stand-in and temporary storage shared by the test scripts
+
+Only the backend requests are replaced, so response caching, streaming, early
+stopping and stats bookkeeping in LocalLLM run exactly as they do against a
+running server. Tests that send requests or run generators wrap themselves in
+`isolated`, so their metrics, cached responses and history entries never reach
+the real stores under data/.
+"""
+import functools
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Union
+from config import settings
+from utils.llm_interface import LocalLLM
+
+# Settings naming files the app writes to, pointed at a temporary folder by isolated_storage
+STORAGE_SETTINGS = {
+    "HISTORY_STORE_PATH": "history.sqlite3",
+    "SHARED_STORE_PATH": "shared_store.sqlite3",
+    "SESSION_SPILL_DIR": "sessions",
+}
+
+
+class ScriptedLLM(LocalLLM):
+    """
+    LocalLLM that answers from a script and records the requests it was sent
+
+    Every request is appended to `calls` as a dict with prompt, system_prompt,
+    context, history, stream, seed, temperature and max_tokens. Clones share
+    the answer and the call log.
+    """
+
+    # The answer: fixed text, or a function of the prompt (which may raise to fail the request)
+    answer: Union[str, Callable[[str], str]] = ""
+    # Characters per streamed chunk; token counts are reported in chunks too
+    chunk_size = 40
+    # Seconds each request takes
+    delay = 0.0
+    calls: Optional[list] = None
+    lock: Optional[threading.Lock] = None
+
+    def __init__(self, model_override: Optional[str] = None, temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None, *, provider: Optional[str] = None,
+                 answer: Union[str, Callable[[str], str], None] = None):
+        super().__init__(model_override=model_override, temperature=temperature, max_tokens=max_tokens)
+        if provider is not None:
+            self.provider = provider
+        if answer is not None:
+            self.answer = answer
+        if self.calls is None:
+            self.calls = []
+            self.lock = threading.Lock()
+
+    def current(self) -> "ScriptedLLM":
+        """Stand in for a generator module's default client (utils.llm_interface.llm)"""
+        return self
+
+    def _respond(self, prompt: str, system_prompt: Optional[str], **request) -> str:
+        with self.lock:
+            self.calls.append({"prompt": prompt, "system_prompt": system_prompt, "seed": self.seed,
+                               "temperature": self.temperature, "max_tokens": self.max_tokens, **request})
+        if self.delay:
+            time.sleep(self.delay)
+        return self.answer(prompt) if callable(self.answer) else self.answer
+
+    def done_reason(self, prompt: str) -> str:
+        """Why the scripted server stopped answering the prompt; override to report a cut-off"""
+        return "stop"
+
+    def _chunks(self, text: str) -> list[str]:
+        return [text[start:start + self.chunk_size] for start in range(0, len(text), self.chunk_size)]
+
+    def _ollama_done(self, prompt: str, text: str, context: list) -> dict:
+        return {"prompt_eval_count": len(self._chunks(prompt)), "eval_count": len(self._chunks(text)),
+                "done_reason": self.done_reason(prompt), "context": context}
+
+    def _usage(self, prompt: str, text: str) -> dict:
+        return {"prompt_tokens": len(self._chunks(prompt)), "completion_tokens": len(self._chunks(text))}
+
+    def _generate_ollama(self, prompt, system_prompt=None, context=None, json_schema=None, stop=None):
+        text = self._respond(prompt, system_prompt, context=context, history=None, stream=False)
+        self._record_ollama_stats(self._ollama_done(prompt, text, list(context or []) + [1] * 10))
+        return text.strip()
+
+    def _stream_ollama(self, prompt, system_prompt=None, json_schema=None, stop=None):
+        text = self._respond(prompt, system_prompt, context=None, history=None, stream=True)
+        yield from self._chunks(text)
+        # Like Ollama, the context only arrives with the final chunk
+        self._record_ollama_stats(self._ollama_done(prompt, text, [1] * 10))
+
+    def _generate_lm_studio(self, prompt, system_prompt=None, history=None, json_schema=None, stop=None):
+        text = self._respond(prompt, system_prompt, context=None, history=history, stream=False)
+        self._record_lm_studio_stats(self._usage(prompt, text), self.done_reason(prompt))
+        return text.strip()
+
+    def _stream_lm_studio(self, prompt, system_prompt=None, json_schema=None, stop=None):
+        text = self._respond(prompt, system_prompt, context=None, history=None, stream=True)
+        yield from self._chunks(text)
+        self._record_lm_studio_stats(self._usage(prompt, text), self.done_reason(prompt))
+
+
+def scripted(answer: Union[str, Callable[[str], str]], **attributes) -> type:
+    """
+    A ScriptedLLM class whose instances all share one answer and call log,
+    for tests that replace a module's LocalLLM
+
+    Args:
+        answer: Fixed text, or a function of the prompt
+        **attributes: Other class attributes to set (chunk_size, delay)
+    """
+    return type("ScriptedLLM", (ScriptedLLM,), {
+        "answer": staticmethod(answer) if callable(answer) else answer,
+        "calls": [],
+        "lock": threading.Lock(),
+        **attributes,
+    })
+
+
+@contextmanager
+def isolated_storage() -> Iterator[str]:
+    """
+    Point the history, shared store and session spill folder at a temporary folder
+
+    Yields:
+        The folder, which is deleted (and the settings restored) afterwards
+    """
+    original = {name: getattr(settings, name) for name in STORAGE_SETTINGS}
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as folder:
+        for name, filename in STORAGE_SETTINGS.items():
+            setattr(settings, name, os.path.join(folder, filename))
+        try:
+            yield folder
+        finally:
+            for name, value in original.items():
+                setattr(settings, name, value)
+
+
+def isolated(test: Callable) -> Callable:
+    """Run a test function inside isolated_storage"""
+    @functools.wraps(test)
+    def run(*args, **kwargs):
+        with isolated_storage():
+            return test(*args, **kwargs)
+    return run
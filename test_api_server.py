@@ -0,0 +1,112 @@
+"""
+Test script for the HTTP API server
+Uses a scripted LLM stand-in so no server backend is needed
+"""
+import json
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from api_server import create_server
+from generators import writing_generator
+from scripted_llm import scripted, isolated
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+PROMPT = ("1. MAIN PROMPT:\nA cartographer maps a city that rearranges itself nightly\n\n"
+          "2. SETTING DETAILS:\n- Shifting streets\n\n3. PLOT DIRECTIONS:\n- A map lies\n\n"
+          "4. DEVELOPMENT QUESTIONS:\n- Who moves the city?")
+
+
+def call(base: str, method: str, path: str, body: dict = None) -> tuple[int, dict]:
+    request = urllib.request.Request(base + path, method=method,
+                                     data=json.dumps(body).encode("utf-8") if body is not None else None,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@isolated
+def test_endpoints():
+    """Validation, sync, streaming and job modes all serve the generator"""
+    original = writing_generator.LocalLLM
+    writing_generator.LocalLLM = scripted(PROMPT)
+    server = create_server("127.0.0.1", 0, max_concurrent=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        assert call(base, "GET", "/health") == (200, {"status": "ok"})
+        status, schemas = call(base, "GET", "/generators")
+        assert status == 200 and "topic" in schemas["blog"]["properties"]
+        
+        assert call(base, "POST", "/generate/podcast", {"topic": "x"})[0] == 404
+        status, body = call(base, "POST", "/generate/blog", {"audience": "beginners"})
+        assert status == 422 and "topic" in body["error"]
+        assert call(base, "POST", "/generate/writing", {"genre": "sci-fi", "tempo": 3})[0] == 422
+        assert call(base, "POST", "/generate/writing", {"genre": "polka"})[0] == 422
+        
+        status, body = call(base, "POST", "/generate/writing", {"genre": "sci-fi", "early_stop": False})
+        assert status == 200 and "cartographer" in body["result"]["prompt"]
+        assert body["markdown"].startswith("# Creative Writing Prompt")
+        
+        # Streaming: chunks arrive as events before the final result
+        request = urllib.request.Request(base + "/generate/writing/stream", method="POST",
+                                         data=json.dumps({"genre": "sci-fi", "early_stop": False}).encode("utf-8"))
+        with urllib.request.urlopen(request, timeout=10) as response:
+            assert response.headers["Content-Type"].startswith("text/event-stream")
+            events = [block.split("\n") for block in response.read().decode("utf-8").strip().split("\n\n")]
+        names = [lines[0].removeprefix("event: ") for lines in events]
+        assert names[-1] == "result" and names.count("chunk") >= 2
+        assert "".join(json.loads(lines[1].removeprefix("data: "))["text"]
+                       for lines in events if lines[0] == "event: chunk") == PROMPT
+        
+        # Jobs: submit, then poll until done
+        status, body = call(base, "POST", "/jobs/writing", {"genre": "mystery", "early_stop": False})
+        assert status == 202
+        for _ in range(100):
+            status, job = call(base, "GET", body["status_url"])
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(0.05)
+        assert job["status"] == "done" and "cartographer" in job["result"]["result"]["prompt"]
+        assert call(base, "GET", "/jobs/unknown")[0] == 404
+        
+        # Concurrency limit: with the only slot taken, sync requests are turned away
+        server.slots.acquire()
+        try:
+            assert call(base, "POST", "/generate/writing", {"genre": "sci-fi"})[0] == 429
+        finally:
+            server.slots.release()
+    finally:
+        server.shutdown()
+        server.server_close()
+        writing_generator.LocalLLM = original
+    print("   ✓ Sync, streaming and job endpoints served and validated")
+
+
+def test_no_streamlit():
+    """The server module loads without Streamlit"""
+    code = "import sys, api_server; assert 'streamlit' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+    print("   ✓ api_server does not import Streamlit")
+
+
+def main():
+    print("=" * 60)
+    print("Testing API Server")
+    print("=" * 60)
+    test_endpoints()
+    test_no_streamlit()
+    print("[PASS] API server is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Test script for headless batch generation
+Uses a scripted LLM stand-in so no server is needed
+"""
+import json
+import os
+import sys
+import tempfile
+from batch_cli import prepare_jobs, read_rows, run_batch
+from generators import blog_generator
+from scripted_llm import scripted, isolated
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+OUTLINE = """## 1. HEADLINES
+- A Practical Guide to {topic}
+
+## 2. INTRODUCTION HOOK
+Why {topic} matters.
+
+## 3. MAIN SECTIONS
+### Basics
+- First steps
+
+## 4. KEY TAKEAWAYS
+- Start small
+
+## 5. CALL-TO-ACTION
+Try it today.
+
+## 6. SEO KEYWORDS
+{topic}
+"""
+
+
+def write_outline(prompt: str, flaky: bool) -> str:
+    """An outline for the prompt's topic; topics containing 'flaky' fail while `flaky` is set"""
+    topic = prompt.split("Topic:")[-1].strip().splitlines()[0]
+    if "flaky" in topic.lower() and flaky:
+        raise Exception("backend unavailable")
+    return OUTLINE.format(topic=topic)
+
+
+def run(jobs, output, markdown_dir=None, flaky=False):
+    """Run the batch against a scripted client, returning the summary and the number of requests sent"""
+    fake = scripted(lambda prompt: write_outline(prompt, flaky))
+    original = blog_generator.LocalLLM
+    blog_generator.LocalLLM = fake
+    try:
+        return run_batch(jobs, output, markdown_dir, workers=2), len(fake.calls)
+    finally:
+        blog_generator.LocalLLM = original
+
+
+@isolated
+def test_batch_resume():
+    """Results stream to JSONL and Markdown, finished and repeated rows are skipped, failures retried"""
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "topics.csv")
+        with open(source, "w", encoding="utf-8", newline="") as f:
+            f.write("id,topic,audience,variants\n"
+                    "a,Rust ownership,beginners,\n"
+                    "b,Flaky networks,experts,\n"
+                    "c,Rust ownership,beginners,\n"
+                    "d,Bad row,nobody,many\n")
+        jobs, errors = prepare_jobs(read_rows(source), "blog", {"temperature": 0.7, "early_stop": False})
+        assert len(jobs) == 3 and len(errors) == 1 and "variants" in errors[0]
+        assert jobs[0]["hash"] == jobs[2]["hash"]
+        
+        output = os.path.join(folder, "out", "outlines.jsonl")
+        markdown = os.path.join(folder, "md")
+        summary, _ = run(jobs, output, markdown, flaky=True)
+        assert summary == {"completed": 1, "skipped": 1, "failed": 1}
+        
+        with open(output, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert [record["id"] for record in records] == ["a"]
+        assert records[0]["result"]["topic"] == "Rust ownership"
+        assert os.path.exists(records[0]["markdown_file"])
+        
+        # An interrupted write leaves a partial line; the resumed run redoes only the failed row
+        with open(output, "a", encoding="utf-8") as f:
+            f.write('{"id": "b", "input_ha')
+        summary, requests = run(jobs, output, markdown)
+        assert summary == {"completed": 1, "skipped": 2, "failed": 0}
+        assert requests == 1
+        
+        summary, _ = run(jobs, output, markdown)
+        assert summary == {"completed": 0, "skipped": 3, "failed": 0}
+        with open(output, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert json.loads(lines[-1])["id"] == "b"
+    print("   ✓ Batch streamed, checkpointed and resumed")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Batch CLI")
+    print("=" * 60)
+    test_batch_resume()
+    print("[PASS] Batch CLI is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Test script for chunked social media calendar generation
+Uses a scripted LLM stand-in so no server is needed
+"""
+import sys
+from datetime import datetime
+from generators.social_generator import (SocialMediaCalendar, calculate_post_dates, chunk_post_dates,
+                                         find_missing_post_dates, generate_calendar_chunks)
+from scripted_llm import ScriptedLLM, isolated
+from utils.output_parsers import parse_social_calendar
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def posts_for(prompt: str) -> str:
+    """One post per requested date; the first post of every chunk repeats the same idea"""
+    request = prompt.split("REQUEST DETAILS:")[1]
+    dates_block = request.split("Post Dates (one post per date, no other dates):")[1].split("\n\n")[0]
+    dates = [line for line in dates_block.strip().splitlines() if line]
+    retry = "Ideas Already Planned" in request
+    posts = []
+    for i, date in enumerate(dates):
+        day = datetime.strptime(date, "%B %d, %Y (%A)").timetuple().tm_yday
+        idea = f"story{day} guide{day} insight{day}" if retry or i else "Five myths about machine learning"
+        posts.append(f"**{date}**: Carousel - {idea}\nHashtags: #ai")
+    return "\n\n".join(posts)
+
+
+def test_chunk_post_dates():
+    """Dates are split into weeks, with short trailing weeks merged"""
+    dates = calculate_post_dates("daily", "month", datetime(2025, 1, 1))
+    chunks = chunk_post_dates(dates)
+    assert [date for chunk in chunks for date in chunk] == dates
+    assert all(len(chunk) >= 3 for chunk in chunks)
+    assert len(chunks) == 5
+    assert len(chunks[0]) == 7
+    print("   ✓ Dates chunked by week")
+
+
+@isolated
+def test_chunks_merge_in_order_without_duplicates():
+    """Chunks merge in date order and repeated ideas are regenerated once"""
+    llm = ScriptedLLM(max_tokens=2000, answer=posts_for)
+    dates = calculate_post_dates("daily", "month", datetime(2025, 1, 1))
+    chunks = chunk_post_dates(dates)
+    streamed = []
+    text, source, generation = generate_calendar_chunks(
+        llm, chunks, "AI", "daily", "LinkedIn", "month", "professional",
+        stream_callback=streamed.append, early_stop=False
+    )
+    posts = parse_social_calendar(text)["posts"]
+    assert [post["date"] for post in posts] == dates
+    ideas = [post["idea"] for post in posts]
+    assert ideas.count("Five myths about machine learning") == 1
+    assert source is None
+    assert len(streamed) == len(chunks)
+    assert generation["deduplicated_posts"] == len(chunks) - 1
+    # One request per chunk plus one for the duplicates
+    assert len(llm.calls) == len(chunks) + 1
+    print("   ✓ Chunks merged in order with duplicates regenerated")
+
+
+class CutOffLLM(ScriptedLLM):
+    """Runs out of tokens in the last post of the chunk that starts on January 8"""
+
+    def done_reason(self, prompt: str) -> str:
+        return "length" if "January 08, 2025" in prompt else "stop"
+
+
+def cut_off_posts_for(prompt: str) -> str:
+    """Distinct posts per requested date; the cut-off chunk's last post has a caption but no hashtags"""
+    request = prompt.split("REQUEST DETAILS:")[1]
+    dates_block = request.split("Post Dates (one post per date, no other dates):")[1].split("\n\n")[0]
+    dates = [line for line in dates_block.strip().splitlines() if line]
+    posts = []
+    for date in dates:
+        day = datetime.strptime(date, "%B %d, %Y (%A)").timetuple().tm_yday
+        posts.append(f"**{date}**: Carousel - story{day} guide{day} insight{day}\nCaption: Lessons from day {day}")
+    posts = [post + "\nHashtags: #ai" for post in posts]
+    if "January 08, 2025" in prompt:
+        posts[-1] = posts[-1].split("\nHashtags")[0].rsplit(" ", 2)[0]
+    return "\n\n".join(posts)
+
+
+@isolated
+def test_truncated_chunk_drops_its_own_cut_off_post():
+    """A chunk cut off by the token limit loses its own last post, which is then reported missing"""
+    llm = CutOffLLM(max_tokens=2000, answer=cut_off_posts_for)
+    dates = calculate_post_dates("daily", "month", datetime(2025, 1, 1))
+    chunks = chunk_post_dates(dates)
+    assert chunks[1][0] == "January 08, 2025 (Wednesday)"
+    cut_off = chunks[1][-1]
+    text, _, generation = generate_calendar_chunks(
+        llm, chunks, "AI", "daily", "LinkedIn", "month", "professional", early_stop=False
+    )
+    posted = [post["date"] for post in parse_social_calendar(text)["posts"]]
+    assert posted == [date for date in dates if date != cut_off]
+    assert generation["truncated_chunks"] == [2]
+    assert generation["stop_reason"] == "stop"
+    
+    calendar = SocialMediaCalendar(theme="AI", calendar=text, metadata={
+        "frequency": "daily", "timeframe": "month", "platform": "LinkedIn", "start_date": "2025-01-01", **generation
+    })
+    assert find_missing_post_dates(calendar) == [cut_off]
+    print("   ✓ Cut-off post dropped from its own chunk and reported missing")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Chunked Calendar Generation")
+    print("=" * 60)
+    test_chunk_post_dates()
+    test_chunks_merge_in_order_without_duplicates()
+    test_truncated_chunk_drops_its_own_cut_off_post()
+    print("[PASS] Chunked calendar generation is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Test script for map-reduce blog draft generation
+Uses a scripted LLM stand-in so no server is needed
+"""
+import sys
+import time
+from generators import draft_generator
+from generators.blog_generator import BlogOutline
+from generators.draft_generator import generate_blog_draft
+from scripted_llm import ScriptedLLM, isolated
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+OUTLINE = """## 1. HEADLINES
+- Docker for Python Developers
+
+## 2. STRUCTURED OUTLINE
+### Introduction
+- Why containers
+### Writing a Dockerfile
+- Base images
+### Docker Compose
+- Services and volumes
+### Deploying Containers
+- Registries
+### Conclusion
+- Next steps
+
+## 3. KEY POINTS
+- Images are layered
+
+## 4. SUBTOPICS
+- Kubernetes
+"""
+
+# Paragraphs long enough that each becomes its own chunk
+KNOWLEDGE_BASE = "\n\n".join([
+    "Our base images are built on python:3.12-slim. " + "Image notes. " * 40,
+    "Compose files live in the deploy/ folder and define three services. " + "Service notes. " * 40,
+    "The marketing team owns the company blog style guide. " + "Brand notes. " * 40,
+])
+
+SECTION_DELAY = 0.2
+
+
+def answer(prompt: str) -> str:
+    """Answers section prompts slowly and the reduce prompt with the three parts"""
+    if "SECTION TO WRITE" in prompt:
+        time.sleep(SECTION_DELAY)
+        title = prompt.split("SECTION TO WRITE:\n")[1].splitlines()[0]
+        return f"{title}\n\nBody of {title}. It explains things.\n\nMore detail here."
+    return ("1. INTRODUCTION:\nContainers make shipping Python easy.\n\n"
+            "2. TRANSITIONS:\n- Now that the image is ready, compose it.\n- With services defined, ship them.\n\n"
+            "3. CONCLUSION:\nStart with one service today.")
+
+
+@isolated
+def test_sections_expand_concurrently():
+    """Main sections are expanded in parallel with only their relevant context, then tied together"""
+    from config import settings
+    outline = BlogOutline(topic="Docker", outline=OUTLINE, metadata={"length": "long", "audience": "beginners"})
+    completed = []
+    original_llm, original_parallel = draft_generator.llm, settings.LLM_MAX_PARALLEL
+    llm = ScriptedLLM(max_tokens=2000, answer=answer)
+    draft_generator.llm = llm
+    settings.LLM_MAX_PARALLEL = 3
+    try:
+        started = time.perf_counter()
+        draft = generate_blog_draft(outline, custom_context=KNOWLEDGE_BASE, on_section=completed.append)
+        elapsed = time.perf_counter() - started
+    finally:
+        draft_generator.llm, settings.LLM_MAX_PARALLEL = original_llm, original_parallel
+
+    assert [section.title for section in draft.sections] == ["Writing a Dockerfile", "Docker Compose", "Deploying Containers"]
+    assert elapsed < SECTION_DELAY * 2, f"sections ran sequentially ({elapsed:.2f}s)"
+    assert sorted(event["index"] for event in completed) == [0, 1, 2]
+
+    compose_prompt = next(call["prompt"] for call in llm.calls if "SECTION TO WRITE:\nDocker Compose" in call["prompt"])
+    assert "deploy/ folder" in compose_prompt
+    assert "style guide" not in compose_prompt
+
+    assert draft.title == "Docker for Python Developers"
+    assert draft.introduction == "Containers make shipping Python easy."
+    assert len(draft.transitions) == 2
+    assert draft.draft.index("Now that the image is ready") < draft.draft.index("Body of Docker Compose")
+    assert "Body of Writing a Dockerfile" in draft.sections[0].content
+    assert not draft.sections[0].content.startswith("Writing a Dockerfile")
+    print("   ✓ Sections expanded concurrently and merged")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Blog Draft Generation")
+    print("=" * 60)
+    test_sections_expand_concurrently()
+    print("[PASS] Blog draft generation is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Test script for memoized export rendering
+"""
+import sys
+from config import settings
+from generators.blog_generator import BlogOutline
+from utils import export_utils
+from utils.export_utils import cached_export, generate_html, lazy_export
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def test_exports_rendered_once_per_content():
+    """An export is rendered when first requested, then served from the cache until the result changes"""
+    renders = []
+
+    def render(outline):
+        renders.append(outline.topic)
+        return generate_html(f"Blog Outline: {outline.topic}", outline.outline, outline.metadata)
+
+    result = BlogOutline(topic="Rust ownership", outline="## 1. HEADLINES\n- Borrowing", metadata={"model": "llama3.2"})
+    download = lazy_export("test_html", result, render)
+    assert renders == []
+    html = download()
+    assert "Borrowing" in html and download() == html
+    # A reloaded copy of the same result shares the export; a refined one does not
+    same = BlogOutline.model_validate_json(result.model_dump_json())
+    assert cached_export("test_html", same, render) == html
+    refined = result.model_copy(update={"outline": "## 1. HEADLINES\n- Lifetimes"})
+    assert "Lifetimes" in cached_export("test_html", refined, render)
+    assert renders == ["Rust ownership", "Rust ownership"]
+    print("   ✓ Exports are rendered lazily, once per result content")
+
+
+def test_cache_stays_within_budget():
+    """Least recently used exports are evicted once the cache is over EXPORT_CACHE_MB"""
+    original = settings.EXPORT_CACHE_MB
+    settings.EXPORT_CACHE_MB = 0.25
+    try:
+        results = [BlogOutline(topic=f"Topic {number}", outline="x" * 100_000, metadata={}) for number in range(4)]
+        for result in results:
+            cached_export("test_text", result, lambda item: item.outline)
+        assert export_utils._exports_size <= 256 * 1024
+        keys = [key for key in export_utils._exports if key[0] == "test_text"]
+        assert len(keys) == 2 and keys[-1][1] == export_utils.content_key(results[-1])
+        # Too large to keep: rendered every time
+        huge = BlogOutline(topic="Huge", outline="x" * 300_000, metadata={})
+        assert len(cached_export("test_text", huge, lambda item: item.outline)) == 300_000
+        assert export_utils._exports_size <= 256 * 1024
+    finally:
+        settings.EXPORT_CACHE_MB = original
+    print("   ✓ The export cache stays within its memory budget")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Export Cache")
+    print("=" * 60)
+    test_exports_rendered_once_per_content()
+    test_cache_stays_within_budget()
+    print("[PASS] Export cache is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Test script for the local headline scorer
+"""
+import sys
+import time
+from generators.blog_generator import HeadlineSet
+from utils.headline_scorer import rank_headlines, clean_headline
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+CANDIDATES = [
+    '1. "Docker for Python Developers: 10 Essential Tips"',
+    "2. 10 Essential Docker Tips for Python Developers",
+    "3. Why Your Team Should Stop Ignoring Containers",
+    "4. Understanding Containerization Infrastructure Considerations",
+    "5. A Very Long Headline About Docker That Goes Well Beyond the Seventy Character Limit",
+    "6. Docker for Python",
+]
+
+
+def test_ranking_and_duplicates():
+    """Strong headlines rank first, overlong ones last, and reworded copies are dropped"""
+    assert clean_headline('1. "Docker Basics"') == "Docker Basics"
+    ranked = rank_headlines(CANDIDATES, "Docker for Python", top_n=10)
+    headlines = [item.headline for item in ranked]
+    assert headlines[0] == "Docker for Python Developers: 10 Essential Tips"
+    assert "10 Essential Docker Tips for Python Developers" not in headlines
+    assert ranked[-1].features["length"] == 0.0
+    assert all(0.0 <= item.score <= 1.0 for item in ranked)
+    print("   ✓ Headlines ranked and near-duplicates dropped")
+
+
+def test_rerank_is_fast():
+    """Forty candidates are ranked in milliseconds, and re-ranking needs no LLM"""
+    candidates = [f"{n} Docker Tips for Python Teams in Year {n}" for n in range(40)]
+    started = time.perf_counter()
+    rank_headlines(candidates, "Docker", top_n=10)
+    assert time.perf_counter() - started < 0.1
+    
+    headline_set = HeadlineSet(topic="Docker for Python", candidates=CANDIDATES,
+                               ranked=rank_headlines(CANDIDATES, "Docker for Python", top_n=3), metadata={})
+    length_only = {"length": 1.0, "number": 0.0, "power_words": 0.0, "keyword": 0.0, "readability": 0.0}
+    reranked = headline_set.rerank(top_n=2, weights=length_only)
+    assert len(reranked.ranked) == 2
+    assert all(item.score == item.features["length"] for item in reranked.ranked)
+    print("   ✓ Local re-ranking is fast")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Headline Scorer")
+    print("=" * 60)
+    test_ranking_and_duplicates()
+    test_rerank_is_fast()
+    print("[PASS] Headline scorer is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
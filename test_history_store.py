@@ -0,0 +1,140 @@
+"""
+Test script for the generation history and its full-text search
+Uses a scripted LLM stand-in so no server is needed
+"""
+import os
+import sys
+import tempfile
+import time
+from config import settings
+from generators import blog_generator
+from generators.registry import run_generator
+from generators.blog_generator import BlogOutline
+from generators.writing_generator import WritingPrompt
+from scripted_llm import scripted, isolated
+from utils.history_store import HistoryStore, fts_query, get_history_store
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+OUTLINE = """## 1. HEADLINES
+- A Practical Guide to {topic}
+
+## 2. INTRODUCTION HOOK
+Why {topic} matters.
+
+## 3. MAIN SECTIONS
+### Basics
+- First steps
+
+## 4. KEY TAKEAWAYS
+- Start small
+
+## 5. CALL-TO-ACTION
+Try it today.
+
+## 6. SEO KEYWORDS
+{topic}
+"""
+
+
+def write_outline(prompt: str) -> str:
+    """An outline for the prompt's topic"""
+    topic = prompt.split("Topic:")[-1].strip().splitlines()[0]
+    return OUTLINE.format(topic=topic)
+
+
+def outline(topic: str, model: str = "llama3.2") -> BlogOutline:
+    return BlogOutline(topic=topic, outline=OUTLINE.format(topic=topic),
+                       metadata={"model": model, "provider": "ollama"})
+
+
+def test_search_and_filters():
+    """Searches match word prefixes in titles and text; filters and pages narrow them down"""
+    store = HistoryStore(":memory:")
+    rust = store.add("blog", outline("Rust ownership"), {"topic": "Rust ownership", "stream_callback": print},
+                     owner="alice", duration=12.5)
+    store.add("blog", outline("Python typing", model="qwen2.5"), {"topic": "Python typing"}, owner="bob")
+    prompt = WritingPrompt(genre="fantasy", prompt="A dragon guards a library of rusted keys.",
+                           metadata={"prompt_type": "story starter", "model": "llama3.2"})
+    store.add("writing", prompt, {"genre": "fantasy"}, owner="alice")
+
+    assert fts_query('rust "own-') == '"rust"* "own"*'
+    entries, total = store.search("rus own")
+    assert total == 1 and entries[0]["id"] == rust and "**" in entries[0]["snippet"]
+    # "rusted" is in the writing prompt's text, "Rust" in the outline's title and text
+    assert store.search("rust")[1] == 2
+    assert store.search("rust", kind="writing")[0][0]["title"] == "Fantasy story starter"
+    assert store.search("", owner="alice")[1] == 2
+    assert store.search("", model="qwen2.5")[0][0]["title"] == "Python typing"
+    assert store.models() == ["llama3.2", "qwen2.5"]
+
+    # Newest first, one page at a time
+    entries, total = store.search("", limit=2)
+    assert total == 3 and [entry["kind"] for entry in entries] == ["writing", "blog"]
+    assert store.search("", limit=2, offset=2)[0][0]["id"] == rust
+
+    entry = store.get(rust)
+    assert entry["params"] == {"topic": "Rust ownership"} and entry["duration"] == 12.5
+    assert store.load(rust).outline == outline("Rust ownership").outline
+    # Only the owner can delete an entry
+    assert not store.delete(rust, owner="bob") and store.get(rust) is not None
+    assert store.delete(rust, owner="alice")
+    assert store.get(rust) is None and store.search("ownership")[1] == 0
+    print("   ✓ Results are searched, filtered, paged, loaded and deleted")
+
+
+@isolated
+def test_generations_recorded():
+    """Generations run through the registry are recorded with their owner, unless history is off"""
+    original = (settings.HISTORY_ENABLED, blog_generator.LocalLLM)
+    blog_generator.LocalLLM = scripted(write_outline)
+    try:
+        run_generator("blog", {"topic": "Kubernetes operators", "temperature": 0.7, "early_stop": False}, owner="api")
+        settings.HISTORY_ENABLED = False
+        run_generator("blog", {"topic": "Terraform modules", "temperature": 0.7, "early_stop": False}, owner="api")
+        entries, total = get_history_store().search("operators", owner="api")
+        assert total == 1 and entries[0]["duration"] is not None
+        assert get_history_store().search("terraform")[1] == 0
+        get_history_store().close()
+    finally:
+        settings.HISTORY_ENABLED, blog_generator.LocalLLM = original
+    print("   ✓ Generations are recorded when history is enabled")
+
+
+def test_search_stays_interactive():
+    """Searching and paging through many results stays well under interactive latency"""
+    with tempfile.TemporaryDirectory() as folder:
+        store = HistoryStore(os.path.join(folder, "history.sqlite3"))
+        words = ["rust", "python", "kubernetes", "typing", "async", "testing", "databases", "security"]
+        topics = [f"{words[number % 8].title()} {words[number // 8 % 8]} part {number}" for number in range(5000)]
+        for topic in topics:
+            store.add("blog", outline(topic, model=f"model-{len(topic) % 3}"), {"topic": topic}, owner="alice")
+
+        started = time.perf_counter()
+        for query in ["ru", "python async", "kub sec", "databases part 4"]:
+            entries, total = store.search(query, limit=20)
+            assert entries and total >= len(entries)
+            store.search(query, best_match=True, limit=20, offset=20)
+            store.search(query, model="model-1", owner="alice", limit=20)
+        store.search("", limit=20, offset=4000)
+        elapsed = time.perf_counter() - started
+        store.close()
+    assert elapsed < 1, f"Searches took {elapsed:.2f}s"
+    print(f"   ✓ 13 searches over 5,000 results took {elapsed * 1000:.0f}ms")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Generation History")
+    print("=" * 60)
+    test_search_and_filters()
+    test_generations_recorded()
+    test_search_stays_interactive()
+    print("[PASS] Generation history is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
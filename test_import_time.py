@@ -0,0 +1,62 @@
+"""
+Import-time budget test for the entry points
+Runs `python -X importtime` in a fresh interpreter for each entry point
+"""
+import re
+import subprocess
+import sys
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+# Entry point -> (cumulative import budget in seconds, modules it must not load at import)
+BUDGETS = {
+    "api_server": (0.5, ("streamlit", "numpy", "requests", "generators")),
+    "batch_cli": (1.5, ("streamlit", "numpy", "requests")),
+    "build_prompt_bank": (1.5, ("streamlit", "numpy", "requests")),
+    # Streamlit itself dominates; the generators load with the selected tab
+    "main": (10.0, ("generators", "numpy")),
+}
+
+_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_profile(module: str) -> tuple[float, set[str]]:
+    """
+    Import a module in a fresh interpreter
+
+    Returns:
+        Tuple of (cumulative import time of the module in seconds, every module loaded)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    loaded, total = set(), 0.0
+    for match in _LINE.finditer(result.stderr):
+        loaded.add(match.group(3))
+        if match.group(3) == module and not match.group(2):
+            total = int(match.group(1)) / 1_000_000
+    return total, loaded
+
+
+def test_entry_point_budgets():
+    """Entry points import within budget and leave heavy dependencies for later"""
+    for module, (budget, forbidden) in BUDGETS.items():
+        seconds, loaded = import_profile(module)
+        heavy = sorted(name for name in loaded if name.split(".")[0] in forbidden)
+        assert not heavy, f"{module} imports {', '.join(heavy[:5])} at import time"
+        assert seconds < budget, f"{module} took {seconds:.2f}s to import (budget {budget}s)"
+        print(f"   ✓ {module}: {seconds * 1000:.0f} ms")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Import Time")
+    print("=" * 60)
+    test_entry_point_budgets()
+    print("[PASS] Entry points start fast!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Test script for background generation jobs
+Jobs run plain functions, so no server is needed
+"""
+import sys
+import threading
+import time
+from utils.job_manager import JobManager, JobQueueFull
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def wait_for(job, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not job.active, f"job still {job.status}"
+
+
+def test_job_runs_in_background():
+    """submit returns at once; the job streams partial text, then keeps its result"""
+    manager = JobManager(max_workers=1, max_queued=5, ttl=60)
+    release = threading.Event()
+    streamed = threading.Event()
+
+    def run(on_chunk):
+        on_chunk("Hello, ")
+        on_chunk("world")
+        streamed.set()
+        release.wait(5)
+        return "result"
+
+    try:
+        job = manager.submit(run, "blog", owner="alice", label="Greeting")
+        assert streamed.wait(5)
+        assert job.status == "running" and job.partial_text == "Hello, world"
+        release.set()
+        wait_for(job)
+        assert job.status == "done" and job.result == "result" and job.elapsed > 0
+        assert manager.get(job.id) is job
+        assert job.to_dict()["type"] == "blog" and "error" not in job.to_dict()
+    finally:
+        release.set()
+        manager.shutdown()
+    print("   ✓ Jobs run in the background with partial output and a kept result")
+
+
+def test_failed_job():
+    """A generation that raises marks the job failed with its error"""
+    manager = JobManager(max_workers=1, max_queued=5, ttl=60)
+
+    def run(on_chunk):
+        raise RuntimeError("model not found")
+
+    try:
+        job = manager.submit(run, "social", owner="alice")
+        wait_for(job)
+        assert job.status == "failed" and job.error == "model not found" and job.result is None
+    finally:
+        manager.shutdown()
+    print("   ✓ Failures are recorded on the job")
+
+
+def test_queue_limit():
+    """Submitting beyond max_queued waiting jobs raises JobQueueFull"""
+    manager = JobManager(max_workers=1, max_queued=1, ttl=60)
+    release = threading.Event()
+    started = threading.Event()
+
+    def run(on_chunk):
+        started.set()
+        release.wait(5)
+        return "done"
+
+    try:
+        running = manager.submit(run, "writing")
+        assert started.wait(5)
+        manager.submit(run, "writing")
+        try:
+            manager.submit(run, "writing")
+            raise AssertionError("expected JobQueueFull")
+        except JobQueueFull:
+            pass
+        release.set()
+        wait_for(running)
+    finally:
+        release.set()
+        manager.shutdown()
+    print("   ✓ The waiting queue is bounded")
+
+
+def test_jobs_for_and_expiry():
+    """jobs_for filters by owner and kind, newest first; finished jobs expire after the TTL"""
+    manager = JobManager(max_workers=2, max_queued=5, ttl=60)
+    try:
+        first = manager.submit(lambda on_chunk: 1, "blog", owner="alice")
+        second = manager.submit(lambda on_chunk: 2, "blog", owner="alice")
+        other_kind = manager.submit(lambda on_chunk: 3, "social", owner="alice")
+        other_owner = manager.submit(lambda on_chunk: 4, "blog", owner="bob")
+        for job in (first, second, other_kind, other_owner):
+            wait_for(job)
+        second.submitted_at = first.submitted_at + 1
+        assert manager.jobs_for("alice", "blog") == [second, first]
+        assert len(manager.jobs_for("alice")) == 3
+
+        manager.forget(other_owner.id)
+        assert manager.get(other_owner.id) is None
+        first.finished_at -= 120
+        assert manager.jobs_for("alice", "blog") == [second]
+    finally:
+        manager.shutdown()
+    print("   ✓ Jobs are listed per user and expire after their TTL")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Background Jobs")
+    print("=" * 60)
+    test_job_runs_in_background()
+    test_failed_job()
+    test_queue_limit()
+    test_jobs_for_and_expiry()
+    print("[PASS] Background jobs are working correctly!")
+
+
+if __name__ == "__main__":
+    main()
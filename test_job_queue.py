@@ -0,0 +1,149 @@
+"""
+Test script for the durable job queue and its worker processes
+Uses a scripted LLM stand-in so no server is needed
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from batch_cli import prepare_jobs, run_queued
+from config import settings
+from generators import blog_generator
+from scripted_llm import scripted, isolated
+from utils.job_queue import JobQueue
+from worker import Worker
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+OUTLINE = """## 1. HEADLINES
+- A Practical Guide to {topic}
+
+## 2. INTRODUCTION HOOK
+Why {topic} matters.
+
+## 3. MAIN SECTIONS
+### Basics
+- First steps
+
+## 4. KEY TAKEAWAYS
+- Start small
+
+## 5. CALL-TO-ACTION
+Try it today.
+
+## 6. SEO KEYWORDS
+{topic}
+"""
+
+
+def write_outline(prompt: str) -> str:
+    """An outline for the prompt's topic"""
+    topic = prompt.split("Topic:")[-1].strip().splitlines()[0]
+    return OUTLINE.format(topic=topic)
+
+
+def test_leases_and_retries():
+    """Claims are exclusive; lapsed leases are retried until the attempts run out"""
+    with tempfile.TemporaryDirectory() as folder:
+        queue = JobQueue(os.path.join(folder, "queue.sqlite3"), lease=0.2, max_attempts=2, ttl=60, retry_delay=0)
+        job = queue.enqueue("blog", {"topic": "Rust"}, owner="alice", label="Rust", key="rust")
+        assert queue.enqueue("blog", {"topic": "Rust"}, key="rust").id == job.id
+
+        claimed = queue.claim("worker-a")
+        assert claimed["id"] == job.id and claimed["params"] == {"topic": "Rust"} and claimed["attempt"] == 1
+        assert queue.claim("worker-b") is None
+        assert queue.heartbeat(job.id, "worker-a", "partial text")
+        assert queue.get(job.id).partial_text == "partial text"
+
+        # worker-a dies: once its lease lapses worker-b takes over and worker-a's result is refused
+        time.sleep(0.3)
+        reclaimed = queue.claim("worker-b")
+        assert reclaimed["id"] == job.id and reclaimed["attempt"] == 2
+        assert not queue.complete(job.id, "worker-a", {"result": {}, "markdown": ""})
+
+        # worker-b dies too, on the last attempt
+        time.sleep(0.3)
+        assert queue.claim("worker-c") is None
+        failed = queue.get(job.id)
+        assert failed.status == "failed" and "stopped responding" in failed.error
+
+        # Failed jobs do not block a new job with the same key; backend errors are retried
+        again = queue.enqueue("blog", {"topic": "Rust"}, owner="alice", key="rust")
+        assert again.id != job.id
+        assert queue.fail(queue.claim("worker-a")["id"], "worker-a", "backend unavailable")
+        assert queue.claim("worker-a")["attempt"] == 2
+        assert not queue.fail(again.id, "worker-a", "bad input", retry=False)
+        assert [job.status for job in queue.jobs_for("alice", "blog")] == ["failed", "failed"]
+    print("   ✓ Leases are exclusive, lapse on crashed workers, and retries are bounded")
+
+
+@isolated
+def test_worker_and_batch():
+    """A worker runs queued batch rows and the batch CLI records their results"""
+    original = blog_generator.LocalLLM
+    blog_generator.LocalLLM = scripted(write_outline)
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            queue = JobQueue(os.path.join(folder, "queue.sqlite3"), lease=5, ttl=60)
+            rows = [{"topic": "Rust ownership"}, {"topic": "Python typing"}, {"topic": "Go channels"}]
+            jobs, errors = prepare_jobs(rows, "blog", {"temperature": 0.7, "early_stop": False})
+            assert not errors
+            output = os.path.join(folder, "out.jsonl")
+
+            # Jobs queued by one batch run are run by the worker, then recorded by a second run
+            for job in jobs:
+                queue.enqueue(job["type"], job["params"], owner="batch", key=job["hash"])
+            summary = Worker(queue, concurrency=2, poll=0.05).run(drain=True)
+            assert summary == {"completed": 3, "failed": 0, "retried": 0}
+            summary = run_queued(jobs, output, queue=queue, poll=0.05)
+            assert summary == {"completed": 3, "skipped": 0, "failed": 0}
+
+            with open(output, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            topics = sorted(record["result"]["topic"] for record in records)
+            assert topics == ["Go channels", "Python typing", "Rust ownership"]
+            assert run_queued(jobs, output, queue=queue)["skipped"] == 3
+    finally:
+        blog_generator.LocalLLM = original
+    print("   ✓ Workers run queued jobs and batch results are recorded once")
+
+
+@isolated
+def test_worker_processes():
+    """Jobs are spread over several worker processes sharing the queue file"""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "queue.sqlite3")
+        queue = JobQueue(path, lease=5, max_attempts=1, ttl=60)
+        ids = [queue.enqueue("blog", {"topic": f"Topic {number}", "early_stop": False}).id for number in range(6)]
+        # Unreachable backend: every job fails without retry, which is enough to see who claimed it
+        env = {**os.environ, "JOB_QUEUE_PATH": path, "OLLAMA_BASE_URL": "http://127.0.0.1:9", "LLM_PROVIDER": "ollama",
+               "HISTORY_STORE_PATH": settings.HISTORY_STORE_PATH, "SHARED_STORE_PATH": settings.SHARED_STORE_PATH}
+        workers = [subprocess.Popen([sys.executable, "worker.py", "--drain", "--poll", "0.05"], env=env,
+                                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                   for _ in range(2)]
+        for process in workers:
+            process.wait(timeout=60)
+        jobs = [queue.get(job_id) for job_id in ids]
+        assert all(job.status == "failed" for job in jobs)
+        assert queue.counts() == {"failed": 6}
+    print("   ✓ Separate worker processes drain a shared queue")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Durable Job Queue")
+    print("=" * 60)
+    test_leases_and_retries()
+    test_worker_and_batch()
+    test_worker_processes()
+    print("[PASS] Durable job queue is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Test script for structured output parsing
+Checks the JSON path and the markdown fallback parsers on typical model output
+"""
+import sys
+from generators.blog_generator import parse_blog_structure, BlogStructure
+from generators.social_generator import parse_calendar_structure
+from generators.writing_generator import parse_writing_structure
+from utils.output_parsers import (
+    match_section,
+    SectionStreamParser,
+    PostStreamParser,
+    SectionCompletionDetector,
+    PostCountDetector,
+    BLOG_SECTIONS,
+)
+from scripted_llm import ScriptedLLM, isolated
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+SAMPLE_OUTLINE = """Here is your outline!
+
+## 1. HEADLINES (5-7 options):
+- "10 Python Tricks Every Beginner Should Know"
+- Python Basics: Your First 30 Days
+
+## 2. STRUCTURED OUTLINE:
+**Introduction**
+   - Hook: why Python?
+   - What readers will learn
+**Setting Up Your Environment**
+   - Installing Python
+   - Choosing an editor
+**Conclusion**
+   - Summary and call-to-action
+
+## 3. KEY POINTS:
+- Python is the most popular language on GitHub
+- Beginners struggle with virtual environments
+
+## 4. SUBTOPICS:
+- Virtual environments
+- pip and packaging
+"""
+
+SAMPLE_CALENDAR = """1. CONTENT IDEAS:
+
+**Monday, Jan 6**: Carousel - 5 myths about AI
+Caption/Hook: Think AI will take your job? Read this first.
+Engagement Prompt: Which myth did you believe?
+Hashtags: #AI #MachineLearning #Myths
+
+**Wednesday, Jan 8**: Video - Behind the scenes of model training
+Caption/Hook: Ever wondered how a model learns?
+Hashtags: #AI #DataScience
+"""
+
+SAMPLE_WRITING = """1. MAIN PROMPT:
+A lighthouse keeper finds a message in a bottle written in her own handwriting.
+
+2. CHARACTER ELEMENTS (if relevant):
+- A reclusive keeper
+- A stranger who arrives by boat
+
+3. SETTING DETAILS:
+- A storm-bound island in 1890
+
+4. PLOT DIRECTIONS:
+- The messages predict shipwrecks
+
+5. DEVELOPMENT QUESTIONS:
+- Who sent the first message?
+"""
+
+
+def test_section_headers():
+    """Header variants models commonly produce are recognised"""
+    assert match_section("## 1. HEADLINES (5-7 options):", BLOG_SECTIONS) == "HEADLINES"
+    assert match_section("**Structured Outline**", BLOG_SECTIONS) == "STRUCTURED OUTLINE"
+    assert match_section("### 3. Key Points", BLOG_SECTIONS) == "KEY POINTS"
+    assert match_section("- Headlines should be short and punchy", BLOG_SECTIONS) is None
+    print("   ✓ Section header variants recognised")
+
+
+def test_blog_fallback_parser():
+    """Free-form outlines are parsed into headlines, sections and key points"""
+    structure, source = parse_blog_structure(SAMPLE_OUTLINE)
+    assert source == "fallback_parser"
+    assert structure.headlines[0] == "10 Python Tricks Every Beginner Should Know"
+    assert [s.title for s in structure.sections] == ["Introduction", "Setting Up Your Environment", "Conclusion"]
+    assert structure.sections[1].key_points == ["Installing Python", "Choosing an editor"]
+    assert len(structure.key_points) == 2
+    assert structure.subtopics == ["Virtual environments", "pip and packaging"]
+    print("   ✓ Blog fallback parser")
+
+
+def test_blog_json_round_trip():
+    """JSON responses (even fenced) validate, and render back to parseable markdown"""
+    structure, _ = parse_blog_structure(SAMPLE_OUTLINE)
+    fenced = f"```json\n{structure.model_dump_json()}\n```"
+    parsed, source = parse_blog_structure(fenced)
+    assert source == "json"
+    assert parsed == structure
+    reparsed = BlogStructure.model_validate(parse_blog_structure(structure.to_markdown() + "\n")[0].model_dump())
+    assert reparsed.headlines == structure.headlines
+    assert [s.title for s in reparsed.sections] == [s.title for s in structure.sections]
+    print("   ✓ Blog JSON path and markdown round trip")
+
+
+def test_calendar_fallback_parser():
+    """Calendar post blocks are parsed with date, format, caption and hashtags"""
+    structure, source = parse_calendar_structure(SAMPLE_CALENDAR)
+    assert source == "fallback_parser"
+    assert len(structure.posts) == 2
+    first = structure.posts[0]
+    assert first.date == "Monday, Jan 6"
+    assert first.format == "Carousel"
+    assert first.idea == "5 myths about AI"
+    assert first.engagement_prompt == "Which myth did you believe?"
+    assert first.hashtags == ["#AI", "#MachineLearning", "#Myths"]
+    assert structure.posts[1].engagement_prompt == ""
+    print("   ✓ Calendar fallback parser")
+
+
+def test_writing_fallback_parser():
+    """Writing prompts are split into their five sections"""
+    structure, source = parse_writing_structure(SAMPLE_WRITING)
+    assert source == "fallback_parser"
+    assert structure.main_prompt.startswith("A lighthouse keeper")
+    assert structure.character_elements == ["A reclusive keeper", "A stranger who arrives by boat"]
+    assert structure.development_questions == ["Who sent the first message?"]
+    print("   ✓ Writing fallback parser")
+
+
+def test_stream_parser_emits_sections_as_they_complete():
+    """Sections are emitted when the next header arrives, whatever the chunking"""
+    parser = SectionStreamParser(BLOG_SECTIONS)
+    events = parser.feed("## 1. HEADLINES\n- First headline\n")
+    assert events == []
+    events = parser.feed("- Second\n## 2. STRUCTURED OUTLINE\n")
+    assert [e["name"] for e in events] == ["HEADLINES"]
+    assert events[0]["text"] == "- First headline\n- Second"
+
+    # Feeding one character at a time gives the same events as feeding everything at once
+    whole = SectionStreamParser(BLOG_SECTIONS)
+    expected = whole.feed(SAMPLE_OUTLINE) + whole.close()
+    tokenwise = SectionStreamParser(BLOG_SECTIONS)
+    events = []
+    for char in SAMPLE_OUTLINE:
+        events.extend(tokenwise.feed(char))
+    events.extend(tokenwise.close())
+    assert [(e["name"], e["text"]) for e in events] == [(e["name"], e["text"]) for e in expected]
+    assert [e["name"] for e in events] == BLOG_SECTIONS
+    print("   ✓ Section stream parser")
+
+
+def test_post_stream_parser():
+    """A post is emitted as soon as its Hashtags line is complete"""
+    parser = PostStreamParser()
+    lines = SAMPLE_CALENDAR.splitlines(keepends=True)
+    hashtags_line = next(i for i, line in enumerate(lines) if line.startswith("Hashtags"))
+    events = []
+    for line in lines[:hashtags_line + 1]:
+        events.extend(parser.feed(line))
+    assert len(events) == 1
+    assert events[0]["post"]["date"] == "Monday, Jan 6"
+    for line in lines[hashtags_line + 1:]:
+        events.extend(parser.feed(line))
+    events.extend(parser.close())
+    assert [e["index"] for e in events] == [0, 1]
+    print("   ✓ Post stream parser")
+
+
+def test_completion_detector_cuts_trailing_commentary():
+    """Generation ends after the last section; sign-offs are trimmed, sub-labels are not"""
+    trailing = SAMPLE_OUTLINE + "\nThis outline gives you a solid structure.\nGood luck with your post!\nMore text\n"
+    detector = SectionCompletionDetector(BLOG_SECTIONS)
+    fired = False
+    for char in trailing:
+        if detector.feed(char):
+            fired = True
+            break
+    assert fired
+    assert trailing[:detector.end_offset].rstrip() == SAMPLE_OUTLINE.rstrip()
+
+    # A label line inside the last section is followed by more items, not a sign-off
+    sub_label = SAMPLE_OUTLINE + "\nAdvanced topics:\n- Type hints\n"
+    detector = SectionCompletionDetector(BLOG_SECTIONS)
+    assert not any(detector.feed(line) for line in sub_label.splitlines(keepends=True))
+
+    # Nothing fires while required sections are still missing
+    detector = SectionCompletionDetector(BLOG_SECTIONS)
+    assert not detector.feed(SAMPLE_OUTLINE.split("## 4.")[0] + "---\n")
+    print("   ✓ Section completion detector")
+
+
+@isolated
+def test_early_stop_metadata():
+    """Only an early stop is reported as tokens saved, and only with a real token count"""
+    trailing = SAMPLE_OUTLINE + "\nThis outline gives you a solid structure.\nGood luck with your post!\nMore text\n"
+    ollama = ScriptedLLM(max_tokens=2000, provider="ollama", answer=trailing)
+    text = ollama.stream_text("outline", completion_detector=SectionCompletionDetector(BLOG_SECTIONS))
+    metadata = ollama.generation_metadata()
+    assert text == SAMPLE_OUTLINE.strip() and metadata["stop_reason"] == "early_stop"
+    assert metadata["tokens_saved"] == 2000 - metadata["tokens_generated"]
+
+    # LM Studio chunks are not tokens, and its usage block never arrived
+    lm_studio = ScriptedLLM(max_tokens=2000, provider="lm_studio", answer=trailing)
+    lm_studio.stream_text("outline", completion_detector=SectionCompletionDetector(BLOG_SECTIONS))
+    metadata = lm_studio.generation_metadata()
+    assert metadata["tokens_generated"] is None and "tokens_saved" not in metadata
+    assert metadata["chunks_generated"] > 0
+
+    # A result that ended by itself saved nothing
+    ollama.stream_text("outline")
+    assert ollama.generation_metadata()["stop_reason"] == "stop"
+    assert "tokens_saved" not in ollama.generation_metadata()
+    print("   ✓ Tokens saved reported only for early stops")
+
+
+def test_post_count_detector():
+    """The calendar stream ends once the expected number of posts is complete"""
+    detector = PostCountDetector(1)
+    lines = SAMPLE_CALENDAR.splitlines(keepends=True)
+    fired_at = next(i for i, line in enumerate(lines) if detector.feed(line))
+    assert lines[fired_at].startswith("Hashtags")
+    assert not PostCountDetector(3).feed(SAMPLE_CALENDAR)
+    print("   ✓ Post count detector")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Structured Output Parsers")
+    print("=" * 60)
+    test_section_headers()
+    test_blog_fallback_parser()
+    test_blog_json_round_trip()
+    test_calendar_fallback_parser()
+    test_writing_fallback_parser()
+    test_stream_parser_emits_sections_as_they_complete()
+    test_post_stream_parser()
+    test_completion_detector_cuts_trailing_commentary()
+    test_early_stop_metadata()
+    test_post_count_detector()
+    print("[PASS] Structured output parsers are working correctly!")
+
+
+if __name__ == "__main__":
+    main()
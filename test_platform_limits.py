@@ -0,0 +1,56 @@
+"""
+Test script for platform limits on adapted social media posts
+"""
+import sys
+from generators.social_generator import fit_calendar_to_platform
+from utils.platform_limits import fit_post_to_platform, post_text
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+LONG_POST = {
+    "date": "Monday, Jan 6",
+    "format": "Thread",
+    "idea": "5 myths about AI",
+    "caption": "Think AI will take your job? " + "Here is what the research actually says about automation. " * 6,
+    "engagement_prompt": "Which myth did you believe?",
+    "hashtags": ["#AI", "#MachineLearning", "#Myths", "#FutureOfWork"],
+}
+
+
+def test_twitter_post_fits_280_characters():
+    """Hashtags, then the engagement prompt, then the caption are cut to fit"""
+    post, fixes = fit_post_to_platform(LONG_POST, "Twitter")
+    assert len(post_text(post)) <= 280
+    assert post["hashtags"] == ["#AI", "#MachineLearning"]
+    assert post["engagement_prompt"] == ""
+    assert post["caption"].endswith("…")
+    assert len(fixes) == 3
+    # The input is left untouched
+    assert len(LONG_POST["hashtags"]) == 4
+    print("   ✓ Twitter post fitted to 280 characters")
+
+
+def test_posts_within_limits_are_unchanged():
+    """Calendars that already fit keep their original text"""
+    post, fixes = fit_post_to_platform(LONG_POST, "LinkedIn")
+    assert fixes == [] and post == LONG_POST
+
+    text = "**Monday, Jan 6**: Image - AI myths\nCaption/Hook: Short hook\nHashtags: #AI\n"
+    assert fit_calendar_to_platform(text, "Twitter") == (text, 0)
+    print("   ✓ Posts within limits unchanged")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Platform Limits")
+    print("=" * 60)
+    test_twitter_post_fits_280_characters()
+    test_posts_within_limits_are_unchanged()
+    print("[PASS] Platform limits are working correctly!")
+
+
+if __name__ == "__main__":
+    main()
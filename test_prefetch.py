@@ -0,0 +1,84 @@
+"""
+Test script for background prefetching
+"""
+import sys
+import threading
+import time
+from utils.prefetch import BackendGate, PrefetchQueue
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    """Poll until condition() is true or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_buffer_fills_and_serves():
+    """The buffer fills up to its size and each take is refilled"""
+    counter = iter(range(100))
+    queue = PrefetchQueue(lambda: next(counter), size=2, idle_seconds=60, gate=BackendGate())
+    assert queue.take() is None
+    assert wait_for(lambda: queue.ready_count == 2)
+    time.sleep(0.05)
+    assert queue.stats["generated"] == 2
+    assert queue.take() == 0
+    assert wait_for(lambda: queue.ready_count == 2)
+    assert queue.stats == {"served_ready": 1, "served_direct": 1, "generated": 3, "errors": 0, "expired": 0}
+    queue.stop()
+    print("   ✓ Buffer fills and refills")
+
+
+def test_waits_for_foreground_requests():
+    """Nothing is prefetched while a foreground request is running"""
+    gate = BackendGate()
+    release = threading.Event()
+    
+    def foreground_request():
+        with gate.foreground():
+            release.wait()
+    
+    worker = threading.Thread(target=foreground_request)
+    worker.start()
+    assert wait_for(lambda: gate.busy)
+    queue = PrefetchQueue(lambda: "prompt", size=1, idle_seconds=60, gate=gate).start()
+    time.sleep(0.2)
+    assert queue.ready_count == 0
+    release.set()
+    worker.join()
+    assert wait_for(lambda: queue.ready_count == 1, timeout=3.0)
+    queue.stop()
+    print("   ✓ Prefetching yields to foreground requests")
+
+
+def test_idle_expiry():
+    """An unused queue drops its results and stops, and restarts on the next take"""
+    queue = PrefetchQueue(lambda: "prompt", size=1, idle_seconds=0.2, gate=BackendGate()).start()
+    assert wait_for(lambda: queue.ready_count == 1)
+    assert wait_for(lambda: not queue.running, timeout=6.0)
+    assert queue.ready_count == 0 and queue.stats["expired"] == 1
+    assert queue.take() is None
+    assert wait_for(lambda: queue.ready_count == 1)
+    queue.stop()
+    print("   ✓ Idle queues expire")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Prefetch Queue")
+    print("=" * 60)
+    test_buffer_fills_and_serves()
+    test_waits_for_foreground_requests()
+    test_idle_expiry()
+    print("[PASS] Prefetch queue is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
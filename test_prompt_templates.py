@@ -0,0 +1,73 @@
+"""
+Test script for prompt template layout
+Checks that the static prefix is shared across requests and the variable fields come last
+"""
+import sys
+from utils.prompt_templates import (
+    get_template,
+    get_blog_outline_prompt,
+    get_social_media_prompt,
+    get_writing_prompt_template,
+    BLOG_OUTLINE_TEMPLATE,
+    SOCIAL_MEDIA_TEMPLATE,
+    WRITING_PROMPT_TEMPLATE,
+)
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def test_static_prefix_is_shared():
+    """Different requests must start with the same static instructions"""
+    first = get_blog_outline_prompt("Python Basics", "beginners", "short", "tutorial")
+    second = get_blog_outline_prompt("Kubernetes Operators", "experts", "long", "opinion", "Some docs")
+    assert first.startswith(BLOG_OUTLINE_TEMPLATE.instructions)
+    assert second.startswith(BLOG_OUTLINE_TEMPLATE.instructions)
+
+    social = get_social_media_prompt("AI", "daily", "Twitter", "week", "casual")
+    assert social.startswith(SOCIAL_MEDIA_TEMPLATE.instructions)
+
+    writing = get_writing_prompt_template("sci-fi", "plot", "simple", "Include a robot")
+    assert writing.startswith(WRITING_PROMPT_TEMPLATE.instructions)
+    print("   ✓ Static prefix shared across requests")
+
+
+def test_variable_fields_come_last():
+    """Topic, custom context and constraints only appear after the instructions"""
+    prompt = get_blog_outline_prompt("Python Basics", "beginners", "short", "tutorial", "Custom docs here")
+    tail = prompt[len(BLOG_OUTLINE_TEMPLATE.instructions):]
+    assert '"Python Basics"' in tail
+    assert "Custom docs here" in tail
+    # Custom context is the least volatile field, so it comes before the topic
+    assert tail.index("Custom docs here") < tail.index("Python Basics")
+
+    writing = get_writing_prompt_template("mystery", "character", "complex", "Set in Victorian era")
+    assert "Set in Victorian era" in writing[len(WRITING_PROMPT_TEMPLATE.instructions):]
+    assert "Additional Constraints" not in get_writing_prompt_template("mystery", "character", "complex")
+    print("   ✓ Variable fields rendered in the request tail")
+
+
+def test_fingerprints():
+    """Fingerprints are stable, distinct per template and exposed as metadata"""
+    fingerprints = {t.fingerprint for t in (BLOG_OUTLINE_TEMPLATE, SOCIAL_MEDIA_TEMPLATE, WRITING_PROMPT_TEMPLATE)}
+    assert len(fingerprints) == 3
+    assert get_template("blog_outline") is BLOG_OUTLINE_TEMPLATE
+    metadata = BLOG_OUTLINE_TEMPLATE.metadata()
+    assert metadata["prompt_version"] == "blog_outline/v2"
+    assert metadata["prompt_fingerprint"] == BLOG_OUTLINE_TEMPLATE.fingerprint
+    print("   ✓ Fingerprints stable and distinct")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Prompt Template Layout")
+    print("=" * 60)
+    test_static_prefix_is_shared()
+    test_variable_fields_come_last()
+    test_fingerprints()
+    print("[PASS] Prompt templates are prefix-stable")
+
+
+if __name__ == "__main__":
+    main()
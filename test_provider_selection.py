@@ -5,6 +5,7 @@ Tests both Ollama and LM Studio provider configuration
 import os
 from utils.llm_interface import LocalLLM
 from config import settings
+from scripted_llm import isolated
 
 def test_provider_initialization():
     """Test that providers can be initialized correctly"""
@@ -54,6 +55,7 @@ def test_provider_initialization():
     except Exception as e:
         print(f"   ✗ Error: {str(e)}")
 
+@isolated
 def test_model_listing():
     """Test fetching available models from both providers"""
     print("\n" + "=" * 60)
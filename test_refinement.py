@@ -0,0 +1,120 @@
+"""
+Test script for refinement sessions
+Uses a scripted LLM stand-in so the session bookkeeping can be checked without a running server
+"""
+import itertools
+import sys
+from generators import blog_generator
+from generators.blog_generator import generate_blog_outline
+from scripted_llm import ScriptedLLM, isolated
+from utils.refinement import RefinementSession
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+OUTLINE = """## 1. HEADLINES
+- Rust Ownership Explained
+
+## 2. STRUCTURED OUTLINE
+### Borrowing
+- Shared and mutable references
+
+## 3. KEY POINTS
+- Every value has one owner
+
+## 4. SUBTOPICS
+- Lifetimes
+
+---
+
+I hope this outline helps! Let me know if you would like any changes.
+"""
+
+
+def revisions():
+    """Answers "revision 1", "revision 2", ... in request order"""
+    numbers = itertools.count(1)
+    return lambda prompt: f"revision {next(numbers)}"
+
+
+@isolated
+def test_ollama_reuses_context():
+    """Follow-ups send only the instruction plus the previous context array"""
+    llm = ScriptedLLM(max_tokens=100, provider="ollama", answer=revisions())
+    session = RefinementSession(llm, "original outline", prompt="make an outline", context=[7, 7, 7])
+    session.refine("make section 3 more advanced")
+    assert llm.calls[0]["context"] == [7, 7, 7]
+    assert "make section 3 more advanced" in llm.calls[0]["prompt"]
+    assert "original outline" not in llm.calls[0]["prompt"]
+    assert session.context == [7, 7, 7] + [1] * 10
+    assert session.current == "revision 1"
+    print("   ✓ Ollama context array reused")
+
+
+@isolated
+def test_lm_studio_sends_history():
+    """LM Studio follow-ups carry the chat history"""
+    llm = ScriptedLLM(max_tokens=100, provider="lm_studio", answer=revisions())
+    session = RefinementSession(llm, "original calendar", prompt="make a calendar", system_prompt="sys")
+    session.refine("add two more posts")
+    history = llm.calls[0]["history"]
+    assert [turn["role"] for turn in history] == ["user", "assistant"]
+    assert history[1]["content"] == "original calendar"
+    print("   ✓ LM Studio chat history sent")
+
+
+@isolated
+def test_history_is_summarized_near_limit():
+    """Older turns are summarized once the context window fills up"""
+    llm = ScriptedLLM(max_tokens=100, provider="lm_studio", answer=revisions())
+    session = RefinementSession(llm, "x" * 1000, prompt="y" * 1000, max_context_tokens=600)
+    session.refine("shorter please")
+    # First call is the summary, second the refinement itself
+    assert len(llm.calls) == 2
+    assert session.summary == "revision 1"
+    assert "Summary of the earlier conversation" in llm.calls[1]["system_prompt"]
+    assert [turn["role"] for turn in llm.calls[1]["history"]] == ["assistant"]
+    print("   ✓ History summarized near the context limit")
+
+
+@isolated
+def test_early_stopped_result_is_replayed():
+    """A stream stopped early leaves no context, so the refinement replays the conversation"""
+    llm = ScriptedLLM(max_tokens=2000, provider="ollama", answer=OUTLINE)
+    # An earlier request on the shared client left its context behind
+    llm.generate("an earlier request")
+    assert llm.last_context
+    original = blog_generator.llm
+    blog_generator.llm = llm
+    try:
+        outline = generate_blog_outline("Rust ownership")
+    finally:
+        blog_generator.llm = original
+    assert outline.metadata["stop_reason"] == "early_stop"
+    assert outline._session_seed["context"] is None
+
+    session = RefinementSession.from_seed(outline._session_seed, outline.outline)
+    session.refine("add a section on lifetimes")
+    refinement = llm.calls[-1]
+    assert refinement["context"] is None
+    assert "Rust Ownership Explained" in refinement["prompt"] and "add a section on lifetimes" in refinement["prompt"]
+    assert "I hope this outline helps" not in refinement["prompt"]
+    assert session.context == [1] * 10
+    print("   ✓ Early-stopped result refined from a replayed conversation")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Refinement Sessions")
+    print("=" * 60)
+    test_ollama_reuses_context()
+    test_lm_studio_sends_history()
+    test_history_is_summarized_near_limit()
+    test_early_stopped_result_is_replayed()
+    print("[PASS] Refinement sessions are working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Test script for targeted repair of incomplete results
+Uses a scripted LLM stand-in so no server is needed
+"""
+import sys
+from datetime import datetime
+from generators.blog_generator import BlogOutline, find_blog_outline_gaps, repair_blog_outline
+from generators.social_generator import (
+    SocialMediaCalendar,
+    calculate_post_dates,
+    find_missing_post_dates,
+    repair_social_calendar,
+)
+from scripted_llm import ScriptedLLM, isolated
+from utils.output_parsers import BLOG_SECTIONS, split_sections
+from utils.repair import merge_sections
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+OUTLINE_WITHOUT_SUBTOPICS = """## 1. HEADLINES
+- Python in 30 Days
+
+## 2. STRUCTURED OUTLINE
+**Introduction**
+- Why Python
+
+## 3. KEY POINTS
+- Python is popular
+"""
+
+
+@isolated
+def test_missing_section_is_repaired_in_place():
+    """Only the missing section is requested, with a fraction of the token budget"""
+    outline = BlogOutline(topic="Python", outline=OUTLINE_WITHOUT_SUBTOPICS, metadata={"stop_reason": "stop"})
+    assert find_blog_outline_gaps(outline) == ["SUBTOPICS"]
+
+    llm = ScriptedLLM(max_tokens=2000, provider="ollama", answer="## 4. SUBTOPICS\n- Virtual environments\n")
+    outline._session_seed = {"llm": llm, "prompt": "make an outline", "context": [1, 2, 3],
+                             "response": OUTLINE_WITHOUT_SUBTOPICS}
+    repaired = repair_blog_outline(outline)
+    assert llm.calls[0]["context"] == [1, 2, 3]
+    assert "SUBTOPICS" in llm.calls[0]["prompt"]
+    assert llm.calls[0]["max_tokens"] == 500
+    assert find_blog_outline_gaps(repaired) == []
+    assert repaired.metadata["repaired_sections"] == ["SUBTOPICS"]
+    print("   ✓ Missing section repaired")
+
+
+def test_truncated_section_is_replaced():
+    """A section cut off by max_tokens is replaced, and sections stay in prompt order"""
+    truncated = OUTLINE_WITHOUT_SUBTOPICS.replace("## 3. KEY POINTS\n- Python is popular\n", "## 3. KEY POINTS\n- Python is pop")
+    outline = BlogOutline(topic="Python", outline=truncated, metadata={"stop_reason": "length"})
+    assert find_blog_outline_gaps(outline) == ["KEY POINTS", "SUBTOPICS"]
+
+    merged = merge_sections(truncated, "4. SUBTOPICS:\n- pip\n\n3. KEY POINTS:\n- Python is popular\n",
+                            BLOG_SECTIONS, ["KEY POINTS", "SUBTOPICS"])
+    sections = split_sections(merged, BLOG_SECTIONS)
+    assert list(sections) == BLOG_SECTIONS
+    assert "Python is pop" not in merged.replace("Python is popular", "")
+    print("   ✓ Truncated section replaced in order")
+
+
+@isolated
+def test_missing_calendar_dates():
+    """Dates from calculate_post_dates without a post are requested and appended"""
+    start = datetime(2025, 1, 6)
+    dates = calculate_post_dates("weekly", "month", start)
+    text = "".join(f"**{date}**: Carousel - Idea {i}\nHashtags: #ai\n\n" for i, date in enumerate(dates[:2]))
+    calendar = SocialMediaCalendar(theme="AI", calendar=text, metadata={
+        "frequency": "weekly", "timeframe": "month", "generated_date": start.isoformat(), "stop_reason": "length"})
+    # The last post may have been cut off, so its date counts as missing too
+    assert find_missing_post_dates(calendar) == dates[1:]
+
+    answer = "Here you go:\n\n" + "".join(f"**{date}**: Video - New idea\nHashtags: #ai\n\n" for date in dates[1:])
+    llm = ScriptedLLM(max_tokens=2000, provider="lm_studio", answer=answer)
+    repaired = repair_social_calendar(calendar, llm_instance=llm)
+    assert "Here you go" not in repaired.calendar
+    assert find_missing_post_dates(repaired) == []
+    assert repaired.calendar.count("Idea 1") == 0
+    print("   ✓ Missing calendar dates repaired")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Targeted Repair")
+    print("=" * 60)
+    test_missing_section_is_repaired_in_place()
+    test_truncated_section_is_replaced()
+    test_missing_calendar_dates()
+    print("[PASS] Targeted repair is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Test script for posting schedules and calendar exports
+"""
+import io
+import sys
+from datetime import date
+from itertools import islice
+from generators.social_generator import (
+    SocialMediaCalendar,
+    calculate_post_dates,
+    calendar_posts_by_date,
+    posting_schedule,
+)
+from utils.export_utils import iter_csv, write_schedule
+from utils.scheduler import PostingSchedule
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def test_weekday_patterns_and_blackouts():
+    """3x week is Mon/Wed/Fri and blackout dates are skipped"""
+    schedule = PostingSchedule("3x week", "week", start_date=date(2025, 1, 6), blackout_dates=["2025-01-08"])
+    assert [day.strftime("%a %d") for day in schedule.dates()] == ["Mon 06", "Fri 10", "Mon 13"]
+    assert calculate_post_dates("2x week", "week", date(2025, 1, 6)) == [
+        "January 07, 2025 (Tuesday)", "January 09, 2025 (Thursday)"]
+    print("   ✓ Weekday patterns and blackout dates")
+
+
+def test_time_zones_and_platform_slots():
+    """Posting times are local to the time zone, across daylight saving changes"""
+    schedule = PostingSchedule("daily", "week", start_date=date(2025, 3, 29), timezone="Europe/Berlin",
+                               platforms=["LinkedIn", "Twitter"], time_slots={"twitter": ["07:30"]})
+    slots = list(islice(schedule, 4))
+    assert [(slot.platform, slot.start.strftime("%H:%M %Z")) for slot in slots] == [
+        ("Twitter", "07:30 CET"), ("LinkedIn", "08:00 CET"), ("Twitter", "07:30 CEST"), ("LinkedIn", "12:00 CEST")]
+    print("   ✓ Time zones and per-platform time slots")
+
+
+def test_year_long_export_streams():
+    """A year of daily posts on five platforms is written without building a list"""
+    platforms = ["LinkedIn", "Twitter", "Instagram", "Facebook", "TikTok"]
+    schedule = PostingSchedule("daily", "year", start_date=date(2025, 1, 1), platforms=platforms)
+    assert schedule.count() == 366
+    output = io.StringIO()
+    write_schedule(schedule, output, "ics", posts={date(2025, 1, 1): {"idea": "New year, new plans"}})
+    text = output.getvalue()
+    assert text.count("BEGIN:VEVENT") == 366 * 5
+    assert "SUMMARY:[LinkedIn] New year\\, new plans" in text
+    # The schedule ends on January 1st of the next year, which has no post
+    assert text.count("New year\\, new plans") == 5
+    rows = list(islice(iter_csv(schedule), 3))
+    assert rows[0].startswith("date,time,timezone,platform")
+    assert rows[1].startswith("2025-01-01,")
+    print("   ✓ Year-long multi-platform export streamed")
+
+
+def test_year_calendar_export_keeps_years_apart():
+    """The first and last day of a year-long calendar share a month and day but not a post"""
+    text = ("**January 01, 2026 (Thursday)**: Carousel - Goals for the year\nHashtags: #plan\n\n"
+            "**Jan 2**: Video - Second day check-in\nHashtags: #plan\n\n"
+            "**January 01, 2027 (Friday)**: Carousel - A year in review\nHashtags: #recap\n")
+    calendar = SocialMediaCalendar(theme="Planning", calendar=text, metadata={
+        "frequency": "daily", "timeframe": "year", "start_date": "2026-01-01", "platform": "LinkedIn"})
+    posts = calendar_posts_by_date(calendar)
+    assert set(posts) == {date(2026, 1, 1), date(2026, 1, 2), date(2027, 1, 1)}
+    output = io.StringIO()
+    write_schedule(posting_schedule(calendar), output, "ics", posts=posts)
+    summaries = [line for line in output.getvalue().splitlines() if line.startswith("SUMMARY:")]
+    assert len(summaries) == 366
+    assert summaries[0] == "SUMMARY:[LinkedIn] Goals for the year"
+    assert summaries[1] == "SUMMARY:[LinkedIn] Second day check-in"
+    assert summaries[-1] == "SUMMARY:[LinkedIn] A year in review"
+    print("   ✓ Year-long calendar export keeps January 1st of each year apart")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Posting Schedules")
+    print("=" * 60)
+    test_weekday_patterns_and_blackouts()
+    test_time_zones_and_platform_slots()
+    test_year_long_export_streams()
+    test_year_calendar_export_keeps_years_apart()
+    print("[PASS] Posting schedules are working correctly!")
+
+
+if __name__ == "__main__":
+    main()
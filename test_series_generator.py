@@ -0,0 +1,107 @@
+"""
+Test script for the blog series planner
+Uses a scripted LLM stand-in so no server is needed
+"""
+import re
+import sys
+import time
+from generators import series_generator
+from generators.series_generator import generate_blog_series, series_bundle, load_series_bundle
+from scripted_llm import ScriptedLLM, isolated
+from utils.similarity import NearDuplicateIndex
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+PLAN = """1. SERIES OVERVIEW:
+Operating Kubernetes clusters in production.
+
+2. POSTS:
+1. Cluster Setup - Installing and sizing a cluster
+2. Observability - Metrics, logs and traces
+3. Upgrades - Rolling upgrades without downtime
+4. Disaster Recovery - Backups and restores
+"""
+
+TOPICS = ["cluster setup", "observability stack", "rolling upgrades", "disaster recovery"]
+
+OUTLINE_DELAY = 0.2
+
+
+def outline_for(post: int, headline: str) -> str:
+    """A small outline whose main section is specific to the post"""
+    topic = TOPICS[post - 1]
+    return (f"## 1. HEADLINES\n- {headline}\n\n"
+            f"## 2. STRUCTURED OUTLINE\n### Introduction\n- Hook\n### Planning {topic} step{post}\n- Point\n"
+            f"### Conclusion\n- Wrap up\n\n## 3. KEY POINTS\n- Fact\n\n## 4. SUBTOPICS\n- Related\n")
+
+
+def answer(prompt: str) -> str:
+    """The plan, then outlines; posts 1 and 3 share a headline unless told to avoid it"""
+    match = re.search(r"Post in Series: (\d+) of", prompt)
+    if not match:
+        return PLAN
+    time.sleep(OUTLINE_DELAY)
+    post = int(match.group(1))
+    if post in (1, 3) and "do not repeat" not in prompt:
+        return outline_for(post, "The Complete Guide to Running Kubernetes in Production")
+    return outline_for(post, f"Kubernetes {TOPICS[post - 1]} explained")
+
+
+def test_near_duplicate_index():
+    """Similar titles are found, unrelated ones are not"""
+    index = NearDuplicateIndex(threshold=0.6)
+    index.add("a", "Getting Started with Kubernetes Operators")
+    index.add("b", "Monitoring Clusters with Prometheus")
+    assert [key for key, _ in index.query("Getting started with Kubernetes operators today")] == ["a"]
+    assert index.query("Backing up etcd") == []
+    print("   ✓ Near-duplicate index")
+
+
+@isolated
+def test_series_regenerates_only_overlapping_posts():
+    """Outlines run in parallel and only the post repeating an earlier one is redone"""
+    from config import settings
+    events = []
+    original_llm, original_parallel = series_generator.llm, settings.LLM_MAX_PARALLEL
+    llm = ScriptedLLM(max_tokens=2000, answer=answer)
+    series_generator.llm = llm
+    settings.LLM_MAX_PARALLEL = 4
+    try:
+        started = time.perf_counter()
+        series = generate_blog_series("Kubernetes Operations", post_count=4, early_stop=False,
+                                      on_post=events.append)
+        elapsed = time.perf_counter() - started
+    finally:
+        series_generator.llm, settings.LLM_MAX_PARALLEL = original_llm, original_parallel
+
+    assert [post.title for post in series.plan] == ["Cluster Setup", "Observability", "Upgrades", "Disaster Recovery"]
+    assert series.metadata["regenerated_posts"] == [3]
+    assert series.metadata["remaining_overlaps"] == {}
+    assert "explained" in series.outlines[2].outline
+    assert "The Complete Guide" in series.outlines[0].outline
+    assert elapsed < OUTLINE_DELAY * 4, f"outlines ran sequentially ({elapsed:.2f}s)"
+    assert events[0] == {"type": "plan", "posts": [post.title for post in series.plan]}
+
+    outline_calls = [call["prompt"] for call in llm.calls if "Post in Series" in call["prompt"]]
+    assert len(outline_calls) == 5
+    assert all("SERIES PLAN" in call and "Disaster Recovery" in call for call in outline_calls)
+
+    restored = load_series_bundle(series_bundle(series))
+    assert restored.to_markdown() == series.to_markdown()
+    print("   ✓ Only the overlapping post was regenerated")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Blog Series Planner")
+    print("=" * 60)
+    test_near_duplicate_index()
+    test_series_regenerates_only_overlapping_posts()
+    print("[PASS] Blog series planner is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
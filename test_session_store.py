@@ -0,0 +1,74 @@
+"""
+Test script for the memory-bounded session store
+"""
+import sys
+import tempfile
+import time
+from generators.blog_generator import BlogOutline
+from utils.llm_interface import LocalLLM
+from utils.session_store import SessionStore
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def outline(topic: str, size: int) -> BlogOutline:
+    result = BlogOutline(topic=topic, outline=f"## {topic}\n" + "x" * size, metadata={"model": "llama3.2"})
+    result._session_seed = {"llm": LocalLLM(temperature=0.5).clone(), "prompt": f"Topic: {topic}"}
+    return result
+
+
+def test_values_spill_to_disk():
+    """Values over the memory budget are evicted least recently used first and loaded back when used"""
+    with tempfile.TemporaryDirectory() as folder:
+        store = SessionStore(folder, budget=250_000)
+        handles = [store.put(f"session-{number}", "last_result", outline(f"Topic {number}", 100_000))
+                   for number in range(5)]
+        total = store.usage()
+        assert total["sessions"] == 5 and total["in_memory"] <= 250_000
+        # Highly repetitive text compresses well on disk
+        assert total["on_disk"] < total["in_memory"]
+
+        # The oldest value was evicted: it is read back from disk, private state included
+        assert store.usage("session-0")["in_memory"] == 0
+        loaded = store.get(handles[0])
+        assert loaded.topic == "Topic 0" and loaded._session_seed["llm"].temperature == 0.5
+        assert store.usage("session-0")["in_memory"] == handles[0].size
+        assert store.usage()["in_memory"] <= 250_000
+
+        # Storing a new value of the same name replaces the old one
+        newer = store.put("session-1", "last_result", outline("Newer", 10))
+        assert store.get(handles[1]) is None and store.get(newer).topic == "Newer"
+        assert store.usage("session-1")["values"] == 1
+
+        store.drop("session-2")
+        assert store.get(handles[2]) is None and store.usage("session-2")["values"] == 0
+        assert len(list(store.directory.iterdir())) == 4
+    print("   ✓ Values spill to disk under the memory budget and load back when used")
+
+
+def test_idle_sessions_expire():
+    """Values of sessions unused for longer than the idle time are deleted"""
+    with tempfile.TemporaryDirectory() as folder:
+        store = SessionStore(folder, budget=1_000_000, idle=0.1)
+        idle = store.put("idle", "last_draft", ("outline", "draft"))
+        time.sleep(0.2)
+        store._last_expiry = 0
+        active = store.put("active", "last_draft", ("outline", "draft"))
+        assert store.get(idle) is None and store.get(active) == ("outline", "draft")
+        assert store.usage()["sessions"] == 1
+    print("   ✓ Idle sessions' values are deleted")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Session Store")
+    print("=" * 60)
+    test_values_spill_to_disk()
+    test_idle_sessions_expire()
+    print("[PASS] Session store is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
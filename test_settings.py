@@ -0,0 +1,142 @@
+"""
+Test script for hot-reloadable settings and profiles
+Uses temporary .env and profile files, no server needed
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from config import settings
+from generators.blog_generator import generate_blog_outline
+from scripted_llm import ScriptedLLM, isolated
+from utils.llm_interface import llm
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def write(path: str, text: str):
+    """Write a file and move its modification time forward so the change is seen"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    stamp = time.time() + 10 + len(text)
+    os.utime(path, (stamp, stamp))
+
+
+def test_reload_profiles():
+    """Profiles apply over .env, changes are picked up, bad edits are rejected"""
+    original_env_file = settings.ENV_FILE
+    with tempfile.TemporaryDirectory() as folder:
+        env_file = os.path.join(folder, ".env")
+        profiles_file = os.path.join(folder, "profiles.json")
+        with open(profiles_file, "w", encoding="utf-8") as f:
+            json.dump({"fast": {"OLLAMA_MODEL": "tiny-model", "MAX_TOKENS": 600},
+                       "quality": {"OLLAMA_MODEL": "large-model", "MAX_TOKENS": 3500}}, f)
+        base = f"LLM_PROVIDER=ollama\nMAX_TOKENS=1500\nTEMPERATURE=0.4\nSETTINGS_PROFILES_FILE={profiles_file}\n"
+        try:
+            settings.ENV_FILE = env_file
+            write(env_file, base + "SETTINGS_PROFILE=fast\n")
+            assert settings.reload_if_changed()
+            assert (settings.OLLAMA_MODEL, settings.MAX_TOKENS, settings.TEMPERATURE) == ("tiny-model", 600, 0.4)
+            assert not settings.reload_if_changed()
+            
+            # A generation in flight keeps its client; new requests get the new one
+            running = llm.current()
+            write(env_file, base + "SETTINGS_PROFILE=quality\n")
+            assert settings.reload_if_changed()
+            assert settings.OLLAMA_MODEL == "large-model" and llm.model == "large-model"
+            assert running.model == "tiny-model" and llm.current() is not running
+            
+            # Broken edits leave the current settings in place
+            write(env_file, base + "SETTINGS_PROFILE=turbo\n")
+            try:
+                settings.reload_if_changed()
+                raise AssertionError("Unknown profile was accepted")
+            except ValueError as e:
+                assert "turbo" in str(e)
+            assert settings.OLLAMA_MODEL == "large-model" and settings.SETTINGS_PROFILE == "quality"
+        finally:
+            settings.ENV_FILE = original_env_file
+            settings.reload()
+    print("   ✓ Profiles applied and hot-reloaded, live client swapped")
+
+
+def test_relative_paths_use_project_folder():
+    """Relative store paths resolve against the project, not the working directory"""
+    original_env_file, original_cwd = settings.ENV_FILE, os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        env_file = os.path.join(folder, ".env")
+        queue_file = os.path.join(folder, "queue.sqlite3")
+        try:
+            settings.ENV_FILE = env_file
+            write(env_file, f"LLM_PROVIDER=ollama\nHISTORY_STORE_PATH=stores/history.sqlite3\nJOB_QUEUE_PATH={queue_file}\n")
+            os.chdir(folder)
+            settings.reload()
+            assert settings.HISTORY_STORE_PATH == os.path.join(settings.PROJECT_DIR, "stores/history.sqlite3")
+            assert settings.SHARED_STORE_PATH == os.path.join(settings.PROJECT_DIR, "data/shared_store.sqlite3")
+            assert settings.JOB_QUEUE_PATH == queue_file
+        finally:
+            os.chdir(original_cwd)
+            settings.ENV_FILE = original_env_file
+            settings.reload()
+    print("   ✓ Relative paths resolved against the project folder")
+
+
+OUTLINE = """## 1. HEADLINES
+- Rust Ownership Explained
+
+## 2. STRUCTURED OUTLINE
+### Borrowing
+- References
+
+## 3. KEY POINTS
+- One owner per value
+
+## 4. SUBTOPICS
+- Lifetimes
+"""
+
+
+@isolated
+def test_generation_keeps_its_client():
+    """A reload during a generation does not mix the new client into its result"""
+    def reload_then_answer(prompt):
+        # What a settings reload does to the default client, while the request is with the backend
+        llm.reset()
+        return OUTLINE
+
+    scripted = ScriptedLLM(model_override="scripted-model", answer=reload_then_answer)
+    object.__setattr__(llm, "_client", scripted)
+    try:
+        outline = generate_blog_outline("Rust ownership", early_stop=False)
+    finally:
+        llm.reset()
+    assert llm.current() is not scripted
+    assert outline.metadata["model"] == "scripted-model" and outline.metadata["tokens_generated"]
+    assert isinstance(outline._session_seed["llm"], ScriptedLLM)
+    assert outline._session_seed["context"] == scripted.last_context
+    print("   ✓ A generation keeps the client it started with across a reload")
+
+
+def test_shipped_profiles():
+    """The bundled profiles only set known settings"""
+    profiles = settings.load_profiles()
+    assert {"fast", "quality"} <= set(profiles)
+    print("   ✓ Bundled profiles are valid")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Settings Reload")
+    print("=" * 60)
+    test_reload_profiles()
+    test_relative_paths_use_project_folder()
+    test_generation_keeps_its_client()
+    test_shipped_profiles()
+    print("[PASS] Settings reload is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Test script for the cross-process shared store
+Uses a stand-in backend so no server is needed
+"""
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from config import settings
+from scripted_llm import scripted
+from utils.llm_interface import LocalLLM
+from utils.shared_store import SharedStore
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def numbered_answers():
+    """Numbers the answers, so a response served from the cache shows which request it came from"""
+    numbers = itertools.count(1)
+    return lambda prompt: "Streamed answer" if prompt.startswith("Streamed") else f"Answer {next(numbers)}"
+
+
+def test_values_shared_between_stores():
+    """A value set through one store is read through another on the same file, until it expires"""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "shared.sqlite3")
+        first, second = SharedStore(path), SharedStore(path)
+        first.set("models", "ollama", ["llama3.2", "qwen2.5"], ttl=0.2)
+        assert second.get("models", "ollama") == ["llama3.2", "qwen2.5"]
+        assert second.cached("models", "ollama", 60, lambda: ["other"]) == ["llama3.2", "qwen2.5"]
+        time.sleep(0.3)
+        assert second.get("models", "ollama") is None
+        assert second.cached("models", "ollama", 60, lambda: ["fresh"]) == ["fresh"]
+        first.delete("models")
+        assert second.get("models", "ollama") is None
+    print("   ✓ Cache entries are shared between stores and expire")
+
+
+def test_counters_across_processes():
+    """Increments from several processes all add up"""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "shared.sqlite3")
+        SharedStore(path)
+        script = ("import sys; from utils.shared_store import SharedStore; store = SharedStore(sys.argv[1])\n"
+                  "for _ in range(50): store.increment({'llm_requests': 1, 'llm_seconds': 0.5})")
+        processes = [subprocess.Popen([sys.executable, "-c", script, path],
+                                      cwd=os.path.dirname(os.path.abspath(__file__))) for _ in range(3)]
+        for process in processes:
+            assert process.wait(timeout=60) == 0
+        assert SharedStore(path).counters() == {"llm_requests": 150, "llm_seconds": 75}
+    print("   ✓ Counters add up across processes")
+
+
+def test_llm_uses_shared_store():
+    """Model lists and identical responses are served from the store; metrics are recorded"""
+    original = (settings.SHARED_STORE_PATH, settings.RESPONSE_CACHE_TTL_SECONDS, LocalLLM._fetch_models)
+    fetches = []
+    with tempfile.TemporaryDirectory() as folder:
+        settings.SHARED_STORE_PATH = os.path.join(folder, "shared.sqlite3")
+        settings.RESPONSE_CACHE_TTL_SECONDS = 60
+        LocalLLM._fetch_models = staticmethod(lambda provider: fetches.append(provider) or ["llama3.2"])
+        try:
+            assert LocalLLM.get_available_models("ollama") == ["llama3.2"]
+            assert LocalLLM.get_available_models("ollama") == ["llama3.2"]
+            assert len(fetches) == 1
+            LocalLLM.get_available_models("ollama", refresh=True)
+            assert len(fetches) == 2
+
+            # Two clients stand in for two replicas sending the same request
+            counting = scripted(numbered_answers())
+            first, second = counting(), counting()
+            first.provider = second.provider = "ollama"
+            assert first.generate("Same prompt") == "Answer 1"
+            assert second.generate("Same prompt") == "Answer 1"
+            assert second.last_stats["eval_count"] == 1
+            second.seed = 7
+            assert second.generate("Same prompt") == "Answer 2"
+            second.seed = None
+            chunks = []
+            assert first.stream_text("Streamed prompt") == "Streamed answer"
+            assert second.stream_text("Streamed prompt", on_chunk=chunks.append) == "Streamed answer"
+            assert len(counting.calls) == 3 and chunks == ["Streamed answer"]
+
+            counters = SharedStore(settings.SHARED_STORE_PATH).counters()
+            assert counters["response_cache_hits"] == 2 and counters["response_cache_misses"] == 3
+            assert counters["llm_requests"] == 3 and counters["llm_completion_tokens"] == 3
+        finally:
+            settings.SHARED_STORE_PATH, settings.RESPONSE_CACHE_TTL_SECONDS, LocalLLM._fetch_models = original
+    print("   ✓ Model lists, responses and metrics go through the shared store")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Shared Store")
+    print("=" * 60)
+    test_values_shared_between_stores()
+    test_counters_across_processes()
+    test_llm_uses_shared_store()
+    print("[PASS] Shared store is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Test script for diverse multi-variant generation
+Uses a scripted LLM stand-in so no server is needed
+"""
+import itertools
+import sys
+from config import settings
+from generators import writing_generator
+from generators.writing_generator import generate_writing_prompt
+from scripted_llm import scripted, isolated
+from utils.variants import generate_variants, variant_options, WRITING_ANGLES
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+SCENARIOS = [
+    "A lighthouse keeper finds a letter from her future self",
+    "A lighthouse keeper finds a letter from her own future self",
+    "Twin pilots race a storm to deliver an antidote across the northern sea",
+    "A cartographer maps a city that rearranges itself every night",
+]
+
+
+def in_order():
+    """Answers with the scenarios in request order"""
+    scenarios = itertools.cycle(SCENARIOS)
+    return lambda prompt: (f"1. MAIN PROMPT:\n{next(scenarios)}\n\n2. SETTING DETAILS:\n- Windswept coast\n\n"
+                           "3. PLOT DIRECTIONS:\n- A secret surfaces\n\n4. DEVELOPMENT QUESTIONS:\n- What is at stake?")
+
+
+def test_variant_options():
+    """Each variant gets its own angle, seed and a clamped temperature"""
+    options = variant_options(3, 1.95, WRITING_ANGLES)
+    assert [option["angle"] for option in options] == WRITING_ANGLES[:3]
+    assert len({option["seed"] for option in options}) == 3
+    assert all(0.0 <= option["temperature"] <= 2.0 for option in options)
+    print("   ✓ Variant options are diverse")
+
+
+@isolated
+def test_duplicates_replaced():
+    """A near-identical variant is discarded and topped up with a distinct one"""
+    fake = scripted(in_order())
+    original_class, original_parallel = writing_generator.LocalLLM, settings.LLM_MAX_PARALLEL
+    writing_generator.LocalLLM = fake
+    # One at a time so the scripted order is deterministic
+    settings.LLM_MAX_PARALLEL = 1
+    try:
+        result = generate_writing_prompt("sci-fi", "plot", "simple", variants=3, early_stop=False)
+    finally:
+        writing_generator.LocalLLM, settings.LLM_MAX_PARALLEL = original_class, original_parallel
+    
+    assert len(fake.calls) == 4
+    assert len(result.alternatives) == 2
+    assert result.metadata["variants_discarded_as_duplicates"] == 1
+    assert result.metadata["variants_returned"] == 3
+    prompts = [result.prompt] + [variant.prompt for variant in result.alternatives]
+    assert sum("lighthouse" in prompt for prompt in prompts) == 1
+    assert [variant.metadata["variant_rank"] for variant in [result] + result.alternatives] == [1, 2, 3]
+    # Every request carried its own angle and seed
+    assert all("Creative Angle" in call["prompt"] for call in fake.calls)
+    assert len({call["seed"] for call in fake.calls}) == 4
+    print("   ✓ Duplicate variant replaced, alternatives ranked")
+
+
+def test_ranking_prefers_complete():
+    """Results with fewer gaps rank ahead of more distinctive ones"""
+    texts = {0: "alpha beta gamma delta", 1: "epsilon zeta eta theta", 2: "alpha beta gamma iota"}
+    ranked, summary = generate_variants(
+        lambda option: {"text": texts[option["index"]], "gaps": [] if option["index"] == 2 else ["x"]},
+        text_of=lambda result: result["text"],
+        count=3,
+        temperature=0.7,
+        gaps=lambda result: result["gaps"],
+        threshold=0.9,
+    )
+    assert ranked[0]["text"] == texts[2] and ranked[1]["text"] == texts[1]
+    assert summary["variants_returned"] == 3 and summary["variants_failed"] == 0
+    print("   ✓ Complete variants rank first, then the most distinctive")
+
+
+def main():
+    print("=" * 60)
+    print("Testing Variant Generation")
+    print("=" * 60)
+    test_variant_options()
+    test_duplicates_replaced()
+    test_ranking_prefers_complete()
+    print("[PASS] Variant generation is working correctly!")
+
+
+if __name__ == "__main__":
+    main()
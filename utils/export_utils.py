@@ -1,9 +1,16 @@
 """
 Export utilities for converting generated content to different formats
 """
-from typing import Optional
-from datetime import datetime
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO, Union
+from datetime import datetime, timedelta, timezone
 import base64
+import csv
+import hashlib
+import io
+import threading
+import zipfile
+from config import settings
 
 
 def generate_markdown(title: str, content: str, metadata: Optional[dict] = None) -> str:
@@ -130,3 +137,220 @@ def create_download_button_txt(filename: str, content: str) -> tuple:
         Tuple of (content, filename, mime_type)
     """
     return content, filename.replace('.md', '.txt'), "text/plain"
+
+
+
+def _ics_escape(text: str) -> str:
+    """Escape text for an iCalendar property value"""
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _ics_fold(line: str) -> str:
+    """Fold a content line at 75 octets as required by RFC 5545"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Do not split a multi-byte character
+        while cut > 0 and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _slot_post(posts: Optional[dict], slot) -> dict:
+    """Post planned for a schedule slot, keyed by (platform, date) or date"""
+    if not posts:
+        return {}
+    day = slot.start.date()
+    return posts.get((slot.platform.lower(), day)) or posts.get(day) or {}
+
+
+def iter_icalendar(slots: Iterable, posts: Optional[dict] = None, title: str = "Social Media Calendar",
+                   duration_minutes: int = 30) -> Iterator[str]:
+    """
+    Stream a posting schedule as an iCalendar (.ics) document
+
+    Args:
+        slots: ScheduleSlot objects (e.g. a utils.scheduler.PostingSchedule), consumed lazily
+        posts: Optional dict of date or (platform, date) -> post dict
+            (see generators.social_generator.calendar_posts_by_date) used for event titles and descriptions
+        title: Calendar name
+        duration_minutes: Length of each event
+
+    Yields:
+        Lines of the document, CRLF-terminated
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR\r\n"
+    yield "VERSION:2.0\r\n"
+    yield "PRODID:-//Blog Post Creator//Social Media Calendar//EN\r\n"
+    yield _ics_fold(f"X-WR-CALNAME:{_ics_escape(title)}")
+    for slot in slots:
+        start = slot.start.astimezone(timezone.utc)
+        end = start + timedelta(minutes=duration_minutes)
+        post = _slot_post(posts, slot)
+        platform = slot.platform or "Social"
+        summary = f"[{platform}] {post['idea']}" if post.get("idea") else f"{platform} post"
+        yield "BEGIN:VEVENT\r\n"
+        yield f"UID:{start.strftime('%Y%m%dT%H%M%SZ')}-{platform.lower()}@blog-post-creator\r\n"
+        yield f"DTSTAMP:{stamp}\r\n"
+        yield f"DTSTART:{start.strftime('%Y%m%dT%H%M%SZ')}\r\n"
+        yield f"DTEND:{end.strftime('%Y%m%dT%H%M%SZ')}\r\n"
+        yield _ics_fold(f"SUMMARY:{_ics_escape(summary)}")
+        description = "\n".join(part for part in (post.get("caption"), post.get("engagement_prompt"),
+                                                   " ".join(post.get("hashtags", []))) if part)
+        if description:
+            yield _ics_fold(f"DESCRIPTION:{_ics_escape(description)}")
+        yield "END:VEVENT\r\n"
+    yield "END:VCALENDAR\r\n"
+
+
+CSV_COLUMNS = ["date", "time", "timezone", "platform", "format", "idea", "caption", "engagement_prompt", "hashtags"]
+
+
+def iter_csv(slots: Iterable, posts: Optional[dict] = None) -> Iterator[str]:
+    """
+    Stream a posting schedule as CSV
+
+    Args:
+        slots: ScheduleSlot objects, consumed lazily
+        posts: Optional dict of date or (platform, date) -> post dict
+
+    Yields:
+        CSV rows (header first)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def row(values: list) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield row(CSV_COLUMNS)
+    for slot in slots:
+        post = _slot_post(posts, slot)
+        yield row([
+            slot.start.strftime("%Y-%m-%d"),
+            slot.start.strftime("%H:%M"),
+            slot.start.tzname(),
+            slot.platform,
+            post.get("format", ""),
+            post.get("idea", ""),
+            post.get("caption", ""),
+            post.get("engagement_prompt", ""),
+            " ".join(post.get("hashtags", [])),
+        ])
+
+
+def write_schedule(slots: Iterable, output: TextIO, fmt: str = "ics", posts: Optional[dict] = None,
+                   title: str = "Social Media Calendar") -> None:
+    """
+    Write a posting schedule to a text file without building it in memory
+
+    Args:
+        slots: ScheduleSlot objects, consumed lazily
+        output: File opened for writing (use newline="" for CSV)
+        fmt: "ics" or "csv"
+        posts: Optional dict of date or (platform, date) -> post dict
+        title: Calendar name (iCalendar only)
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if fmt == "ics":
+        lines = iter_icalendar(slots, posts, title)
+    elif fmt == "csv":
+        lines = iter_csv(slots, posts)
+    else:
+        raise ValueError(f"Unknown schedule format: {fmt}. Must be 'ics' or 'csv'")
+    for line in lines:
+        output.write(line)
+
+
+def create_zip_bundle(files: dict[str, str]) -> bytes:
+    """
+    Pack several text files into one zip archive
+
+    Args:
+        files: Archive path -> file content, written in the given order
+
+    Returns:
+        The zip archive as bytes (e.g. for st.download_button)
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+    return buffer.getvalue()
+
+
+def read_zip_bundle(data: bytes) -> dict[str, str]:
+    """Unpack a zip archive created by create_zip_bundle into path -> content"""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return {name: archive.read(name).decode("utf-8") for name in archive.namelist()}
+
+
+# Rendered exports by (export name, result content hash), least recently used first
+_exports: OrderedDict[tuple[str, str], Union[str, bytes]] = OrderedDict()
+_exports_size = 0
+_exports_lock = threading.Lock()
+
+
+def content_key(result) -> str:
+    """Hash of a result model's content (a refined or repaired result gets a new one)"""
+    return hashlib.blake2b(result.model_dump_json().encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cached_export(name: str, result, render: Callable[[Any], Union[str, bytes]]) -> Union[str, bytes]:
+    """
+    Render an export of a result at most once per result content
+    
+    Rendered exports are shared by all sessions in one LRU cache limited to
+    EXPORT_CACHE_MB; one larger than that is rendered but not kept.
+    
+    Args:
+        name: Name of the export, one per renderer (e.g. "blog_html")
+        result: Result model to export
+        render: Function rendering the export from the result
+    
+    Returns:
+        The rendered export
+    """
+    global _exports_size
+    key = (name, content_key(result))
+    with _exports_lock:
+        if key in _exports:
+            _exports.move_to_end(key)
+            return _exports[key]
+    
+    data = render(result)
+    budget = settings.EXPORT_CACHE_MB * 1024 * 1024
+    with _exports_lock:
+        if key not in _exports and len(data) <= budget:
+            _exports[key] = data
+            _exports_size += len(data)
+            while _exports_size > budget:
+                _, evicted = _exports.popitem(last=False)
+                _exports_size -= len(evicted)
+    return data
+
+
+def lazy_export(name: str, result, render: Callable[[Any], Union[str, bytes]]) -> Callable[[], Union[str, bytes]]:
+    """
+    Export for st.download_button's data, rendered only when the download is requested
+    
+    Args:
+        name, result, render: As for cached_export
+    
+    Returns:
+        Function without arguments returning the (cached) export
+    """
+    return lambda: cached_export(name, result, render)
@@ -0,0 +1,155 @@
+"""
+Local headline scoring
+
+Ranks headline candidates without further LLM calls. Every candidate is
+turned into a row of features (length, numbers, power words, keyword
+placement, readability), all rows are scored with one weighted matrix
+product, and near-duplicates of better headlines are dropped. Ranking a few
+dozen candidates takes milliseconds, so users can re-rank as often as they like.
+"""
+import re
+from typing import TYPE_CHECKING, Optional
+from pydantic import BaseModel, Field
+from utils.similarity import NearDuplicateIndex, word_set
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAX_HEADLINE_CHARS = 70
+
+# Character range that reads well in search results and social cards
+IDEAL_HEADLINE_CHARS = (45, 65)
+
+POWER_WORDS = {
+    "essential", "ultimate", "complete", "proven", "simple", "easy", "fast", "quick", "secret", "secrets",
+    "best", "mistakes", "avoid", "powerful", "practical", "step-by-step", "definitive", "everything",
+    "beginner", "beginners", "master", "mastering", "boost", "faster", "effortless", "hidden", "instantly",
+    "new", "smarter", "stop", "why", "how", "real-world", "hands-on", "guide", "tips", "tricks",
+}
+
+FEATURES = ["length", "number", "power_words", "keyword", "readability"]
+
+DEFAULT_WEIGHTS = {
+    "length": 0.3,
+    "number": 0.15,
+    "power_words": 0.15,
+    "keyword": 0.25,
+    "readability": 0.15,
+}
+
+_NUMBER = re.compile(r"\b\d+\b")
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9'-]*")
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+
+class HeadlineScore(BaseModel):
+    """A ranked headline with its feature scores (each 0.0-1.0)"""
+    headline: str
+    score: float
+    features: dict[str, float] = Field(default_factory=dict)
+
+
+def clean_headline(text: str) -> str:
+    """Strip list numbering, quotes and markdown from a headline candidate"""
+    text = re.sub(r"^\s*(?:[-*•+]|\d+[.)])\s+", "", text)
+    return text.strip().strip("*_`").strip().strip('"“”').strip()
+
+
+def _syllables(word: str) -> int:
+    """Rough syllable count (vowel groups, ignoring a silent final e)"""
+    if word.endswith("e") and not word.endswith("le") and len(word) > 2:
+        word = word[:-1]
+    return max(1, len(_VOWEL_GROUPS.findall(word)))
+
+
+def headline_features(headlines: list[str], keyword: str) -> "np.ndarray":
+    """
+    Feature matrix of headline candidates
+
+    Args:
+        headlines: Cleaned headline candidates
+        keyword: Topic or keyword the headlines should lead with
+
+    Returns:
+        Array of shape (len(headlines), len(FEATURES)) with values in 0.0-1.0
+    """
+    # numpy is only loaded once headlines are scored, not when generators are imported
+    import numpy as np
+
+    low, high = IDEAL_HEADLINE_CHARS
+    lengths = np.array([len(headline) for headline in headlines], dtype=float)
+    # 1.0 inside the ideal range, falling off linearly, 0.0 past the hard limit
+    length = np.where(lengths > MAX_HEADLINE_CHARS, 0.0,
+                      np.clip(1.0 - np.maximum(np.maximum(low - lengths, lengths - high), 0) / low, 0.0, 1.0))
+
+    tokens = [_TOKEN.findall(headline.lower()) for headline in headlines]
+    number = np.array([1.0 if _NUMBER.search(headline) else 0.0 for headline in headlines])
+    power_words = np.minimum(np.array([sum(token in POWER_WORDS for token in words) for words in tokens],
+                                      dtype=float), 2.0) / 2.0
+
+    # Share of the keyword's words present, weighted towards an early position
+    keyword_words = word_set(keyword)
+    keyword_scores = []
+    for words in tokens:
+        found = [position for position, token in enumerate(words) if token in keyword_words]
+        if not keyword_words or not found:
+            keyword_scores.append(0.0)
+            continue
+        coverage = len({words[position] for position in found}) / len(keyword_words)
+        keyword_scores.append(coverage * (1.0 - 0.5 * found[0] / max(1, len(words))))
+    keyword_score = np.array(keyword_scores)
+
+    # Short words and 6-12 words per headline read fastest
+    syllables = np.array([np.mean([_syllables(token) for token in words]) if words else 3.0 for words in tokens])
+    word_counts = np.array([len(words) for words in tokens], dtype=float)
+    readability = (np.clip((3.0 - syllables) / 1.5, 0.0, 1.0)
+                   * np.clip(1.0 - np.maximum(np.maximum(6 - word_counts, word_counts - 12), 0) / 6.0, 0.0, 1.0))
+
+    return np.column_stack([length, number, power_words, keyword_score, readability])
+
+
+def rank_headlines(
+    candidates: list[str],
+    keyword: str,
+    top_n: int = 10,
+    weights: Optional[dict[str, float]] = None,
+    duplicate_threshold: float = 0.6
+) -> list[HeadlineScore]:
+    """
+    Rank headline candidates locally
+
+    Args:
+        candidates: Raw candidates (list markers and quotes are stripped)
+        keyword: Topic or keyword the headlines should feature
+        top_n: Number of headlines to return
+        weights: Optional per-feature weights overriding DEFAULT_WEIGHTS
+        duplicate_threshold: Jaccard similarity at which a lower-ranked headline
+            counts as a near-duplicate of a better one and is dropped
+
+    Returns:
+        Up to top_n headlines, best first
+    """
+    import numpy as np
+
+    headlines = list(dict.fromkeys(filter(None, (clean_headline(candidate) for candidate in candidates))))
+    if not headlines:
+        return []
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    vector = np.array([weights[name] for name in FEATURES])
+    features = headline_features(headlines, keyword)
+    scores = features @ vector / vector.sum()
+
+    ranked = []
+    seen = NearDuplicateIndex(threshold=duplicate_threshold)
+    for index in np.argsort(-scores, kind="stable"):
+        if seen.query(headlines[index]):
+            continue
+        seen.add(index, headlines[index])
+        ranked.append(HeadlineScore(
+            headline=headlines[index],
+            score=round(float(scores[index]), 3),
+            features={name: round(float(value), 3) for name, value in zip(FEATURES, features[index])},
+        ))
+        if len(ranked) == top_n:
+            break
+    return ranked
@@ -0,0 +1,259 @@
+"""
+Generation history
+
+Every blog outline, social media calendar and writing prompt generated by the
+app, the API server, batch runs and workers is recorded in one SQLite file
+with its parameters, model and timing, so earlier results can be found and
+reused instead of generated again.
+
+Results are stored zlib-compressed; their title and text are also indexed in
+an FTS5 table (with prefix indexes, so search-as-you-type stays fast). Lists
+are paged newest first by row id, which the indexes and the FTS index can
+both deliver in order, so browsing and searching stay interactive with
+hundreds of thousands of results.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+from config import settings
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+# Result field holding the generated text, per generator
+TEXT_FIELDS = {"blog": "outline", "social": "calendar", "writing": "prompt"}
+
+PREVIEW_CHARS = 240
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT,
+    title TEXT NOT NULL,
+    model TEXT,
+    provider TEXT,
+    created_at REAL NOT NULL,
+    duration REAL,
+    preview TEXT NOT NULL,
+    params TEXT NOT NULL,
+    result BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_kind ON results (kind);
+CREATE INDEX IF NOT EXISTS results_by_owner ON results (owner);
+CREATE INDEX IF NOT EXISTS results_by_model ON results (model);
+CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(
+    title, content, tokenize = 'porter unicode61', prefix = '2 3'
+);
+"""
+
+
+def fts_query(text: str) -> str:
+    """FTS5 query matching every word of free text, each as a prefix ("" if there are no words)"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text.lower()))
+
+
+def result_title(kind: str, result) -> str:
+    """Short title of a result (topic, theme, or genre and prompt type)"""
+    if kind == "blog":
+        return result.topic
+    if kind == "social":
+        return result.theme
+    return f"{result.genre.title()} {result.metadata.get('prompt_type', 'prompt')}"
+
+
+def result_text(kind: str, result) -> str:
+    """Searchable text of a result (all platform versions of a multi-platform calendar)"""
+    text = getattr(result, TEXT_FIELDS[kind])
+    for platform, calendar in (getattr(result, "platform_calendars", None) or {}).items():
+        text += f"\n\n{platform}\n{calendar}"
+    return text
+
+
+class HistoryStore:
+    """Generated results in a SQLite file, with full-text search"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: SQLite file (defaults to HISTORY_STORE_PATH; ":memory:" for a temporary store)
+        """
+        self.path = path or settings.HISTORY_STORE_PATH
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by all threads, serialized by a lock (like the prompt bank)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._connection.close()
+
+    def add(self, kind: str, result, params: dict, owner: Optional[str] = None,
+            duration: Optional[float] = None) -> int:
+        """
+        Record a result
+
+        Args:
+            kind: Generator name ("blog", "social" or "writing")
+            result: The generator's result model
+            params: Arguments it was generated with (callables such as stream callbacks are left out)
+            owner: User the result belongs to
+            duration: Seconds the generation took
+
+        Returns:
+            Id of the history entry
+        """
+        text = result_text(kind, result)
+        title = result_title(kind, result)
+        stored_params = {name: value for name, value in params.items() if not callable(value)}
+        blob = zlib.compress(result.model_dump_json().encode("utf-8"), 6)
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO results (kind, owner, title, model, provider, created_at, duration, preview, params, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, owner, title, result.metadata.get("model"), result.metadata.get("provider"), time.time(),
+                 duration, " ".join(text.split())[:PREVIEW_CHARS],
+                 json.dumps(stored_params, ensure_ascii=False, default=str), blob),
+            )
+            self._connection.execute("INSERT INTO results_fts (rowid, title, content) VALUES (?, ?, ?)",
+                                     (cursor.lastrowid, title, text))
+            self._connection.commit()
+        return cursor.lastrowid
+
+    def search(self, query: str = "", kind: Optional[str] = None, model: Optional[str] = None,
+               owner: Optional[str] = None, best_match: bool = False,
+               limit: int = 20, offset: int = 0) -> tuple[list[dict], int]:
+        """
+        One page of entries, newest first (or best match first for a search)
+
+        Args:
+            query: Free text; every word must appear (as a word prefix) in the title or text
+            kind, model, owner: Optional filters
+            best_match: Order search results by relevance instead of age
+            limit: Page size
+            offset: Entries to skip
+
+        Returns:
+            Tuple of (entries with id, kind, owner, title, model, provider,
+            created_at, duration, preview and snippet; total matching entries)
+        """
+        match = fts_query(query)
+        conditions, values = [], []
+        for column, value in (("kind", kind), ("model", model), ("owner", owner)):
+            if value is not None:
+                # For a search, "+" keeps SQLite from driving the query by this column's index and
+                # running the full-text match once per row it finds
+                conditions.append(f"{'+' if match else ''}r.{column} = ?")
+                values.append(value)
+        columns = "r.id, r.kind, r.owner, r.title, r.model, r.provider, r.created_at, r.duration, r.preview"
+        if match:
+            source = "results_fts JOIN results r ON r.id = results_fts.rowid"
+            conditions.insert(0, "results_fts MATCH ?")
+            values.insert(0, match)
+            columns += ", snippet(results_fts, 1, '**', '**', '…', 16) AS snippet"
+            order = "results_fts.rank" if best_match else "results_fts.rowid DESC"
+        else:
+            source = "results r"
+            columns += ", NULL AS snippet"
+            order = "r.id DESC"
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {columns} FROM {source}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                values + [limit, offset]).fetchall()
+            total = self._connection.execute(f"SELECT COUNT(*) FROM {source}{where}", values).fetchone()[0]
+        return [dict(row) for row in rows], total
+
+    def get(self, entry_id: int) -> Optional[dict]:
+        """An entry with its parameters and the result as JSON (None if it does not exist)"""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM results WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["params"] = json.loads(entry["params"])
+        entry["result"] = json.loads(zlib.decompress(entry["result"]).decode("utf-8"))
+        return entry
+
+    def load(self, entry_id: int):
+        """
+        The result model of an entry
+
+        Raises:
+            KeyError: If the entry does not exist
+        """
+        from generators.registry import load_result
+
+        entry = self.get(entry_id)
+        if entry is None:
+            raise KeyError(f"No history entry {entry_id}")
+        return load_result(entry["kind"], entry["result"])
+
+    def delete(self, entry_id: int, owner: Optional[str] = None) -> bool:
+        """
+        Remove an entry
+
+        Args:
+            entry_id: Entry to remove
+            owner: If given, only remove the entry if it belongs to this user
+
+        Returns:
+            True if the entry was removed
+        """
+        query, values = "DELETE FROM results WHERE id = ?", [entry_id]
+        if owner is not None:
+            query += " AND owner = ?"
+            values.append(owner)
+        with self._lock:
+            removed = self._connection.execute(query, values).rowcount > 0
+            if removed:
+                self._connection.execute("DELETE FROM results_fts WHERE rowid = ?", (entry_id,))
+            self._connection.commit()
+        return removed
+
+    def models(self) -> list[str]:
+        """Models that produced at least one entry"""
+        with self._lock:
+            rows = self._connection.execute("SELECT DISTINCT model FROM results WHERE model IS NOT NULL ORDER BY model")
+            return [row[0] for row in rows]
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    """The history at HISTORY_STORE_PATH"""
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != settings.HISTORY_STORE_PATH:
+            _store = HistoryStore()
+        return _store
+
+
+def record_result(kind: str, result, params: dict, owner: Optional[str] = None,
+                  duration: Optional[float] = None) -> Optional[int]:
+    """
+    Add a result to the history unless HISTORY_ENABLED is off; never fails the caller
+
+    Returns:
+        Id of the history entry, or None if it was not recorded
+    """
+    if not settings.HISTORY_ENABLED or kind not in TEXT_FIELDS:
+        return None
+    try:
+        return get_history_store().add(kind, result, params, owner, duration)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Could not record {kind} result in the history: {str(e)}")
+        return None
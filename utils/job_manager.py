@@ -0,0 +1,184 @@
+"""
+Background generation jobs
+
+Generations are submitted to a process-wide JobManager instead of running on
+the caller's thread. Each job runs on a worker thread, collects the text it
+streams so far, and keeps its result (or error) until it expires, so callers
+poll it by id: the Streamlit page keeps working while jobs run, a user can
+run several at once, and a reloaded page finds its jobs again by owner.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from config import settings
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting to run"""
+
+
+class Job:
+    """One background generation"""
+
+    def __init__(self, kind: str, owner: Optional[str] = None, label: str = ""):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.label = label
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self._chunks: list[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """True while the job is queued or running"""
+        return self.status in ("queued", "running")
+
+    @property
+    def partial_text(self) -> str:
+        """Text streamed so far"""
+        with self._lock:
+            return "".join(self._chunks)
+
+    def on_chunk(self, chunk: str) -> None:
+        """Stream callback handed to the generator"""
+        with self._lock:
+            self._chunks.append(chunk)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds the job has been running (or ran)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> dict:
+        """JSON-ready view (result included as is; set fields only)"""
+        view = {
+            "id": self.id,
+            "type": self.kind,
+            "label": self.label,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+        return {key: value for key, value in view.items() if value not in (None, "")}
+
+
+class JobManager:
+    """A pool of worker threads running submitted jobs, with a table of recent jobs"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_queued: Optional[int] = None,
+                 ttl: Optional[float] = None, name: str = "job"):
+        """
+        Args:
+            max_workers: Jobs running at once (defaults to JOB_MAX_WORKERS)
+            max_queued: Jobs allowed to wait for a worker (defaults to JOB_MAX_QUEUED)
+            ttl: Seconds finished jobs are kept (defaults to JOB_RESULT_TTL_SECONDS)
+            name: Prefix of the worker thread names
+        """
+        self.max_workers = max(1, max_workers or settings.JOB_MAX_WORKERS)
+        self.max_queued = max_queued if max_queued is not None else settings.JOB_MAX_QUEUED
+        self.ttl = ttl if ttl is not None else settings.JOB_RESULT_TTL_SECONDS
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+    def submit(self, run: Callable[[Callable[[str], None]], Any], kind: str,
+               owner: Optional[str] = None, label: str = "") -> Job:
+        """
+        Queue a job
+
+        Args:
+            run: Does the work; receives the job's stream callback and returns the result
+            kind: What the job generates (e.g. "blog")
+            owner: User the job belongs to (see jobs_for)
+            label: Short description shown in job lists
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFull: If max_queued jobs are already waiting
+        """
+        job = Job(kind, owner, label)
+        with self._lock:
+            self._purge()
+            queued = sum(other.status == "queued" for other in self._jobs.values())
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"{queued} jobs are already queued, try again when one has finished")
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, run)
+        logger.info(f"Queued {kind} job {job.id[:8]} ({queued + 1} waiting)")
+        return job
+
+    def _run(self, job: Job, run: Callable[[Callable[[str], None]], Any]) -> None:
+        job.started_at = time.time()
+        job.status = "running"
+        try:
+            job.result = run(job.on_chunk)
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            logger.warning(f"{job.kind} job {job.id[:8]} failed: {str(e)}")
+        job.finished_at = time.time()
+
+    def _purge(self) -> None:
+        """Drop finished jobs past their time to live (call with the lock held)"""
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at and now - job.finished_at > self.ttl]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job by id (None if unknown or expired)"""
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def jobs_for(self, owner: str, kind: Optional[str] = None) -> list[Job]:
+        """A user's jobs (optionally of one kind), newest first"""
+        with self._lock:
+            self._purge()
+            jobs = [job for job in self._jobs.values()
+                    if job.owner == owner and (kind is None or job.kind == kind)]
+        return sorted(jobs, key=lambda job: job.submitted_at, reverse=True)
+
+    def forget(self, job_id: str) -> None:
+        """Remove a finished job from the table"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.active:
+                del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and drop the queued ones (running jobs finish in the background)"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """The process-wide job manager, shared by every Streamlit session"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
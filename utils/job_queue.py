@@ -0,0 +1,311 @@
+"""
+Durable job queue
+
+Generation jobs stored in one SQLite file, so they outlive the process that
+queued them and can be run by any number of worker processes (worker.py) on
+this host, or on several hosts sharing the file. The app, the API server and
+the batch CLI queue jobs here; workers claim them one at a time.
+
+A claimed job is leased to its worker for JOB_LEASE_SECONDS and the worker
+renews the lease while it runs. If the worker dies the lease lapses and the
+next claim retries the job, up to JOB_MAX_ATTEMPTS runs in total. Jobs are
+read back as utils.job_manager.Job objects, so callers list and poll them the
+same way as in-process jobs.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+from config import settings
+from utils.job_manager import Job, JobQueueFull
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+# Seconds before a failed job is retried (doubled for every further attempt, capped at a minute)
+RETRY_DELAY_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT,
+    label TEXT NOT NULL DEFAULT '',
+    dedupe_key TEXT,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    partial TEXT NOT NULL DEFAULT '',
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_by_owner ON jobs (owner, kind);
+CREATE INDEX IF NOT EXISTS jobs_by_key ON jobs (dedupe_key);
+"""
+
+
+class JobQueue:
+    """Generation jobs in a SQLite file, claimed by worker processes"""
+
+    def __init__(self, path: Optional[str] = None, lease: Optional[float] = None,
+                 max_attempts: Optional[int] = None, ttl: Optional[float] = None,
+                 retry_delay: float = RETRY_DELAY_SECONDS):
+        """
+        Args:
+            path: SQLite file (defaults to JOB_QUEUE_PATH)
+            lease: Seconds a claim lasts without renewal (defaults to JOB_LEASE_SECONDS)
+            max_attempts: Runs of a job before it fails for good (defaults to JOB_MAX_ATTEMPTS)
+            ttl: Seconds finished jobs are kept (defaults to JOB_RESULT_TTL_SECONDS)
+            retry_delay: Seconds before the first retry of a failed job
+        """
+        self.path = path or settings.JOB_QUEUE_PATH
+        self.lease = lease if lease is not None else settings.JOB_LEASE_SECONDS
+        self.max_attempts = max(1, max_attempts or settings.JOB_MAX_ATTEMPTS)
+        self.ttl = ttl if ttl is not None else settings.JOB_RESULT_TTL_SECONDS
+        self.retry_delay = retry_delay
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            if settings.JOB_QUEUE_WAL:
+                connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call: the queue is used from many threads and processes
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Connection inside a write transaction (taken up front, so claims never race)"""
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def enqueue(self, kind: str, params: dict, owner: Optional[str] = None, label: str = "",
+                key: Optional[str] = None, max_queued: Optional[int] = None) -> Job:
+        """
+        Queue a generation
+
+        Args:
+            kind: Generator name (see generators.registry.GENERATORS)
+            params: JSON-serializable generator arguments
+            owner: User the job belongs to (see jobs_for)
+            label: Short description shown in job lists
+            key: Deduplication key; while a queued, running or finished job with
+                this key exists, that job is returned instead of queuing another
+            max_queued: Refuse the job if this many are already waiting
+
+        Returns:
+            The queued (or existing) job
+
+        Raises:
+            JobQueueFull: If max_queued jobs are already waiting
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            self._purge(connection, now)
+            if key is not None:
+                row = connection.execute(
+                    "SELECT * FROM jobs WHERE dedupe_key = ? AND status != 'failed' "
+                    "ORDER BY submitted_at DESC LIMIT 1", (key,)).fetchone()
+                if row is not None:
+                    return _to_job(row)
+            if max_queued is not None:
+                queued = connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued >= max_queued:
+                    raise JobQueueFull(f"{queued} jobs are already queued, try again when one has finished")
+            job_id = uuid.uuid4().hex
+            connection.execute(
+                "INSERT INTO jobs (id, kind, owner, label, dedupe_key, params, status, max_attempts, "
+                "available_at, submitted_at) VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, owner, label, key, json.dumps(params, ensure_ascii=False),
+                 self.max_attempts, now, now),
+            )
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        logger.info(f"Queued durable {kind} job {job_id[:8]}")
+        return _to_job(row)
+
+    def claim(self, worker_id: str, kinds: Optional[list[str]] = None) -> Optional[dict]:
+        """
+        Lease the oldest runnable job to a worker
+
+        A job is runnable when it is queued and due, or running under a lapsed
+        lease. Jobs whose lease lapsed on their last attempt are marked failed.
+
+        Args:
+            worker_id: Unique id of the claiming worker
+            kinds: Only claim these generators (default: any)
+
+        Returns:
+            Dict with id, kind, owner, params and attempt, or None if nothing is runnable
+        """
+        now = time.time()
+        kind_filter, kind_params = "", ()
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+            kind_params = tuple(kinds)
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, lease_owner = NULL, "
+                "error = 'Worker stopped responding on the last attempt' "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now))
+            row = connection.execute(
+                "SELECT id, kind, owner, params, attempts, lease_owner FROM jobs "
+                "WHERE ((status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_expires < ?))"
+                + kind_filter + " ORDER BY submitted_at LIMIT 1",
+                (now, now) + kind_params).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, started_at = ?, partial = '' WHERE id = ?",
+                (worker_id, now + self.lease, now, row["id"]))
+        if row["lease_owner"]:
+            logger.warning(f"Lease of {row['kind']} job {row['id'][:8]} lapsed ({row['lease_owner']}), retrying")
+        return {"id": row["id"], "kind": row["kind"], "owner": row["owner"], "params": json.loads(row["params"]),
+                "attempt": row["attempts"] + 1}
+
+    def heartbeat(self, job_id: str, worker_id: str, partial: Optional[str] = None) -> bool:
+        """
+        Renew a worker's lease on a job, optionally saving the text streamed so far
+
+        Returns:
+            False if the worker no longer holds the job (its lease lapsed and it was reclaimed)
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_expires = ?, partial = COALESCE(?, partial) "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + self.lease, partial, job_id, worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """
+        Store the result of a job the worker holds
+
+        Returns:
+            False if the worker no longer holds the job (the result is discarded)
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, finished_at = ?, "
+                "lease_owner = NULL WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id))
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Record a failed run; the job is queued again after a delay while it has attempts left
+
+        Args:
+            retry: False for errors a retry cannot fix (e.g. invalid inputs)
+
+        Returns:
+            True if the job will be retried
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (job_id, worker_id)).fetchone()
+            if row is None:
+                return False
+            if retry and row["attempts"] < row["max_attempts"]:
+                delay = min(60.0, self.retry_delay * 2 ** (row["attempts"] - 1))
+                connection.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, available_at = ?, lease_owner = NULL, "
+                    "lease_expires = NULL WHERE id = ?", (error, now + delay, job_id))
+                return True
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_owner = NULL "
+                "WHERE id = ?", (error, now, job_id))
+            return False
+
+    def release(self, job_id: str, worker_id: str) -> None:
+        """Hand a job back unfinished (worker shutting down); the run does not count as an attempt"""
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'queued', attempts = attempts - 1, lease_owner = NULL, "
+                "lease_expires = NULL, partial = '' WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (job_id, worker_id))
+
+    def _purge(self, connection: sqlite3.Connection, now: float) -> None:
+        """Drop finished jobs past their time to live"""
+        connection.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ? "
+                           "AND status IN ('done', 'failed')", (now - self.ttl,))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job by id (None if unknown or expired)"""
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _to_job(row) if row is not None else None
+
+    def jobs_for(self, owner: str, kind: Optional[str] = None) -> list[Job]:
+        """A user's jobs (optionally of one kind), newest first"""
+        query, params = "SELECT * FROM jobs WHERE owner = ?", (owner,)
+        if kind is not None:
+            query, params = query + " AND kind = ?", params + (kind,)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(query + " ORDER BY submitted_at DESC", params).fetchall()
+        return [_to_job(row) for row in rows]
+
+    def forget(self, job_id: str) -> None:
+        """Remove a finished job"""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM jobs WHERE id = ? AND status IN ('done', 'failed')", (job_id,))
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs per status"""
+        with closing(self._connect()) as connection:
+            return dict(connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def _to_job(row: sqlite3.Row) -> Job:
+    """Job object of a queue row (result as stored: the JSON result and its Markdown)"""
+    job = Job(row["kind"], row["owner"], row["label"])
+    job.id = row["id"]
+    job.status = row["status"]
+    job.submitted_at = row["submitted_at"]
+    job.started_at = row["started_at"]
+    job.finished_at = row["finished_at"]
+    job.result = json.loads(row["result"]) if row["result"] else None
+    job.error = row["error"]
+    if row["partial"]:
+        job.on_chunk(row["partial"])
+    return job
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """The queue at JOB_QUEUE_PATH"""
+    global _queue
+    with _queue_lock:
+        if _queue is None or _queue.path != settings.JOB_QUEUE_PATH:
+            _queue = JobQueue()
+        return _queue
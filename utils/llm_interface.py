@@ -2,15 +2,24 @@
 LLM Interface for local model inference
 Supports both Ollama and LM Studio
 """
-import requests
+import copy
+import hashlib
 import json
-from typing import Optional
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterator, Optional
 from config import settings
 from utils.logger import setup_logger
+from utils.prefetch import backend_gate
+from utils.shared_store import get_shared_store, record_metrics
 
 # Set up logger
 logger = setup_logger(__name__)
 
+# requests is imported inside the methods that send requests: it is the
+# slowest import of the package, and only needed once a request is made
+
 
 class LocalLLM:
     """Wrapper for local LLM inference"""
@@ -19,6 +28,12 @@ class LocalLLM:
         self.provider = settings.LLM_PROVIDER
         self.max_tokens = max_tokens if max_tokens is not None else settings.MAX_TOKENS
         self.temperature = temperature if temperature is not None else settings.TEMPERATURE
+        # Sampling seed; None lets the backend pick one (set to vary or reproduce outputs)
+        self.seed: Optional[int] = None
+        # Token counts and timings reported by the backend for the last request
+        self.last_stats: dict = {}
+        # Ollama context array from the last request, used to continue a conversation
+        self.last_context: Optional[list] = None
         
         if self.provider == "ollama":
             self.base_url = settings.OLLAMA_BASE_URL
@@ -32,41 +47,227 @@ class LocalLLM:
         
         logger.info(f"Initialized LocalLLM with provider: {self.provider}, model: {self.model}, temperature: {self.temperature}, max_tokens: {self.max_tokens}")
     
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def generate(self, prompt: str, system_prompt: Optional[str] = None,
+                 context: Optional[list] = None, history: Optional[list[dict]] = None,
+                 json_schema: Optional[dict] = None, stop: Optional[list[str]] = None) -> str:
         """
         Generate text completion from the local LLM
         
         Args:
             prompt: The user prompt/question
             system_prompt: Optional system prompt for context
+            context: Optional Ollama context array from a previous response (Ollama only)
+            history: Optional earlier chat messages to send before the prompt (LM Studio only)
+            json_schema: Optional JSON schema the response must follow (structured output)
+            stop: Optional stop sequences that end the generation
             
         Returns:
             Generated text response
         """
+        import requests
         logger.debug(f"Generating response using {self.provider}")
+        # Conversation turns depend on earlier responses, so they are never cached
+        cache_key = None
+        if context is None and not history:
+            cache_key = self._response_cache_key("generate", prompt, system_prompt, json_schema, stop)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
         try:
-            if self.provider == "ollama":
-                return self._generate_ollama(prompt, system_prompt)
-            elif self.provider == "lm_studio":
-                return self._generate_lm_studio(prompt, system_prompt)
+            # Background prefetching waits while user-facing requests run
+            with backend_gate.foreground():
+                if self.provider == "ollama":
+                    text = self._generate_ollama(prompt, system_prompt, context, json_schema, stop)
+                elif self.provider == "lm_studio":
+                    text = self._generate_lm_studio(prompt, system_prompt, history, json_schema, stop)
         except requests.exceptions.ConnectionError:
+            record_metrics(llm_requests=1, llm_errors=1)
             logger.error(f"Could not connect to {self.provider}")
             raise ConnectionError(
                 f"Could not connect to {self.provider}. "
                 f"Please ensure {self.provider} is running."
             )
         except Exception as e:
+            record_metrics(llm_requests=1, llm_errors=1)
             logger.error(f"Error generating response: {str(e)}")
             raise Exception(f"Error generating response: {str(e)}")
+        self._record_response(cache_key, text, started)
+        return text
     
-    def _generate_ollama(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        """Generate using Ollama API"""
-        url = f"{self.base_url}/api/generate"
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None,
+                        json_schema: Optional[dict] = None, stop: Optional[list[str]] = None) -> Iterator[str]:
+        """
+        Stream a text completion from the local LLM
+        
+        The HTTP connection is closed as soon as the caller stops iterating
+        (closing the generator), so a consumer can end a generation early.
+        last_stats and last_context are filled in once the backend reports the
+        final chunk; a stream closed before then leaves them empty.
+        
+        Args:
+            prompt: The user prompt/question
+            system_prompt: Optional system prompt for context
+            json_schema: Optional JSON schema the response must follow (structured output)
+            stop: Optional stop sequences that end the generation
+            
+        Yields:
+            Text chunks as they are generated
+        """
+        import requests
+        logger.debug(f"Streaming response using {self.provider}")
+        self.last_stats = {}
+        self.last_context = None
+        try:
+            with backend_gate.foreground():
+                if self.provider == "ollama":
+                    yield from self._stream_ollama(prompt, system_prompt, json_schema, stop)
+                elif self.provider == "lm_studio":
+                    yield from self._stream_lm_studio(prompt, system_prompt, json_schema, stop)
+        except requests.exceptions.ConnectionError:
+            logger.error(f"Could not connect to {self.provider}")
+            raise ConnectionError(
+                f"Could not connect to {self.provider}. "
+                f"Please ensure {self.provider} is running."
+            )
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
+            raise Exception(f"Error generating response: {str(e)}")
+    
+    def stream_text(self, prompt: str, system_prompt: Optional[str] = None,
+                    json_schema: Optional[dict] = None,
+                    on_chunk: Optional[Callable[[str], None]] = None,
+                    stop: Optional[list[str]] = None,
+                    completion_detector=None) -> str:
+        """
+        Stream a completion, passing each chunk to `on_chunk`, and return the full text
         
+        Args:
+            prompt: The user prompt/question
+            system_prompt: Optional system prompt for context
+            json_schema: Optional JSON schema the response must follow (structured output)
+            on_chunk: Optional callback receiving each text chunk as it arrives
+            stop: Optional stop sequences that end the generation
+            completion_detector: Optional object with feed(chunk) -> bool and end_offset
+                (see utils.output_parsers). Once it reports the result complete, the
+                connection is closed and the text is cut at end_offset.
+            
+        Returns:
+            Generated text response
+        """
+        # Early-stopped text is cut differently, so it is cached separately
+        mode = "stream" if completion_detector is None else "stream_early_stop"
+        cache_key = self._response_cache_key(mode, prompt, system_prompt, json_schema, stop)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            if on_chunk is not None:
+                on_chunk(cached)
+            return cached
+        started = time.perf_counter()
+        chunks = []
+        stream = self.generate_stream(prompt, system_prompt, json_schema, stop)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                if completion_detector is not None and completion_detector.feed(chunk):
+                    # Closing the generator closes the HTTP connection, which stops decoding.
+                    # The final chunk never arrives, so there is no context to continue from.
+                    stream.close()
+                    if self.provider == "ollama":
+                        # Ollama streams one token per chunk
+                        self.last_stats = {"eval_count": len(chunks), "done_reason": "early_stop"}
+                    else:
+                        # LM Studio chunks can hold several tokens, and its usage block never arrived
+                        self.last_stats = {"chunks_generated": len(chunks), "done_reason": "early_stop"}
+                    logger.info(f"All required sections complete, stopped after {len(chunks)} chunks")
+                    text = "".join(chunks)[:completion_detector.end_offset].strip()
+                    self._record_response(cache_key, text, started)
+                    return text
+        except Exception:
+            record_metrics(llm_requests=1, llm_errors=1)
+            raise
+        text = "".join(chunks).strip()
+        self._record_response(cache_key, text, started)
+        return text
+    
+    def _response_cache_key(self, mode: str, prompt: str, system_prompt: Optional[str],
+                            json_schema: Optional[dict], stop: Optional[list[str]]) -> Optional[str]:
+        """Shared response cache key of a request (None while the cache is off)"""
+        if settings.RESPONSE_CACHE_TTL_SECONDS <= 0:
+            return None
+        request = {
+            "mode": mode, "provider": self.provider, "base_url": self.base_url, "model": self.model,
+            "prompt": prompt, "system": system_prompt, "schema": json_schema, "stop": stop,
+            "temperature": self.temperature, "max_tokens": self.max_tokens, "seed": self.seed,
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    
+    def _cached_response(self, key: Optional[str]) -> Optional[str]:
+        """A response another request (in any process) already generated, restoring its stats"""
+        if key is None:
+            return None
+        try:
+            entry = get_shared_store().get("responses", key)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Response cache unavailable: {str(e)}")
+            return None
+        if entry is None:
+            record_metrics(response_cache_misses=1)
+            return None
+        record_metrics(response_cache_hits=1)
+        logger.info("Serving response from the shared cache")
+        self.last_stats = entry["stats"]
+        self.last_context = None
+        return entry["text"]
+    
+    def _record_response(self, key: Optional[str], text: str, started: float):
+        """Count a finished request in the shared metrics and cache its response"""
+        record_metrics(
+            llm_requests=1,
+            llm_seconds=time.perf_counter() - started,
+            llm_prompt_tokens=self.last_stats.get("prompt_eval_count") or 0,
+            llm_completion_tokens=self.last_stats.get("eval_count") or 0,
+        )
+        if key is None:
+            return
+        try:
+            get_shared_store().set("responses", key, {"text": text, "stats": self.last_stats},
+                                   settings.RESPONSE_CACHE_TTL_SECONDS)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Could not cache response: {str(e)}")
+    
+    def generation_metadata(self) -> dict:
+        """
+        Summarize how the last generation ended, for result metadata
+        
+        Returns:
+            Dict with stop_reason and tokens_generated. After an early stop it
+            also has tokens_saved (the part of the max_tokens budget left unused
+            because the stream was closed once the result was complete), or
+            chunks_generated where the backend's token count is unknown.
+            A natural end is not counted as a saving.
+        """
+        generated = self.last_stats.get("eval_count")
+        reason = self.last_stats.get("done_reason")
+        metadata = {"stop_reason": reason, "tokens_generated": generated}
+        if reason == "early_stop":
+            if generated is not None:
+                metadata["tokens_saved"] = max(self.max_tokens - generated, 0)
+            else:
+                metadata["chunks_generated"] = self.last_stats.get("chunks_generated")
+        return metadata
+    
+    def _ollama_payload(self, prompt: str, system_prompt: Optional[str], context: Optional[list],
+                        json_schema: Optional[dict], stop: Optional[list[str]], stream: bool) -> dict:
+        """Build the /api/generate request body"""
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": self.temperature,
                 "num_predict": self.max_tokens
@@ -75,20 +276,68 @@ class LocalLLM:
         
         if system_prompt:
             payload["system"] = system_prompt
+        if context:
+            payload["context"] = context
+        if json_schema:
+            # Ollama constrains decoding to the schema
+            payload["format"] = json_schema
+        if stop:
+            payload["options"]["stop"] = stop
+        if self.seed is not None:
+            payload["options"]["seed"] = self.seed
+        return payload
+    
+    def _record_ollama_stats(self, result: dict):
+        """Keep token counts and timings from a final Ollama response"""
+        self.last_context = result.get("context")
+        self.last_stats = {
+            key: result.get(key)
+            for key in ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration", "total_duration", "done_reason")
+            if key in result
+        }
+    
+    def _generate_ollama(self, prompt: str, system_prompt: Optional[str] = None, context: Optional[list] = None,
+                         json_schema: Optional[dict] = None, stop: Optional[list[str]] = None) -> str:
+        """Generate using Ollama API"""
+        import requests
+        url = f"{self.base_url}/api/generate"
+        payload = self._ollama_payload(prompt, system_prompt, context, json_schema, stop, stream=False)
         
         response = requests.post(url, json=payload, timeout=600)
         response.raise_for_status()
         
         result = response.json()
+        self._record_ollama_stats(result)
         return result.get("response", "").strip()
     
-    def _generate_lm_studio(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        """Generate using LM Studio OpenAI-compatible API"""
-        url = f"{self.base_url}/chat/completions"
+    def _stream_ollama(self, prompt: str, system_prompt: Optional[str] = None,
+                       json_schema: Optional[dict] = None, stop: Optional[list[str]] = None) -> Iterator[str]:
+        """Stream using Ollama API (newline-delimited JSON chunks)"""
+        import requests
+        url = f"{self.base_url}/api/generate"
+        payload = self._ollama_payload(prompt, system_prompt, None, json_schema, stop, stream=True)
         
+        with requests.post(url, json=payload, stream=True, timeout=600) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise Exception(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    self._record_ollama_stats(chunk)
+    
+    def _lm_studio_payload(self, prompt: str, system_prompt: Optional[str], history: Optional[list[dict]],
+                           json_schema: Optional[dict], stop: Optional[list[str]], stream: bool) -> dict:
+        """Build the /chat/completions request body"""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
+        if history:
+            messages.extend(history)
         messages.append({"role": "user", "content": prompt})
         
         payload = {
@@ -98,11 +347,80 @@ class LocalLLM:
             "max_tokens": self.max_tokens
         }
         
+        if json_schema:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "result", "strict": True, "schema": json_schema}
+            }
+        if stop:
+            payload["stop"] = stop
+        if self.seed is not None:
+            payload["seed"] = self.seed
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+    
+    def _record_lm_studio_stats(self, usage: Optional[dict], finish_reason: Optional[str] = None):
+        """Keep token counts from an OpenAI-style usage block"""
+        usage = usage or {}
+        self.last_context = None
+        self.last_stats = {
+            "prompt_eval_count": usage.get("prompt_tokens"),
+            "eval_count": usage.get("completion_tokens"),
+        }
+        if finish_reason:
+            # Same vocabulary as Ollama's done_reason ("stop" / "length")
+            self.last_stats["done_reason"] = finish_reason
+    
+    def _generate_lm_studio(self, prompt: str, system_prompt: Optional[str] = None, history: Optional[list[dict]] = None,
+                            json_schema: Optional[dict] = None, stop: Optional[list[str]] = None) -> str:
+        """Generate using LM Studio OpenAI-compatible API"""
+        import requests
+        url = f"{self.base_url}/chat/completions"
+        payload = self._lm_studio_payload(prompt, system_prompt, history, json_schema, stop, stream=False)
+        
         response = requests.post(url, json=payload, timeout=600)
         response.raise_for_status()
         
         result = response.json()
-        return result["choices"][0]["message"]["content"].strip()
+        choice = result["choices"][0]
+        self._record_lm_studio_stats(result.get("usage"), choice.get("finish_reason"))
+        return choice["message"]["content"].strip()
+    
+    def _stream_lm_studio(self, prompt: str, system_prompt: Optional[str] = None,
+                          json_schema: Optional[dict] = None, stop: Optional[list[str]] = None) -> Iterator[str]:
+        """Stream using LM Studio OpenAI-compatible API (server-sent events)"""
+        import requests
+        url = f"{self.base_url}/chat/completions"
+        payload = self._lm_studio_payload(prompt, system_prompt, None, json_schema, stop, stream=True)
+        
+        finish_reason = None
+        with requests.post(url, json=payload, stream=True, timeout=600) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("usage"):
+                    self._record_lm_studio_stats(chunk["usage"], finish_reason)
+                for choice in chunk.get("choices") or []:
+                    finish_reason = choice.get("finish_reason") or finish_reason
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield content
+        if finish_reason:
+            self.last_stats["done_reason"] = finish_reason
+    
+    def clone(self) -> "LocalLLM":
+        """Copy this client's provider/model/parameter settings into a new instance"""
+        other = copy.copy(self)
+        other.last_stats = {}
+        other.last_context = None
+        return other
     
     def test_connection(self) -> tuple[bool, str]:
         """
@@ -111,6 +429,7 @@ class LocalLLM:
         Returns:
             Tuple of (success: bool, message: str)
         """
+        import requests
         try:
             if self.provider == "ollama":
                 # Test Ollama connection
@@ -137,18 +456,70 @@ class LocalLLM:
         except Exception as e:
             return False, f"[ERROR] Error: {str(e)}"
     
+    def check_health(self, refresh: bool = False) -> tuple[bool, str]:
+        """
+        test_connection, with the outcome shared by every process on the host
+        for HEALTH_CHECK_TTL_SECONDS
+        
+        Args:
+            refresh: Run the check even if a recent outcome is cached
+        
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        def check() -> list:
+            record_metrics(health_checks=1)
+            return list(self.test_connection())
+        
+        try:
+            success, message = get_shared_store().cached(
+                "health", f"{self.provider}|{self.base_url}|{self.model}",
+                settings.HEALTH_CHECK_TTL_SECONDS, check, refresh=refresh)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Shared store unavailable, checking directly: {str(e)}")
+            return self.test_connection()
+        return success, message
+    
     @staticmethod
-    def get_available_models(provider: str = None) -> list[str]:
+    def get_available_models(provider: str = None, refresh: bool = False) -> list[str]:
         """
         Get list of available models from the LLM provider
         
+        The list is shared by every process on the host for
+        MODEL_LIST_TTL_SECONDS (a failed fetch only for HEALTH_CHECK_TTL_SECONDS).
+        
         Args:
             provider: LLM provider ("ollama" or "lm_studio"). Uses settings default if None.
+            refresh: Fetch the list even if a recent one is cached
         
         Returns:
             List of available model names
         """
         provider = provider or settings.LLM_PROVIDER
+        base_url = settings.OLLAMA_BASE_URL if provider == "ollama" else settings.LM_STUDIO_BASE_URL
+        key = f"{provider}|{base_url}"
+        try:
+            store = get_shared_store()
+            models = None if refresh else store.get("models", key)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Shared store unavailable, fetching models directly: {str(e)}")
+            return LocalLLM._fetch_models(provider)
+        if models is not None:
+            return models
+        
+        models = LocalLLM._fetch_models(provider)
+        ttl = settings.MODEL_LIST_TTL_SECONDS if models else settings.HEALTH_CHECK_TTL_SECONDS
+        try:
+            store.set("models", key, models, ttl)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Could not share the model list: {str(e)}")
+        return models
+    
+    @staticmethod
+    def _fetch_models(provider: str) -> list[str]:
+        """Model names reported by the provider (empty if it cannot be reached)"""
+        import requests
+        record_metrics(model_list_fetches=1)
         
         try:
             if provider == "ollama":
@@ -174,5 +545,46 @@ class LocalLLM:
             return []
 
 
+class _DefaultLLM:
+    """The shared default client, constructed on first use instead of at import"""
+    
+    def __init__(self):
+        object.__setattr__(self, "_client", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+    
+    def _get(self) -> LocalLLM:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    object.__setattr__(self, "_client", LocalLLM())
+        return self._client
+    
+    def current(self) -> LocalLLM:
+        """
+        The default client itself, to use for the whole of a request
+        
+        Attribute reads through the proxy always reach the newest client, so
+        after a settings reload a request reading the proxy would mix two
+        clients' stats and context.
+        """
+        return self._get()
+    
+    def reset(self) -> None:
+        """
+        Swap in a client built from the current settings
+        
+        Requests already running keep the client they resolved with current().
+        """
+        with self._lock:
+            object.__setattr__(self, "_client", LocalLLM())
+    
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
+
+
 # Create a singleton instance
-llm = LocalLLM()
+llm = _DefaultLLM()
+settings.on_reload(llm.reset)
@@ -0,0 +1,531 @@
+"""
+Parsers that turn the generators' markdown output into structured data
+
+Used as the fallback for structured output mode when a model ignores the JSON
+schema, and (through SectionStreamParser / PostStreamParser) to show each
+section or post as soon as it has finished streaming. Everything here works
+on plain model text in linear time over its lines.
+"""
+import json
+import re
+from datetime import date
+from typing import Optional
+
+BLOG_SECTIONS = ["HEADLINES", "STRUCTURED OUTLINE", "KEY POINTS", "SUBTOPICS"]
+SOCIAL_SECTIONS = ["CONTENT IDEAS", "POST FORMATS", "ENGAGEMENT PROMPTS", "HASHTAG RECOMMENDATIONS"]
+WRITING_SECTIONS = ["MAIN PROMPT", "CHARACTER ELEMENTS", "SETTING DETAILS", "PLOT DIRECTIONS", "DEVELOPMENT QUESTIONS"]
+
+# Labels of the per-post fields in the social media prompt's post format
+POST_FIELDS = {
+    "caption/hook": "caption",
+    "caption": "caption",
+    "hook": "caption",
+    "engagement prompt": "engagement_prompt",
+    "cta": "engagement_prompt",
+    "hashtags": "hashtags",
+}
+
+_BULLET = re.compile(r"^\s*(?:[-*•+]|\d+[.)])\s+")
+_DECORATION = " \t#*_`>:"
+_POST_HEADER = re.compile(r"^\s*(?:[-*•]\s*)?(?:\*\*)?\s*([^:*]{2,40}?)\s*(?:\*\*)?\s*:\s*(?:\*\*)?\s*(.+?)\s*$")
+_HASHTAG = re.compile(r"#[\w-]+")
+_MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_MONTH_DAY = re.compile(r"\b(" + "|".join(_MONTHS) + r")[a-z]*\.?\s+(\d{1,2})\b(?:,?\s+(\d{4})\b)?", re.IGNORECASE)
+
+
+def clean_line(line: str) -> str:
+    """Strip list markers and markdown decoration from a line"""
+    line = _BULLET.sub("", line)
+    return line.strip(_DECORATION).replace("**", "").strip()
+
+
+def match_section(line: str, names: list[str]) -> Optional[str]:
+    """
+    Return the section name if the line is a header for one of `names`
+
+    Accepts the variants models commonly produce: "1. HEADLINES (5-7 options):",
+    "## Headlines", "**Structured Outline**", "### 3. Key Points".
+    """
+    stripped = line.strip()
+    if not stripped or len(stripped) > 60:
+        return None
+    text = stripped.lstrip("#*_ \t")
+    text = re.sub(r"^\d+[.)]\s*", "", text)
+    text = text.strip(_DECORATION).upper()
+    for name in names:
+        if text.startswith(name):
+            rest = text[len(name):].strip(_DECORATION)
+            # Allow a short qualifier such as "(5-7 OPTIONS)" or "(IF RELEVANT)"
+            if not rest or (rest.startswith("(") and len(rest) <= 25):
+                return name
+    return None
+
+
+def split_sections(text: str, names: list[str]) -> dict[str, list[str]]:
+    """
+    Split model output into the numbered sections requested by a prompt
+
+    Args:
+        text: Generated markdown text
+        names: Section names in prompt order
+
+    Returns:
+        Dict of section name -> body lines (sections that never appear are absent)
+    """
+    parser = SectionStreamParser(names)
+    events = parser.feed(text) + parser.close()
+    sections: dict[str, list[str]] = {}
+    for event in events:
+        # A repeated header continues the earlier section
+        sections.setdefault(event["name"], []).extend(event["lines"])
+    return sections
+
+
+def section_spans(text: str, names: list[str]) -> list[tuple[str, int, int]]:
+    """
+    Locate the sections of `names` in the text
+
+    Returns:
+        (name, start, end) character spans in order of appearance; each span
+        runs from its header line to the next header (or the end of the text)
+    """
+    spans = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        name = match_section(line, names)
+        if name is not None:
+            if spans:
+                spans[-1] = (spans[-1][0], spans[-1][1], offset)
+            spans.append((name, offset, len(text)))
+        offset += len(line)
+    return spans
+
+
+def list_items(lines: list[str]) -> list[str]:
+    """Collect the non-empty items of a section, without list markers"""
+    items = []
+    for line in lines:
+        item = clean_line(line)
+        if item:
+            items.append(item)
+    return items
+
+
+def is_heading(line: str) -> bool:
+    """True for markdown headings and lines that are entirely bold"""
+    stripped = line.strip()
+    return stripped.startswith("#") or (stripped.startswith("**") and stripped.rstrip(":").endswith("**"))
+
+
+def parse_outline_sections(lines: list[str]) -> list[dict]:
+    """
+    Parse the STRUCTURED OUTLINE section into titled sections with key points
+
+    If the section uses headings (markdown or bold lines), each heading starts
+    a section and everything below it is a key point. Otherwise list items at
+    the outermost indentation start sections and deeper items are key points.
+    """
+    uses_headings = any(is_heading(line) for line in lines)
+    sections: list[dict] = []
+    base_indent = None
+    for line in lines:
+        text = clean_line(line)
+        if not text:
+            continue
+        indent = len(line) - len(line.lstrip())
+        if base_indent is None:
+            base_indent = indent
+        if uses_headings:
+            starts_section = is_heading(line)
+        else:
+            starts_section = indent <= base_indent
+        if starts_section or not sections:
+            sections.append({"title": text, "key_points": []})
+        else:
+            sections[-1]["key_points"].append(text)
+    return sections
+
+
+def parse_blog_outline(text: str) -> dict:
+    """Parse blog outline markdown into a dict matching BlogStructure"""
+    sections = split_sections(text, BLOG_SECTIONS)
+    return {
+        "headlines": [h.strip('"') for h in list_items(sections.get("HEADLINES", []))],
+        "sections": parse_outline_sections(sections.get("STRUCTURED OUTLINE", [])),
+        "key_points": list_items(sections.get("KEY POINTS", [])),
+        "subtopics": list_items(sections.get("SUBTOPICS", [])),
+    }
+
+
+def parse_post_block(lines: list[str]) -> Optional[dict]:
+    """
+    Parse one "[Date/Day]: [Post Type] - [Content Idea]" block with its fields
+
+    Returns:
+        Dict matching SocialPost, or None if the first line is not a post header
+    """
+    if not lines:
+        return None
+    match = _POST_HEADER.match(lines[0])
+    if not match or match.group(1).strip().lower() in POST_FIELDS:
+        return None
+    date, rest = match.group(1).strip(), match.group(2).strip()
+    post_format, _, idea = rest.partition(" - ")
+    if not idea:
+        post_format, _, idea = rest.partition(" – ")
+    post = {
+        "date": date,
+        "format": post_format.strip(" *[]") if idea else "",
+        "idea": (idea or rest).strip(" *[]"),
+        "caption": "",
+        "engagement_prompt": "",
+        "hashtags": [],
+    }
+    for line in lines[1:]:
+        label, sep, value = clean_line(line).partition(":")
+        field = POST_FIELDS.get(label.strip().lower()) if sep else None
+        if field == "hashtags":
+            post["hashtags"] = _HASHTAG.findall(value)
+        elif field:
+            post[field] = value.strip().strip('"')
+    return post
+
+
+def is_post_header(line: str) -> bool:
+    """True if the line starts a calendar post block"""
+    return parse_post_block([line]) is not None and "#" not in line.split(":", 1)[0]
+
+
+def post_header_offsets(text: str) -> list[int]:
+    """Character offsets of the lines that start calendar post blocks"""
+    offsets = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        if not match_section(line, SOCIAL_SECTIONS) and is_post_header(line):
+            offsets.append(offset)
+        offset += len(line)
+    return offsets
+
+
+def post_date(text: str, start: date) -> Optional[date]:
+    """
+    Resolve a free-form post date ("Monday, Jan 6", "January 06, 2025 (Monday)")
+    to a calendar date, or None if it names no valid date
+
+    A date without a year is the first such day on or after `start` (the
+    first day of the calendar's schedule).
+    """
+    match = _MONTH_DAY.search(text)
+    if not match:
+        return None
+    month, day = _MONTHS.index(match.group(1)[:3].lower()) + 1, int(match.group(2))
+    years = [int(match.group(3))] if match.group(3) else [start.year, start.year + 1]
+    for year in years:
+        try:
+            resolved = date(year, month, day)
+        except ValueError:
+            continue
+        if match.group(3) or resolved >= start:
+            return resolved
+    return None
+
+
+def parse_social_calendar(text: str) -> dict:
+    """Parse calendar markdown into a dict matching CalendarStructure"""
+    parser = PostStreamParser()
+    events = parser.feed(text) + parser.close()
+    return {"posts": [event["post"] for event in events]}
+
+
+def parse_writing_prompt(text: str) -> dict:
+    """Parse writing prompt markdown into a dict matching WritingStructure"""
+    sections = split_sections(text, WRITING_SECTIONS)
+    return {
+        "main_prompt": "\n".join(list_items(sections.get("MAIN PROMPT", []))),
+        "character_elements": list_items(sections.get("CHARACTER ELEMENTS", [])),
+        "setting_details": list_items(sections.get("SETTING DETAILS", [])),
+        "plot_directions": list_items(sections.get("PLOT DIRECTIONS", [])),
+        "development_questions": list_items(sections.get("DEVELOPMENT QUESTIONS", [])),
+    }
+
+
+def extract_json(text: str) -> Optional[dict]:
+    """
+    Load a JSON object from model output, tolerating code fences and chatter
+
+    Returns:
+        The parsed object, or None if the text holds no JSON object
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.lower().startswith("json"):
+            text = text[4:]
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class LineBuffer:
+    """
+    Splits streamed chunks into complete lines
+
+    Pending text is kept as a list of pieces and only joined once a newline
+    arrives, so every character is handled a constant number of times no
+    matter how the stream is chunked.
+    """
+
+    def __init__(self):
+        self._pieces: list[str] = []
+
+    def feed(self, chunk: str) -> list[str]:
+        """Add a chunk and return the lines it completed"""
+        if "\n" not in chunk:
+            self._pieces.append(chunk)
+            return []
+        head, *middle, tail = chunk.split("\n")
+        self._pieces.append(head)
+        lines = ["".join(self._pieces), *middle]
+        self._pieces = [tail] if tail else []
+        return lines
+
+    def flush(self) -> list[str]:
+        """Return the final unterminated line, if any"""
+        line = "".join(self._pieces)
+        self._pieces = []
+        return [line] if line else []
+
+
+class SectionStreamParser:
+    """
+    Incremental parser for outputs made of numbered sections
+
+    Feed it chunks as they stream in; it returns a "section" event each time a
+    section is complete (the next header started, or the stream ended).
+
+    Event: {"type": "section", "name": str, "lines": list[str], "text": str, "index": int}
+    """
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.completed: list[str] = []
+        self.current: Optional[str] = None
+        self._lines: list[str] = []
+        self._buffer = LineBuffer()
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consume a streamed chunk and return any completed-section events"""
+        events = []
+        for line in self._buffer.feed(chunk):
+            event = self._line(line)
+            if event:
+                events.append(event)
+        return events
+
+    def close(self) -> list[dict]:
+        """Finish the stream and return the events for the last section"""
+        events = []
+        for line in self._buffer.flush():
+            event = self._line(line)
+            if event:
+                events.append(event)
+        event = self._finish_section()
+        if event:
+            events.append(event)
+        return events
+
+    def _line(self, line: str) -> Optional[dict]:
+        name = match_section(line, self.names)
+        if name is None:
+            if self.current is not None:
+                self._lines.append(line)
+            return None
+        event = self._finish_section()
+        self.current = name
+        return event
+
+    def _finish_section(self) -> Optional[dict]:
+        if self.current is None:
+            return None
+        lines = self._lines
+        while lines and not lines[-1].strip():
+            lines.pop()
+        event = {
+            "type": "section",
+            "name": self.current,
+            "lines": lines,
+            "text": "\n".join(lines).strip("\n"),
+            "index": len(self.completed),
+        }
+        self.completed.append(self.current)
+        self.current = None
+        self._lines = []
+        return event
+
+
+class PostStreamParser:
+    """
+    Incremental parser for social media calendars
+
+    Emits a "post" event as soon as a "[Date/Day]: [Post Type] - [Idea]" block
+    is complete: when its Hashtags line (the last field in the post format)
+    arrives, when the next post starts, or when the stream ends.
+
+    Event: {"type": "post", "post": dict matching SocialPost, "index": int}
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._block: list[str] = []
+        self._buffer = LineBuffer()
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consume a streamed chunk and return any completed-post events"""
+        events = []
+        for line in self._buffer.feed(chunk):
+            events.extend(self._line(line))
+        return events
+
+    def close(self) -> list[dict]:
+        """Finish the stream and return the event for the last post"""
+        events = []
+        for line in self._buffer.flush():
+            events.extend(self._line(line))
+        event = self._finish_post()
+        if event:
+            events.append(event)
+        return events
+
+    def _line(self, line: str) -> list[dict]:
+        if match_section(line, SOCIAL_SECTIONS):
+            return []
+        events = []
+        if is_post_header(line):
+            event = self._finish_post()
+            if event:
+                events.append(event)
+            self._block = [line]
+        elif self._block and line.strip():
+            self._block.append(line)
+            if clean_line(line).lower().startswith("hashtags"):
+                event = self._finish_post()
+                if event:
+                    events.append(event)
+        return events
+
+    def _finish_post(self) -> Optional[dict]:
+        post = parse_post_block(self._block)
+        self._block = []
+        # Keep only blocks that carry at least one post field; plain "Label: value"
+        # lines elsewhere in the text would otherwise be mistaken for posts
+        if not post or not (post["caption"] or post["engagement_prompt"] or post["hashtags"]):
+            return None
+        event = {"type": "post", "post": post, "index": self.count}
+        self.count += 1
+        return event
+
+
+def is_list_item(line: str) -> bool:
+    """True for bullet or numbered list lines and indented continuation lines"""
+    return bool(_BULLET.match(line)) or line[:1] in (" ", "\t")
+
+
+class SectionCompletionDetector:
+    """
+    Detects when a streamed result has produced all of its required sections
+
+    The result is complete once every required section has started and the
+    last one has ended: after its list items and a blank line come either a
+    horizontal rule or two lines of plain text (sign-offs, commentary). A
+    single plain line is not enough, since it may be a sub-label followed by
+    more items.
+    Implements the completion_detector protocol of LocalLLM.stream_text:
+    feed(chunk) returns True once complete, and end_offset is where the
+    wanted text ends.
+    """
+
+    def __init__(self, names: list[str], required: Optional[list[str]] = None):
+        self.names = names
+        self.required = set(required or names)
+        self.seen: set[str] = set()
+        self.current: Optional[str] = None
+        self.end_offset: Optional[int] = None
+        self._offset = 0
+        self._has_items = False
+        self._blank_at: Optional[int] = None
+        self._candidate_at: Optional[int] = None
+        self._buffer = LineBuffer()
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a streamed chunk; True once the result is complete"""
+        if self.end_offset is not None:
+            return True
+        for line in self._buffer.feed(chunk):
+            if self._line(line):
+                return True
+            self._offset += len(line) + 1
+        return False
+
+    def _line(self, line: str) -> bool:
+        name = match_section(line, self.names)
+        if name is not None:
+            self.seen.add(name)
+            self.current = name
+            self._has_items = False
+            self._blank_at = None
+            self._candidate_at = None
+            return False
+        if self.current is None or not self.required <= self.seen:
+            return False
+
+        stripped = line.strip()
+        if not stripped:
+            if self._blank_at is None:
+                self._blank_at = self._offset
+            return False
+        if stripped in ("---", "***", "___") and self._has_items:
+            self.end_offset = self._blank_at if self._blank_at is not None else self._offset
+            return True
+        if is_list_item(line):
+            self._has_items = True
+            self._candidate_at = None
+        elif self._candidate_at is not None:
+            self.end_offset = self._candidate_at
+            return True
+        elif self._blank_at is not None and self._has_items:
+            # Possibly the start of trailing commentary; confirmed by the next plain line
+            self._candidate_at = self._blank_at
+        self._blank_at = None
+        return False
+
+
+class PostCountDetector:
+    """
+    Detects when a streamed calendar has produced the expected number of posts
+
+    Implements the completion_detector protocol of LocalLLM.stream_text.
+    """
+
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.end_offset: Optional[int] = None
+        self._offset = 0
+        self._parser = PostStreamParser()
+        self._buffer = LineBuffer()
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a streamed chunk; True once all expected posts are complete"""
+        if self.end_offset is not None:
+            return True
+        for line in self._buffer.feed(chunk):
+            self._offset += len(line) + 1
+            self._parser.feed(line + "\n")
+            if self._parser.count >= self.expected:
+                self.end_offset = self._offset
+                return True
+        return False
@@ -0,0 +1,68 @@
+"""
+Platform limits for social media posts, enforced locally
+
+Adapted posts are fitted to each platform's limits here instead of asking
+the model to try again: hashtags beyond the platform's useful maximum are
+dropped first, then the engagement prompt, and only then is the caption
+shortened at a word boundary.
+"""
+
+# characters: maximum length of the post text (caption, engagement prompt and hashtags)
+# hashtags: maximum number of hashtags worth using
+PLATFORM_LIMITS = {
+    "twitter": {"characters": 280, "hashtags": 2},
+    "linkedin": {"characters": 3000, "hashtags": 5},
+    "instagram": {"characters": 2200, "hashtags": 30},
+    "facebook": {"characters": 63206, "hashtags": 3},
+    "tiktok": {"characters": 2200, "hashtags": 5},
+}
+
+ELLIPSIS = "…"
+
+
+def post_text(post: dict) -> str:
+    """The text of a post as it would be published"""
+    parts = [post.get("caption", ""), post.get("engagement_prompt", ""), " ".join(post.get("hashtags", []))]
+    return "\n\n".join(part for part in parts if part)
+
+
+def fit_post_to_platform(post: dict, platform: str) -> tuple[dict, list[str]]:
+    """
+    Fit a post to a platform's character and hashtag limits
+
+    Args:
+        post: Dict matching SocialPost
+        platform: Platform name (case-insensitive)
+
+    Returns:
+        Tuple of (fitted post, descriptions of the changes made)
+    """
+    limits = PLATFORM_LIMITS.get(platform.lower())
+    if limits is None:
+        return post, []
+
+    post = {**post, "hashtags": list(post.get("hashtags", []))}
+    fixes = []
+    if len(post["hashtags"]) > limits["hashtags"]:
+        fixes.append(f"kept {limits['hashtags']} of {len(post['hashtags'])} hashtags")
+        post["hashtags"] = post["hashtags"][:limits["hashtags"]]
+
+    limit = limits["characters"]
+    if len(post_text(post)) > limit and post.get("engagement_prompt"):
+        fixes.append("dropped the engagement prompt")
+        post["engagement_prompt"] = ""
+
+    overflow = len(post_text(post)) - limit
+    if overflow > 0 and post.get("caption"):
+        caption = post["caption"]
+        keep = max(len(caption) - overflow - len(ELLIPSIS), 0)
+        shortened = caption[:keep]
+        if " " in shortened:
+            shortened = shortened[:shortened.rindex(" ")]
+        post["caption"] = shortened.rstrip(" ,;:-") + ELLIPSIS
+        fixes.append(f"shortened the caption to fit {limit} characters")
+    # Only when the hashtags alone are over the limit
+    while len(post_text(post)) > limit and post["hashtags"]:
+        post["hashtags"].pop()
+        fixes.append("dropped a hashtag")
+    return post, fixes
@@ -0,0 +1,215 @@
+"""
+Background prefetching of generated results
+
+A PrefetchQueue keeps a few results ready for one set of inputs (for example
+the current writing prompt selection) so "give me another one" is served
+instantly while the queue refills in the background.
+
+Prefetching runs at low priority: background requests only start while no
+foreground request is running (every LocalLLM request from a normal thread
+counts as foreground), at most PREFETCH_MAX_PARALLEL of them run at once, and
+a queue that has not been used for its idle time stops and drops its results.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Generic, Iterator, Optional, TypeVar
+from config import settings
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+# Longest pause after repeated failures (e.g. the backend is down)
+MAX_ERROR_BACKOFF_SECONDS = 60.0
+
+_thread_state = threading.local()
+
+
+def is_background_thread() -> bool:
+    """True on prefetch worker threads"""
+    return getattr(_thread_state, "background", False)
+
+
+class BackendGate:
+    """Gives foreground requests priority over background prefetching"""
+
+    def __init__(self, max_background: int = 1):
+        self.max_background = max_background
+        self._condition = threading.Condition()
+        self._foreground = 0
+        self._background = 0
+
+    @contextmanager
+    def foreground(self) -> Iterator[None]:
+        """Mark a user-facing request as running (no-op on prefetch threads)"""
+        if is_background_thread():
+            yield
+            return
+        with self._condition:
+            self._foreground += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._foreground -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def background(self, should_wait: Callable[[], bool] = lambda: True) -> Iterator[bool]:
+        """
+        Wait for an idle backend and a free background slot
+
+        Args:
+            should_wait: Called while waiting; return False to give up (e.g. the queue stopped)
+
+        Yields:
+            True if a slot was acquired, False if waiting was abandoned
+        """
+        with self._condition:
+            while self._foreground or self._background >= self.max_background:
+                if not should_wait():
+                    yield False
+                    return
+                self._condition.wait(timeout=1.0)
+            self._background += 1
+        try:
+            yield True
+        finally:
+            with self._condition:
+                self._background -= 1
+                self._condition.notify_all()
+
+    def resize(self, max_background: int) -> None:
+        """Change how many background requests may run at once"""
+        with self._condition:
+            self.max_background = max_background
+            self._condition.notify_all()
+
+    @property
+    def busy(self) -> bool:
+        """True while any foreground request is running"""
+        return self._foreground > 0
+
+
+backend_gate = BackendGate(settings.PREFETCH_MAX_PARALLEL)
+settings.on_reload(lambda: backend_gate.resize(settings.PREFETCH_MAX_PARALLEL))
+
+
+class PrefetchQueue(Generic[T]):
+    """A small buffer of ready results for one set of inputs, refilled in the background"""
+
+    def __init__(self, producer: Callable[[], T], size: Optional[int] = None,
+                 idle_seconds: Optional[float] = None, gate: Optional[BackendGate] = None,
+                 name: str = "prefetch"):
+        """
+        Args:
+            producer: Generates one result (called on the worker thread)
+            size: Number of results to keep ready (defaults to PREFETCH_BUFFER_SIZE)
+            idle_seconds: Stop refilling and drop the buffer after this long without
+                a take() (defaults to PREFETCH_IDLE_SECONDS)
+            gate: Backend gate shared with foreground requests
+            name: Name for logs and the worker thread
+        """
+        self.producer = producer
+        self.size = size if size is not None else settings.PREFETCH_BUFFER_SIZE
+        self.idle_seconds = idle_seconds if idle_seconds is not None else settings.PREFETCH_IDLE_SECONDS
+        self.gate = gate or backend_gate
+        self.name = name
+        self.stats = {"served_ready": 0, "served_direct": 0, "generated": 0, "errors": 0, "expired": 0}
+        self._ready: deque[T] = deque()
+        self._condition = threading.Condition()
+        self._last_used = time.monotonic()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "PrefetchQueue[T]":
+        """Start (or restart after idle expiry) the background worker"""
+        with self._condition:
+            self._stopped = False
+            self._last_used = time.monotonic()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return self
+
+    def stop(self) -> None:
+        """Stop the worker and drop ready results (a running request finishes in the background)"""
+        with self._condition:
+            self._stopped = True
+            self._ready.clear()
+            self._condition.notify_all()
+
+    def take(self) -> Optional[T]:
+        """
+        Take a ready result, waking the worker to refill the buffer
+
+        Returns:
+            A prefetched result, or None if none is ready yet (generate one in
+            the foreground then; the buffer keeps refilling meanwhile)
+        """
+        self.start()
+        with self._condition:
+            if self._ready:
+                self.stats["served_ready"] += 1
+                return self._ready.popleft()
+            self.stats["served_direct"] += 1
+            return None
+
+    @property
+    def ready_count(self) -> int:
+        """Number of results ready to serve"""
+        return len(self._ready)
+
+    @property
+    def running(self) -> bool:
+        """True while the worker thread is alive"""
+        return self._thread is not None and self._thread.is_alive() and not self._stopped
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self._last_used > self.idle_seconds
+
+    def _keep_waiting(self) -> bool:
+        return not self._stopped and not self._idle()
+
+    def _run(self) -> None:
+        _thread_state.background = True
+        errors = 0
+        while True:
+            with self._condition:
+                while not self._stopped and not self._idle() and len(self._ready) >= self.size:
+                    self._condition.wait(timeout=min(self.idle_seconds, 5.0))
+                if not self._stopped and self._idle():
+                    logger.info(f"{self.name}: idle for {self.idle_seconds:g}s, dropping {len(self._ready)} result(s)")
+                    self.stats["expired"] += len(self._ready)
+                    self._ready.clear()
+                    self._stopped = True
+                if self._stopped:
+                    return
+
+            result, failed = None, False
+            with self.gate.background(self._keep_waiting) as acquired:
+                if not acquired:
+                    continue
+                try:
+                    result = self.producer()
+                except Exception as e:
+                    failed = True
+                    errors += 1
+                    self.stats["errors"] += 1
+                    logger.warning(f"{self.name}: prefetch failed ({str(e)})")
+            with self._condition:
+                if failed:
+                    # Back off outside the background slot so other queues can use it
+                    self._condition.wait(timeout=min(MAX_ERROR_BACKOFF_SECONDS, 2.0 ** errors))
+                    continue
+                errors = 0
+                if self._stopped:
+                    return
+                self._ready.append(result)
+                self.stats["generated"] += 1
+                logger.debug(f"{self.name}: {len(self._ready)}/{self.size} result(s) ready")
@@ -0,0 +1,173 @@
+"""
+Offline prompt bank
+
+Creative writing prompts without constraints only depend on (genre, prompt
+type, complexity), so they can be generated ahead of time. The bank stores a
+de-duplicated corpus per combination in one SQLite file (prompt text is
+zlib-compressed) and serves a random prompt the user has not seen yet with a
+single indexed query, without touching the LLM backend.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional
+from config import settings
+from utils.output_parsers import parse_writing_prompt
+from utils.similarity import NearDuplicateIndex
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+# Jaccard similarity of two main prompts at which the later one is not stored
+DUPLICATE_THRESHOLD = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    id INTEGER PRIMARY KEY,
+    combination TEXT NOT NULL,
+    fingerprint TEXT NOT NULL UNIQUE,
+    text BLOB NOT NULL,
+    model TEXT
+);
+CREATE INDEX IF NOT EXISTS prompts_by_combination ON prompts (combination);
+CREATE TABLE IF NOT EXISTS seen (
+    user_id TEXT NOT NULL,
+    prompt_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, prompt_id)
+) WITHOUT ROWID;
+"""
+
+
+def combination_key(genre: str, prompt_type: str, complexity: str) -> str:
+    """Bank key of one (genre, prompt type, complexity) combination"""
+    return f"{genre.lower()}|{prompt_type.lower()}|{complexity.lower()}"
+
+
+def main_prompt(text: str) -> str:
+    """The MAIN PROMPT section of a writing prompt (the whole text if it has none)"""
+    return parse_writing_prompt(text)["main_prompt"] or text
+
+
+class PromptBank:
+    """Pre-generated writing prompts stored in a SQLite file"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: SQLite file (defaults to PROMPT_BANK_PATH; ":memory:" for a temporary bank)
+        """
+        self.path = path or settings.PROMPT_BANK_PATH
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by Streamlit's script threads, serialized by a lock
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._duplicate_indexes: dict[str, NearDuplicateIndex] = {}
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._connection.close()
+
+    def _duplicate_index(self, combination: str) -> NearDuplicateIndex:
+        """Near-duplicate index of the main prompts of a combination (loaded on first use)"""
+        if combination not in self._duplicate_indexes:
+            index = NearDuplicateIndex(threshold=DUPLICATE_THRESHOLD)
+            rows = self._connection.execute("SELECT id, text FROM prompts WHERE combination = ?", (combination,))
+            for prompt_id, blob in rows:
+                index.add(prompt_id, main_prompt(zlib.decompress(blob).decode("utf-8")))
+            self._duplicate_indexes[combination] = index
+        return self._duplicate_indexes[combination]
+
+    def add(self, genre: str, prompt_type: str, complexity: str, text: str, model: Optional[str] = None) -> bool:
+        """
+        Store a generated prompt unless it repeats one already in the bank
+
+        Returns:
+            True if the prompt was stored, False if it was a duplicate
+        """
+        combination = combination_key(genre, prompt_type, complexity)
+        scenario = main_prompt(text)
+        normalized = re.sub(r"\W+", " ", scenario.lower()).strip()
+        fingerprint = hashlib.sha256(f"{combination}\n{normalized}".encode("utf-8")).hexdigest()[:32]
+        with self._lock:
+            index = self._duplicate_index(combination)
+            if index.query(scenario):
+                return False
+            try:
+                cursor = self._connection.execute(
+                    "INSERT INTO prompts (combination, fingerprint, text, model) VALUES (?, ?, ?, ?)",
+                    (combination, fingerprint, zlib.compress(text.encode("utf-8"), 9), model),
+                )
+            except sqlite3.IntegrityError:
+                return False
+            self._connection.commit()
+            index.add(cursor.lastrowid, scenario)
+            return True
+
+    def sample(self, genre: str, prompt_type: str, complexity: str,
+               user_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Take a random prompt of a combination that the user has not seen yet
+
+        Args:
+            genre, prompt_type, complexity: The combination to serve
+            user_id: User to track; the prompt is marked as seen by them
+
+        Returns:
+            Dict with id, text and model, or None if the bank has no unseen prompt
+        """
+        combination = combination_key(genre, prompt_type, complexity)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, text, model FROM prompts WHERE combination = ? AND NOT EXISTS "
+                "(SELECT 1 FROM seen WHERE seen.user_id = ? AND seen.prompt_id = prompts.id) "
+                "ORDER BY random() LIMIT 1",
+                (combination, user_id or ""),
+            ).fetchone()
+            if row is None:
+                return None
+            if user_id:
+                self._connection.execute("INSERT OR IGNORE INTO seen (user_id, prompt_id) VALUES (?, ?)",
+                                         (user_id, row[0]))
+                self._connection.commit()
+        return {"id": row[0], "text": zlib.decompress(row[1]).decode("utf-8"), "model": row[2]}
+
+    def count(self, genre: str, prompt_type: str, complexity: str, user_id: Optional[str] = None) -> int:
+        """Number of prompts of a combination (only those the user has not seen, if given)"""
+        combination = combination_key(genre, prompt_type, complexity)
+        with self._lock:
+            if user_id is None:
+                query, params = "SELECT COUNT(*) FROM prompts WHERE combination = ?", (combination,)
+            else:
+                query = ("SELECT COUNT(*) FROM prompts WHERE combination = ? AND NOT EXISTS "
+                         "(SELECT 1 FROM seen WHERE seen.user_id = ? AND seen.prompt_id = prompts.id)")
+                params = (combination, user_id)
+            return self._connection.execute(query, params).fetchone()[0]
+
+    def counts(self) -> dict[str, int]:
+        """Number of prompts per combination key"""
+        with self._lock:
+            rows = self._connection.execute("SELECT combination, COUNT(*) FROM prompts GROUP BY combination")
+            return dict(rows.fetchall())
+
+    def forget_seen(self, user_id: str) -> None:
+        """Make every prompt available to a user again"""
+        with self._lock:
+            self._connection.execute("DELETE FROM seen WHERE user_id = ?", (user_id,))
+            self._connection.commit()
+
+
+_bank: Optional[PromptBank] = None
+
+
+def get_prompt_bank() -> Optional[PromptBank]:
+    """The bank at PROMPT_BANK_PATH, or None if it has not been built"""
+    global _bank
+    if _bank is None and Path(settings.PROMPT_BANK_PATH).exists():
+        _bank = PromptBank()
+    return _bank
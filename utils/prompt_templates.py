@@ -1,46 +1,97 @@
 """
 Prompt templates for different content generators
+
+Templates are laid out static-first: the system prompt and the instruction
+block never change between requests, and the per-request fields (topic,
+audience, custom context, ...) are appended at the end. Ollama, LM Studio and
+llama.cpp keep the KV cache of the longest prompt prefix they have already
+evaluated, so with this layout repeated requests only re-evaluate the short
+variable tail instead of the whole prompt.
 """
+import hashlib
+import json
+from typing import Optional
+from utils.platform_limits import PLATFORM_LIMITS
 
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
 
-def get_blog_outline_prompt(topic: str, audience: str, length: str, content_type: str, custom_context: str = None) -> str:
-    """
-    Generate a prompt for creating a blog post outline
-    
-    Args:
-        topic: The main topic/keyword focus
-        audience: Target audience level (beginners, intermediate, experts)
-        length: Desired length (short, medium, long)
-        content_type: Type of content (tutorial, listicle, how-to, opinion)
-        custom_context: Optional custom information to incorporate
-    
-    Returns:
-        Formatted prompt string
-    """
-    
-    # Map length to word counts for clarity
-    length_guide = {
-        "short": "800-1200 words (5-7 minute read)",
-        "medium": "1500-2000 words (8-12 minute read)",
-        "long": "2500-3500 words (15-20 minute read)"
-    }
-    
-    length_description = length_guide.get(length.lower(), "1500-2000 words")
-    
-    # Add custom context section if provided
-    context_section = ""
-    if custom_context and custom_context.strip():
-        context_section = f"""\n\nCUSTOM CONTEXT/KNOWLEDGE BASE:
-{custom_context}
-
-IMPORTANT: Use the information from the custom context above to make the blog outline more specific, 
-accurate, and relevant. Reference specific features, technologies, or details mentioned in the context.
-"""
-    
-    prompt = f"""Create a comprehensive technical blog post outline about "{topic}" for {audience} readers.{context_section}
+Return the result as a single JSON object that follows this JSON schema, with no text before or after it.
+Put each headline, key point, post or question in its own list item:
+{schema}"""
+
+
+class PromptTemplate:
+    """A versioned prompt with a static prefix and a variable request tail"""
+
+    def __init__(self, name: str, version: str, system_prompt: str, instructions: str,
+                 stop: Optional[list[str]] = None):
+        self.name = name
+        self.version = version
+        self.system_prompt = system_prompt
+        self.instructions = instructions
+        # Sequences that only appear once the model has moved past the requested
+        # sections (sign-offs, offers to help further). OpenAI-compatible servers
+        # accept at most four.
+        self.stop = stop or []
+        self.fingerprint = hashlib.sha256(
+            f"{name}:{version}\n{system_prompt}\n{instructions}".encode("utf-8")
+        ).hexdigest()[:16]
+
+    def render_request(self, fields: list[tuple[str, Optional[str]]]) -> str:
+        """
+        Render the variable part of the prompt
+
+        Args:
+            fields: (label, value) pairs, ordered from least to most volatile.
+                Empty values are skipped.
+
+        Returns:
+            The request block appended after the static instructions
+        """
+        lines = ["REQUEST DETAILS:"]
+        for label, value in fields:
+            if value is None or not str(value).strip():
+                continue
+            value = str(value).strip()
+            # Multi-line values (custom context) get their own block
+            if "\n" in value:
+                lines.append(f"\n{label}:\n{value}\n")
+            else:
+                lines.append(f"{label}: {value}")
+        return "\n".join(lines)
 
-Content Type: {content_type}
-Target Length: {length_description}
+    def render(self, fields: list[tuple[str, Optional[str]]], json_schema: Optional[dict] = None) -> str:
+        """
+        Render the full prompt: static instructions first, request details last
+
+        Args:
+            fields: Request fields (see render_request)
+            json_schema: Optional schema for structured output mode. The schema
+                is static per generator, so it stays part of the cached prefix.
+        """
+        instructions = self.instructions
+        if json_schema:
+            instructions += STRUCTURED_OUTPUT_INSTRUCTIONS.format(schema=json.dumps(json_schema))
+        return f"{instructions}\n\n{self.render_request(fields)}"
+
+    def metadata(self) -> dict:
+        """Template identifiers to store alongside generated results"""
+        return {
+            "prompt_version": f"{self.name}/v{self.version}",
+            "prompt_fingerprint": self.fingerprint,
+        }
+
+
+BLOG_OUTLINE_TEMPLATE = PromptTemplate(
+    name="blog_outline",
+    version="2",
+    system_prompt="""You are an expert technical content strategist and SEO specialist.
+You create detailed, actionable technical blog post outlines that are easy to follow and implement.
+Your outlines are well-structured, comprehensive, and tailored to the target audience.
+When provided with custom context or documentation, you incorporate that information accurately.
+Always format your output clearly with proper headers, bullet points, and sections.""",
+    instructions="""Create a comprehensive technical blog post outline for the request described at the end of this message.
+Tailor the depth and vocabulary to the target audience and match the requested content type and length.
 
 Please provide:
 
@@ -64,39 +115,30 @@ Please provide:
    - Related topics to mention or link to
    - Supporting concepts to explain
 
-Format the output clearly with headers and bullet points. Make it actionable and ready to use for writing."""
-    
-    return prompt
+If the request includes a CUSTOM CONTEXT/KNOWLEDGE BASE, use that information to make the outline more specific,
+accurate, and relevant. Reference specific features, technologies, or details mentioned in the context.
 
+Format the output clearly with headers and bullet points. Make it actionable and ready to use for writing.""",
+    stop=["\n\nI hope this", "\n\nLet me know if", "\n\nFeel free to", "\n\nThis outline should"],
+)
 
-def get_social_media_prompt(theme: str, frequency: str, platform: str, 
-                            timeframe: str, tone: str) -> str:
-    """
-    Generate a prompt for creating a social media calendar
-    
-    Args:
-        theme: Content theme/category
-        frequency: Posting frequency (daily, 3x week, weekly)
-        platform: Platform focus (Twitter, LinkedIn, Instagram)
-        timeframe: Time period (week, month, quarter)
-        tone: Brand voice/tone preferences
-    
-    Returns:
-        Formatted prompt string
-    """
-    
-    prompt = f"""Create a social media content calendar about "{theme}" for {platform}.
 
-Posting Frequency: {frequency}
-Time Period: {timeframe}
-Brand Voice: {tone}
+SOCIAL_MEDIA_TEMPLATE = PromptTemplate(
+    name="social_media",
+    version="2",
+    system_prompt="""You are an expert social media strategist and content creator.
+You create engaging, platform-optimized social media calendars that drive audience engagement.
+Your calendars are well-structured, actionable, and tailored to the specific platform and audience.
+You understand platform-specific best practices, optimal posting times, and content formats.
+Always format your output clearly with dates, post ideas, engagement prompts, and hashtags.""",
+    instructions="""Create a social media content calendar for the request described at the end of this message.
 
 Please provide:
 
 1. CONTENT IDEAS:
    - Specific post ideas with suggested dates
    - Mix of content types (educational, entertaining, promotional)
-   - Each post should align with {tone} tone
+   - Each post should align with the requested brand voice
 
 2. POST FORMATS:
    - Specify format: text post, image post, video, thread, carousel, etc.
@@ -116,32 +158,20 @@ Format each post idea as:
 [Date/Day]: [Post Type] - [Content Idea]
 Caption/Hook: [Engaging first line]
 Engagement Prompt: [Question or CTA]
-Hashtags: [Relevant tags]"""
-    
-    return prompt
-
+Hashtags: [Relevant tags]""",
+    stop=["\n\nI hope this", "\n\nLet me know if", "\n\nFeel free to", "\n\nThis calendar should"],
+)
 
-def get_writing_prompt_template(genre: str, prompt_type: str, 
-                                complexity: str, constraints: str = None) -> str:
-    """
-    Generate a prompt for creating creative writing prompts
-    
-    Args:
-        genre: Genre preference (sci-fi, mystery, romance, fantasy)
-        prompt_type: Type of prompt (character, plot, world-building)
-        complexity: Complexity level (simple, moderate, complex)
-        constraints: Additional constraints (optional)
-    
-    Returns:
-        Formatted prompt string
-    """
-    
-    constraint_text = f"\nAdditional Constraints: {constraints}" if constraints else ""
-    
-    prompt = f"""Create an original creative writing prompt for {genre} genre.
 
-Prompt Type: {prompt_type}
-Complexity Level: {complexity}{constraint_text}
+WRITING_PROMPT_TEMPLATE = PromptTemplate(
+    name="writing_prompt",
+    version="2",
+    system_prompt="""You are a creative writing expert and professional author.
+You create inspiring, detailed creative writing prompts that spark imagination and encourage unique storytelling.
+Your prompts are specific enough to provide direction but open enough to allow creative freedom.
+Always include rich details about characters, settings, conflicts, and potential story directions.""",
+    instructions="""Create an original creative writing prompt for the request described at the end of this message.
+Match the requested genre, prompt type and complexity level, and respect any additional constraints.
 
 Please provide:
 
@@ -170,6 +200,418 @@ Please provide:
    - Themes to consider
    - Possible challenges for characters
 
-Make the prompt specific enough to be inspiring but open enough for creative interpretation."""
-    
-    return prompt
+Make the prompt specific enough to be inspiring but open enough for creative interpretation.""",
+    stop=["\n\nI hope this", "\n\nLet me know if", "\n\nFeel free to", "\n\nHappy writing"],
+)
+
+
+PLATFORM_ADAPTATION_TEMPLATE = PromptTemplate(
+    name="platform_adaptation",
+    version="1",
+    system_prompt="""You are an expert social media editor.
+You rewrite planned posts so they feel native to a specific platform without changing what they are about.
+Always keep the dates and the post format you are given.""",
+    instructions="""Adapt every post of the content plan in the request at the end of this message to the target platform.
+
+For each post:
+   - Keep the date and the content idea
+   - Choose the post type that works best on the platform (thread, carousel, short video, image post, ...)
+   - Rewrite the caption/hook and engagement prompt in the platform's style and length
+   - Use hashtags that work on the platform, within its hashtag limit
+
+Keep every post, in the same order, and write nothing before or after the posts.
+Format each post as:
+[Date/Day]: [Post Type] - [Content Idea]
+Caption/Hook: [Engaging first line]
+Engagement Prompt: [Question or CTA]
+Hashtags: [Relevant tags]""",
+    stop=["\n\nI hope this", "\n\nLet me know if", "\n\nFeel free to", "\n\nThese posts"],
+)
+
+
+BLOG_SECTION_TEMPLATE = PromptTemplate(
+    name="blog_section",
+    version="1",
+    system_prompt="""You are an experienced technical writer.
+You turn one section of a blog post outline into clear, accurate, well-paced prose with concrete examples.
+When reference material is provided, you rely on it rather than on general knowledge.""",
+    instructions="""Write one section of the blog post whose outline is given at the end of this message.
+Other writers are drafting the remaining sections at the same time, so:
+   - Write ONLY the section named under SECTION TO WRITE, covering its key points
+   - Do not write an introduction or conclusion for the whole post
+   - Do not repeat the section header; start directly with the section text
+   - Use short paragraphs, and code blocks or lists where they help the reader
+   - Stay close to the target word count""",
+    stop=["\n\nI hope this", "\n\nLet me know if", "\n\nFeel free to", "\n\nIn the next section"],
+)
+
+
+BLOG_DRAFT_REDUCE_TEMPLATE = PromptTemplate(
+    name="blog_draft_reduce",
+    version="1",
+    system_prompt="""You are an experienced technical editor.
+You tie independently written sections into one coherent blog post.""",
+    instructions="""The sections of the blog post outlined at the end of this message have been written separately.
+You are given how each section starts and ends. Write the connecting pieces:
+
+1. INTRODUCTION:
+   - A hook and what readers will learn (one or two short paragraphs)
+
+2. TRANSITIONS:
+   - One list item per gap between consecutive sections, in order
+   - Each is one sentence that leads from the previous section into the next
+
+3. CONCLUSION:
+   - Summary of the key takeaways and a call-to-action (one or two short paragraphs)
+
+Write only these three parts, with these headers.""",
+    stop=["\n\nI hope this", "\n\nLet me know if", "\n\nFeel free to"],
+)
+
+
+SERIES_PLAN_TEMPLATE = PromptTemplate(
+    name="series_plan",
+    version="1",
+    system_prompt="""You are an expert technical content strategist.
+You plan blog series in which every post has a distinct scope and the posts build on each other.""",
+    instructions="""Plan a blog series for the request described at the end of this message.
+
+Please provide:
+
+1. SERIES OVERVIEW:
+   - Who the series is for and what readers can do after finishing it (two or three sentences)
+
+2. POSTS:
+   - Exactly the requested number of posts, in reading order, one list item per post
+   - Format each item as: [Post Title] - [What this post covers that no other post does]
+   - Posts must not overlap; move shared background into the earliest post that needs it
+
+Write only these two parts, with these headers.""",
+    stop=["\n\nI hope this", "\n\nLet me know if", "\n\nFeel free to", "\n\nThis series"],
+)
+
+
+HEADLINES_TEMPLATE = PromptTemplate(
+    name="headlines",
+    version="1",
+    system_prompt="""You are an expert technical content strategist and SEO specialist.
+You write many varied, attention-grabbing blog headlines quickly.""",
+    instructions="""Write blog post headline candidates for the request described at the end of this message.
+
+   - Write exactly the requested number of headlines, one per line, as a numbered list
+   - Vary the angle: how-to, numbered list, question, mistake to avoid, comparison, outcome
+   - Keep each headline under 70 characters and include the topic's main keyword
+   - Write only the headlines, with no introduction, explanations or commentary""",
+    stop=["\n\nI hope this", "\n\nLet me know if", "\n\nFeel free to", "\n\nThese headlines"],
+)
+
+
+TEMPLATES = {
+    template.name: template
+    for template in (BLOG_OUTLINE_TEMPLATE, SOCIAL_MEDIA_TEMPLATE, WRITING_PROMPT_TEMPLATE,
+                     PLATFORM_ADAPTATION_TEMPLATE, BLOG_SECTION_TEMPLATE, BLOG_DRAFT_REDUCE_TEMPLATE,
+                     SERIES_PLAN_TEMPLATE, HEADLINES_TEMPLATE)
+}
+
+
+def get_template(name: str) -> PromptTemplate:
+    """
+    Look up a prompt template by name
+
+    Args:
+        name: Template name (blog_outline, social_media, writing_prompt)
+
+    Returns:
+        The matching PromptTemplate
+
+    Raises:
+        ValueError: If no template has that name
+    """
+    if name not in TEMPLATES:
+        raise ValueError(f"Unknown prompt template: {name}. Must be one of: {', '.join(TEMPLATES)}")
+    return TEMPLATES[name]
+
+
+def get_blog_outline_fields(topic: str, audience: str, length: str, content_type: str,
+                            custom_context: str = None) -> list[tuple[str, Optional[str]]]:
+    """Build the ordered request fields for a blog outline prompt"""
+
+    # Map length to word counts for clarity
+    length_guide = {
+        "short": "800-1200 words (5-7 minute read)",
+        "medium": "1500-2000 words (8-12 minute read)",
+        "long": "2500-3500 words (15-20 minute read)"
+    }
+
+    length_description = length_guide.get(length.lower(), "1500-2000 words")
+
+    # The custom context tends to be reused across topics, so it goes first
+    # and stays inside the cached prefix when only the topic changes.
+    return [
+        ("CUSTOM CONTEXT/KNOWLEDGE BASE", custom_context),
+        ("Content Type", content_type),
+        ("Target Length", length_description),
+        ("Target Audience", f"{audience} readers"),
+        ("Topic", f'"{topic}"'),
+    ]
+
+
+def get_blog_outline_prompt(topic: str, audience: str, length: str, content_type: str, custom_context: str = None,
+                            json_schema: Optional[dict] = None, angle: Optional[str] = None) -> str:
+    """
+    Generate a prompt for creating a blog post outline
+
+    Args:
+        topic: The main topic/keyword focus
+        audience: Target audience level (beginners, intermediate, experts)
+        length: Desired length (short, medium, long)
+        content_type: Type of content (tutorial, listicle, how-to, opinion)
+        custom_context: Optional custom information to incorporate
+        json_schema: Optional JSON schema for structured output mode
+        angle: Optional angle to take (differs between variants of one request)
+
+    Returns:
+        Formatted prompt string
+    """
+    fields = get_blog_outline_fields(topic, audience, length, content_type, custom_context)
+    # The angle is the only field that differs between variants, so it goes last
+    fields.append(("Angle", f"Take {angle}" if angle else None))
+    return BLOG_OUTLINE_TEMPLATE.render(fields, json_schema)
+
+
+def get_headline_prompt(topic: str, audience: str, content_type: str, count: int,
+                        custom_context: str = None) -> str:
+    """
+    Generate a prompt for headline candidates only (no outline)
+
+    Args:
+        topic: The main topic/keyword focus
+        audience: Target audience level
+        content_type: Type of content (tutorial, listicle, how-to, opinion)
+        count: Number of candidates to write
+        custom_context: Optional custom information to incorporate
+
+    Returns:
+        Formatted prompt string
+    """
+    fields = [
+        ("CUSTOM CONTEXT/KNOWLEDGE BASE", custom_context),
+        ("Content Type", content_type),
+        ("Target Audience", f"{audience} readers"),
+        ("Number of Headlines", str(count)),
+        ("Topic", f'"{topic}"'),
+    ]
+    return HEADLINES_TEMPLATE.render(fields)
+
+
+def get_blog_section_prompt(outline: str, audience: str, content_type: str, section_title: str,
+                            key_points: list[str], word_count: int, reference: Optional[str] = None) -> str:
+    """
+    Generate a prompt for drafting one section of a blog post
+
+    Args:
+        outline: The full outline (shared by all sections of the post)
+        audience: Target audience level
+        content_type: Type of content (tutorial, listicle, how-to, opinion)
+        section_title: Header of the section to write
+        key_points: Points the section must cover
+        word_count: Target length of the section in words
+        reference: Optional knowledge-base excerpts relevant to this section
+
+    Returns:
+        Formatted prompt string
+    """
+    # The outline is identical for every section, so it leads the request and
+    # the parallel section calls share it as a cached prefix.
+    points = "\n".join(f"- {point}" for point in key_points)
+    fields = [
+        ("OUTLINE", outline),
+        ("Target Audience", f"{audience} readers"),
+        ("Content Type", content_type),
+        ("REFERENCE MATERIAL", reference),
+        ("Target Length", f"about {word_count} words"),
+        ("SECTION TO WRITE", f"{section_title}\n{points}" if points else section_title),
+    ]
+    return BLOG_SECTION_TEMPLATE.render(fields)
+
+
+def get_blog_draft_reduce_prompt(outline: str, audience: str, section_summaries: str) -> str:
+    """
+    Generate a prompt for the introduction, transitions and conclusion of a draft
+
+    Args:
+        outline: The full outline
+        audience: Target audience level
+        section_summaries: Title, opening and closing lines of each drafted section
+
+    Returns:
+        Formatted prompt string
+    """
+    fields = [
+        ("OUTLINE", outline),
+        ("Target Audience", f"{audience} readers"),
+        ("DRAFTED SECTIONS", section_summaries),
+    ]
+    return BLOG_DRAFT_REDUCE_TEMPLATE.render(fields)
+
+
+def get_series_plan_prompt(theme: str, post_count: int, audience: str, content_type: str,
+                           custom_context: str = None) -> str:
+    """
+    Generate a prompt for planning a blog series
+
+    Args:
+        theme: What the series is about
+        post_count: Number of posts in the series
+        audience: Target audience level
+        content_type: Type of content of the posts
+        custom_context: Optional custom information to incorporate
+
+    Returns:
+        Formatted prompt string
+    """
+    fields = [
+        ("CUSTOM CONTEXT/KNOWLEDGE BASE", custom_context),
+        ("Content Type", content_type),
+        ("Target Audience", f"{audience} readers"),
+        ("Number of Posts", str(post_count)),
+        ("Series Theme", f'"{theme}"'),
+    ]
+    return SERIES_PLAN_TEMPLATE.render(fields)
+
+
+def get_series_post_outline_prompt(series_plan: str, topic: str, position: str, audience: str, length: str,
+                                   content_type: str, custom_context: str = None,
+                                   avoid: Optional[list[str]] = None) -> str:
+    """
+    Generate a blog outline prompt for one post of a series
+
+    Args:
+        series_plan: The series plan (shared by every post of the series)
+        topic: Title and scope of this post from the plan
+        position: Where the post sits in the series (e.g. "3 of 12")
+        audience, length, content_type, custom_context: As in get_blog_outline_prompt
+        avoid: Headlines and sections other posts already use
+
+    Returns:
+        Formatted prompt string
+    """
+    # The plan and the series-wide settings lead the request so the parallel
+    # outline calls share them as a cached prefix; only the post itself varies.
+    fields = get_blog_outline_fields(topic, audience, length, content_type, custom_context)
+    fields[1:1] = [("SERIES PLAN (outline only this post; the other posts cover their own scope)", series_plan)]
+    fields[-1:-1] = [
+        ("Headlines and Sections Used by Other Posts (do not repeat)", "\n".join(f"- {item}" for item in avoid or [])),
+        ("Post in Series", position),
+    ]
+    return BLOG_OUTLINE_TEMPLATE.render(fields)
+
+
+def get_social_media_fields(theme: str, frequency: str, platform: str, timeframe: str, tone: str,
+                            post_dates: Optional[list[str]] = None,
+                            avoid_ideas: Optional[list[str]] = None) -> list[tuple[str, Optional[str]]]:
+    """Build the ordered request fields for a social media calendar prompt"""
+    # Chunked calendars share everything up to the theme; the dates and ideas
+    # to avoid differ per chunk, so they come last.
+    return [
+        ("Platform", platform),
+        ("Brand Voice", tone),
+        ("Posting Frequency", frequency),
+        ("Time Period", timeframe),
+        ("Theme", f'"{theme}"'),
+        ("Post Dates (one post per date, no other dates)", "\n".join(post_dates) if post_dates else None),
+        ("Ideas Already Planned (do not repeat)", "\n".join(avoid_ideas) if avoid_ideas else None),
+    ]
+
+
+def get_social_media_prompt(theme: str, frequency: str, platform: str,
+                            timeframe: str, tone: str, json_schema: Optional[dict] = None,
+                            post_dates: Optional[list[str]] = None,
+                            avoid_ideas: Optional[list[str]] = None,
+                            angle: Optional[str] = None) -> str:
+    """
+    Generate a prompt for creating a social media calendar
+
+    Args:
+        theme: Content theme/category
+        frequency: Posting frequency (daily, 3x week, weekly)
+        platform: Platform focus (Twitter, LinkedIn, Instagram)
+        timeframe: Time period (week, month, quarter)
+        tone: Brand voice/tone preferences
+        json_schema: Optional JSON schema for structured output mode
+        post_dates: Optional exact dates to plan posts for (one chunk of a long calendar)
+        avoid_ideas: Optional post ideas already used elsewhere in the calendar
+        angle: Optional content focus (differs between variants of one request)
+
+    Returns:
+        Formatted prompt string
+    """
+    fields = get_social_media_fields(theme, frequency, platform, timeframe, tone, post_dates, avoid_ideas)
+    fields.append(("Content Focus", f"Give the calendar {angle}" if angle else None))
+    return SOCIAL_MEDIA_TEMPLATE.render(fields, json_schema)
+
+
+def get_platform_adaptation_fields(content_plan: str, platform: str,
+                                   tone: str) -> list[tuple[str, Optional[str]]]:
+    """Build the ordered request fields for a platform adaptation prompt"""
+    limits = PLATFORM_LIMITS.get(platform.lower())
+    limit_text = None
+    if limits:
+        limit_text = f"at most {limits['characters']} characters per post, at most {limits['hashtags']} hashtags"
+    # The content plan is the same for every platform, so it goes first and
+    # stays in the cached prefix while the platforms are adapted in parallel.
+    return [
+        ("CONTENT PLAN", content_plan),
+        ("Brand Voice", tone),
+        ("Platform Limits", limit_text),
+        ("Target Platform", platform),
+    ]
+
+
+def get_platform_adaptation_prompt(content_plan: str, platform: str, tone: str) -> str:
+    """
+    Generate a prompt for adapting a content plan to one platform
+
+    Args:
+        content_plan: Calendar posts to adapt
+        platform: Target platform (Twitter, LinkedIn, Instagram, ...)
+        tone: Brand voice/tone preferences
+
+    Returns:
+        Formatted prompt string
+    """
+    fields = get_platform_adaptation_fields(content_plan, platform, tone)
+    return PLATFORM_ADAPTATION_TEMPLATE.render(fields)
+
+
+def get_writing_prompt_fields(genre: str, prompt_type: str, complexity: str,
+                              constraints: str = None) -> list[tuple[str, Optional[str]]]:
+    """Build the ordered request fields for a creative writing prompt"""
+    return [
+        ("Genre", genre),
+        ("Prompt Type", prompt_type),
+        ("Complexity Level", complexity),
+        ("Additional Constraints", constraints),
+    ]
+
+
+def get_writing_prompt_template(genre: str, prompt_type: str,
+                                complexity: str, constraints: str = None,
+                                json_schema: Optional[dict] = None, angle: Optional[str] = None) -> str:
+    """
+    Generate a prompt for creating creative writing prompts
+
+    Args:
+        genre: Genre preference (sci-fi, mystery, romance, fantasy)
+        prompt_type: Type of prompt (character, plot, world-building)
+        complexity: Complexity level (simple, moderate, complex)
+        constraints: Additional constraints (optional)
+        json_schema: Optional JSON schema for structured output mode
+        angle: Optional creative angle (differs between variants of one request)
+
+    Returns:
+        Formatted prompt string
+    """
+    fields = get_writing_prompt_fields(genre, prompt_type, complexity, constraints)
+    fields.append(("Creative Angle", f"Build the prompt around {angle}" if angle else None))
+    return WRITING_PROMPT_TEMPLATE.render(fields, json_schema)
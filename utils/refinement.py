@@ -0,0 +1,177 @@
+"""
+Refinement sessions for iterating on a generated result
+
+A session continues the conversation that produced a result instead of
+starting a new generation. For Ollama it keeps the `context` token array
+returned by /api/generate, so a follow-up only evaluates the new instruction.
+For LM Studio it keeps the chat message history (the server's prompt cache
+covers the unchanged history). When the conversation approaches the model's
+context window, older turns are folded into a short summary.
+"""
+from typing import Optional
+from config import settings
+from utils.llm_interface import LocalLLM
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+# Fraction of the context window after which older turns are summarized
+COMPACT_THRESHOLD = 0.8
+
+SUMMARY_PROMPT = """Summarize the conversation below in a few bullet points.
+Keep every requirement, constraint and decision the user asked for; drop the wording of earlier drafts.
+
+{transcript}"""
+
+REFINE_PROMPT = """Apply the following change to your previous answer and return the complete updated version,
+keeping the same structure and headers:
+
+{instruction}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+class RefinementSession:
+    """Follow-up instructions applied incrementally to a previous generation"""
+
+    def __init__(
+        self,
+        llm: LocalLLM,
+        response: str,
+        prompt: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        context: Optional[list] = None,
+        max_context_tokens: Optional[int] = None
+    ):
+        """
+        Args:
+            llm: Client to send follow-ups with (kept for the whole session)
+            response: The generated text being refined
+            prompt: The prompt that produced the response, if known
+            system_prompt: The system prompt used for the original request
+            context: Ollama context array returned with the response
+            max_context_tokens: Context window to stay within (defaults to settings.CONTEXT_WINDOW)
+        """
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.context = context if llm.provider == "ollama" else None
+        self.max_context_tokens = max_context_tokens or settings.CONTEXT_WINDOW
+        self.summary: Optional[str] = None
+        self.turns: list[dict] = []
+        if prompt:
+            self.turns.append({"role": "user", "content": prompt})
+        self.turns.append({"role": "assistant", "content": response})
+        self.refinements = 0
+
+    @classmethod
+    def from_seed(cls, seed: Optional[dict], response: str, llm: Optional[LocalLLM] = None) -> "RefinementSession":
+        """
+        Create a session from the seed a generator attached to its result
+
+        Args:
+            seed: Dict with llm, prompt, system_prompt and context (may be None,
+                e.g. for results restored from storage). Without a context, e.g.
+                for a result whose stream was stopped early, the first Ollama
+                follow-up replays the conversation as a transcript.
+            response: Current text of the result
+            llm: Client to use when the seed has none
+
+        Returns:
+            RefinementSession ready for follow-up instructions
+        """
+        seed = seed or {}
+        client = seed.get("llm") or llm or LocalLLM()
+        # Only reuse the Ollama context if the text has not been edited since
+        context = seed.get("context") if seed.get("response") == response else None
+        return cls(
+            llm=client.clone(),
+            response=response,
+            prompt=seed.get("prompt"),
+            system_prompt=seed.get("system_prompt"),
+            context=context,
+        )
+
+    @property
+    def current(self) -> str:
+        """Latest version of the refined text"""
+        return self.turns[-1]["content"]
+
+    def used_tokens(self) -> int:
+        """Tokens the conversation currently occupies in the context window"""
+        if self.context is not None:
+            return len(self.context)
+        stats = self.llm.last_stats
+        if stats.get("prompt_eval_count") and stats.get("eval_count") and self.refinements:
+            return stats["prompt_eval_count"] + stats["eval_count"]
+        text = "".join(turn["content"] for turn in self.turns) + (self.system_prompt or "") + (self.summary or "")
+        return estimate_tokens(text)
+
+    def refine(self, instruction: str) -> str:
+        """
+        Apply a follow-up instruction to the current result
+
+        Args:
+            instruction: What to change (e.g. "make section 3 more advanced")
+
+        Returns:
+            The complete updated text
+        """
+        message = REFINE_PROMPT.format(instruction=instruction.strip())
+        budget = self.used_tokens() + estimate_tokens(message) + self.llm.max_tokens
+        if budget > self.max_context_tokens * COMPACT_THRESHOLD:
+            self._compact()
+
+        logger.info(f"Refining result (turn {self.refinements + 1}) using {self.llm.provider}")
+        if self.llm.provider == "ollama":
+            if self.context:
+                # The conversation so far is already encoded in the context tokens
+                response = self.llm.generate(prompt=message, context=self.context)
+            else:
+                response = self.llm.generate(prompt=self._transcript(message), system_prompt=self.system_prompt)
+            self.context = self.llm.last_context
+        else:
+            response = self.llm.generate(prompt=message, system_prompt=self._system_message(), history=list(self.turns))
+
+        self.turns.append({"role": "user", "content": message})
+        self.turns.append({"role": "assistant", "content": response})
+        self.refinements += 1
+        return response
+
+    def _system_message(self) -> Optional[str]:
+        """System prompt with the running summary of compacted turns"""
+        if not self.summary:
+            return self.system_prompt
+        return f"{self.system_prompt or ''}\n\nSummary of the earlier conversation:\n{self.summary}".strip()
+
+    def _transcript(self, message: str) -> str:
+        """Render the history as a single prompt (Ollama without a context array)"""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        for turn in self.turns:
+            parts.append(f"{turn['role'].upper()}:\n{turn['content']}")
+        parts.append(f"USER:\n{message}")
+        return "\n\n".join(parts)
+
+    def _compact(self):
+        """Fold all turns except the current result into the running summary"""
+        older = self.turns[:-1]
+        # The context array encodes the full history; start over from the summary
+        self.context = None
+        self.llm.last_stats = {}
+        if not older:
+            return
+
+        transcript = "\n\n".join(f"{turn['role'].upper()}:\n{turn['content']}" for turn in older)
+        if self.summary:
+            transcript = f"EARLIER SUMMARY:\n{self.summary}\n\n{transcript}"
+
+        logger.info(f"Summarizing {len(older)} earlier turns to stay within {self.max_context_tokens} tokens")
+        summarizer = self.llm.clone()
+        summarizer.max_tokens = min(self.llm.max_tokens, 300)
+        self.summary = summarizer.generate(prompt=SUMMARY_PROMPT.format(transcript=transcript))
+        self.turns = self.turns[-1:]
@@ -0,0 +1,165 @@
+"""
+Targeted repair of incomplete generations
+
+Instead of regenerating a whole result when a section is missing or the
+model ran out of tokens, the generators ask for just the gap and merge the
+answer into the existing text. The repair request continues the original
+conversation where the backend allows it (Ollama context array, LM Studio
+chat history); otherwise it repeats the original prompt, which is still in
+the server's prompt cache thanks to the static-first template layout, so
+only the previous answer and the short repair instruction are evaluated.
+"""
+import math
+from typing import Optional
+from utils.llm_interface import llm, LocalLLM
+from utils.output_parsers import section_spans, split_sections, list_items
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+MISSING_SECTIONS_PROMPT = """Your previous answer is incomplete. Write ONLY the following section(s), using the same
+numbered headers and formatting as before, and nothing else:
+{sections}"""
+
+TRUNCATED_SECTION_NOTE = "The {name} section was cut off before it was finished; write it again in full."
+
+MISSING_POSTS_PROMPT = """Your previous calendar is missing posts for some dates. Write ONLY the posts for these dates,
+one post per date, in the same post format as before, and nothing else:
+{dates}"""
+
+# Minimum token budget of a repair request
+MIN_REPAIR_TOKENS = 256
+
+
+def find_section_gaps(text: str, names: list[str], required: Optional[list[str]] = None,
+                      truncated: bool = False) -> list[str]:
+    """
+    Find the sections of a result that need repairing
+
+    Args:
+        text: Generated markdown text
+        names: Section names in prompt order
+        required: Sections that must be present (defaults to all of `names`)
+        truncated: Whether the generation hit the token limit, in which case
+            the last section present is treated as cut off
+
+    Returns:
+        Names of missing, empty or truncated sections, in prompt order
+    """
+    sections = split_sections(text, names)
+    required = names if required is None else required
+    gaps = {name for name in required if not list_items(sections.get(name, []))}
+    if truncated:
+        present = [name for name, _, _ in section_spans(text, names)]
+        if present:
+            gaps.add(present[-1])
+    return [name for name in names if name in gaps]
+
+
+def merge_sections(text: str, repair_text: str, names: list[str], replace: list[str]) -> str:
+    """
+    Merge repaired sections into a result, keeping prompt order
+
+    Args:
+        text: Current result text
+        repair_text: Model answer to the repair request
+        names: Section names in prompt order
+        replace: Sections the repair was asked for; these replace any
+            existing (truncated) version
+
+    Returns:
+        The merged text
+    """
+    repaired = {}
+    for name, start, end in section_spans(repair_text, names):
+        if name in replace:
+            repaired[name] = repaired.get(name, "") + repair_text[start:end]
+    if not repaired and len(replace) == 1 and repair_text.strip():
+        # The model wrote the section body without repeating its header
+        name = replace[0]
+        repaired[name] = f"{names.index(name) + 1}. {name}:\n{repair_text.strip()}\n"
+
+    spans = section_spans(text, names)
+    original = {}
+    for name, start, end in spans:
+        original[name] = original.get(name, "") + text[start:end]
+
+    parts = [text[:spans[0][1]] if spans else text.rstrip() + "\n\n"]
+    for name in names:
+        section = repaired.get(name) or original.get(name)
+        if section:
+            parts.append(section.rstrip() + "\n\n")
+    return "".join(parts).rstrip() + "\n"
+
+
+def repair_budget(max_tokens: int, share: float) -> int:
+    """Token budget for a repair covering `share` (0-1) of the full result"""
+    return min(max_tokens, max(MIN_REPAIR_TOKENS, math.ceil(max_tokens * share)))
+
+
+def request_repair(seed: Optional[dict], text: str, instruction: str, max_tokens: Optional[int] = None,
+                   stop: Optional[list[str]] = None, llm_instance: Optional[LocalLLM] = None) -> str:
+    """
+    Send a repair instruction as a follow-up to the original generation
+
+    Args:
+        seed: Session seed the generator attached to the result (llm, prompt,
+            system_prompt, context, response); may be None
+        text: Current text of the result
+        instruction: What to write (see the *_PROMPT constants)
+        max_tokens: Token budget for the repair
+        stop: Optional stop sequences
+        llm_instance: Client to use when the seed has none
+
+    Returns:
+        The model's answer to the repair instruction
+    """
+    seed = seed or {}
+    client = (seed.get("llm") or llm_instance or llm.current()).clone()
+    if max_tokens is not None:
+        client.max_tokens = max_tokens
+    system_prompt = seed.get("system_prompt")
+    prompt = seed.get("prompt")
+    unchanged = seed.get("response") == text
+
+    if client.provider == "ollama" and seed.get("context") and unchanged:
+        logger.info("Repairing with the original Ollama context")
+        return client.generate(prompt=instruction, context=seed["context"], stop=stop)
+    if client.provider == "lm_studio" and prompt:
+        logger.info("Repairing with the original chat history")
+        history = [{"role": "user", "content": prompt}, {"role": "assistant", "content": text}]
+        return client.generate(prompt=instruction, system_prompt=system_prompt, history=history, stop=stop)
+
+    logger.info("Repairing with the original prompt and previous answer")
+    parts = [prompt] if prompt else []
+    parts.append(f"PREVIOUS ANSWER:\n{text}")
+    parts.append(instruction)
+    return client.generate(prompt="\n\n".join(parts), system_prompt=system_prompt, stop=stop)
+
+
+def repair_sections(seed: Optional[dict], text: str, names: list[str], gaps: list[str], max_tokens: int,
+                    stop: Optional[list[str]] = None, llm_instance: Optional[LocalLLM] = None) -> str:
+    """
+    Regenerate only the given sections of a result and merge them in
+
+    Args:
+        seed: Session seed attached to the result (may be None)
+        text: Current result text
+        names: Section names in prompt order
+        gaps: Sections to regenerate (see find_section_gaps)
+        max_tokens: Token budget of the full generation
+        stop: Optional stop sequences
+        llm_instance: Client to use when the seed has none
+
+    Returns:
+        The result text with the repaired sections merged in
+    """
+    present = {name for name, _, _ in section_spans(text, names)}
+    instruction = MISSING_SECTIONS_PROMPT.format(sections="\n".join(f"- {name}" for name in gaps))
+    for name in gaps:
+        if name in present:
+            instruction += "\n" + TRUNCATED_SECTION_NOTE.format(name=name)
+    budget = repair_budget(max_tokens, len(gaps) / len(names))
+    repair_text = request_repair(seed, text, instruction, budget, stop, llm_instance)
+    return merge_sections(text, repair_text, names, gaps)
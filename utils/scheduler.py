@@ -0,0 +1,141 @@
+"""
+Posting schedules for social media calendars
+
+A PostingSchedule turns a posting frequency into real weekday patterns
+("3x week" is Monday/Wednesday/Friday, "2x week" Tuesday/Thursday), skips
+blackout dates, and assigns each platform a posting time in the schedule's
+time zone. Schedules are iterated lazily, one day at a time, so a year of
+posts for several platforms never has to be held in memory.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, Optional, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from pydantic import BaseModel
+
+POST_DATE_FORMAT = "%B %d, %Y (%A)"
+
+# Posting weekdays per frequency (Monday is 0)
+FREQUENCY_WEEKDAYS = {
+    "daily": (0, 1, 2, 3, 4, 5, 6),
+    "3x week": (0, 2, 4),
+    "2x week": (1, 3),
+    "weekly": (1,),
+}
+
+TIMEFRAME_DAYS = {
+    "week": 7,
+    "month": 30,
+    "quarter": 90,
+    "year": 365,
+}
+
+# Local posting times per platform; consecutive posts rotate through the slots
+PLATFORM_TIME_SLOTS = {
+    "linkedin": ["08:00", "12:00"],
+    "twitter": ["09:00", "15:00"],
+    "instagram": ["11:00", "19:00"],
+    "facebook": ["13:00"],
+    "tiktok": ["18:00", "21:00"],
+}
+
+DEFAULT_TIME_SLOTS = ["10:00"]
+
+
+class ScheduleSlot(BaseModel):
+    """One scheduled post on one platform"""
+    platform: str
+    start: datetime
+    index: int
+
+    @property
+    def label(self) -> str:
+        """Date in the format used in calendar prompts"""
+        return self.start.strftime(POST_DATE_FORMAT)
+
+
+def parse_blackout_dates(values: Optional[Iterable[Union[str, date]]]) -> set[date]:
+    """
+    Normalize blackout dates given as date objects or ISO strings (YYYY-MM-DD)
+
+    Raises:
+        ValueError: If a string is not an ISO date
+    """
+    dates = set()
+    for value in values or []:
+        if isinstance(value, datetime):
+            dates.add(value.date())
+        elif isinstance(value, date):
+            dates.add(value)
+        elif str(value).strip():
+            dates.add(date.fromisoformat(str(value).strip()))
+    return dates
+
+
+class PostingSchedule:
+    """Lazily generated posting schedule for one or more platforms"""
+
+    def __init__(
+        self,
+        frequency: str,
+        timeframe: str = "month",
+        start_date: Optional[Union[date, datetime]] = None,
+        timezone: Optional[str] = None,
+        platforms: Optional[list[str]] = None,
+        blackout_dates: Optional[Iterable[Union[str, date]]] = None,
+        time_slots: Optional[dict[str, list[str]]] = None
+    ):
+        """
+        Args:
+            frequency: Posting frequency (daily, 3x week, 2x week, weekly)
+            timeframe: Period covered (week, month, quarter, year)
+            start_date: First day of the schedule (defaults to today in `timezone`)
+            timezone: IANA time zone name such as "Europe/Berlin" (defaults to UTC)
+            platforms: Platforms to schedule (defaults to a single unnamed platform)
+            blackout_dates: Days without posts
+            time_slots: Per-platform posting times ("HH:MM") overriding PLATFORM_TIME_SLOTS
+
+        Raises:
+            ValueError: If the frequency, timeframe or time zone is unknown
+        """
+        if frequency.lower() not in FREQUENCY_WEEKDAYS:
+            raise ValueError(f"Frequency must be one of: {', '.join(FREQUENCY_WEEKDAYS)}")
+        if timeframe.lower() not in TIMEFRAME_DAYS:
+            raise ValueError(f"Timeframe must be one of: {', '.join(TIMEFRAME_DAYS)}")
+        try:
+            self.tz = ZoneInfo(timezone or "UTC")
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone: {timezone}")
+
+        if start_date is None:
+            start_date = datetime.now(self.tz).date()
+        elif isinstance(start_date, datetime):
+            start_date = start_date.date()
+        self.start_date = start_date
+        self.end_date = start_date + timedelta(days=TIMEFRAME_DAYS[timeframe.lower()])
+        self.weekdays = FREQUENCY_WEEKDAYS[frequency.lower()]
+        self.platforms = platforms or [""]
+        self.blackout_dates = parse_blackout_dates(blackout_dates)
+        self.time_slots = {**PLATFORM_TIME_SLOTS, **{k.lower(): v for k, v in (time_slots or {}).items()}}
+
+    def dates(self) -> Iterator[date]:
+        """Yield posting days in order (start and end date inclusive)"""
+        day = self.start_date
+        while day <= self.end_date:
+            if day.weekday() in self.weekdays and day not in self.blackout_dates:
+                yield day
+            day += timedelta(days=1)
+
+    def __iter__(self) -> Iterator[ScheduleSlot]:
+        """Yield one slot per platform per posting day, in time order within each day"""
+        for index, day in enumerate(self.dates()):
+            slots = []
+            for platform in self.platforms:
+                times = self.time_slots.get(platform.lower(), DEFAULT_TIME_SLOTS)
+                hour, minute = (int(part) for part in times[index % len(times)].split(":"))
+                start = datetime.combine(day, time(hour, minute), tzinfo=self.tz)
+                slots.append(ScheduleSlot(platform=platform, start=start, index=index))
+            yield from sorted(slots, key=lambda slot: slot.start)
+
+    def count(self) -> int:
+        """Number of posting days, without materializing the schedule"""
+        return sum(1 for _ in self.dates())
@@ -0,0 +1,237 @@
+"""
+Session payloads kept out of memory
+
+Streamlit keeps each browser session's state in the app process for as long
+as the session lives, so with many sessions open all day their results and
+drafts add up. Instead, session state only holds a small SessionHandle: the
+payload is pickled, compressed and written to this process's folder under
+SESSION_SPILL_DIR, and loaded back when it is used. Loaded payloads are kept
+in one LRU cache for the whole process, limited to SESSION_MEMORY_BUDGET_MB,
+so memory stays bounded however many sessions are open.
+
+Stored values are treated as immutable: store a changed value again instead
+of modifying the one you got back.
+"""
+import itertools
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+from config import settings
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+MB = 1024 * 1024
+
+
+class SessionHandle:
+    """What session state holds instead of a stored value"""
+
+    __slots__ = ("session", "name", "version", "size")
+
+    def __init__(self, session: str, name: str, version: int, size: int):
+        self.session = session
+        self.name = name
+        self.version = version
+        # Uncompressed (pickled) size of the value, in bytes
+        self.size = size
+
+    def __repr__(self) -> str:
+        return f"SessionHandle({self.session[:8]}/{self.name} v{self.version}, {self.size} bytes)"
+
+
+class SessionStore:
+    """Values of many sessions on disk, with the recently used ones cached in memory"""
+
+    def __init__(self, directory: Optional[str] = None, budget: Optional[int] = None,
+                 idle: Optional[float] = None):
+        """
+        Args:
+            directory: Folder holding one subfolder per app process (defaults to SESSION_SPILL_DIR)
+            budget: Bytes of values kept in memory (defaults to SESSION_MEMORY_BUDGET_MB)
+            idle: Seconds after which an unused session's values are deleted (defaults to SESSION_IDLE_HOURS)
+        """
+        self.root = Path(directory or settings.SESSION_SPILL_DIR)
+        self._budget = budget
+        self._idle = idle
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_folders()
+        self.directory = Path(tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=self.root))
+        # Nothing in the folder outlives the process that wrote it
+        weakref.finalize(self, shutil.rmtree, str(self.directory), True)
+        self._lock = threading.Lock()
+        self._versions = itertools.count(1)
+        # (session, name) -> (version, value, size), least recently used first
+        self._loaded: OrderedDict[tuple[str, str], tuple[int, Any, int]] = OrderedDict()
+        self._loaded_bytes = 0
+        # (session, name) -> (version, size, bytes on disk) of every stored value
+        self._stored: dict[tuple[str, str], tuple[int, int, int]] = {}
+        self._last_used: dict[str, float] = {}
+        self._last_expiry = time.monotonic()
+
+    @property
+    def budget(self) -> int:
+        """Bytes of values kept in memory"""
+        return self._budget if self._budget is not None else int(settings.SESSION_MEMORY_BUDGET_MB * MB)
+
+    @property
+    def idle(self) -> float:
+        """Seconds after which an unused session's values are deleted"""
+        return self._idle if self._idle is not None else settings.SESSION_IDLE_HOURS * 3600
+
+    def put(self, session: str, name: str, value: Any) -> SessionHandle:
+        """
+        Store a value, replacing the session's previous value of that name
+
+        Args:
+            session: Session the value belongs to
+            name: Name of the value within the session (e.g. "last_result")
+            value: Any picklable value
+
+        Returns:
+            Handle to keep in session state
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        blob = zlib.compress(data, 1)
+        key = (session, name)
+        version = next(self._versions)
+        path = self._path(key)
+        # Write beside the current file and swap it in, so a concurrent load never sees half a file
+        temporary = path.with_name(f"{path.name}.{version}.tmp")
+        temporary.write_bytes(blob)
+        with self._lock:
+            os.replace(temporary, path)
+            self._stored[key] = (version, len(data), len(blob))
+            self._keep(key, version, value, len(data))
+            self._last_used[session] = time.time()
+        self._expire_idle_sessions()
+        return SessionHandle(session, name, version, len(data))
+
+    def get(self, handle: SessionHandle) -> Any:
+        """
+        The value behind a handle, loaded from disk if it is not in memory
+
+        Returns:
+            The value, or None if it was replaced since, or deleted with its idle session
+        """
+        key = (handle.session, handle.name)
+        with self._lock:
+            self._last_used[handle.session] = time.time()
+            loaded = self._loaded.get(key)
+            if loaded is not None and loaded[0] == handle.version:
+                self._loaded.move_to_end(key)
+                return loaded[1]
+            stored = self._stored.get(key)
+            if stored is None or stored[0] != handle.version:
+                return None
+        try:
+            value = pickle.loads(zlib.decompress(self._path(key).read_bytes()))
+        except FileNotFoundError:
+            # Replaced or deleted while we were reading
+            return None
+        with self._lock:
+            if self._stored.get(key, (None,))[0] == handle.version:
+                self._keep(key, handle.version, value, handle.size)
+        return value
+
+    def drop(self, session: str, name: Optional[str] = None) -> None:
+        """Delete one value of a session, or all of them"""
+        with self._lock:
+            keys = [key for key in self._stored if key[0] == session and name in (None, key[1])]
+            for key in keys:
+                self._forget(key)
+            if name is None:
+                self._last_used.pop(session, None)
+
+    def usage(self, session: Optional[str] = None) -> dict:
+        """
+        Memory and disk used by one session's values (or by every session)
+
+        Returns:
+            Dictionary with values, in_memory and on_disk bytes (sizes of the
+            pickled values), plus sessions and budget for the whole store
+        """
+        with self._lock:
+            stored = {key: entry for key, entry in self._stored.items() if session in (None, key[0])}
+            in_memory = sum(size for key, (_, _, size) in self._loaded.items() if session in (None, key[0]))
+            view = {
+                "values": len(stored),
+                "in_memory": in_memory,
+                "on_disk": sum(disk for _, _, disk in stored.values()),
+            }
+            if session is None:
+                view["sessions"] = len({key[0] for key in stored})
+                view["budget"] = self.budget
+        return view
+
+    def _path(self, key: tuple[str, str]) -> Path:
+        return self.directory / re.sub(r"[^\w.-]", "_", f"{key[0]}--{key[1]}.pickle.z")
+
+    def _keep(self, key: tuple[str, str], version: int, value: Any, size: int) -> None:
+        """Cache a loaded value and evict the least recently used ones over the budget (lock held)"""
+        previous = self._loaded.pop(key, None)
+        if previous is not None:
+            self._loaded_bytes -= previous[2]
+        if size > self.budget:
+            return
+        self._loaded[key] = (version, value, size)
+        self._loaded_bytes += size
+        while self._loaded_bytes > self.budget:
+            _, (_, _, evicted) = self._loaded.popitem(last=False)
+            self._loaded_bytes -= evicted
+
+    def _forget(self, key: tuple[str, str]) -> None:
+        """Remove a value from memory and disk (lock held)"""
+        loaded = self._loaded.pop(key, None)
+        if loaded is not None:
+            self._loaded_bytes -= loaded[2]
+        if self._stored.pop(key, None) is not None:
+            self._path(key).unlink(missing_ok=True)
+
+    def _expire_idle_sessions(self) -> None:
+        """Delete the values of sessions unused for longer than idle (checked once a minute)"""
+        if time.monotonic() - self._last_expiry < 60:
+            return
+        self._last_expiry = time.monotonic()
+        cutoff = time.time() - self.idle
+        with self._lock:
+            idle = {session for session, used in self._last_used.items() if used < cutoff}
+            for key in [key for key in self._stored if key[0] in idle]:
+                self._forget(key)
+            for session in idle:
+                del self._last_used[session]
+        if idle:
+            logger.info(f"Deleted the stored values of {len(idle)} idle session(s)")
+
+    def _remove_stale_folders(self) -> None:
+        """Delete folders left behind by app processes that did not exit cleanly"""
+        cutoff = time.time() - self.idle
+        for folder in self.root.iterdir():
+            try:
+                if folder.is_dir() and folder.stat().st_mtime < cutoff:
+                    shutil.rmtree(folder, ignore_errors=True)
+            except OSError:
+                continue
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """This process's store under SESSION_SPILL_DIR"""
+    global _store
+    with _store_lock:
+        if _store is None or _store.root != Path(settings.SESSION_SPILL_DIR):
+            _store = SessionStore()
+        return _store
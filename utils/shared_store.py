@@ -0,0 +1,146 @@
+"""
+Storage shared across processes
+
+Several Streamlit replicas, the API server and the workers on one host each
+have their own memory, so anything cached in-process is fetched again, cold,
+by every one of them. This store keeps such values in one SQLite file in WAL
+mode (readers never wait for writers) so a model list fetched, a health check
+run or a response generated by one process is reused by all of them:
+
+- cache entries: JSON values under (namespace, key), each with an expiry
+- counters: named metrics incremented atomically by every process
+
+Each thread keeps its own connection; every write is a single transaction.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+from config import settings
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SharedStore:
+    """Cache entries and counters in a SQLite file shared by every process on the host"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: SQLite file (defaults to SHARED_STORE_PATH)
+        """
+        self.path = path or settings.SHARED_STORE_PATH
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            # WAL only needs a sync at checkpoints; losing the last writes on power loss is fine for a cache
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, namespace: str, key: str) -> Any:
+        """A cached value (None if missing or expired)"""
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time())).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        """Cache a JSON-serializable value for `ttl` seconds"""
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, ensure_ascii=False), time.time() + ttl))
+
+    def cached(self, namespace: str, key: str, ttl: float, compute: Callable[[], Any], refresh: bool = False) -> Any:
+        """
+        A cached value, computed and stored if missing, expired or `refresh` is set
+
+        Concurrent misses in different processes may each compute the value;
+        the last one stored wins.
+        """
+        if not refresh:
+            value = self.get(namespace, key)
+            if value is not None:
+                return value
+        value = compute()
+        self.set(namespace, key, value, ttl)
+        return value
+
+    def delete(self, namespace: str, key: Optional[str] = None) -> None:
+        """Drop one cached value, or a whole namespace"""
+        if key is None:
+            self._connection().execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+        else:
+            self._connection().execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def purge(self) -> int:
+        """Drop expired entries; returns how many were dropped"""
+        return self._connection().execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def increment(self, counters: dict[str, float]) -> None:
+        """Add to several counters in one transaction"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                [(name, amount) for name, amount in counters.items() if amount])
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def counters(self) -> dict[str, float]:
+        """Every counter by name"""
+        return dict(self._connection().execute("SELECT name, value FROM counters ORDER BY name").fetchall())
+
+    def reset_counters(self) -> None:
+        """Set every counter back to zero"""
+        self._connection().execute("DELETE FROM counters")
+
+
+_store: Optional[SharedStore] = None
+_store_lock = threading.Lock()
+
+
+def get_shared_store() -> SharedStore:
+    """The store at SHARED_STORE_PATH"""
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != settings.SHARED_STORE_PATH:
+            _store = SharedStore()
+        return _store
+
+
+def record_metrics(**counters: float) -> None:
+    """Add to shared counters; never fails the caller (a busy store only loses these increments)"""
+    try:
+        get_shared_store().increment(counters)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Could not record metrics: {str(e)}")
@@ -0,0 +1,172 @@
+"""
+Lightweight text similarity for spotting near-duplicate generated content
+and picking the parts of a knowledge base relevant to a request
+"""
+import hashlib
+import re
+from collections import defaultdict
+from typing import Hashable
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that carry no topic information in short post ideas
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "our", "the", "this", "to", "we", "what", "why", "with", "you", "your",
+}
+
+
+def word_set(text: str) -> set[str]:
+    """Lowercased content words of a text"""
+    return {word for word in _WORD.findall(text.lower()) if word not in STOPWORDS}
+
+
+def jaccard(a: set, b: set) -> float:
+    """Jaccard similarity of two sets (0.0 when both are empty)"""
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def find_near_duplicates(texts: list[str], threshold: float = 0.6) -> list[int]:
+    """
+    Find texts that repeat an earlier text in the list
+
+    Args:
+        texts: Texts in priority order (earlier texts are kept)
+        threshold: Jaccard similarity of content words at or above which two
+            texts count as duplicates
+
+    Returns:
+        Indices of the later copy of each near-duplicate pair
+    """
+    kept: list[set[str]] = []
+    duplicates = []
+    for index, text in enumerate(texts):
+        words = word_set(text)
+        if any(jaccard(words, other) >= threshold for other in kept):
+            duplicates.append(index)
+        else:
+            kept.append(words)
+    return duplicates
+
+
+def split_into_chunks(text: str, max_chars: int = 800) -> list[str]:
+    """
+    Split a knowledge base into paragraph-aligned chunks of at most `max_chars`
+
+    Paragraphs longer than the limit are hard-wrapped.
+    """
+    chunks: list[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        pieces = [paragraph]
+        if len(paragraph) > max_chars:
+            pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)]
+        for piece in pieces:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def top_chunks(query: str, chunks: list[str], k: int = 3) -> list[str]:
+    """
+    Pick the chunks that share the most content words with the query
+
+    Args:
+        query: Text describing what is needed (e.g. a section title and its key points)
+        chunks: Candidate chunks (see split_into_chunks)
+        k: Maximum number of chunks to return
+
+    Returns:
+        Up to k chunks with at least one word in common, in their original order
+    """
+    words = word_set(query)
+    scored = []
+    for index, chunk in enumerate(chunks):
+        overlap = len(words & word_set(chunk))
+        if overlap:
+            scored.append((overlap, index))
+    best = sorted(scored, key=lambda item: (-item[0], item[1]))[:k]
+    return [chunks[index] for _, index in sorted(best, key=lambda item: item[1])]
+
+
+# Fixed (a, b) pairs for the MinHash permutations h -> (a * h + b) mod p, so
+# signatures are stable between runs
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "little") % _MERSENNE_PRIME or 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "little") % _MERSENNE_PRIME)
+    for i in range(128)
+]
+
+
+class NearDuplicateIndex:
+    """
+    MinHash index of short texts (headlines, section titles, post ideas)
+
+    Each text is reduced to a MinHash signature of its content words and the
+    signature is split into bands; texts sharing any band are candidates, and
+    candidates are confirmed with the exact Jaccard similarity. Lookups only
+    compare against the few texts that share a band instead of every text
+    added so far.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 32, bands: int = 16):
+        """
+        Args:
+            threshold: Jaccard similarity of content words at or above which two
+                texts count as duplicates
+            num_perm: Number of hash functions in a signature (at most 128)
+            bands: Number of bands the signature is split into (must divide num_perm)
+
+        Raises:
+            ValueError: If bands does not divide num_perm
+        """
+        if num_perm % bands or num_perm > len(_PERMUTATIONS):
+            raise ValueError(f"bands must divide num_perm, and num_perm can be at most {len(_PERMUTATIONS)}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.rows = num_perm // bands
+        self._words: dict[Hashable, set[str]] = {}
+        self._buckets: dict[tuple, list[Hashable]] = defaultdict(list)
+
+    def _signature(self, words: set[str]) -> list[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+                  for word in words]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS[:self.num_perm]]
+
+    def _bands(self, words: set[str]) -> list[tuple]:
+        signature = self._signature(words)
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                for band in range(self.num_perm // self.rows)]
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Index a text under `key` (texts without content words are ignored)"""
+        words = word_set(text)
+        if not words:
+            return
+        self._words[key] = words
+        for band in self._bands(words):
+            self._buckets[band].append(key)
+
+    def query(self, text: str) -> list[tuple[Hashable, float]]:
+        """
+        Find indexed texts similar to `text`
+
+        Returns:
+            (key, similarity) pairs at or above the threshold, most similar first
+        """
+        words = word_set(text)
+        if not words:
+            return []
+        candidates = {key for band in self._bands(words) for key in self._buckets.get(band, [])}
+        matches = [(key, jaccard(words, self._words[key])) for key in candidates]
+        return sorted([match for match in matches if match[1] >= self.threshold], key=lambda match: -match[1])
+
+    def __len__(self) -> int:
+        return len(self._words)
@@ -0,0 +1,176 @@
+"""
+Diverse multi-variant generation
+
+Generates several alternatives of one request concurrently. Each request gets
+its own angle hint, sampling seed and a slightly different temperature, so
+the variants differ in substance rather than wording. Variants that are
+near-duplicates of one already kept are discarded and replaced, and the
+remaining set is ranked: complete results first, then the most distinctive.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+from config import settings
+from utils.similarity import NearDuplicateIndex, jaccard, word_set
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+MAX_VARIANTS = 5
+
+# Temperature offsets cycled across variants (clamped to 0.0-2.0)
+TEMPERATURE_OFFSETS = [0.0, 0.15, -0.1, 0.3, 0.05, 0.2]
+
+# Jaccard similarity of content words at which two variants count as the same
+VARIANT_DUPLICATE_THRESHOLD = 0.7
+
+BLOG_ANGLES = [
+    "a hands-on, step-by-step angle",
+    "a problem-first angle built around common mistakes",
+    "a comparison angle that weighs alternatives and trade-offs",
+    "a big-picture angle about the concepts and why they matter",
+    "a case-study angle built around one realistic example project",
+    "a myth-busting angle that corrects popular misconceptions",
+]
+
+SOCIAL_ANGLES = [
+    "an educational focus with practical tips",
+    "a storytelling and behind-the-scenes focus",
+    "a community focus that starts conversations",
+    "a data and insights focus",
+    "a playful, trend-driven focus",
+    "a myth-busting focus",
+]
+
+WRITING_ANGLES = [
+    "an unexpected point of view",
+    "a reversal of a familiar trope",
+    "a small, intimate scale",
+    "a high-stakes, large-scale conflict",
+    "an unusual structure or framing device",
+    "a setting rarely used in the genre",
+]
+
+
+def variant_options(count: int, temperature: float, angles: list[str], start: int = 0) -> list[dict]:
+    """
+    Request options for variants `start` to `start + count - 1`
+
+    Returns:
+        Dicts with index, angle, temperature and seed
+    """
+    base_seed = random.randrange(1 << 30)
+    options = []
+    for index in range(start, start + count):
+        offset = TEMPERATURE_OFFSETS[index % len(TEMPERATURE_OFFSETS)]
+        options.append({
+            "index": index,
+            "angle": angles[index % len(angles)] if angles else None,
+            "temperature": round(min(2.0, max(0.0, temperature + offset)), 2),
+            "seed": base_seed + index,
+        })
+    return options
+
+
+def generate_variants(
+    generate: Callable[[dict], T],
+    text_of: Callable[[T], str],
+    count: int,
+    temperature: Optional[float] = None,
+    angles: Optional[list[str]] = None,
+    gaps: Optional[Callable[[T], list]] = None,
+    max_rounds: int = 2,
+    threshold: float = VARIANT_DUPLICATE_THRESHOLD
+) -> tuple[list[T], dict]:
+    """
+    Generate `count` distinct variants concurrently and rank them
+
+    Args:
+        generate: Produces one result from variant options (index, angle,
+            temperature, seed); called on worker threads
+        text_of: Text of a result used for the similarity check
+        count: Number of variants wanted (1 to MAX_VARIANTS)
+        temperature: Base temperature (defaults to TEMPERATURE)
+        angles: Angle hints handed out to the variants in turn
+        gaps: Optional function listing what a result is missing; complete results rank first
+        max_rounds: Generation rounds, including top-ups for discarded duplicates
+        threshold: Similarity at which a variant duplicates one already kept
+
+    Returns:
+        Tuple of (variants, best first; summary metadata)
+
+    Raises:
+        ValueError: If count is out of range
+        Exception: If no variant could be generated
+    """
+    if not 1 <= count <= MAX_VARIANTS:
+        raise ValueError(f"Variants must be between 1 and {MAX_VARIANTS}")
+    temperature = settings.TEMPERATURE if temperature is None else temperature
+    workers = max(1, min(settings.LLM_MAX_PARALLEL, count))
+
+    kept: list[tuple[dict, T]] = []
+    index = NearDuplicateIndex(threshold=threshold)
+    discarded = failed = 0
+    next_option = 0
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for round_number in range(max_rounds):
+            missing = count - len(kept)
+            if missing <= 0:
+                break
+            options = variant_options(missing, temperature, angles or [], start=next_option)
+            next_option += missing
+            logger.info(f"Generating {missing} variant(s), round {round_number + 1}")
+            # Results are checked in submission order so earlier variants win ties
+            futures = [(option, pool.submit(generate, option)) for option in options]
+            for option, future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    errors.append(str(e))
+                    logger.warning(f"Variant {option['index'] + 1} failed: {str(e)}")
+                    continue
+                text = text_of(result)
+                if index.query(text):
+                    discarded += 1
+                    continue
+                index.add(len(kept), text)
+                kept.append((option, result))
+
+    if not kept:
+        raise Exception(errors[0] if errors else "No variant could be generated")
+
+    # Rank: fewest gaps first, then the variant least similar to the others
+    words = [word_set(text_of(result)) for _, result in kept]
+
+    def distinctiveness(position: int) -> float:
+        others = [jaccard(words[position], words[other]) for other in range(len(kept)) if other != position]
+        return 1.0 - (sum(others) / len(others) if others else 0.0)
+
+    order = sorted(range(len(kept)), key=lambda position: (
+        len(gaps(kept[position][1])) if gaps else 0, -distinctiveness(position), position))
+    ranked = []
+    for rank, position in enumerate(order, 1):
+        option, result = kept[position]
+        metadata = getattr(result, "metadata", None)
+        if isinstance(metadata, dict):
+            metadata.update({
+                "variant_rank": rank,
+                "variant_angle": option["angle"],
+                "variant_temperature": option["temperature"],
+                "variant_seed": option["seed"],
+                "variant_distinctiveness": round(distinctiveness(position), 3),
+            })
+        ranked.append(result)
+
+    summary = {
+        "variants_requested": count,
+        "variants_returned": len(ranked),
+        "variants_discarded_as_duplicates": discarded,
+        "variants_failed": failed,
+    }
+    return ranked, summary
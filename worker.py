@@ -0,0 +1,177 @@
+"""
+Worker process for the durable job queue
+
+Claims jobs from the queue at JOB_QUEUE_PATH (see utils/job_queue.py), runs
+them against the configured backend and writes the results back. Start as
+many workers as the backend can keep busy, on this host or on any host that
+shares the queue file; each one runs WORKER_CONCURRENCY jobs at once and
+keeps its own HTTP client, so parsing and rendering are spread over
+processes instead of sharing one interpreter.
+
+A running job's lease is renewed every third of JOB_LEASE_SECONDS together
+with its streamed text, so the app shows progress. If a worker is killed its
+jobs are retried by another worker once their lease lapses; Ctrl+C hands
+running jobs back immediately.
+
+Usage:
+    python worker.py [--concurrency 2] [--type blog --type social] [--drain]
+
+Requires a running Ollama (or LM Studio) server.
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+from typing import Optional
+from config import settings
+from generators.registry import GENERATORS, dump_result, run_generator
+from utils.job_queue import JobQueue
+from utils.logger import setup_logger
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Set up logger
+logger = setup_logger(__name__)
+
+
+class Worker:
+    """Claims and runs queued jobs on a few threads until stopped"""
+
+    def __init__(self, queue: Optional[JobQueue] = None, concurrency: Optional[int] = None,
+                 kinds: Optional[list[str]] = None, poll: float = 1.0):
+        """
+        Args:
+            queue: Queue to serve (defaults to the one at JOB_QUEUE_PATH)
+            concurrency: Jobs at once (defaults to WORKER_CONCURRENCY)
+            kinds: Only run these generators (default: all)
+            poll: Seconds to wait before looking again when the queue is empty
+        """
+        self.queue = queue or JobQueue()
+        self.concurrency = max(1, concurrency or settings.WORKER_CONCURRENCY)
+        self.kinds = kinds
+        self.poll = poll
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.summary = {"completed": 0, "failed": 0, "retried": 0}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Jobs running now: job id -> (worker id, streamed chunks)
+        self._running: dict[str, tuple[str, list[str]]] = {}
+
+    def stop(self) -> None:
+        """Stop claiming jobs; running jobs finish first"""
+        self._stop.set()
+
+    def run(self, drain: bool = False) -> dict:
+        """
+        Serve the queue until stopped
+
+        Args:
+            drain: Return once no job is runnable instead of waiting for more
+
+        Returns:
+            Summary with completed, failed and retried counts
+        """
+        threads = [threading.Thread(target=self._loop, args=(f"{self.name}:{index}", drain),
+                                    name=f"worker-{index}", daemon=True)
+                   for index in range(self.concurrency)]
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="worker-heartbeat", daemon=True)
+        for thread in threads:
+            thread.start()
+        heartbeat.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            # Hand running jobs back now rather than waiting for their leases to lapse
+            with self._lock:
+                running = dict(self._running)
+            for job_id, (worker_id, _) in running.items():
+                self.queue.release(job_id, worker_id)
+            raise
+        finally:
+            self._stop.set()
+        return self.summary
+
+    def _loop(self, worker_id: str, drain: bool) -> None:
+        while not self._stop.is_set():
+            job = self.queue.claim(worker_id, self.kinds)
+            if job is None:
+                if drain:
+                    return
+                self._stop.wait(self.poll)
+                continue
+            self._process(worker_id, job)
+
+    def _process(self, worker_id: str, job: dict) -> None:
+        """Run one claimed job and record its outcome"""
+        chunks: list[str] = []
+        with self._lock:
+            self._running[job["id"]] = (worker_id, chunks)
+        logger.info(f"{worker_id} running {job['kind']} job {job['id'][:8]} (attempt {job['attempt']})")
+        try:
+            result = run_generator(job["kind"], {**job["params"], "stream_callback": chunks.append}, job["owner"])
+        except Exception as e:
+            # Invalid inputs fail the same way every time; anything else may be transient
+            retry = not isinstance(e, (ValueError, TypeError, KeyError))
+            if self.queue.fail(job["id"], worker_id, str(e), retry=retry):
+                self._count("retried")
+                logger.warning(f"{job['kind']} job {job['id'][:8]} failed, will retry: {str(e)}")
+            else:
+                self._count("failed")
+                logger.warning(f"{job['kind']} job {job['id'][:8]} failed: {str(e)}")
+        else:
+            if self.queue.complete(job["id"], worker_id, dump_result(result)):
+                self._count("completed")
+            else:
+                logger.warning(f"Lost the lease on {job['kind']} job {job['id'][:8]}, result discarded")
+        finally:
+            with self._lock:
+                del self._running[job["id"]]
+
+    def _heartbeat_loop(self) -> None:
+        """Renew the leases of running jobs and publish their streamed text"""
+        while not self._stop.wait(max(0.05, self.queue.lease / 3)):
+            with self._lock:
+                running = [(job_id, worker_id, "".join(chunks))
+                           for job_id, (worker_id, chunks) in self._running.items()]
+            for job_id, worker_id, partial in running:
+                try:
+                    self.queue.heartbeat(job_id, worker_id, partial)
+                except Exception as e:
+                    # A busy or briefly unreachable queue file; the next beat tries again
+                    logger.warning(f"Heartbeat for job {job_id[:8]} failed: {str(e)}")
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.summary[outcome] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued generation jobs")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Jobs at once in this process (defaults to WORKER_CONCURRENCY)")
+    parser.add_argument("--type", action="append", choices=list(GENERATORS), dest="kinds",
+                        help="Only run this generator (repeatable; default: all)")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between checks of an empty queue")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue has no runnable job")
+    args = parser.parse_args()
+
+    # Pick up .env and profile changes (models, endpoints, generation parameters) without a restart
+    settings.watch()
+    worker = Worker(concurrency=args.concurrency, kinds=args.kinds, poll=args.poll)
+    print(f"👷 Worker {worker.name} serving {worker.queue.path} ({worker.concurrency} job(s) at once)")
+    try:
+        summary = worker.run(drain=args.drain)
+    except KeyboardInterrupt:
+        print("\n⏹️ Stopped; running jobs were handed back to the queue")
+        sys.exit(130)
+    print(f"✅ {summary['completed']} completed, {summary['failed']} failed, {summary['retried']} retried")
+
+
+if __name__ == "__main__":
+    main()